@@ -0,0 +1,98 @@
+"""
+Benchmark of the keyword matcher of bas2prg.tokenize_line.
+
+Tokenizes long 80-column lines and a large synthetic program (see
+c64basic_compiler.synthetic) with tokenize_line and with the matcher it
+replaced, which tried every keyword on the uppercased rest of the line at
+each character, checks that both give the same bytes and reports the
+speedup:
+
+    PYTHONPATH=src python benchmarks/bench_bas2prg.py [--lines N]
+"""
+
+import argparse
+import random
+import time
+
+from c64basic_compiler.bas2prg import basic_tokens, tokenize_line
+from c64basic_compiler.synthetic import generate_program
+
+# Characters of the long lines: keywords, variables, numbers and quotes
+_WORDS = list(basic_tokens) + ["A", "X1", "B$", "123", "4.5", " ", ",", ";", ":"]
+
+
+def _tokenize_line_per_keyword(line: str) -> bytearray:
+    """The previous tokenize_line: every keyword tried at every character."""
+    result = bytearray()
+    number, content = line.strip().split(" ", 1)
+    result += int(number).to_bytes(2, "little")
+    i = 0
+    in_quotes = False
+    while i < len(content):
+        if content[i] == '"':
+            in_quotes = not in_quotes
+            result.append(ord(content[i]))
+            i += 1
+            continue
+        if not in_quotes:
+            for token, code in basic_tokens.items():
+                if content[i:].upper().startswith(token):
+                    result.append(code)
+                    i += len(token)
+                    break
+            else:
+                result.append(ord(content[i]))
+                i += 1
+        else:
+            result.append(ord(content[i]))
+            i += 1
+    result.append(0x00)
+    return result
+
+
+def _long_lines(count: int, seed: int) -> list[str]:
+    """Lines of 80 columns, line number included."""
+    rand = random.Random(seed)
+    lines = []
+    for index in range(count):
+        text = f"{index + 1} "
+        while len(text) < 80:
+            text += rand.choice(_WORDS) if rand.random() < 0.95 else '"HI"'
+        lines.append(text[:80])
+    return lines
+
+
+def _best(tokenize, lines: list[str], repeat: int) -> tuple[float, list]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [tokenize(line) for line in lines]
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    workloads = {
+        "80-column lines": _long_lines(args.lines, 0),
+        "synthetic program": list(generate_program(args.lines)),
+    }
+    print(f"{args.lines} lines each, best of {args.repeat}")
+    for name, lines in workloads.items():
+        before, expected = _best(_tokenize_line_per_keyword, lines, args.repeat)
+        after, result = _best(tokenize_line, lines, args.repeat)
+        if result != expected:
+            raise SystemExit(f"{name}: tokenize_line output differs")
+        size = sum(len(line) for line in lines) / 1e6
+        print(
+            f"  {name:<20}{before * 1e3:10.1f} ms -> {after * 1e3:8.1f} ms"
+            f"{before / after:8.1f}x{size / after:8.1f} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Scaling benchmark of parallel pseudocode generation.
+
+Builds a large program by repeating the statements of the examples, then
+times generate_code with 1, 2, 4 and 8 worker processes and checks that every
+run produces the same pseudocode as the serial one:
+
+    PYTHONPATH=src python benchmarks/bench_codegen_jobs.py [--copies N]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.pseudocode.codegen import generate_code
+from c64basic_compiler.utils.logging import logger
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples", "*.bas")
+
+
+def _program(copies: int) -> str:
+    """The statements of every example, renumbered and repeated."""
+    statements = []
+    for path in sorted(glob.glob(EXAMPLES)):
+        with open(path) as f:
+            for line in f:
+                parts = line.split(None, 1)
+                if len(parts) == 2 and parts[0].isdigit():
+                    statements.append(parts[1].rstrip("\n"))
+    return "\n".join(
+        f"{(i + 1) * 10} {text}" for i, text in enumerate(statements * copies)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    # Error messages of the examples would dominate the measurements
+    logger.remove()
+
+    ast = parse(scan(_program(args.copies)))
+    print(f"{len(ast)} statements, best of {args.repeat}")
+
+    serial = None
+    baseline = None
+    for jobs in args.jobs:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            code = generate_code(ast, CompileContext(), jobs=jobs)
+            best = min(best, time.perf_counter() - start)
+        if serial is None:
+            serial, baseline = code, best
+        elif code != serial:
+            raise SystemExit(f"--jobs {jobs}: output differs from serial build")
+        print(f"  jobs={jobs:<3}{best * 1e3:10.1f} ms{baseline / best:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
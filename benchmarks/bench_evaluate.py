@@ -0,0 +1,76 @@
+"""
+Microbenchmark of the expression evaluator.
+
+Times every stage of the evaluator over the sample expressions of
+``evaluate.main`` (expressions that fail to compile are skipped):
+
+    PYTHONPATH=src python benchmarks/bench_evaluate.py [--repeat N]
+"""
+
+import argparse
+import timeit
+
+from c64basic_compiler.compiler.lexer import lex_expression
+from c64basic_compiler.evaluate import (
+    EXAMPLE_EXPRESSIONS,
+    EvaluationError,
+    evaluate_expression,
+    generate_pseudocode,
+    rpn_to_pseudocode,
+    shunting_yard,
+    tokenize,
+    tokens_to_rpn,
+)
+from c64basic_compiler.utils.logging import logger
+
+
+def _valid_expressions() -> list[str]:
+    valid = []
+    for expr in EXAMPLE_EXPRESSIONS:
+        try:
+            evaluate_expression(expr)
+        except EvaluationError:
+            continue
+        valid.append(expr)
+    return valid
+
+
+def _best(stmt, repeat: int, number: int) -> float:
+    """Best time per pass over the expression list, in microseconds."""
+    return min(timeit.repeat(stmt, repeat=repeat, number=number)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    # Debug logging would dominate the measurements
+    logger.remove()
+
+    exprs = _valid_expressions()
+    lexed = [lex_expression(e) for e in exprs]
+    rpns = [tokens_to_rpn(t) for t in lexed]
+    texts = [tokenize(e) for e in exprs]
+    legacy_rpns = [shunting_yard(t) for t in texts]
+
+    stages = {
+        "lex_expression": lambda: [lex_expression(e) for e in exprs],
+        "tokens_to_rpn": lambda: [tokens_to_rpn(t) for t in lexed],
+        "rpn_to_pseudocode": lambda: [rpn_to_pseudocode(r) for r in rpns],
+        "shunting_yard (str)": lambda: [shunting_yard(t) for t in texts],
+        "generate_pseudocode (str)": lambda: [
+            generate_pseudocode(r) for r in legacy_rpns
+        ],
+        "evaluate_expression": lambda: [evaluate_expression(e) for e in exprs],
+    }
+
+    print(f"{len(exprs)} expressions, best of {args.repeat} x {args.number}")
+    for name, stmt in stages.items():
+        total = _best(stmt, args.repeat, args.number)
+        print(f"  {name:<28}{total:10.1f} us/pass{total / len(exprs):8.2f} us/expr")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Cold-start benchmark of the command line entry points.
+
+Imports each module in fresh interpreters under ``python -X importtime`` and
+reports the best cumulative import time, with the modules that cost the most
+in the best run. With --budget-ms, exits with an error when a module takes
+longer to import, so that startup regressions fail the build:
+
+    PYTHONPATH=src python benchmarks/bench_importtime.py [--budget-ms MS]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+MODULES = [
+    "c64basic_compiler.build",
+    "c64basic_compiler.bas2prg",
+    "c64basic_compiler.evaluate",
+]
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+
+def _import_times(module: str) -> dict[str, tuple[int, int]]:
+    """Self and cumulative import time, in microseconds, of every module."""
+    env = dict(os.environ, PYTHONPATH=SRC)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) == 3 and parts[0].strip().isdigit():
+            times[parts[2].strip()] = (int(parts[0]), int(parts[1]))
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float)
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        runs = [_import_times(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda times: times[module][1])
+        total = best[module][1] / 1e3
+        print(f"{module}: {total:.1f} ms, best of {args.repeat}")
+
+        by_self = sorted(best.items(), key=lambda item: item[1][0], reverse=True)
+        for name, (own, cumulative) in by_self[: args.top]:
+            print(f"  {own / 1e3:8.1f} ms {cumulative / 1e3:8.1f} ms  {name}")
+
+        if args.budget_ms is not None and total > args.budget_ms:
+            over_budget.append(module)
+
+    if over_budget:
+        raise SystemExit(
+            f"Over the {args.budget_ms} ms budget: {', '.join(over_budget)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
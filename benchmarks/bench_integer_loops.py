@@ -0,0 +1,99 @@
+"""
+Benchmark of the integer loops found by the range inference.
+
+Compiles loops taken from ``examples/plot.bas`` twice, once as usual and once
+with the inference turned off so that every variable is a float, runs both on
+the emulated C64 of the tests and prints the 6502 cycles spent in the compiled
+code and the calls into the BASIC ROM and KERNAL:
+
+    PYTHONPATH=src:. python benchmarks/bench_integer_loops.py
+
+The test machine runs the ROM routines in Python, so their cycles are not
+counted and the float figures are a lower bound. ``plot.bas`` itself cannot
+be measured because the backend does not support DEF FN; the programs below
+are its screen setup and axes, without the function plot.
+"""
+
+from collections import Counter
+from collections.abc import Callable
+from unittest import mock
+
+from tests.machine import Machine
+
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.codegen import generate_binary
+from c64basic_compiler.compiler.inference import Integers
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.pseudocode.codegen import generate_ir
+from c64basic_compiler.utils.logging import logger
+
+PROGRAMS = {
+    "clear bitmap": "10 FOR I9 = 8192 TO 16191\n20 POKE I9, 0\n30 NEXT I9\n",
+    "fill colours": "10 C = 1\n20 FOR I9 = 1024 TO 2023\n30 POKE I9, C\n40 NEXT I9\n",
+    "plot axes": (
+        "100 Y = 100\n"
+        "110 FOR X = 0 TO 319: GOSUB 1200: NEXT X\n"
+        "120 X = 160\n"
+        "130 FOR Y = 0 TO 199: GOSUB 1200: NEXT Y\n"
+        "140 END\n"
+        "1200 TL = INT(Y/8)\n"
+        "1210 BL = Y AND 7\n"
+        "1220 CP = INT(X/8)\n"
+        "1230 MA = 8192 + TL*320 + CP*8 + BL\n"
+        "1240 BP = 7 - (X AND 7)\n"
+        "1250 POKE MA, PEEK(MA) OR 2^BP\n"
+        "1290 RETURN\n"
+    ),
+}
+
+
+def _build(source: str, integers: bool) -> bytearray:
+    code = generate_ir(parse(scan(source)), CompileContext())
+    if integers:
+        return generate_binary(code)
+    with mock.patch(
+        "c64basic_compiler.compiler.backend.infer_integers",
+        return_value=Integers({}, {}),
+    ):
+        return generate_binary(code)
+
+
+def _counted(trap: Callable[[], None], calls: Counter[int], address: int):
+    def call() -> None:
+        calls[address] += 1
+        trap()
+
+    return call
+
+
+def _measure(source: str, integers: bool) -> tuple[int, int]:
+    """6502 cycles of the compiled code and the number of ROM calls"""
+    machine = Machine(_build(source, integers))
+    calls: Counter[int] = Counter()
+    machine.traps = {
+        address: _counted(trap, calls, address)
+        for address, trap in machine.traps.items()
+    }
+    machine.run(limit=10_000_000)
+    return machine.mpu.processorCycles, calls.total()
+
+
+def main() -> None:
+    # Debug logging would dominate the measurements
+    logger.remove()
+
+    print(f"  {'program':<16}{'float':>22}{'integer':>22}{'cycles':>9}")
+    for name, source in PROGRAMS.items():
+        floats, float_calls = _measure(source, integers=False)
+        ints, int_calls = _measure(source, integers=True)
+        print(
+            f"  {name:<16}"
+            f"{floats:>10} cy {float_calls:>6} calls"
+            f"{ints:>10} cy {int_calls:>6} calls"
+            f"{floats / ints:8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
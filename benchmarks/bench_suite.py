@@ -0,0 +1,252 @@
+"""
+Throughput benchmark of the compiler front end.
+
+Runs the tokenizer (scan), parse, the expression evaluator (the right-hand
+sides of the LET statements), generate_code and a whole compilation
+(build.compile_source, without the build cache), each on its own, over the
+examples, over programs made of repeated examples and over synthetic
+programs of --lines lines (see c64basic_compiler.synthetic). Each stage is
+timed (best of --repeat runs, in statements per second, or expressions per
+second for the evaluator) and then run once more under tracemalloc for its
+peak memory and the memory blocks it leaves allocated.
+
+Results are written as JSON with --output, and compared with a stored
+baseline with --baseline: the script exits with an error when a stage is
+slower, or uses more memory, than the baseline allows:
+
+    PYTHONPATH=src python benchmarks/bench_suite.py --output benchmarks/baseline.json
+    PYTHONPATH=src python benchmarks/bench_suite.py --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import gc
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from c64basic_compiler import __version__
+from c64basic_compiler.build import compile_source
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.statement import Command
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.evaluate import EvaluationError, evaluate_tokens
+from c64basic_compiler.pseudocode.codegen import generate_code
+from c64basic_compiler.synthetic import generate_program
+from c64basic_compiler.utils.logging import logger
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples", "*.bas")
+
+# Metrics compared with the baseline, and whether higher is better
+METRICS = {
+    "statements_per_second": True,
+    "peak_kib": False,
+    "blocks": False,
+}
+
+
+def _examples() -> list[str]:
+    sources = []
+    for path in sorted(glob.glob(EXAMPLES)):
+        with open(path) as f:
+            sources.append(f.read())
+    return sources
+
+
+def _repeated(copies: int) -> str:
+    """The statements of every example, renumbered and repeated."""
+    statements = []
+    for source in _examples():
+        for line in source.split("\n"):
+            parts = line.split(None, 1)
+            if len(parts) == 2 and parts[0].isdigit():
+                statements.append(parts[1])
+    return "\n".join(
+        f"{(i + 1) * 10} {text}" for i, text in enumerate(statements * copies)
+    )
+
+
+def _expressions(ast) -> list:
+    """Token lists of the LET expressions that compile."""
+    expressions = []
+    for instr in ast:
+        if instr.command == Command.LET and instr.args[1:2] == ("=",):
+            try:
+                evaluate_tokens(instr.tokens[2:])
+            except EvaluationError:
+                continue
+            expressions.append(instr.tokens[2:])
+    return expressions
+
+
+def _stages(
+    sources: list[str],
+) -> dict[str, tuple[Callable[[], Any], int | None]]:
+    """
+    Each stage over the sources, with the number of expressions it processes
+    when it does not process statements.
+    """
+    streams = [scan(source) for source in sources]
+    asts = [parse(stream) for stream in streams]
+    expressions = [expr for ast in asts for expr in _expressions(ast)]
+    return {
+        "scan": (lambda: [scan(source) for source in sources], None),
+        "parse": (lambda: [parse(stream) for stream in streams], None),
+        "evaluate": (
+            lambda: [evaluate_tokens(expr) for expr in expressions],
+            len(expressions),
+        ),
+        "codegen": (
+            lambda: [generate_code(ast, CompileContext()) for ast in asts],
+            None,
+        ),
+        "end_to_end": (
+            lambda: [compile_source(source, CompileContext()) for source in sources],
+            None,
+        ),
+    }
+
+
+def _measure(run: Callable[[], Any], repeat: int) -> dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    gc.collect()
+    blocks = sys.getallocatedblocks() - blocks
+    del result
+    return {"seconds": best, "peak_kib": peak / 1024, "blocks": blocks}
+
+
+def run_suite(
+    copies: list[int], repeat: int, lines: list[int] | None = None, seed: int = 0
+) -> dict[str, Any]:
+    """
+    Run every stage over every workload.
+
+    Returns:
+        Metadata of the run and, for each "workload/stage", its metrics
+    """
+    workloads = {"examples": _examples()}
+    for count in copies:
+        workloads[f"repeated_x{count}"] = [_repeated(count)]
+    for count in lines or []:
+        workloads[f"generated_{count}"] = ["\n".join(generate_program(count, seed))]
+
+    results = {}
+    for workload, sources in workloads.items():
+        statements = sum(len(parse(scan(source))) for source in sources)
+        for stage, (run, expressions) in _stages(sources).items():
+            metrics = _measure(run, repeat)
+            count = statements if expressions is None else expressions
+            metrics["statements"] = count
+            metrics["statements_per_second"] = count / max(metrics["seconds"], 1e-9)
+            results[f"{workload}/{stage}"] = metrics
+            print(
+                f"  {workload + '/' + stage:<28}{count:9d}"
+                f"{metrics['statements_per_second']:14.0f} st/s"
+                f"{metrics['peak_kib']:12.0f} KiB{metrics['blocks']:10d} blocks"
+            )
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """
+    Compare results with a baseline.
+
+    Returns:
+        A description of every metric worse than the baseline by more than
+        the tolerance (a fraction, e.g. 0.2 for 20%)
+    """
+    regressions = []
+    for name, metrics in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            before, after = old[metric], metrics[metric]
+            if higher_is_better:
+                worse = after < before * (1 - tolerance)
+            else:
+                # Small counts vary from run to run: allow some slack
+                worse = after > before * (1 + tolerance) + 16
+            if worse:
+                regressions.append(f"{name} {metric}: {before:.0f} -> {after:.0f}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--copies",
+        type=int,
+        nargs="*",
+        default=[10, 100],
+        help="Sizes of the synthetic programs, in copies of the examples",
+    )
+    parser.add_argument(
+        "--lines",
+        type=int,
+        nargs="*",
+        default=[1000, 10000],
+        help="Sizes of the generated programs, in lines",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Fraction by which a metric may be worse than the baseline",
+    )
+    args = parser.parse_args()
+
+    # Debug logging and the error messages of the examples would dominate the
+    # measurements
+    logger.remove()
+
+    print(f"Best of {args.repeat}")
+    results = run_suite(args.copies, args.repeat, args.lines, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            raise SystemExit(
+                "Regressions against the baseline:\n  " + "\n  ".join(regressions)
+            )
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
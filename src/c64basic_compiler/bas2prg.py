@@ -6,90 +6,105 @@ Returns:
 
 import argparse
 import os
+import re
 import sys
 
-import c64basic_compiler.common.basic_tokens as basic_tokens
+import c64basic_compiler.common.basic_tokens as tokens
 
 basic_tokens: dict[str, int] = {
-    "END": basic_tokens.END,
-    "FOR": basic_tokens.FOR,
-    "NEXT": basic_tokens.NEXT,
-    "DATA": basic_tokens.DATA,
-    "INPUT#": basic_tokens.INPUT_HASH,
-    "INPUT": basic_tokens.INPUT,
-    "DIM": basic_tokens.DIM,
-    "READ": basic_tokens.READ,
-    "LET": basic_tokens.LET,
-    "GOTO": basic_tokens.GOTO,
-    "RUN": basic_tokens.RUN,
-    "IF": basic_tokens.IF,
-    "RESTORE": basic_tokens.RESTORE,
-    "GOSUB": basic_tokens.GOSUB,
-    "RETURN": basic_tokens.RETURN,
-    "REM": basic_tokens.REM,
-    "STOP": basic_tokens.STOP,
-    "ON": basic_tokens.ON,
-    "WAIT": basic_tokens.WAIT,
-    "LOAD": basic_tokens.LOAD,
-    "SAVE": basic_tokens.SAVE,
-    "VERIFY": basic_tokens.VERIFY,
-    "DEF": basic_tokens.DEF,
-    "POKE": basic_tokens.POKE,
-    "PRINT#": basic_tokens.PRINT_HASH,
-    "PRINT": basic_tokens.PRINT,
-    "CONT": basic_tokens.CONT,
-    "LIST": basic_tokens.LIST,
-    "CLR": basic_tokens.CLR,
-    "CMD": basic_tokens.CMD,
-    "SYS": basic_tokens.SYS,
-    "OPEN": basic_tokens.OPEN,
-    "CLOSE": basic_tokens.CLOSE,
-    "GET": basic_tokens.GET,
-    "NEW": basic_tokens.NEW,
-    "TAB(": basic_tokens.TAB_OPEN,
-    "TO": basic_tokens.TO,
-    "FN": basic_tokens.FN,
-    "SPC(": basic_tokens.SPC_OPEN,
-    "THEN": basic_tokens.THEN,
-    "NOT": basic_tokens.NOT,
-    "STEP": basic_tokens.STEP,
-    "+": basic_tokens.PLUS,
-    "-": basic_tokens.MINUS,
-    "*": basic_tokens.MULTIPLY,
-    "/": basic_tokens.DIVIDE,
-    "^": basic_tokens.POWER,
-    "AND": basic_tokens.AND,
-    "OR": basic_tokens.OR,
-    ">": basic_tokens.GREATER,
-    "=": basic_tokens.EQUAL,
-    "<": basic_tokens.LESS,
-    "SGN": basic_tokens.SGN,
-    "INT": basic_tokens.INT,
-    "ABS": basic_tokens.ABS,
-    "USR": basic_tokens.USR,
-    "FRE": basic_tokens.FRE,
-    "POS": basic_tokens.POS,
-    "SQR": basic_tokens.SQR,
-    "RND": basic_tokens.RND,
-    "LOG": basic_tokens.LOG,
-    "EXP": basic_tokens.EXP,
-    "COS": basic_tokens.COS,
-    "SIN": basic_tokens.SIN,
-    "TAN": basic_tokens.TAN,
-    "ATN": basic_tokens.ATN,
-    "PEEK": basic_tokens.PEEK,
-    "LEN": basic_tokens.LEN,
-    "STR$": basic_tokens.STR_DOLLAR,
-    "VAL": basic_tokens.VAL,
-    "ASC": basic_tokens.ASC,
-    "CHR$": basic_tokens.CHR_DOLLAR,
-    "LEFT$": basic_tokens.LEFT_DOLLAR,
-    "RIGHT$": basic_tokens.RIGHT_DOLLAR,
-    "MID$": basic_tokens.MID_DOLLAR,
+    "END": tokens.END,
+    "FOR": tokens.FOR,
+    "NEXT": tokens.NEXT,
+    "DATA": tokens.DATA,
+    "INPUT#": tokens.INPUT_HASH,
+    "INPUT": tokens.INPUT,
+    "DIM": tokens.DIM,
+    "READ": tokens.READ,
+    "LET": tokens.LET,
+    "GOTO": tokens.GOTO,
+    "RUN": tokens.RUN,
+    "IF": tokens.IF,
+    "RESTORE": tokens.RESTORE,
+    "GOSUB": tokens.GOSUB,
+    "RETURN": tokens.RETURN,
+    "REM": tokens.REM,
+    "STOP": tokens.STOP,
+    "ON": tokens.ON,
+    "WAIT": tokens.WAIT,
+    "LOAD": tokens.LOAD,
+    "SAVE": tokens.SAVE,
+    "VERIFY": tokens.VERIFY,
+    "DEF": tokens.DEF,
+    "POKE": tokens.POKE,
+    "PRINT#": tokens.PRINT_HASH,
+    "PRINT": tokens.PRINT,
+    "CONT": tokens.CONT,
+    "LIST": tokens.LIST,
+    "CLR": tokens.CLR,
+    "CMD": tokens.CMD,
+    "SYS": tokens.SYS,
+    "OPEN": tokens.OPEN,
+    "CLOSE": tokens.CLOSE,
+    "GET": tokens.GET,
+    "NEW": tokens.NEW,
+    "TAB(": tokens.TAB_OPEN,
+    "TO": tokens.TO,
+    "FN": tokens.FN,
+    "SPC(": tokens.SPC_OPEN,
+    "THEN": tokens.THEN,
+    "NOT": tokens.NOT,
+    "STEP": tokens.STEP,
+    "+": tokens.PLUS,
+    "-": tokens.MINUS,
+    "*": tokens.MULTIPLY,
+    "/": tokens.DIVIDE,
+    "^": tokens.POWER,
+    "AND": tokens.AND,
+    "OR": tokens.OR,
+    ">": tokens.GREATER,
+    "=": tokens.EQUAL,
+    "<": tokens.LESS,
+    "SGN": tokens.SGN,
+    "INT": tokens.INT,
+    "ABS": tokens.ABS,
+    "USR": tokens.USR,
+    "FRE": tokens.FRE,
+    "POS": tokens.POS,
+    "SQR": tokens.SQR,
+    "RND": tokens.RND,
+    "LOG": tokens.LOG,
+    "EXP": tokens.EXP,
+    "COS": tokens.COS,
+    "SIN": tokens.SIN,
+    "TAN": tokens.TAN,
+    "ATN": tokens.ATN,
+    "PEEK": tokens.PEEK,
+    "LEN": tokens.LEN,
+    "STR$": tokens.STR_DOLLAR,
+    "VAL": tokens.VAL,
+    "ASC": tokens.ASC,
+    "CHR$": tokens.CHR_DOLLAR,
+    "LEFT$": tokens.LEFT_DOLLAR,
+    "RIGHT$": tokens.RIGHT_DOLLAR,
+    "MID$": tokens.MID_DOLLAR,
 }
 
-
-def tokenize_line(line: str):
+# Scanner of the content of a line, matching in turn: a quoted string (up to
+# the closing quote or the end of the line), a keyword, a run of characters
+# that cannot start a keyword, or any other single character. Keywords are
+# tried in table order, as the C64 does: the first one the text starts with
+# wins, not the longest, and a regex alternation matches the same way.
+_SCANNER = re.compile(
+    '"[^"]*"?|('
+    + "|".join(map(re.escape, basic_tokens))
+    + ')|[^"'
+    + re.escape("".join(sorted({token[0] for token in basic_tokens})))
+    + "]+|.",
+    re.DOTALL,
+)
+
+
+def tokenize_line(line: str) -> bytearray:
     """Tokenizes a line of BASIC code.
 
     Args:
@@ -105,33 +120,25 @@ def tokenize_line(line: str):
 
     result += (line_number).to_bytes(2, "little")
 
-    i = 0
-    in_quotes = False
-    while i < len(content):
-        if content[i] == '"':
-            in_quotes = not in_quotes
-            result.append(ord(content[i]))
-            i += 1
-            continue
-
-        if not in_quotes:
-            for token, code in basic_tokens.items():
-                if content[i:].upper().startswith(token):
-                    result.append(code)
-                    i += len(token)
-                    break
-            else:
-                result.append(ord(content[i]))
-                i += 1
+    # Keywords are matched case-insensitively, on the uppercased content
+    upper = content.upper()
+    if len(upper) != len(content):
+        # Some character uppercases to several (e.g. "ß"), which would shift
+        # the positions: only fold ASCII, the only letters PETSCII has
+        upper = "".join(c.upper() if c.isascii() else c for c in content)
+
+    for match in _SCANNER.finditer(upper):
+        keyword = match.group(1)
+        if keyword is not None:
+            result.append(basic_tokens[keyword])
         else:
-            result.append(ord(content[i]))
-            i += 1
+            result.extend(map(ord, content[match.start() : match.end()]))
 
     result.append(0x00)
     return result
 
 
-def convert_bas_to_prg(input_file, output_file, force=False):
+def convert_bas_to_prg(input_file: str, output_file: str, force: bool = False) -> None:
     """Converts a BASIC file to a PRG file.
 
     Args:
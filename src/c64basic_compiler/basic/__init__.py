@@ -2,51 +2,100 @@
 Package for C64 BASIC language elements and abstractions.
 """
 
-import inspect
-import sys
-from typing import Dict
-
 # Import the base class and Type enum
 from c64basic_compiler.basic.basic_function import BasicFunction, Type
-from c64basic_compiler.basic.comparison_operators import *  # Ensure we import comparison operators
-from c64basic_compiler.basic.logic_operators import *
-
-# Import all function modules to register their classes
-from c64basic_compiler.basic.math_functions import *
-from c64basic_compiler.basic.operators import *
-from c64basic_compiler.basic.string_functions import *
-from c64basic_compiler.basic.system_functions import *
-
-
-# Dynamically build the function table from all BasicFunction subclasses
-def _build_function_table() -> dict[str, BasicFunction]:
-    """
-    Dynamically builds a function table by discovering all BasicFunction subclasses.
-
-    Returns:
-        Dict mapping function names to instantiated function objects
-    """
-    function_table = {}
-
-    # Find all BasicFunction subclasses in all imported modules
-    for module_name, module in sys.modules.items():
-        if module_name.startswith("c64basic_compiler.basic."):
-            for name, obj in inspect.getmembers(module):
-                if (
-                    inspect.isclass(obj)
-                    and issubclass(obj, BasicFunction)
-                    and obj is not BasicFunction
-                    and obj.name  # Only include classes with a name
-                ):
-                    function_table[obj.name] = obj()
-
-                    # print(f"Registered function: {obj.name}")
-
-    return function_table
+from c64basic_compiler.basic.comparison_operators import (
+    EqualOperator,
+    GreaterThanEqualOperator,
+    GreaterThanOperator,
+    LessThanEqualOperator,
+    LessThanOperator,
+    NotEqualOperator,
+)
+from c64basic_compiler.basic.logic_operators import AndOperator, NotOperator, OrOperator
+from c64basic_compiler.basic.math_functions import (
+    AbsFunction,
+    AtnFunction,
+    CosFunction,
+    ExpFunction,
+    IntFunction,
+    LogFunction,
+    RndFunction,
+    SgnFunction,
+    SinFunction,
+    SqrFunction,
+    TanFunction,
+)
+from c64basic_compiler.basic.operators import (
+    AddOperator,
+    DivideOperator,
+    MultiplyOperator,
+    PowerOperator,
+    SubtractOperator,
+    UnaryMinusOperator,
+)
+from c64basic_compiler.basic.string_functions import (
+    AscFunction,
+    ChrFunction,
+    LenFunction,
+    StrFunction,
+    ValFunction,
+)
+from c64basic_compiler.basic.system_functions import (
+    PeekFunction,
+    PiFunction,
+    TiFunction,
+    TimeFunction,
+    TimeStringFunction,
+    TiStringFunction,
+)
 
+# Every BasicFunction subclass, by module. A new function or operator must be
+# listed here to be known to the compiler.
+FUNCTION_CLASSES: tuple[type[BasicFunction], ...] = (
+    EqualOperator,
+    LessThanOperator,
+    GreaterThanOperator,
+    LessThanEqualOperator,
+    GreaterThanEqualOperator,
+    NotEqualOperator,
+    AndOperator,
+    OrOperator,
+    NotOperator,
+    AbsFunction,
+    IntFunction,
+    SgnFunction,
+    SqrFunction,
+    LogFunction,
+    ExpFunction,
+    SinFunction,
+    CosFunction,
+    TanFunction,
+    AtnFunction,
+    RndFunction,
+    AddOperator,
+    SubtractOperator,
+    MultiplyOperator,
+    DivideOperator,
+    PowerOperator,
+    UnaryMinusOperator,
+    StrFunction,
+    ChrFunction,
+    AscFunction,
+    ValFunction,
+    LenFunction,
+    PeekFunction,
+    TiFunction,
+    TiStringFunction,
+    TimeFunction,
+    TimeStringFunction,
+    PiFunction,
+)
 
-# The global function table
-FUNCTION_TABLE = _build_function_table()
+# The global function table: function names to function objects
+FUNCTION_TABLE: dict[str, BasicFunction] = {
+    function_class.name: function_class() for function_class in FUNCTION_CLASSES
+}
 
 # Re-export Type enum so it can be imported from c64basic_compiler.basic
-__all__ = ["FUNCTION_TABLE", "Type", "BasicFunction"]
+__all__ = ["FUNCTION_CLASSES", "FUNCTION_TABLE", "Type", "BasicFunction"]
@@ -1,6 +1,22 @@
 from enum import Enum
 from typing import ClassVar
 
+# Value of a constant argument or result: a number BASIC stores exactly, or
+# the contents of a string
+Constant = int | float | str
+
+
+def ratio(value: Constant) -> tuple[int, int]:
+    """
+    A number as an exact fraction: its numerator and denominator.
+
+    Raises:
+        TypeError: When the value is a string
+    """
+    if isinstance(value, str):
+        raise TypeError(f"String {value!r} used as a number")
+    return value.as_integer_ratio()
+
 
 class Type(Enum):
     """Enumeration of supported data types in BASIC."""
@@ -67,6 +83,22 @@ class BasicFunction:
         """
         return args[0] if self.return_type == Type.ANY else self.return_type
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        """
+        Compute the result of this function at compile time, for constant
+        arguments. Numbers given are stored exactly by BASIC.
+
+        Functions only fold when the result is the one the C64 computes, to
+        the last bit, and no error would be raised at run time.
+
+        Args:
+            args: Values of the arguments
+
+        Returns:
+            The result, or None when it must be computed at run time
+        """
+        return None
+
     def _compatible(self, given: Type, expected: Type) -> bool:
         """
         Check if a given type is compatible with an expected type.
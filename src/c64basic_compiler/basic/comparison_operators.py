@@ -1,4 +1,23 @@
-from c64basic_compiler.basic.basic_function import BasicFunction, Type
+from c64basic_compiler.basic.basic_function import BasicFunction, Constant, Type
+from c64basic_compiler.common.text_to_petscii import text_to_petscii
+
+
+def _compare(args: list[Constant]) -> int:
+    """
+    Sign of the difference of two numbers or strings, which are compared by
+    their PETSCII codes, a shorter string being less than a longer one it
+    starts.
+
+    Raises:
+        TypeError: When a string is compared with a number
+    """
+    a, b = args
+    if isinstance(a, str) and isinstance(b, str):
+        codes_a, codes_b = bytes(text_to_petscii(a)), bytes(text_to_petscii(b))
+        return (codes_a > codes_b) - (codes_a < codes_b)
+    if isinstance(a, str) or isinstance(b, str):
+        raise TypeError("A string compared with a number")
+    return (a > b) - (a < b)
 
 
 class EqualOperator(BasicFunction):
@@ -26,6 +45,9 @@ class EqualOperator(BasicFunction):
     arg_types = [Type.ANY, Type.ANY]
     return_type = Type.INT
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        return -1 if _compare(args) == 0 else 0
+
     def is_type_compatible(self, args: list[Type]) -> bool:
         # Equal operator works if both arguments are the same type
         # or if both are numeric types
@@ -62,6 +84,9 @@ class LessThanOperator(BasicFunction):
     arg_types = [Type.ANY, Type.ANY]
     return_type = Type.INT
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        return -1 if _compare(args) < 0 else 0
+
     def is_type_compatible(self, args: list[Type]) -> bool:
         # Same rules as equal operator
         if args[0] == args[1]:
@@ -97,6 +122,9 @@ class GreaterThanOperator(BasicFunction):
     arg_types = [Type.ANY, Type.ANY]
     return_type = Type.INT
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        return -1 if _compare(args) > 0 else 0
+
     def is_type_compatible(self, args: list[Type]) -> bool:
         # Same rules as equal operator
         if args[0] == args[1]:
@@ -132,6 +160,9 @@ class LessThanEqualOperator(BasicFunction):
     arg_types = [Type.ANY, Type.ANY]
     return_type = Type.INT
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        return -1 if _compare(args) <= 0 else 0
+
     def is_type_compatible(self, args: list[Type]) -> bool:
         # Same rules as equal operator
         if args[0] == args[1]:
@@ -167,6 +198,9 @@ class GreaterThanEqualOperator(BasicFunction):
     arg_types = [Type.ANY, Type.ANY]
     return_type = Type.INT
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        return -1 if _compare(args) >= 0 else 0
+
     def is_type_compatible(self, args: list[Type]) -> bool:
         # Same rules as equal operator
         if args[0] == args[1]:
@@ -201,6 +235,9 @@ class NotEqualOperator(BasicFunction):
     arg_types = [Type.ANY, Type.ANY]
     return_type = Type.INT
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        return -1 if _compare(args) != 0 else 0
+
     def is_type_compatible(self, args: list[Type]) -> bool:
         # Same rules as equal operator
         if args[0] == args[1]:
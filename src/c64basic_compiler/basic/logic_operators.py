@@ -1,4 +1,14 @@
-from c64basic_compiler.basic.basic_function import BasicFunction, Type
+from c64basic_compiler.basic.basic_function import BasicFunction, Constant, Type
+
+
+def _integers(args: list[Constant]) -> list[int] | None:
+    """
+    The arguments as the 16-bit integers the operators work on, or None when
+    one is not a whole number in range (an ILLEGAL QUANTITY error).
+    """
+    if all(arg == int(arg) and -32768 <= arg <= 32767 for arg in args):
+        return [int(arg) for arg in args]
+    return None
 
 
 class AndOperator(BasicFunction):
@@ -26,6 +36,10 @@ class AndOperator(BasicFunction):
     arg_types = [Type.INT, Type.INT]
     return_type = Type.INT
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        values = _integers(args)
+        return values[0] & values[1] if values else None
+
 
 class OrOperator(BasicFunction):
     """
@@ -52,6 +66,10 @@ class OrOperator(BasicFunction):
     arg_types = [Type.INT, Type.INT]
     return_type = Type.INT
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        values = _integers(args)
+        return values[0] | values[1] if values else None
+
 
 class NotOperator(BasicFunction):
     """
@@ -76,3 +94,7 @@ class NotOperator(BasicFunction):
     arity = 1
     arg_types = [Type.INT]
     return_type = Type.INT
+
+    def fold(self, args: list[Constant]) -> Constant | None:
+        values = _integers(args)
+        return ~values[0] if values else None
@@ -1,4 +1,10 @@
-from c64basic_compiler.basic.basic_function import BasicFunction, Type
+from c64basic_compiler.basic.basic_function import (
+    BasicFunction,
+    Constant,
+    Type,
+    ratio,
+)
+from c64basic_compiler.common.c64_float import exact
 
 
 class AbsFunction(BasicFunction):
@@ -23,6 +29,10 @@ class AbsFunction(BasicFunction):
     arg_types = [Type.NUM]
     return_type = Type.NUM
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        numerator, denominator = ratio(args[0])
+        return exact(abs(numerator), denominator)
+
 
 class IntFunction(BasicFunction):
     """
@@ -47,6 +57,10 @@ class IntFunction(BasicFunction):
     arg_types = [Type.NUM]
     return_type = Type.INT
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        numerator, denominator = ratio(args[0])
+        return exact(numerator // denominator)
+
 
 class SgnFunction(BasicFunction):
     """
@@ -71,6 +85,10 @@ class SgnFunction(BasicFunction):
     arg_types = [Type.NUM]
     return_type = Type.INT
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        numerator, _ = ratio(args[0])
+        return (numerator > 0) - (numerator < 0)
+
 
 class SqrFunction(BasicFunction):
     """
@@ -87,6 +105,9 @@ class SqrFunction(BasicFunction):
     Examples:
         SQR(9) = 3
         SQR(2) = 1.4142...
+
+    Not folded: the ROM computes square roots as EXP(LOG(x) * 0.5), which
+    rounds even SQR(16).
     """
 
     name = "SQR"
@@ -1,4 +1,10 @@
-from c64basic_compiler.basic.basic_function import BasicFunction, Type
+from c64basic_compiler.basic.basic_function import (
+    BasicFunction,
+    Constant,
+    Type,
+    ratio,
+)
+from c64basic_compiler.common.c64_float import exact
 
 
 class AddOperator(BasicFunction):
@@ -35,6 +41,13 @@ class AddOperator(BasicFunction):
             return True
         return False
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        a, b = args
+        if isinstance(a, str) and isinstance(b, str):
+            return a + b if len(a) + len(b) <= 255 else None
+        (n1, d1), (n2, d2) = ratio(a), ratio(b)
+        return exact(n1 * d2 + n2 * d1, d1 * d2)
+
 
 class SubtractOperator(BasicFunction):
     """
@@ -60,6 +73,10 @@ class SubtractOperator(BasicFunction):
     arg_types = [Type.NUM, Type.NUM]
     return_type = Type.NUM
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        (n1, d1), (n2, d2) = (ratio(arg) for arg in args)
+        return exact(n1 * d2 - n2 * d1, d1 * d2)
+
 
 class MultiplyOperator(BasicFunction):
     """
@@ -85,6 +102,10 @@ class MultiplyOperator(BasicFunction):
     arg_types = [Type.NUM, Type.NUM]
     return_type = Type.NUM
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        (n1, d1), (n2, d2) = (ratio(arg) for arg in args)
+        return exact(n1 * n2, d1 * d2)
+
 
 class DivideOperator(BasicFunction):
     """
@@ -110,6 +131,11 @@ class DivideOperator(BasicFunction):
     arg_types = [Type.NUM, Type.NUM]
     return_type = Type.NUM
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        (n1, d1), (n2, d2) = (ratio(arg) for arg in args)
+        # Division by zero is an error at run time
+        return exact(n1 * d2, d1 * n2) if n2 else None
+
 
 class PowerOperator(BasicFunction):
     """
@@ -128,6 +154,9 @@ class PowerOperator(BasicFunction):
         2 ^ 3 = 8
         5 ^ 2 = 25
         2 ^ 0.5 = 1.414... (square root of 2)
+
+    Not folded: the ROM computes powers as EXP(LOG(x) * y), which rounds even
+    2 ^ 3.
     """
 
     name = "^"
@@ -160,3 +189,7 @@ class UnaryMinusOperator(BasicFunction):
     arity = 1
     arg_types = [Type.NUM]
     return_type = Type.NUM
+
+    def fold(self, args: list[Constant]) -> Constant | None:
+        numerator, denominator = ratio(args[0])
+        return exact(-numerator, denominator)
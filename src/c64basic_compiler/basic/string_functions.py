@@ -1,4 +1,5 @@
-from c64basic_compiler.basic.basic_function import BasicFunction, Type
+from c64basic_compiler.basic.basic_function import BasicFunction, Constant, Type
+from c64basic_compiler.common.text_to_petscii import text_to_petscii
 
 
 class StrFunction(BasicFunction):
@@ -24,6 +25,13 @@ class StrFunction(BasicFunction):
     arg_types = [Type.NUM]
     return_type = Type.STR
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        # Whole numbers below 1E9 are written without a point or exponent
+        value = args[0]
+        if value != int(value) or abs(value) >= 1e9:
+            return None
+        return f"{int(value): d}"
+
 
 class ChrFunction(BasicFunction):
     """
@@ -48,6 +56,14 @@ class ChrFunction(BasicFunction):
     arg_types = [Type.INT]
     return_type = Type.STR
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        # Only printable characters that can be written in a string literal
+        code = args[0]
+        if code != int(code) or not 32 <= code < 127 or code == 34:
+            return None
+        char = chr(int(code))
+        return char if text_to_petscii(char) == bytes([int(code)]) else None
+
 
 class AscFunction(BasicFunction):
     """
@@ -71,6 +87,11 @@ class AscFunction(BasicFunction):
     arg_types = [Type.STR]
     return_type = Type.INT
 
+    def fold(self, args: list[Constant]) -> Constant | None:
+        # ASC of an empty string is an error at run time
+        text = args[0]
+        return text_to_petscii(text)[0] if isinstance(text, str) and text else None
+
 
 class ValFunction(BasicFunction):
     """
@@ -120,3 +141,7 @@ class LenFunction(BasicFunction):
     arity = 1
     arg_types = [Type.STR]
     return_type = Type.INT
+
+    def fold(self, args: list[Constant]) -> Constant | None:
+        text = args[0]
+        return len(text) if isinstance(text, str) else None
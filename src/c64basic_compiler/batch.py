@@ -0,0 +1,139 @@
+"""
+Batch builds: compile many BASIC programs in a pool of worker processes.
+
+Batch builds never ask questions: outputs that already exist are skipped
+unless overwriting is forced, and every file gets an entry in the JSON report
+(status, time and output size), whether it compiled or not.
+"""
+
+import glob
+import os
+import time
+from typing import Any, NamedTuple
+
+from c64basic_compiler.utils import tracing
+from c64basic_compiler.utils.logging import logger
+
+GLOB_CHARACTERS = frozenset("*?[")
+
+
+class BuildTask(NamedTuple):
+    """A program to compile in a worker process."""
+
+    input_file: str
+    output_file: str
+    force: bool
+    use_cache: bool
+    trace: bool
+
+
+def is_batch(inputs: list[str]) -> bool:
+    """
+    Tell whether the inputs name more than a single file.
+    """
+    if len(inputs) != 1:
+        return True
+    path = inputs[0]
+    return os.path.isdir(path) or not GLOB_CHARACTERS.isdisjoint(path)
+
+
+def expand_inputs(inputs: list[str]) -> list[str]:
+    """
+    Expand inputs into source files: directories stand for the .bas files in
+    them and glob patterns (** included) for the files they match. Files are
+    listed once, in the order they are named.
+    """
+    files: dict[str, None] = {}
+    for path in inputs:
+        if os.path.isdir(path):
+            matches = sorted(glob.glob(os.path.join(glob.escape(path), "*.bas")))
+        elif not GLOB_CHARACTERS.isdisjoint(path):
+            matches = sorted(glob.glob(path, recursive=True))
+        else:
+            matches = [path]
+        for match in matches:
+            files.setdefault(os.path.normpath(match), None)
+    return list(files)
+
+
+def build_batch(
+    inputs: list[str],
+    output_dir: str | None = None,
+    jobs: int = 1,
+    force: bool = False,
+    use_cache: bool = True,
+    trace: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Compile several programs, one per worker process at a time.
+
+    Args:
+        inputs: Files, directories and glob patterns (see expand_inputs)
+        output_dir: Directory for every output; by default each output is
+            written next to its source
+        jobs: Number of worker processes
+        force: Overwrite existing outputs instead of skipping them
+        use_cache: Reuse the line cache of each program
+        trace: Write a .trace.jsonl file next to each output
+
+    Returns:
+        The report of each file, in input order
+    """
+    tasks = []
+    for input_file in expand_inputs(inputs):
+        base = os.path.splitext(os.path.basename(input_file))[0]
+        directory = output_dir if output_dir else os.path.dirname(input_file)
+        output_file = os.path.join(directory, base + ".prg")
+        tasks.append(BuildTask(input_file, output_file, force, use_cache, trace))
+
+    if jobs == 1 or len(tasks) < 2:
+        return [_build_one(task) for task in tasks]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Workers are forked from this process, so they start with the function
+    # table and the handlers loaded so far
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        return list(executor.map(_build_one, tasks))
+
+
+def _build_one(task: BuildTask) -> dict[str, Any]:
+    # Imported here: build imports this module
+    from c64basic_compiler.build import compile_file
+
+    input_file, output_file, force, use_cache, trace = task
+    base = os.path.splitext(output_file)[0]
+    report: dict[str, Any] = {
+        "input_file": input_file,
+        "output_file": output_file,
+        "status": "ok",
+    }
+    start = time.perf_counter()
+
+    if not os.path.isfile(input_file):
+        report.update(status="error", error="Input file does not exist")
+    elif os.path.isfile(output_file) and not force:
+        report.update(status="skipped", reason="Output file already exists")
+    else:
+        try:
+            if os.path.dirname(output_file):
+                os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            if trace:
+                tracing.add_sink(tracing.JsonLinesSink(base + ".trace.jsonl"))
+            try:
+                report.update(
+                    compile_file(
+                        input_file,
+                        output_file,
+                        cache_file=base + ".cache.json" if use_cache else None,
+                    )
+                )
+            finally:
+                tracing.disable()
+            report["size"] = os.path.getsize(report["pseudocode_file"])
+        except Exception as e:
+            logger.error(f"Error compiling {input_file}: {e}")
+            report.update(status="error", error=str(e))
+
+    report["time"] = time.perf_counter() - start
+    return report
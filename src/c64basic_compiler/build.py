@@ -2,23 +2,52 @@ import argparse
 import json
 import os
 import sys
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
 
+from c64basic_compiler.batch import build_batch, is_batch
 from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.common.line_cache import LineCache
+from c64basic_compiler.compiler.codegen import generate_binary
 from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.prg_writer import write_prg
 from c64basic_compiler.compiler.pseudocode_writer import write_pseudocode
-from c64basic_compiler.compiler.tokenizer import tokenize
-
-# from c64basic_compiler.compiler.codegen import generate_code
-from c64basic_compiler.pseudocode.codegen import generate_code
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.exceptions import BackendError
+from c64basic_compiler.pseudocode.codegen import generate_ir
+from c64basic_compiler.pseudocode.incremental import generate_incremental
+from c64basic_compiler.pseudocode.ir import Code
+from c64basic_compiler.pseudocode.pco import write_pco
+from c64basic_compiler.pseudocode.stream import (
+    generate_stream,
+    parse_lines,
+    read_lines,
+    scan_jump_targets,
+)
+from c64basic_compiler.utils import tracing
 from c64basic_compiler.utils.logging import configure_logger, logger
+from c64basic_compiler.utils.profiling import ProfileSink
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="BASIC Compiler for  C64 (C64BASIC Compiler)."
     )
-    parser.add_argument("-i", "--input", required=True, help="Input .bas file")
-    parser.add_argument("-o", "--output", required=False, help="Output .prg file")
+    parser.add_argument(
+        "-i",
+        "--input",
+        required=True,
+        nargs="+",
+        help="Input .bas file; several files, directories or glob patterns "
+        "compile in batch mode",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=False,
+        help="Output .prg file (in batch mode: output directory)",
+    )
     parser.add_argument(
         "-f", "--force", action="store_true", help="Overwrite output file if it exists"
     )
@@ -28,16 +57,85 @@ def main() -> None:
         action="store_true",
         help="Show extended information about the compilation",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes used to generate pseudocode, or to compile "
+        "files in batch mode (default: 1)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompile every line instead of reusing the build cache",
+    )
+    parser.add_argument(
+        "--pco",
+        action="store_true",
+        help="Write the pseudocode as a binary .pco file instead of text",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Compile and write the pseudocode a chunk of lines at a time, in "
+        "constant memory (no build cache, single job, no .prg file)",
+    )
+    parser.add_argument(
+        "--trace-file",
+        required=False,
+        help="JSON-lines file for trace events "
+        "(default with -v: output file name with .trace.jsonl extension)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Compile every line (no build cache) and print the time and memory "
+        "of each stage, the time of each handler and the most expensive lines",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="Number of source lines listed by --profile (default: 10)",
+    )
+    parser.add_argument(
+        "--profile-dump",
+        metavar="FILE",
+        help="Write cProfile statistics of the build to this .prof file",
+    )
+    parser.add_argument(
+        "--report",
+        required=False,
+        help="Batch mode: write the JSON build report to this file "
+        "instead of the standard output",
+    )
 
     args = parser.parse_args()
-
-    input_file = args.input
-    output_file = args.output
-    force_overwrite = args.force
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.stream and args.jobs > 1:
+        parser.error("--stream cannot be combined with --jobs")
+    if (args.profile or args.profile_dump) and is_batch(args.input):
+        parser.error("--profile and --profile-dump only profile single files")
 
     logger_level = "DEBUG" if args.verbose else "INFO"
     configure_logger(level=logger_level)
 
+    if is_batch(args.input):
+        sys.exit(_main_batch(args))
+    _main_single(args)
+
+
+def _main_single(args: argparse.Namespace) -> None:
+    """
+    Compile a single file, asking before an existing output is overwritten.
+    """
+    input_file = args.input[0]
+    output_file = args.output
+    force_overwrite = args.force
+
     if not os.path.isfile(input_file):
         print(f"Error: Input file '{input_file}' does not exist.")
         sys.exit(1)
@@ -62,36 +160,315 @@ def main() -> None:
             print("Operation cancelled.")
             sys.exit(1)
 
+    trace_file = _start_tracing(args, output_file)
+
+    # Streamed builds never use the cache, and profiles measure every line
+    cache_file = None
+    if not (args.no_cache or args.stream or args.profile):
+        cache_file = os.path.splitext(output_file)[0] + ".cache.json"
+
+    try:
+        with _profiling(args) as profile:
+            report = compile_file(
+                input_file,
+                output_file,
+                jobs=args.jobs,
+                cache_file=cache_file,
+                stream=args.stream,
+                pco=args.pco,
+            )
+    finally:
+        tracing.disable()
+
+    logger.info(
+        "Compiled {} lines ({} reused from the build cache) into {}",
+        report["lines"],
+        report["reused_lines"],
+        report["pseudocode_file"],
+    )
+
+    if trace_file:
+        logger.debug("Trace file written: {}", trace_file)
+
+    if profile is not None:
+        print(profile.report(args.profile_top, _source_lines(input_file)))
+
+
+def _start_tracing(args: argparse.Namespace, output_file: str) -> str | None:
+    """
+    Start writing trace events to the file given by --trace-file, or with -v
+    to a file named after the output file. Returns the file, if any.
+    """
+    trace_file: str | None = args.trace_file
+    if args.verbose and not trace_file:
+        trace_file = os.path.splitext(output_file)[0] + ".trace.jsonl"
+    if trace_file:
+        tracing.add_sink(tracing.JsonLinesSink(trace_file))
+    return trace_file
+
+
+@contextmanager
+def _profiling(args: argparse.Namespace) -> Iterator[ProfileSink | None]:
+    """
+    Profile the block as asked by --profile and --profile-dump, yielding the
+    sink that collects the profile (None without --profile), and write the
+    .prof file.
+    """
+    if not args.profile and not args.profile_dump:
+        yield None
+        return
+
+    # Imported here: both are slow to import and only used to profile
+    import cProfile
+    import tracemalloc
+
+    profile = None
+    if args.profile:
+        profile = ProfileSink()
+        tracing.add_sink(profile)
+        tracemalloc.start()
+    profiler = cProfile.Profile() if args.profile_dump else None
+
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield profile
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if profile is not None:
+            tracemalloc.stop()
+            tracing.remove_sink(profile)
+
+    if profiler is not None:
+        profiler.dump_stats(args.profile_dump)
+        logger.info("Profile written: {}", args.profile_dump)
+
+
+def _source_lines(input_file: str) -> dict[int, str]:
+    """
+    Return the text of each line of a BASIC source file, by line number.
+    """
+    lines = {}
     with open(input_file) as f:
-        source = f.read()
+        for text in f:
+            number, _, rest = text.strip().partition(" ")
+            if number.isdigit():
+                lines[int(number)] = rest.strip()
+    return lines
 
-    ctx = CompileContext()
-    tokens = tokenize(source)
-    # logger.debug(f"Tokens: {json.dumps(tokens, indent=4)}")
-    logger.debug(f"Tokens: {tokens}")
 
-    # Parse the tokens into an abstract syntax tree (AST)
-    ast = parse(tokens)
-    # logger.debug(f"AST: {json.dumps(ast, indent=4)}")
-    logger.debug(f"AST: {ast}")
+def _main_batch(args: argparse.Namespace) -> int:
+    """
+    Run a batch build and write its report. Returns the exit status.
+    """
+    reports = build_batch(
+        args.input,
+        output_dir=args.output,
+        jobs=args.jobs,
+        force=args.force,
+        use_cache=not args.no_cache,
+        trace=args.verbose,
+    )
+    failed = sum(1 for report in reports if report["status"] == "error")
+    logger.info("Compiled {} files, {} failed", len(reports) - failed, failed)
 
-    logger.debug(f"Compile context: {ctx}")
+    output = json.dumps(reports, indent=4)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 1 if failed else 0
 
-    # Generate pseudocode
-    pseudo_code = generate_code(ast, ctx)
-    logger.debug(f"Generated pseudocode: {json.dumps(pseudo_code, indent=4)}")
 
-    # Write the pseudocode to a text file
-    pseudocode_file = os.path.splitext(output_file)[0] + ".pseudocode"
-    write_pseudocode(pseudocode_file, pseudo_code)
-    logger.debug(f"Pseudocode file PRG succesfully generated: {pseudocode_file}")
+def compile_file(
+    input_file: str,
+    output_file: str,
+    jobs: int = 1,
+    cache_file: str | None = None,
+    stream: bool = False,
+    pco: bool = False,
+) -> dict[str, Any]:
+    """
+    Compile a BASIC source file, writing the pseudocode next to the output file.
+
+    Args:
+        input_file: BASIC source file
+        output_file: Output .prg file
+        jobs: Number of processes used to generate pseudocode
+        cache_file: Line cache file; lines found in it are not compiled again
+        stream: Compile a chunk of lines at a time, writing the pseudocode as it
+            is generated (see compile_stream); jobs and cache_file are ignored
+            and no .prg file is written
+        pco: Write the pseudocode as a binary .pco file instead of text
+
+    Returns:
+        The build report
+    """
+    extension = ".pco" if pco else ".pseudocode"
+    pseudocode_file = os.path.splitext(output_file)[0] + extension
+
+    if stream:
+        lines, instructions = compile_stream(
+            input_file, pseudocode_file, CompileContext()
+        )
+        reused = 0
+    else:
+        with tracing.span("read", file=input_file):
+            with open(input_file) as f:
+                source = f.read()
+
+        lines = sum(1 for text in source.split("\n") if text.strip())
+        cache = LineCache(cache_file) if cache_file is not None else None
+        pseudo_code, reused = compile_source(source, CompileContext(), cache, jobs)
+        if cache is not None:
+            cache.save()
+        instructions = len(pseudo_code)
+
+        # Write the pseudocode to a text file
+        with tracing.span("write", file=pseudocode_file):
+            write_code(pseudocode_file, pseudo_code)
+    logger.debug("Pseudocode file PRG succesfully generated: {}", pseudocode_file)
+
+    if stream:
+        # The backend lowers the whole program at once (integer inference,
+        # layout), so it would undo the constant memory of a streamed build
+        logger.info("No PRG file written for streamed build {}", output_file)
+        prg_file = None
+    else:
+        prg_file = compile_binary(pseudo_code, output_file)
+
+    report = {
+        "input_file": input_file,
+        "pseudocode_file": pseudocode_file,
+        "prg_file": prg_file,
+        "lines": lines,
+        "reused_lines": reused,
+        "instructions": instructions,
+    }
+    if tracing.enabled:
+        tracing.emit("report", **report)
+    return report
 
-    # Write the pseudocode to a binary file
 
-    # binary = generate_code(ast, ctx)
+def compile_stream(
+    input_file: str, pseudocode_file: str, ctx: CompileContext
+) -> tuple[int, int]:
+    """
+    Compile a BASIC source file as a pipeline of generators: lines are read,
+    tokenized, parsed, translated and written a chunk at a time, so memory use
+    does not grow with the program and output is written while the input is
+    still being read. Only the jump targets, needed for the labels, are
+    collected beforehand, in a first pass over the file.
 
-    # write_prg(output_file, binary)
-    # print(f"Binary file PRG succesfully generated: {output_file}")
+    Args:
+        input_file: BASIC source file
+        pseudocode_file: Pseudocode file to write (see write_code)
+        ctx: Compilation context
+
+    Returns:
+        The number of source lines and of pseudocode instructions
+    """
+    with tracing.span("prescan", file=input_file) as event:
+        with open(input_file) as f:
+            jump_targets = scan_jump_targets(read_lines(f))
+        event["targets"] = len(jump_targets)
+    logger.debug("Jump targets: {}", len(jump_targets))
+
+    counts = {"lines": 0, "instructions": 0}
+
+    def counted(items: Iterable[str], key: str) -> Iterator[str]:
+        for item in items:
+            counts[key] += 1
+            yield item
+
+    with tracing.span("stream", file=input_file) as event:
+        with open(input_file) as f:
+            lines = counted(read_lines(f), "lines")
+            code = generate_stream(parse_lines(lines), ctx, jump_targets)
+            write_code(pseudocode_file, counted(code, "instructions"))
+        event.update(counts)
+    return counts["lines"], counts["instructions"]
+
+
+def compile_binary(code: Code | Iterable[str], output_file: str) -> str | None:
+    """
+    Compile pseudocode to machine code and write it to a .prg file. Programs
+    the backend cannot compile are reported, and get no .prg file.
+
+    Returns:
+        The .prg file, or None when it was not written
+    """
+    with tracing.span("native", file=output_file) as event:
+        try:
+            binary = generate_binary(code)
+        except BackendError as e:
+            logger.warning("No PRG file written for {}: {}", output_file, e)
+            event["error"] = str(e)
+            return None
+        write_prg(output_file, binary)
+        event["bytes"] = len(binary)
+    logger.debug("Binary file PRG succesfully generated: {}", output_file)
+    return output_file
+
+
+def write_code(filename: str, code: Code | Iterable[str]) -> None:
+    """
+    Write pseudocode, a Code or lines of text, to a file: binary for a .pco
+    file, text otherwise.
+    """
+    if filename.endswith(".pco"):
+        write_pco(filename, code)
+    else:
+        write_pseudocode(filename, code)
+
+
+def compile_source(
+    source: str, ctx: CompileContext, cache: LineCache | None = None, jobs: int = 1
+) -> tuple[Code | list[str], int]:
+    """
+    Compile BASIC source code to pseudocode.
+
+    Args:
+        source: The BASIC source code
+        ctx: Compilation context
+        cache: Line cache; lines found in it are not compiled again
+        jobs: Number of processes used to generate pseudocode
+
+    Returns:
+        The pseudocode and the number of lines reused from the cache. The
+        pseudocode is a Code when no cache is used, lines of text otherwise;
+        both iterate over lines of text.
+    """
+    if cache is None:
+        return _compile_source(source, ctx, jobs), 0
+    with tracing.span("incremental", jobs=jobs) as event:
+        pseudo_code, reused = generate_incremental(source, ctx, cache, jobs)
+        event["reused_lines"] = reused
+    return pseudo_code, reused
+
+
+def _compile_source(source: str, ctx: CompileContext, jobs: int) -> Code:
+    with tracing.span("scan") as event:
+        tokens = scan(source)
+        event["tokens"] = len(tokens)
+    logger.debug("Tokens: {}", len(tokens))
+
+    # Parse the tokens into an abstract syntax tree (AST)
+    with tracing.span("parse") as event:
+        ast = parse(tokens)
+        event["statements"] = len(ast)
+    logger.debug("AST: {} statements", len(ast))
+
+    logger.debug("Compile context: {}", ctx)
+
+    # Generate pseudocode
+    with tracing.span("codegen", jobs=jobs) as event:
+        pseudo_code = generate_ir(ast, ctx, jobs=jobs)
+        event["instructions"] = len(pseudo_code)
+    logger.debug("Generated pseudocode: {} lines", len(pseudo_code))
+    return pseudo_code
 
 
 if __name__ == "__main__":
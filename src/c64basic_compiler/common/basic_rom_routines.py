@@ -0,0 +1,71 @@
+# c64basic_compiler/common/basic_rom_routines.py
+
+# ---------------------------------------------------
+# BASIC ROM Routines - Commodore 64 (C64)
+# ---------------------------------------------------
+# Entry points of the BASIC V2 ROM used by compiled programs, mostly for
+# floating point arithmetic. FAC is the floating point accumulator, ARG the
+# second operand. Numbers in memory are 5 bytes long (see c64_float).
+# ---------------------------------------------------
+
+# -----------------------------------
+# Moving numbers
+# -----------------------------------
+MOVFM = 0xBBA2  # Load FAC from memory (A = low, Y = high address byte)
+MOVMF = 0xBBD4  # Store FAC, rounded, into memory (X = low, Y = high)
+CONUPK = 0xBA8C  # Load ARG from memory (A/Y)
+
+# -----------------------------------
+# Arithmetic
+# -----------------------------------
+FADD = 0xB867  # FAC = memory (A/Y) + FAC
+FSUB = 0xB850  # FAC = memory (A/Y) - FAC
+FMULT = 0xBA28  # FAC = memory (A/Y) * FAC
+FDIV = 0xBB0F  # FAC = memory (A/Y) / FAC
+FPWRT = 0xBF7B  # FAC = ARG ^ FAC
+NEGOP = 0xBFB4  # FAC = -FAC
+FCOMP = 0xBC5B  # Compare FAC with memory (A/Y): A = 0 (=), 1 (FAC >), $FF (<)
+SIGN = 0xBC2B  # A = sign of FAC: 0, 1 or $FF
+
+# -----------------------------------
+# Functions (argument and result in FAC)
+# -----------------------------------
+SGN = 0xBC39
+ABS = 0xBC58
+INT = 0xBCCC
+SQR = 0xBF71
+LOG = 0xB9EA
+EXP = 0xBFED
+COS = 0xE264
+SIN = 0xE26B
+TAN = 0xE2B4
+ATN = 0xE30E
+RND = 0xE097
+
+# -----------------------------------
+# Conversions
+# -----------------------------------
+FOUT = 0xBDDD  # FAC to a zero-terminated string at $0100 (address in A/Y)
+FIN = 0xBCF3  # Text at TXTPTR to FAC (call CHRGOT first)
+GIVAYF = 0xB391  # Signed 16-bit integer (A = high, Y = low byte) to FAC
+AYINT = 0xB1BF  # FAC to a signed 16-bit integer in FACMO/FACMO+1 (high first)
+GETADR = 0xB7F7  # FAC to an unsigned 16-bit integer in LINNUM
+
+# -----------------------------------
+# Errors
+# -----------------------------------
+ERROR = 0xA437  # Print the BASIC error number X and return to READY
+
+ERROR_ILLEGAL_QUANTITY = 14
+ERROR_STRING_TOO_LONG = 23
+
+# -----------------------------------
+# Memory used by the routines above
+# -----------------------------------
+LINNUM = 0x14  # Result of GETADR (2 bytes)
+FACEXP = 0x61  # FAC exponent: 0 when FAC is 0
+FACMO = 0x64  # Result of AYINT (high byte, then low byte)
+CHRGOT = 0x0079  # Read the character at TXTPTR again
+TXTPTR = 0x7A  # Pointer into the text being interpreted (2 bytes)
+PNTR = 0xD3  # Cursor column in the logical screen line
+BUF = 0x0200  # BASIC input buffer (89 bytes)
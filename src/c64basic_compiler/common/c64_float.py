@@ -0,0 +1,81 @@
+# c64basic_compiler/common/c64_float.py
+
+"""
+Commodore 64 floating point numbers.
+
+BASIC keeps numbers in memory in 5 bytes (MFLPT format): an exponent byte,
+biased by 128 (0 means the number is 0), and a 32-bit big-endian mantissa
+in 0.5..1 whose always-set top bit is replaced by the sign bit.
+"""
+
+import math
+
+
+def to_mflpt(value: float) -> bytes:
+    """
+    Encode a number in the 5-byte format of BASIC, rounding the mantissa to
+    32 bits. Numbers too small for the format become 0.
+
+    Raises:
+        OverflowError: When the number is too large for the format
+    """
+    if value == 0:
+        return bytes(5)
+    if math.isnan(value) or math.isinf(value):
+        raise OverflowError(f"{value} has no C64 representation")
+    mantissa, exponent = math.frexp(abs(value))
+    # Exact: the mantissa has 53 bits, 21 of them after the point
+    bits = int(mantissa * 2**32 + 0.5)
+    if bits == 1 << 32:
+        bits >>= 1
+        exponent += 1
+    exponent += 128
+    if exponent > 255:
+        raise OverflowError(f"{value} is too large for a C64 number")
+    if exponent < 1:
+        return bytes(5)
+    bits &= 0x7FFFFFFF
+    if value < 0:
+        bits |= 0x80000000
+    return bytes([exponent]) + bits.to_bytes(4, "big")
+
+
+def from_mflpt(data: bytes) -> float:
+    """
+    Decode a number in the 5-byte format of BASIC.
+    """
+    if data[0] == 0:
+        return 0.0
+    bits = int.from_bytes(data[1:5], "big")
+    value = math.ldexp(bits | 0x80000000, data[0] - 128 - 32)
+    return -value if bits & 0x80000000 else value
+
+
+def exact(numerator: int, denominator: int = 1) -> int | float | None:
+    """
+    Return the number numerator / denominator when BASIC stores it without
+    rounding: a fraction with a power of two denominator, at most 32 bits of
+    mantissa and an exponent in range. Whole numbers are returned as int.
+
+    Returns:
+        The number, or None when BASIC would round it or cannot store it
+    """
+    if numerator == 0:
+        return 0
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+    divisor = math.gcd(numerator, denominator)
+    numerator //= divisor
+    denominator //= divisor
+    if denominator & (denominator - 1):
+        return None
+    magnitude = abs(numerator)
+    # Bits of the mantissa, without the trailing zeros
+    if (magnitude >> ((magnitude & -magnitude).bit_length() - 1)).bit_length() > 32:
+        return None
+    exponent = magnitude.bit_length() - (denominator.bit_length() - 1) + 128
+    if not 1 <= exponent <= 255:
+        return None
+    if denominator == 1:
+        return numerator
+    return numerator / denominator
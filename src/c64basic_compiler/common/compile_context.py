@@ -2,6 +2,7 @@
 
 import json
 
+from c64basic_compiler.common.expression_cache import ExpressionCache
 from c64basic_compiler.common.string_area import StringAreaAllocator
 from c64basic_compiler.common.symbol_table import SymbolTable
 
@@ -9,13 +10,20 @@ from c64basic_compiler.common.symbol_table import SymbolTable
 class CompileContext:
     """
     Holds global compilation state for the current program.
+
+    The expression cache is the only state that may outlive a program: pass
+    the same ExpressionCache to several contexts to share compiled
+    expressions between compilations.
     """
 
-    def __init__(self):
+    def __init__(self, expression_cache: ExpressionCache | None = None):
         self.symbol_table = SymbolTable()
         self.label_counter = 0
         self.loop_stack = []
         self.string_area = StringAreaAllocator()
+        self.expression_cache = (
+            expression_cache if expression_cache is not None else ExpressionCache()
+        )
 
     def new_label(self, prefix="L") -> str:
         """
@@ -38,6 +46,7 @@ class CompileContext:
             "string_area": repr(
                 self.string_area
             ),  # Assuming StringAreaAllocator has a __repr__ method
+            "expression_cache": self.expression_cache.stats(),
         }
 
     def __repr__(self) -> str:
@@ -0,0 +1,97 @@
+# c64basic_compiler/common/expression_cache.py
+
+from collections import OrderedDict
+from collections.abc import Hashable
+
+DEFAULT_MAXSIZE = 1024
+
+# Compiled expression: its (mnemonic, operand) instructions
+Compiled = tuple[tuple[str, str | None], ...]
+
+
+class ExpressionCache:
+    """
+    Bounded LRU cache of compiled expressions.
+
+    Keys are normalized token sequences and values are immutable instruction
+    tuples, so a cached result can be shared by every statement (and every
+    compilation) that uses the same expression.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        if maxsize < 0:
+            raise ValueError(f"Cache size must not be negative, got {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, Compiled] = OrderedDict()
+
+    def get(self, key: Hashable) -> Compiled | None:
+        """
+        Return the cached pseudocode for key, or None (counted as a miss).
+        """
+        code = self._entries.get(key)
+        if code is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return code
+
+    def put(self, key: Hashable, code: Compiled) -> None:
+        """
+        Store the pseudocode for key, evicting the least recently used entries.
+        """
+        if self.maxsize == 0:
+            return
+        self._entries[key] = code
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def resize(self, maxsize: int) -> None:
+        """
+        Change the maximum number of entries, evicting as needed.
+        """
+        if maxsize < 0:
+            raise ValueError(f"Cache size must not be negative, got {maxsize}")
+        self.maxsize = maxsize
+        self._evict()
+
+    def clear(self) -> None:
+        """
+        Drop every entry and reset the counters.
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return the cache counters as a dictionary.
+        """
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __repr__(self) -> str:
+        return (
+            f"<ExpressionCache size={len(self._entries)} maxsize={self.maxsize} "
+            f"hits={self.hits} misses={self.misses} evictions={self.evictions}>"
+        )
@@ -0,0 +1,164 @@
+# c64basic_compiler/common/line_cache.py
+
+import hashlib
+import json
+import os
+from functools import cache
+from typing import Any
+
+import c64basic_compiler
+from c64basic_compiler import __version__
+
+# Bumped when the layout of the cache file changes
+CACHE_FORMAT = 1
+
+
+def source_fingerprint(root: str) -> str:
+    """
+    Hash of the path and contents of every Python file below a directory.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    paths: list[str] = []
+    for directory, _, files in os.walk(root):
+        paths.extend(os.path.join(directory, name) for name in files)
+    for path in sorted(p for p in paths if p.endswith(".py")):
+        digest.update(os.path.relpath(path, root).replace(os.sep, "/").encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+@cache
+def compiler_version() -> str:
+    """
+    Version of the compiler, as written in caches: the package version plus a
+    fingerprint of its sources, so any change to the code generation makes
+    the caches of earlier builds cold even when the version is not bumped.
+    """
+    root = os.path.dirname(c64basic_compiler.__file__)
+    return f"{__version__}+{source_fingerprint(root)}"
+
+
+def line_hash(text: str) -> str:
+    """
+    Hash of the text of a source line, used as its cache key.
+    """
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class LineCache:
+    """
+    On-disk cache of the pseudocode generated for single source lines.
+
+    Lines are keyed by the hash of their text (line number included). For
+    each line the cache keeps its line number and jump targets, which are
+    needed to place the labels of the whole program, and its pseudocode, which
+    also depends on whether the line is itself a jump target.
+
+    A cache written by another compiler version, or by a compiler built from
+    other sources, is ignored. Only the entries
+    used by the last build are saved, so the file does not grow with edits.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lines: dict[str, list[Any]] = {}
+        self._code: dict[str, list[str]] = {}
+        self._used_lines: set[str] = set()
+        self._used_code: set[str] = set()
+        self._changed = False
+        if path is not None and os.path.isfile(path):
+            self._load(path)
+
+    def _load(self, path: str) -> None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return  # An unreadable cache is just a cold one
+        if (
+            not isinstance(data, dict)
+            or data.get("format") != CACHE_FORMAT
+            or data.get("version") != compiler_version()
+        ):
+            return
+        self._lines = data.get("lines", {})
+        self._code = data.get("code", {})
+
+    def get_line(self, digest: str) -> tuple[int, list[int]] | None:
+        """
+        Return the line number and jump targets of a line, or None.
+        """
+        entry = self._lines.get(digest)
+        if entry is not None:
+            self._used_lines.add(digest)
+            return entry[0], entry[1]
+        return None
+
+    def put_line(self, digest: str, line: int, targets: list[int]) -> None:
+        """
+        Store the line number and jump targets of a line.
+        """
+        self._lines[digest] = [line, targets]
+        self._used_lines.add(digest)
+        self._changed = True
+
+    def get_code(self, digest: str, is_target: bool) -> list[str] | None:
+        """
+        Return the pseudocode of a line, or None (counted as a miss).
+        """
+        key = f"{digest}:{int(is_target)}"
+        code = self._code.get(key)
+        if code is None:
+            self.misses += 1
+            return None
+        self._used_code.add(key)
+        self.hits += 1
+        return code
+
+    def put_code(self, digest: str, is_target: bool, code: list[str]) -> None:
+        """
+        Store the pseudocode of a line.
+        """
+        key = f"{digest}:{int(is_target)}"
+        self._code[key] = code
+        self._used_code.add(key)
+        self._changed = True
+
+    def save(self) -> None:
+        """
+        Write the entries used since the cache was loaded to its file, unless
+        they are exactly the entries that were loaded.
+        """
+        if self.path is None:
+            return
+        if (
+            not self._changed
+            and len(self._used_lines) == len(self._lines)
+            and len(self._used_code) == len(self._code)
+        ):
+            return
+        data = {
+            "format": CACHE_FORMAT,
+            "version": compiler_version(),
+            "lines": {key: self._lines[key] for key in self._used_lines},
+            "code": {key: self._code[key] for key in self._used_code},
+        }
+        # Written aside and renamed, so an interrupted build leaves the old cache
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(data, separators=(",", ":")))
+        os.replace(temp_path, self.path)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Lookup counters and sizes, e.g. for build reports.
+        """
+        return {
+            "lines": len(self._lines),
+            "code": len(self._code),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
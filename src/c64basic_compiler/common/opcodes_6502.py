@@ -98,3 +98,125 @@ LDA_ABSOLUTE_Y = 0xB9  # Load Accumulator from absolute address, Y offset
 STA_ABSOLUTE_Y = 0x99  # Store Accumulator to absolute address, Y offset
 LDA_INDIRECT_X = 0xA1  # Load Accumulator from indirect address, X offset
 STA_INDIRECT_X = 0x81  # Store Accumulator to indirect address, X offset
+
+# -------------------------------
+# Addressing modes and opcode table (used by the assembler)
+# -------------------------------
+
+IMPLIED = "imp"  # RTS
+ACCUMULATOR = "acc"  # ASL A
+IMMEDIATE = "imm"  # LDA #$05
+ZERO_PAGE = "zp"  # LDA $FB
+ZERO_PAGE_X = "zpx"  # LDA $FB,X
+ZERO_PAGE_Y = "zpy"  # LDX $FB,Y
+ABSOLUTE = "abs"  # LDA $C000
+ABSOLUTE_X = "absx"  # LDA $C000,X
+ABSOLUTE_Y = "absy"  # LDA $C000,Y
+INDIRECT = "ind"  # JMP ($0300)
+INDIRECT_X = "indx"  # LDA ($FB,X)
+INDIRECT_Y = "indy"  # LDA ($FB),Y
+RELATIVE = "rel"  # BNE label
+
+# Bytes taken by an instruction in each addressing mode
+MODE_SIZES = {
+    IMPLIED: 1,
+    ACCUMULATOR: 1,
+    IMMEDIATE: 2,
+    ZERO_PAGE: 2,
+    ZERO_PAGE_X: 2,
+    ZERO_PAGE_Y: 2,
+    ABSOLUTE: 3,
+    ABSOLUTE_X: 3,
+    ABSOLUTE_Y: 3,
+    INDIRECT: 3,
+    INDIRECT_X: 2,
+    INDIRECT_Y: 2,
+    RELATIVE: 2,
+}
+
+# Zero page mode used instead of each absolute mode when the address fits
+ZERO_PAGE_MODES = {
+    ABSOLUTE: ZERO_PAGE,
+    ABSOLUTE_X: ZERO_PAGE_X,
+    ABSOLUTE_Y: ZERO_PAGE_Y,
+}
+
+_ALU = ("imm", "zp", "zpx", "abs", "absx", "absy", "indx", "indy")
+_SHIFT = ("acc", "zp", "zpx", "abs", "absx")
+
+
+def _modes(modes: tuple[str, ...], base: tuple[int, ...]) -> dict[str, int]:
+    return dict(zip(modes, base, strict=True))
+
+
+# Opcode of every official instruction, by mnemonic and addressing mode
+OPCODE_TABLE = {
+    "ADC": _modes(_ALU, (0x69, 0x65, 0x75, 0x6D, 0x7D, 0x79, 0x61, 0x71)),
+    "AND": _modes(_ALU, (0x29, 0x25, 0x35, 0x2D, 0x3D, 0x39, 0x21, 0x31)),
+    "ASL": _modes(_SHIFT, (0x0A, 0x06, 0x16, 0x0E, 0x1E)),
+    "BCC": {RELATIVE: BCC},
+    "BCS": {RELATIVE: BCS},
+    "BEQ": {RELATIVE: BEQ},
+    "BIT": {ZERO_PAGE: 0x24, ABSOLUTE: 0x2C},
+    "BMI": {RELATIVE: BMI},
+    "BNE": {RELATIVE: BNE},
+    "BPL": {RELATIVE: BPL},
+    "BRK": {IMPLIED: BRK},
+    "BVC": {RELATIVE: BVC},
+    "BVS": {RELATIVE: BVS},
+    "CLC": {IMPLIED: CLC},
+    "CLD": {IMPLIED: CLD},
+    "CLI": {IMPLIED: CLI},
+    "CLV": {IMPLIED: CLV},
+    "CMP": _modes(_ALU, (0xC9, 0xC5, 0xD5, 0xCD, 0xDD, 0xD9, 0xC1, 0xD1)),
+    "CPX": {IMMEDIATE: 0xE0, ZERO_PAGE: 0xE4, ABSOLUTE: 0xEC},
+    "CPY": {IMMEDIATE: 0xC0, ZERO_PAGE: 0xC4, ABSOLUTE: 0xCC},
+    "DEC": {ZERO_PAGE: 0xC6, ZERO_PAGE_X: 0xD6, ABSOLUTE: 0xCE, ABSOLUTE_X: 0xDE},
+    "DEX": {IMPLIED: DEX},
+    "DEY": {IMPLIED: DEY},
+    "EOR": _modes(_ALU, (0x49, 0x45, 0x55, 0x4D, 0x5D, 0x59, 0x41, 0x51)),
+    "INC": {ZERO_PAGE: 0xE6, ZERO_PAGE_X: 0xF6, ABSOLUTE: 0xEE, ABSOLUTE_X: 0xFE},
+    "INX": {IMPLIED: INX},
+    "INY": {IMPLIED: INY},
+    "JMP": {ABSOLUTE: JMP_ABSOLUTE, INDIRECT: 0x6C},
+    "JSR": {ABSOLUTE: JSR_ABSOLUTE},
+    "LDA": _modes(_ALU, (0xA9, 0xA5, 0xB5, 0xAD, 0xBD, 0xB9, 0xA1, 0xB1)),
+    "LDX": {
+        IMMEDIATE: 0xA2,
+        ZERO_PAGE: 0xA6,
+        ZERO_PAGE_Y: 0xB6,
+        ABSOLUTE: 0xAE,
+        ABSOLUTE_Y: 0xBE,
+    },
+    "LDY": {
+        IMMEDIATE: 0xA0,
+        ZERO_PAGE: 0xA4,
+        ZERO_PAGE_X: 0xB4,
+        ABSOLUTE: 0xAC,
+        ABSOLUTE_X: 0xBC,
+    },
+    "LSR": _modes(_SHIFT, (0x4A, 0x46, 0x56, 0x4E, 0x5E)),
+    "NOP": {IMPLIED: NOP},
+    "ORA": _modes(_ALU, (0x09, 0x05, 0x15, 0x0D, 0x1D, 0x19, 0x01, 0x11)),
+    "PHA": {IMPLIED: PHA},
+    "PHP": {IMPLIED: PHP},
+    "PLA": {IMPLIED: PLA},
+    "PLP": {IMPLIED: PLP},
+    "ROL": _modes(_SHIFT, (0x2A, 0x26, 0x36, 0x2E, 0x3E)),
+    "ROR": _modes(_SHIFT, (0x6A, 0x66, 0x76, 0x6E, 0x7E)),
+    "RTI": {IMPLIED: RTI},
+    "RTS": {IMPLIED: RTS},
+    "SBC": _modes(_ALU, (0xE9, 0xE5, 0xF5, 0xED, 0xFD, 0xF9, 0xE1, 0xF1)),
+    "SEC": {IMPLIED: SEC},
+    "SED": {IMPLIED: SED},
+    "SEI": {IMPLIED: SEI},
+    "STA": _modes(_ALU[1:], (0x85, 0x95, 0x8D, 0x9D, 0x99, 0x81, 0x91)),
+    "STX": {ZERO_PAGE: 0x86, ZERO_PAGE_Y: 0x96, ABSOLUTE: 0x8E},
+    "STY": {ZERO_PAGE: 0x84, ZERO_PAGE_X: 0x94, ABSOLUTE: 0x8C},
+    "TAX": {IMPLIED: TAX},
+    "TAY": {IMPLIED: TAY},
+    "TSX": {IMPLIED: TSX},
+    "TXA": {IMPLIED: TXA},
+    "TXS": {IMPLIED: TXS},
+    "TYA": {IMPLIED: TYA},
+}
@@ -1,14 +1,32 @@
 # c64basic_compiler/common/symbol_table.py
 
+from typing import Any
+
+# Bytes of storage of each type of variable: 5-byte floating point numbers,
+# 2-byte integers (A%) and strings (A$) of a length byte and 255 characters
+VARIABLE_SIZES = {"number": 5, "integer": 2, "string": 256}
+
+
+def variable_type(name: str) -> str:
+    """
+    Type of a variable, given by the suffix of its name as in C64 BASIC:
+    $ for strings, % for integers.
+    """
+    if name.endswith("$"):
+        return "string"
+    if name.endswith("%"):
+        return "integer"
+    return "number"
+
 
 class SymbolTable:
     """
     Symbol table for variables used in BASIC.
-    Stores name, offset, and type (number/string).
+    Stores name, offset, and type (number/integer/string).
     """
 
-    def __init__(self, base_address=0xC000):
-        self.table = {}
+    def __init__(self, base_address: int = 0xC000) -> None:
+        self.table: dict[str, dict[str, Any]] = {}
         self.offset = 0
         self.base_address = base_address
 
@@ -26,14 +44,20 @@ class SymbolTable:
     def register(
         self,
         name: str,
-        size: int,
-        vtype: str = "number",
+        size: int | None = None,
+        vtype: str | None = None,
     ) -> int:
         """
         Register a variable if it doesn't exist. Returns absolute address.
+        The type defaults to the one of the name, and the size to the one
+        of the type.
         """
 
         name = self._normalize_name(name)
+        if vtype is None:
+            vtype = variable_type(name)
+        if size is None:
+            size = VARIABLE_SIZES[vtype]
         if name not in self.table:
             self.table[name] = {
                 "offset": self.offset,
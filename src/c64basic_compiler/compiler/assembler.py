@@ -0,0 +1,420 @@
+"""
+6502 assembler of the machine code backend.
+
+A program is built as a list of statements, then laid out at an origin
+address: every label gets its address and every instruction is encoded.
+Statements are added one at a time (op, label, data, word) or as assembly
+source, in the usual syntax:
+
+    loop:   LDA (ptr1),Y
+            JSR CHROUT
+            DEY
+            BNE loop
+
+Operands are numbers ($hex, %binary or decimal), symbols, or symbols plus or
+minus a number, with < or > in front for their low or high byte. Symbols are
+labels, equates (equ) and reserved memory (reserve), which is laid out after
+the code and data and is not part of the assembled bytes. Zero page modes
+are used for operands known to be below $100 when the instruction is added:
+numbers and equates, never labels.
+
+Branches added with branch() reach any label: they are relaxed when the
+program is laid out, taking 2 bytes when the target is in range and 5, the
+inverted branch over a JMP, when it is not.
+"""
+
+import re
+from typing import Any, NamedTuple
+
+from c64basic_compiler.common.opcodes_6502 import (
+    ABSOLUTE,
+    ABSOLUTE_X,
+    ABSOLUTE_Y,
+    ACCUMULATOR,
+    IMMEDIATE,
+    IMPLIED,
+    INDIRECT,
+    INDIRECT_X,
+    INDIRECT_Y,
+    MODE_SIZES,
+    OPCODE_TABLE,
+    RELATIVE,
+    ZERO_PAGE_MODES,
+)
+from c64basic_compiler.exceptions import AssemblyError
+
+BRANCHES = frozenset(
+    mnemonic for mnemonic, modes in OPCODE_TABLE.items() if RELATIVE in modes
+)
+
+# Branch taken on the opposite condition of each branch
+INVERTED_BRANCHES = {
+    "BCC": "BCS",
+    "BCS": "BCC",
+    "BEQ": "BNE",
+    "BNE": "BEQ",
+    "BMI": "BPL",
+    "BPL": "BMI",
+    "BVC": "BVS",
+    "BVS": "BVC",
+}
+
+# Size of a long branch: the inverted branch over a JMP
+LONG_BRANCH_SIZE = 5
+
+_EXPRESSION = re.compile(
+    r"([<>]?)\s*(?:\$([0-9A-Fa-f]+)|%([01]+)|(\d+)|([A-Za-z_][\w.]*))"
+    r"(?:\s*([+-])\s*(\d+|\$[0-9A-Fa-f]+))?$"
+)
+_LABEL = re.compile(r"([A-Za-z_][\w.]*):")
+
+
+class Ref(NamedTuple):
+    """
+    Operand resolved when the program is laid out: the address of a symbol
+    plus an offset, or its low (<) or high (>) byte.
+    """
+
+    symbol: str
+    offset: int = 0
+    part: str = ""
+
+
+Operand = int | Ref | None
+
+
+def _byte_part(value: int, part: str) -> int:
+    if part == "<":
+        return value & 0xFF
+    if part == ">":
+        return (value >> 8) & 0xFF
+    return value
+
+
+# Addressing mode used for each mnemonic, mode and "operand is a byte" flag
+_MODES: dict[tuple[str, str, bool], str] = {}
+
+
+def _addressing_mode(mnemonic: str, mode: str, zero_page: bool) -> str:
+    modes = OPCODE_TABLE.get(mnemonic)
+    if modes is None:
+        raise AssemblyError(f"Unknown instruction {mnemonic}")
+    if mnemonic in BRANCHES and mode == ABSOLUTE:
+        mode = RELATIVE
+    elif zero_page and ZERO_PAGE_MODES.get(mode) in modes:
+        mode = ZERO_PAGE_MODES[mode]
+    if mode not in modes:
+        raise AssemblyError(f"{mnemonic} has no {mode} addressing mode")
+    return mode
+
+
+class Assembler:
+    """
+    Collects 6502 instructions, data and labels, and assembles them.
+    """
+
+    def __init__(self) -> None:
+        # ("op", mnemonic, mode, operand), ("branch", mnemonic, operand),
+        # ("label", name), ("data", bytes) or ("word", operand)
+        self.items: list[tuple[Any, ...]] = []
+        self.equates: dict[str, int] = {}
+        self.reserved: list[tuple[str, int]] = []
+        # Set by assemble(): the address of every symbol, the end of the
+        # assembled bytes and the end of the reserved memory, and the items
+        # that are long branches
+        self.symbols: dict[str, int] = {}
+        self.long_branches: set[int] = set()
+        self.end = 0
+        self.top = 0
+
+    def equ(self, name: str, value: int) -> None:
+        """
+        Define a symbol with a constant value.
+        """
+        self.equates[name] = value
+
+    def label(self, name: str) -> None:
+        """
+        Define a label at the current position.
+        """
+        self.items.append(("label", name))
+
+    def op(self, mnemonic: str, mode: str = IMPLIED, operand: Operand = None) -> None:
+        """
+        Add an instruction. Absolute modes become zero page modes when the
+        operand is a number below $100, and branches take their target as an
+        absolute operand.
+
+        Raises:
+            AssemblyError: When the instruction has no such addressing mode
+        """
+        zero_page = type(operand) is int and 0 <= operand < 0x100
+        key = (mnemonic, mode, zero_page)
+        final = _MODES.get(key)
+        if final is None:
+            final = _MODES[key] = _addressing_mode(mnemonic, mode, zero_page)
+        self.items.append(("op", mnemonic, final, operand))
+
+    def branch(self, mnemonic: str, target: Ref) -> None:
+        """
+        Add a conditional branch to a label at any distance (see layout).
+
+        Raises:
+            AssemblyError: When the instruction is not a conditional branch
+        """
+        if mnemonic not in INVERTED_BRANCHES:
+            raise AssemblyError(f"{mnemonic} is not a conditional branch")
+        self.items.append(("branch", mnemonic, target))
+
+    def data(self, data: bytes) -> None:
+        """
+        Add bytes of data.
+        """
+        self.items.append(("data", bytes(data)))
+
+    def word(self, operand: int | Ref) -> None:
+        """
+        Add a 16-bit little endian word.
+        """
+        self.items.append(("word", operand))
+
+    def reserve(self, name: str, size: int) -> None:
+        """
+        Reserve memory after the code and data, which is not initialised.
+        """
+        self.reserved.append((name, size))
+
+    def source(self, text: str) -> None:
+        """
+        Add the statements of assembly source. Besides instructions and
+        labels ("name:"), lines may hold the directives ".byte a, b, ...",
+        ".word a" and "name: .res size" (see reserve).
+
+        Raises:
+            AssemblyError: When a line cannot be parsed
+        """
+        for line in text.split("\n"):
+            line = line.split(";", 1)[0].strip()
+            match = _LABEL.match(line)
+            if match:
+                name = match.group(1)
+                line = line[match.end() :].strip()
+                if line.startswith(".res"):
+                    size = self.parse_operand(line[4:])
+                    if not isinstance(size, int):
+                        raise AssemblyError(f"Invalid size: {line[4:].strip()}")
+                    self.reserve(name, size)
+                    continue
+                self.label(name)
+            if line:
+                self._statement(line)
+
+    def _statement(self, line: str) -> None:
+        mnemonic, _, operand = line.partition(" ")
+        operand = operand.strip()
+        if mnemonic == ".byte":
+            data = bytearray()
+            for item in operand.split(","):
+                byte = self.parse_operand(item)
+                if not isinstance(byte, int) or not 0 <= byte < 0x100:
+                    raise AssemblyError(f"Invalid byte: {item}")
+                data.append(byte)
+            self.data(bytes(data))
+        elif mnemonic == ".word":
+            self.word(self.parse_operand(operand))
+        else:
+            mode, value = self._parse_mode(operand)
+            self.op(mnemonic.upper(), mode, value)
+
+    def _parse_mode(self, text: str) -> tuple[str, Operand]:
+        upper = text.upper().replace(" ", "")
+        if not text:
+            return IMPLIED, None
+        if upper == "A":
+            return ACCUMULATOR, None
+        if text.startswith("#"):
+            return IMMEDIATE, self.parse_operand(text[1:])
+        if upper.startswith("(") and upper.endswith(",X)"):
+            return INDIRECT_X, self.parse_operand(text[1:].rsplit(",", 1)[0])
+        if upper.startswith("(") and upper.endswith("),Y"):
+            return INDIRECT_Y, self.parse_operand(text[1:].rsplit(")", 1)[0])
+        if upper.startswith("("):
+            return INDIRECT, self.parse_operand(text[1:].rstrip(")"))
+        if upper.endswith(",X"):
+            return ABSOLUTE_X, self.parse_operand(text.rsplit(",", 1)[0])
+        if upper.endswith(",Y"):
+            return ABSOLUTE_Y, self.parse_operand(text.rsplit(",", 1)[0])
+        return ABSOLUTE, self.parse_operand(text)
+
+    def parse_operand(self, text: str) -> int | Ref:
+        """
+        Parse an operand expression. Equates are replaced by their value.
+
+        Raises:
+            AssemblyError: When the text is not a valid expression
+        """
+        match = _EXPRESSION.match(text.strip())
+        if not match:
+            raise AssemblyError(f"Invalid operand: {text}")
+        part, hexadecimal, binary, decimal, symbol, sign, offset = match.groups()
+        adjustment = 0
+        if offset:
+            adjustment = int(offset[1:], 16) if offset[0] == "$" else int(offset)
+            if sign == "-":
+                adjustment = -adjustment
+        if symbol is not None and symbol not in self.equates:
+            return Ref(symbol, adjustment, part)
+        if symbol is not None:
+            value = self.equates[symbol]
+        elif hexadecimal is not None:
+            value = int(hexadecimal, 16)
+        elif binary is not None:
+            value = int(binary, 2)
+        else:
+            value = int(decimal)
+        return _byte_part(value + adjustment, part)
+
+    def assemble(self, origin: int) -> bytearray:
+        """
+        Lay out the program at an address and encode it.
+
+        Raises:
+            AssemblyError: When a symbol is undefined or defined twice, an
+                operand does not fit its addressing mode or a branch target
+                is out of range
+        """
+        self.layout(origin)
+        return self.encode(origin)
+
+    def layout(self, origin: int) -> None:
+        """
+        Give every symbol its address for a program at an address, and set
+        end and top.
+
+        Branches added with branch() start short, and the ones whose target
+        is out of range become long until all are in range. Branches only
+        grow, and moving code apart never brings a target back in range, so
+        a few passes are enough.
+
+        Raises:
+            AssemblyError: When a symbol is undefined or defined twice
+        """
+        self.long_branches = long_branches = set()
+        while True:
+            branches = self._place(origin)
+            grown = [
+                index
+                for index, address, target in branches
+                if not -128 <= self.resolve(target) - (address + 2) <= 127
+            ]
+            if not grown:
+                return
+            long_branches.update(grown)
+
+    def _place(self, origin: int) -> list[tuple[int, int, Ref]]:
+        """
+        Give every symbol its address, with the current long branches.
+
+        Returns:
+            The index, address and target of every short branch
+        """
+        self.symbols = symbols = dict(self.equates)
+        long_branches = self.long_branches
+        branches = []
+        address = origin
+        for index, item in enumerate(self.items):
+            kind = item[0]
+            if kind == "op":
+                address += MODE_SIZES[item[2]]
+            elif kind == "branch":
+                if index in long_branches:
+                    address += LONG_BRANCH_SIZE
+                else:
+                    branches.append((index, address, item[2]))
+                    address += 2
+            elif kind == "label":
+                if item[1] in symbols:
+                    raise AssemblyError(f"Symbol {item[1]} defined twice")
+                symbols[item[1]] = address
+            elif kind == "data":
+                address += len(item[1])
+            else:
+                address += 2
+        self.end = address
+        for name, size in self.reserved:
+            if name in symbols:
+                raise AssemblyError(f"Symbol {name} defined twice")
+            symbols[name] = address
+            address += size
+        self.top = address
+        return branches
+
+    def encode(self, origin: int) -> bytearray:
+        """
+        Encode a program laid out at an address (see layout).
+
+        Raises:
+            AssemblyError: When a symbol is undefined, an operand does not fit
+                its addressing mode or a branch target is out of range
+        """
+        out = bytearray()
+        long_branches = self.long_branches
+        for index, item in enumerate(self.items):
+            kind = item[0]
+            if kind == "op":
+                self._encode(out, origin + len(out), item[1], item[2], item[3])
+            elif kind == "branch":
+                if index in long_branches:
+                    # Skip the JMP on the opposite condition
+                    out.append(OPCODE_TABLE[INVERTED_BRANCHES[item[1]]][RELATIVE])
+                    out.append(3)
+                    self._encode(out, origin + len(out), "JMP", ABSOLUTE, item[2])
+                else:
+                    self._encode(out, origin + len(out), item[1], RELATIVE, item[2])
+            elif kind == "data":
+                out += item[1]
+            elif kind == "word":
+                value = self.resolve(item[1])
+                out += (value & 0xFFFF).to_bytes(2, "little")
+        return out
+
+    def resolve(self, operand: Operand) -> int:
+        """
+        Value of an operand, once the program is laid out.
+
+        Raises:
+            AssemblyError: When the operand is missing or refers to an
+                undefined symbol
+        """
+        if isinstance(operand, int):
+            return operand
+        if operand is None:
+            raise AssemblyError("Missing operand")
+        address = self.symbols.get(operand.symbol)
+        if address is None:
+            raise AssemblyError(f"Undefined symbol {operand.symbol}")
+        return _byte_part(address + operand.offset, operand.part)
+
+    def _encode(
+        self, out: bytearray, address: int, mnemonic: str, mode: str, operand: Operand
+    ) -> None:
+        out.append(OPCODE_TABLE[mnemonic][mode])
+        size = MODE_SIZES[mode]
+        if size == 1:
+            return
+        value = self.resolve(operand)
+        if mode == RELATIVE:
+            offset = value - (address + 2)
+            if not -128 <= offset <= 127:
+                raise AssemblyError(
+                    f"{mnemonic} to {operand} at ${address:04X} out of range"
+                )
+            out.append(offset & 0xFF)
+        elif size == 2:
+            if not 0 <= value < 0x100:
+                raise AssemblyError(f"{mnemonic} operand {operand} is not a byte")
+            out.append(value)
+        else:
+            if not 0 <= value <= 0xFFFF:
+                raise AssemblyError(f"{mnemonic} operand {operand} is not an address")
+            out += value.to_bytes(2, "little")
@@ -0,0 +1,1395 @@
+"""
+Machine code backend.
+
+Lowers pseudocode into 6502 machine code that runs on a C64 with its BASIC
+ROM, which does the floating point arithmetic. The pseudocode stack is not
+kept at run time: the backend follows the values on it while lowering, so
+most operands are used where they are, by address.
+
+- Numbers are computed in FAC. The left operand of an operator is the
+  address of the constant or variable it is in or, when it had to be moved
+  out of FAC for the right operand, of its spill slot.
+- Strings are the address of a constant, a variable or a temporary buffer.
+- Variables that only hold whole numbers that fit in 16 bits (see
+  inference) are kept in 2 bytes. Adding, subtracting and comparing them,
+  AND, OR and NOT, shifts for powers of two and the NEXT of integer FOR
+  counters are done with 16-bit instructions when the result is known to
+  fit; the result is kept in an integer slot. Integers are converted to
+  floating point where they are used with other numbers. Integer (%)
+  variables are always kept in 2 bytes.
+- The depth of the stack is known at every instruction, so each spill slot,
+  integer slot and string buffer has a fixed address.
+
+Memory layout of a compiled program:
+
+    $0801  BASIC line "10 SYS 2062" (see compiler.codegen.basic_header)
+    $080E  program code, runtime routines (see runtime), constants
+           variables, FOR loop records, spill slots, integer slots and
+           string buffers, zeroed when the program starts
+    $A000  BASIC ROM
+
+FOR loops are paired with their NEXT in program order. Strings use a
+length byte and 255 characters of storage each, so no garbage collection
+is needed.
+"""
+
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from c64basic_compiler.common.c64_float import to_mflpt
+from c64basic_compiler.common.opcodes_6502 import (
+    ABSOLUTE,
+    ACCUMULATOR,
+    IMMEDIATE,
+    INDIRECT_Y,
+)
+from c64basic_compiler.common.symbol_table import SymbolTable
+from c64basic_compiler.common.text_to_petscii import text_to_petscii
+from c64basic_compiler.compiler import runtime
+from c64basic_compiler.compiler.assembler import Assembler, Ref
+from c64basic_compiler.compiler.inference import (
+    BOOLEAN,
+    BYTE,
+    SIGNED,
+    Integers,
+    Range,
+    add,
+    divide,
+    infer_integers,
+    integer,
+    logic_and,
+    logic_not,
+    logic_or,
+    multiply,
+    negate,
+    subtract,
+)
+from c64basic_compiler.exceptions import (
+    BackendError,
+    ProgramTooLargeError,
+    UnsupportedInstructionError,
+)
+from c64basic_compiler.pseudocode.ir import (
+    CONST_STRING,
+    MNEMONICS,
+    Code,
+)
+
+NUMBER = "number"
+STRING = "string"
+# Type of integer variables in the symbol table; on the stack, integers are
+# numbers with a range
+INTEGER = "integer"
+
+# First address used by the BASIC ROM
+MEMORY_TOP = 0xA000
+
+NUMBER_SIZE = 5
+INTEGER_SIZE = 2
+STRING_SIZE = 256
+# Limit, step and sign of the step of a FOR loop; only the limit for integer
+# counters, whose step is a constant
+FOR_RECORD_SIZE = 2 * NUMBER_SIZE + 1
+
+# Relations true for each comparison, as the bits of compare_result: 1 when
+# the left operand is greater, 2 when both are equal, 4 when it is less
+RELATIONS = {
+    "EQUAL": 2,
+    "NOT_EQUAL": 5,
+    "LESS": 4,
+    "LESS_EQUAL": 6,
+    "GREATER": 1,
+    "GREATER_EQUAL": 3,
+}
+
+# ROM routine of each operator: FAC = number at (A/Y) <op> FAC, and whether
+# the operands can be swapped
+ARITHMETIC = {
+    "ADD": ("FADD", True),
+    "SUB": ("FSUB", False),
+    "MUL": ("FMULT", True),
+    "DIV": ("FDIV", False),
+}
+
+# Runtime routines of the logic operators, which are commutative
+LOGIC = {"AND": "and_op", "OR": "or_op"}
+
+# Instructions and range of the result of the operators on integers
+INTEGER_ARITHMETIC = {
+    "ADD": ("CLC", "ADC", add),
+    "SUB": ("SEC", "SBC", subtract),
+}
+INTEGER_LOGIC = {"AND": ("AND", logic_and), "OR": ("ORA", logic_or)}
+
+# Values popped and pushed by the instructions of expressions
+STACK_EFFECTS = {
+    **dict.fromkeys(("PUSH_CONST", "LOAD", "PI"), (0, 1)),
+    **dict.fromkeys((*ARITHMETIC, *LOGIC, *RELATIONS, "POW"), (2, 1)),
+    **dict.fromkeys(
+        ("NEGATE", "NOT", "INT", "ABS", "SGN", "SQR", "LOG", "EXP", "SIN", "COS"),
+        (1, 1),
+    ),
+    **dict.fromkeys(
+        ("TAN", "ATN", "RND", "PEEK", "LEN", "ASC", "VAL", "STR$", "CHR$"), (1, 1)
+    ),
+}
+
+# ROM routine of each function of FAC
+FUNCTIONS = {
+    "NEGATE": "NEGOP",
+    "ABS": "ABS",
+    "INT": "INT",
+    "SGN": "SGN",
+    "SQR": "SQR",
+    "LOG": "LOG",
+    "EXP": "EXP",
+    "SIN": "SIN",
+    "COS": "COS",
+    "TAN": "TAN",
+    "ATN": "ATN",
+    "RND": "RND",
+}
+
+# Pseudocode that needs the next instructions as well
+POKE_SEQUENCE = ("VALIDATE_INT_RANGE_VALUE", "POKE_MEMORY")
+
+# Mnemonic and operand (kind and value) of an instruction
+Instruction = tuple[str, tuple[int, int | float | str] | None]
+
+
+class _Value:
+    """
+    A value on the pseudocode stack: in FAC, or in memory at address (a
+    constant, a variable, a spill slot or a string buffer). slot is the spill
+    slot or string buffer, if any, and constant the value of constants.
+    Integers in 2 bytes at address (a variable or an integer slot) have the
+    range of their values.
+    """
+
+    __slots__ = ("type", "address", "slot", "constant", "range")
+
+    def __init__(
+        self,
+        type: str,
+        address: Ref | None = None,
+        slot: int | None = None,
+        constant: int | float | str | None = None,
+        range: Range | None = None,
+    ) -> None:
+        self.type = type
+        self.address = address
+        self.slot = slot
+        self.constant = constant
+        self.range = range
+
+
+class Backend:
+    """
+    Lowers a program into an Assembler holding its code, the runtime
+    routines it uses and its data.
+    """
+
+    def __init__(self) -> None:
+        self.asm = asm = Assembler()
+        runtime.define_symbols(asm)
+        asm.reserve("__reserved", 0)
+        self.variables = SymbolTable(base_address=0)
+        # Address of each variable and constant seen so far
+        self.addresses: dict[str, Ref] = {}
+        self.constants: dict[int | float, _Value] = {}
+        self.stack: list[_Value] = []
+        # The value in FAC, if any
+        self.fac: _Value | None = None
+        self.spills = 0
+        self.max_spills = 0
+        self.max_integers = 0
+        self.max_conversions = 0
+        self.max_buffers = 0
+        self.integers = Integers({}, {})
+        self.routines: set[str] = {"clear_memory", "end"}
+        self.numbers: dict[bytes, str] = {}
+        self.strings: dict[bytes, str] = {}
+        # Loop variable and first instruction of the open FOR loops
+        self.loops: list[tuple[str, str]] = []
+        self.ifs: list[str] = []
+        self.for_records: set[str] = set()
+        self.instructions: list[Instruction] = []
+        self.index = 0
+        self.labels = 0
+        self.line = -1
+
+    # --- Entry point ---------------------------------------------------------
+
+    def lower(self, code: Code) -> Assembler:
+        """
+        Lower a program.
+
+        Raises:
+            BackendError: When the program has compile errors or pseudocode
+                that cannot be lowered
+        """
+        self.integers = infer_integers(code)
+        asm = self.asm
+        asm.label("start")
+        asm.op("JSR", ABSOLUTE, Ref("clear_memory"))
+        asm.op("TSX")
+        asm.op("STX", ABSOLUTE, Ref("saved_sp"))
+
+        operands = code.operands
+        constants = code.constants
+        kinds = code.kinds
+        lines = code.lines
+        instructions: list[Instruction] = [
+            (
+                MNEMONICS[opcode],
+                (kinds[operand], constants[operand]) if operand >= 0 else None,
+            )
+            for opcode, operand in zip(code.opcodes, operands, strict=True)
+        ]
+        self.instructions = instructions
+        methods: dict[str, Callable[[Any], None]] = {}
+        self.index = 0
+        while self.index < len(instructions):
+            mnemonic, operand = instructions[self.index]
+            self.line = lines[self.index]
+            method = methods.get(mnemonic)
+            if method is None:
+                method = methods[mnemonic] = self._method(mnemonic, operand)
+            method(operand[1] if operand else None)
+            self.index += 1
+        if self.stack:
+            raise self._error("Values left on the stack at the end of the program")
+
+        asm.op("JMP", ABSOLUTE, Ref("end"))
+        runtime.link(asm, self.routines)
+        self._data()
+        return asm
+
+    def _method(
+        self, mnemonic: str, operand: tuple[int, int | float | str] | None
+    ) -> Callable[[Any], None]:
+        """
+        Method that lowers an instruction.
+
+        Raises:
+            BackendError: When the instruction cannot be lowered
+        """
+        if mnemonic == "#":
+            message = operand[1] if operand else ""
+            raise self._error(f"Program has compile errors: {message}")
+        method: Callable[[Any], None] | None = getattr(
+            self, "_" + mnemonic.replace("$", "_str"), None
+        )
+        if method is None:
+            raise self._error(
+                f"{mnemonic} is not supported by the machine code backend",
+                UnsupportedInstructionError,
+            )
+        return method
+
+    def _error(
+        self, message: str, error: type[BackendError] = BackendError
+    ) -> BackendError:
+        if self.line >= 0:
+            message = f"Line {self.line}: {message}"
+        return error(message)
+
+    def _data(self) -> None:
+        asm = self.asm
+        for data, name in self.numbers.items():
+            asm.label(name)
+            asm.data(data)
+        for data, name in self.strings.items():
+            asm.label(name)
+            asm.data(data)
+        asm.reserve("variables", self.variables.offset)
+        for name in sorted(self.for_records):
+            counter = name in self.integers.steps
+            asm.reserve(f"for {name}", INTEGER_SIZE if counter else FOR_RECORD_SIZE)
+        asm.reserve("spills", self.max_spills * NUMBER_SIZE)
+        asm.reserve("integers", self.max_integers * INTEGER_SIZE)
+        asm.reserve("conversions", self.max_conversions * NUMBER_SIZE)
+        asm.reserve("buffers", self.max_buffers * STRING_SIZE)
+        size = sum(size for _, size in asm.reserved)
+        asm.equ("__reserved_pages", (size + 0xFF) >> 8)
+
+    # --- Values --------------------------------------------------------------
+
+    def _new_label(self) -> str:
+        self.labels += 1
+        return f"_L{self.labels}"
+
+    def _variable(self, name: str) -> Ref:
+        address = self.addresses.get(name)
+        if address is None:
+            if name.endswith("$"):
+                vtype, size = STRING, STRING_SIZE
+            elif self._range(name) is not None:
+                vtype, size = INTEGER, INTEGER_SIZE
+            else:
+                vtype, size = NUMBER, NUMBER_SIZE
+            offset = self.variables.register(name, size, vtype)
+            address = self.addresses[name] = Ref("variables", offset)
+        return address
+
+    def _range(self, name: str) -> Range | None:
+        """
+        Range of an integer variable, None for other variables. Integer (%)
+        variables are integers even when the inference gave up.
+        """
+        range = self.integers.ranges.get(name)
+        if range is None and name.endswith("%"):
+            return SIGNED
+        return range
+
+    def _number(self, value: int | float) -> _Value:
+        known = self.constants.get(value)
+        if known is None:
+            try:
+                data = to_mflpt(value)
+            except OverflowError as e:
+                raise self._error(f"?OVERFLOW: {e}") from e
+            name = self.numbers.setdefault(data, f"_N{len(self.numbers)}")
+            known = self.constants[value] = _Value(NUMBER, Ref(name), constant=value)
+        return _Value(NUMBER, known.address, constant=value)
+
+    def _string(self, text: str) -> _Value:
+        petscii = text_to_petscii(text)
+        if len(petscii) > 255:
+            raise self._error("?STRING TOO LONG")
+        data = bytes([len(petscii)]) + petscii
+        name = self.strings.setdefault(data, f"_S{len(self.strings)}")
+        return _Value(STRING, Ref(name), constant=text)
+
+    def _pop(self, type: str) -> _Value:
+        value = self.stack.pop()
+        if value.type != type:
+            raise self._error("?TYPE MISMATCH")
+        return value
+
+    def _pointer(self, address: Ref | int) -> None:
+        """A/Y = address"""
+        asm = self.asm
+        if isinstance(address, int):
+            asm.op("LDA", IMMEDIATE, address & 0xFF)
+            asm.op("LDY", IMMEDIATE, address >> 8)
+        else:
+            asm.op("LDA", IMMEDIATE, Ref(address.symbol, address.offset, "<"))
+            asm.op("LDY", IMMEDIATE, Ref(address.symbol, address.offset, ">"))
+
+    def _set_pointer(self, zero_page: str, address: Ref) -> None:
+        """ptr1 or ptr2 = address"""
+        asm = self.asm
+        asm.op("LDA", IMMEDIATE, Ref(address.symbol, address.offset, "<"))
+        asm.op("STA", ABSOLUTE, asm.equates[zero_page])
+        asm.op("LDA", IMMEDIATE, Ref(address.symbol, address.offset, ">"))
+        asm.op("STA", ABSOLUTE, asm.equates[zero_page] + 1)
+
+    def _call(self, routine: str) -> None:
+        """JSR to a runtime routine"""
+        self.routines.add(routine)
+        self.asm.op("JSR", ABSOLUTE, Ref(routine))
+
+    def _rom(self, routine: str) -> None:
+        """JSR to a ROM routine"""
+        self.asm.op("JSR", ABSOLUTE, self.asm.equates[routine])
+
+    def _spill(self) -> None:
+        """Move the value in FAC, if any, to a spill slot"""
+        value = self.fac
+        if value is None:
+            return
+        value.slot = self.spills
+        value.address = Ref("spills", self.spills * NUMBER_SIZE)
+        self.spills += 1
+        self.max_spills = max(self.max_spills, self.spills)
+        self._store_fac(value.address)
+        self.fac = None
+
+    def _store_fac(self, address: Ref) -> None:
+        asm = self.asm
+        asm.op("LDX", IMMEDIATE, Ref(address.symbol, address.offset, "<"))
+        asm.op("LDY", IMMEDIATE, Ref(address.symbol, address.offset, ">"))
+        self._rom("MOVMF")
+
+    def _address(self, value: _Value) -> Ref:
+        """
+        Address of a value in memory, whose spill slot or string buffer, if
+        any, is free from now on.
+        """
+        if value.slot is not None and value.type == NUMBER:
+            if value.slot != self.spills - 1:
+                raise self._error("Spill slots used out of order")
+            self.spills -= 1
+        if value.address is None:
+            raise self._error("Value is not in memory")
+        return value.address
+
+    def _to_fac(self, value: _Value) -> None:
+        """Load a number into FAC"""
+        if value is self.fac:
+            return
+        self._spill()
+        if value.range is not None:
+            self._integer_byte("LDA", value, 1)
+            self._integer_byte("LDY", value, 0)
+            if value.range.signed:
+                self._rom("GIVAYF")
+            else:
+                self._call("unsigned_to_fac")
+            value.range = None
+        else:
+            self._pointer(self._address(value))
+            self._rom("MOVFM")
+        value.address = value.slot = None
+        self.fac = value
+
+    def _push_fac(self) -> None:
+        """Push the result of a computation, which is in FAC"""
+        self.fac = _Value(NUMBER)
+        self.stack.append(self.fac)
+
+    def _top_to_fac(self) -> _Value:
+        value = self.stack[-1]
+        if value.type != NUMBER:
+            raise self._error("?TYPE MISMATCH")
+        self._to_fac(value)
+        return self.stack.pop()
+
+    def _buffer(self) -> Ref:
+        """
+        Buffer of a string computed at the top of the stack: one per depth
+        of strings on the stack.
+        """
+        depth = sum(1 for value in self.stack if value.type == STRING)
+        self.max_buffers = max(self.max_buffers, depth + 1)
+        return Ref("buffers", depth * STRING_SIZE)
+
+    def _push_string(self, address: Ref) -> None:
+        self.stack.append(_Value(STRING, address, slot=address.offset))
+
+    def _operands(self, commutative: bool) -> tuple[Ref, bool]:
+        """
+        Pop the operands of a binary operator on numbers, with the right
+        operand in FAC.
+
+        Returns:
+            The address of the left operand and whether the operands were
+            swapped: the left one is in FAC, the right one at the address
+        """
+        right = self._pop(NUMBER)
+        left = self._pop(NUMBER)
+        if left.range is not None:
+            self._convert(left)
+        if left is self.fac:
+            if commutative and right.range is None:
+                self.fac = None
+                return self._address(right), True
+            self._spill()
+        self._to_fac(right)
+        self.fac = None
+        return self._address(left), False
+
+    def _convert(self, value: _Value) -> None:
+        """
+        Convert an integer to a number in memory, in the conversion slot of
+        its depth in the stack.
+        """
+        self._to_fac(value)
+        self.fac = None
+        depth = len(self.stack)
+        self.max_conversions = max(self.max_conversions, depth + 1)
+        value.address = Ref("conversions", depth * NUMBER_SIZE)
+        self._store_fac(value.address)
+
+    # --- Integers ------------------------------------------------------------
+
+    def _integer_range(self, value: _Value) -> Range | None:
+        """
+        Range of a number that is an integer in 2 bytes or a whole constant
+        that fits in them, None for other numbers.
+        """
+        if value.range is not None:
+            return value.range
+        constant = value.constant
+        if isinstance(constant, (int, float)) and constant == int(constant):
+            range = Range(int(constant), int(constant))
+            if range.word:
+                return range
+        return None
+
+    def _integer_byte(self, mnemonic: str, value: _Value, byte: int) -> None:
+        """An instruction on the low (0) or high (1) byte of an integer"""
+        if value.range is not None:
+            address = self._address(value)
+            self.asm.op(
+                mnemonic, ABSOLUTE, address._replace(offset=address.offset + byte)
+            )
+            return
+        constant = value.constant
+        if not isinstance(constant, (int, float)):
+            raise self._error("?TYPE MISMATCH")
+        self.asm.op(mnemonic, IMMEDIATE, int(constant) >> 8 * byte & 0xFF)
+
+    def _integer_slot(self) -> Ref:
+        """Integer slot of the value pushed next"""
+        depth = len(self.stack)
+        self.max_integers = max(self.max_integers, depth + 1)
+        return Ref("integers", depth * INTEGER_SIZE)
+
+    def _push_integer(self, address: Ref, range: Range) -> None:
+        self.stack.append(_Value(NUMBER, address, range=range))
+
+    def _integer_operands(self) -> tuple[Range, Range] | None:
+        """Ranges of the operands of a binary operator, when both are integers"""
+        if self.stack[-1].type != NUMBER or self.stack[-2].type != NUMBER:
+            return None
+        right = self._integer_range(self.stack[-1])
+        left = self._integer_range(self.stack[-2])
+        if right is None or left is None:
+            return None
+        return left, right
+
+    def _integer_binary(self, mnemonic: str, result: Range, setup: str = "") -> None:
+        """
+        Pop two integers and push the result of an instruction on each of
+        their bytes, from the low byte (ADC, SBC, AND, ORA, EOR).
+        """
+        right = self.stack.pop()
+        left = self.stack.pop()
+        slot = self._integer_slot()
+        asm = self.asm
+        if setup:
+            asm.op(setup)
+        for byte in (0, 1):
+            self._integer_byte("LDA", left, byte)
+            self._integer_byte(mnemonic, right, byte)
+            asm.op("STA", ABSOLUTE, slot._replace(offset=slot.offset + byte))
+        self._push_integer(slot, result)
+
+    def _integer_arithmetic(self, mnemonic: str) -> bool:
+        """
+        Add or subtract integers, when the result fits in 16 bits. Returns
+        False when the operands are not integers or the result may not fit.
+        """
+        ranges = self._integer_operands()
+        if ranges is None:
+            return False
+        setup, instruction, function = INTEGER_ARITHMETIC[mnemonic]
+        result = function(*ranges)
+        if result is not None and result.word:
+            self._integer_binary(instruction, result, setup)
+            return True
+        if not (ranges[0].signed and ranges[1].signed and self._signed_consumer()):
+            return False
+        # The result is used where it must be in SIGNED anyway: the error is
+        # raised by the operator instead
+        self._integer_binary(instruction, SIGNED, setup)
+        self.routines.add("illegal_quantity")
+        self.asm.branch("BVS", Ref("illegal_quantity"))
+        return True
+
+    def _signed_consumer(self) -> bool:
+        """
+        Whether the value pushed by the current instruction is used by one
+        that raises ?ILLEGAL QUANTITY when it is not in -32768..32767: AND,
+        OR, NOT or a store in an integer (%) variable.
+        """
+        above = 0
+        for mnemonic, operand in self.instructions[self.index + 1 :]:
+            popped, pushed = STACK_EFFECTS.get(mnemonic, (1, 0))
+            if popped > above:
+                if mnemonic == "STORE":
+                    return operand is not None and str(operand[1]).endswith("%")
+                return mnemonic in ("AND", "OR", "NOT")
+            above += pushed - popped
+        return False
+
+    def _integer_logic(self, mnemonic: str) -> bool:
+        """AND or OR of integers in -32768..32767"""
+        ranges = self._integer_operands()
+        if ranges is None or not (ranges[0].signed and ranges[1].signed):
+            return False
+        instruction, function = INTEGER_LOGIC[mnemonic]
+        self._integer_binary(instruction, function(*ranges))
+        return True
+
+    def _store_integer(self, value: _Value, target: Ref, signed: bool) -> None:
+        """
+        Store a number in 2 bytes, signed or not: integers that fit are
+        copied, other numbers converted (see _fac_to_integer).
+        """
+        asm = self.asm
+        range = self._integer_range(value)
+        if range is not None and (range.signed if signed else range.unsigned):
+            if value.address != target:
+                for byte in (0, 1):
+                    self._integer_byte("LDA", value, byte)
+                    asm.op(
+                        "STA", ABSOLUTE, target._replace(offset=target.offset + byte)
+                    )
+            return
+        self._to_fac(value)
+        self.fac = None
+        self._fac_to_integer(target, signed)
+
+    def _fac_to_integer(self, target: Ref, signed: bool) -> None:
+        """
+        Store FAC in 2 bytes, rounded down, raising ?ILLEGAL QUANTITY when
+        it does not fit.
+        """
+        asm = self.asm
+        if signed:
+            self._rom("AYINT")
+            low, high = asm.equates["FACMO"] + 1, asm.equates["FACMO"]
+        else:
+            self._rom("GETADR")
+            low, high = asm.equates["LINNUM"], asm.equates["LINNUM"] + 1
+        asm.op("LDA", ABSOLUTE, low)
+        asm.op("STA", ABSOLUTE, target)
+        asm.op("LDA", ABSOLUTE, high)
+        asm.op("STA", ABSOLUTE, target._replace(offset=target.offset + 1))
+
+    def _drop(self) -> None:
+        """Pop a value that is not used"""
+        value = self.stack.pop()
+        if value is self.fac:
+            self.fac = None
+        elif value.type == NUMBER:
+            self._address(value)
+
+    # --- Branches ------------------------------------------------------------
+
+    def _condition(self) -> None:
+        """
+        Pop a condition and set the Z flag when it is false. Comparisons
+        followed by a conditional instruction are not turned into numbers.
+        """
+        value = self.stack.pop()
+        if value.type != NUMBER:
+            raise self._error("?TYPE MISMATCH")
+        if value.constant == "compare":
+            return
+        if value.range is not None:
+            self._integer_byte("LDA", value, 0)
+            self._integer_byte("ORA", value, 1)
+            return
+        self._to_fac(value)
+        self.fac = None
+        self.asm.op("LDA", ABSOLUTE, self.asm.equates["FACEXP"])
+
+    def _jump_if(self, zero: bool, target: str) -> None:
+        """Jump to a label when the Z flag is set (zero) or clear"""
+        self.asm.branch("BEQ" if zero else "BNE", Ref(target))
+
+    # --- Pseudocode ----------------------------------------------------------
+
+    def _REM(self, operand: int | float | str | None) -> None:
+        pass
+
+    def _LABEL(self, operand: str) -> None:
+        if self.stack:
+            raise self._error("Values left on the stack before a label")
+        self.asm.label(operand)
+
+    def _JMP(self, operand: str) -> None:
+        self.asm.op("JMP", ABSOLUTE, Ref(operand))
+
+    def _CALL(self, operand: str) -> None:
+        self.asm.op("JSR", ABSOLUTE, Ref(operand))
+
+    def _RET(self, operand: None) -> None:
+        self.asm.op("RTS")
+
+    def _END(self, operand: None) -> None:
+        self.asm.op("JMP", ABSOLUTE, Ref("end"))
+
+    def _PUSH_CONST(self, operand: int | float | str) -> None:
+        if not isinstance(operand, str):
+            self.stack.append(self._number(operand))
+        elif self.instructions[self.index][1] == (CONST_STRING, operand):
+            self.stack.append(self._string(operand))
+        else:
+            raise self._error(f"Invalid constant {operand}")
+
+    def _PI(self, operand: None) -> None:
+        self.stack.append(self._number(3.141592653589793))
+
+    def _LOAD(self, operand: str) -> None:
+        vtype = STRING if operand.endswith("$") else NUMBER
+        range = self._range(operand)
+        self.stack.append(_Value(vtype, self._variable(operand), range=range))
+
+    def _STORE(self, operand: str) -> None:
+        target = self._variable(operand)
+        range = self._range(operand)
+        if operand.endswith("$"):
+            self._copy_string(self._address(self._pop(STRING)), target)
+        elif range is not None:
+            self._store_integer(self._pop(NUMBER), target, range.signed)
+        else:
+            self._top_to_fac()
+            self.fac = None
+            self._store_fac(target)
+
+    def _copy_string(self, source: Ref, target: Ref) -> None:
+        if source != target:
+            self._set_pointer("ptr1", source)
+            self._set_pointer("ptr2", target)
+            self._call("string_copy")
+
+    def _ADD(self, operand: None) -> None:
+        if self.stack[-1].type == STRING:
+            self._concatenate()
+        elif not self._integer_arithmetic("ADD"):
+            self._arithmetic("ADD")
+
+    def _arithmetic(self, mnemonic: str) -> None:
+        routine, commutative = ARITHMETIC[mnemonic]
+        address, _ = self._operands(commutative)
+        self._pointer(address)
+        self._rom(routine)
+        self._push_fac()
+
+    def _SUB(self, operand: None) -> None:
+        if not self._integer_arithmetic("SUB"):
+            self._arithmetic("SUB")
+
+    def _MUL(self, operand: None) -> None:
+        if not self._integer_shift():
+            self._arithmetic("MUL")
+
+    def _shift_count(self, ranges: tuple[Range, Range] | None) -> int | None:
+        """
+        Bits to shift an integer by to multiply or divide it by the constant
+        above it on the stack, when that is a power of two. ranges are the
+        ones of the operands (see _integer_operands).
+        """
+        if ranges is None or self.stack[-1].range is not None:
+            return None
+        factor = int(ranges[1].lo)
+        if factor < 1 or factor & (factor - 1):
+            return None
+        return factor.bit_length() - 1
+
+    def _integer_shift(self) -> bool:
+        """
+        Multiply an integer by a constant power of two, when the result fits
+        in 16 bits.
+        """
+        ranges = self._integer_operands()
+        count = self._shift_count(ranges)
+        if ranges is None or count is None:
+            return False
+        result = multiply(*ranges)
+        if result is None or not result.word:
+            return False
+        self.stack.pop()
+        value = self.stack.pop()
+        slot = self._integer_slot()
+        asm = self.asm
+        self._integer_byte("LDA", value, 0)
+        asm.op("STA", ABSOLUTE, slot)
+        self._integer_byte("LDA", value, 1)
+        for _ in range(count):
+            asm.op("ASL", ABSOLUTE, slot)
+            asm.op("ROL", ACCUMULATOR)
+        asm.op("STA", ABSOLUTE, slot._replace(offset=slot.offset + 1))
+        self._push_integer(slot, result)
+        return True
+
+    def _DIV(self, operand: None) -> None:
+        if not self._integer_quotient():
+            self._arithmetic("DIV")
+
+    def _integer_quotient(self) -> bool:
+        """
+        INT of an integer divided by a constant power of two, as a shift to
+        the right (which rounds down, as INT does).
+        """
+        following = self.instructions[self.index + 1 : self.index + 2]
+        if not following or following[0][0] != "INT":
+            return False
+        ranges = self._integer_operands()
+        count = self._shift_count(ranges)
+        if ranges is None or count is None:
+            return False
+        quotient = divide(*ranges)
+        if quotient is None:
+            return False
+        result = integer(quotient)
+        self.stack.pop()
+        value = self.stack.pop()
+        slot = self._integer_slot()
+        asm = self.asm
+        self._integer_byte("LDA", value, 0)
+        asm.op("STA", ABSOLUTE, slot)
+        self._integer_byte("LDA", value, 1)
+        for _ in range(count):
+            if ranges[0].lo < 0:
+                # C = the sign bit
+                asm.op("CMP", IMMEDIATE, 0x80)
+                asm.op("ROR", ACCUMULATOR)
+            else:
+                asm.op("LSR", ACCUMULATOR)
+            asm.op("ROR", ABSOLUTE, slot)
+        asm.op("STA", ABSOLUTE, slot._replace(offset=slot.offset + 1))
+        self._push_integer(slot, result)
+        # The INT is done
+        self.index += 1
+        return True
+
+    def _POW(self, operand: None) -> None:
+        address, _ = self._operands(False)
+        self._pointer(address)
+        self._rom("CONUPK")
+        self.asm.op("LDA", ABSOLUTE, self.asm.equates["FACEXP"])
+        self._rom("FPWRT")
+        self._push_fac()
+
+    def _logic(self, mnemonic: str) -> None:
+        address, _ = self._operands(True)
+        self._pointer(address)
+        self._call(LOGIC[mnemonic])
+        self._push_fac()
+
+    def _AND(self, operand: None) -> None:
+        if not self._integer_logic("AND"):
+            self._logic("AND")
+
+    def _OR(self, operand: None) -> None:
+        if not self._integer_logic("OR"):
+            self._logic("OR")
+
+    def _NOT(self, operand: None) -> None:
+        range = self._integer_range(self.stack[-1])
+        if range is not None and range.signed:
+            # NOT x = x EOR -1
+            self.stack.append(_Value(NUMBER, constant=-1))
+            self._integer_binary("EOR", logic_not(range))
+            return
+        self._top_to_fac()
+        self._call("not_op")
+        self._push_fac()
+
+    def _concatenate(self) -> None:
+        right = self._address(self._pop(STRING))
+        left = self._pop(STRING)
+        buffer = self._buffer()
+        self._copy_string(self._address(left), buffer)
+        self._set_pointer("ptr1", right)
+        self._set_pointer("ptr2", buffer)
+        self._call("string_append")
+        self._push_string(buffer)
+
+    def _compare(self, mnemonic: str) -> None:
+        """
+        Compare two values, leaving A = 0 and the Z flag set when the
+        relation is false.
+        """
+        relations = RELATIONS[mnemonic]
+        if self.stack[-1].type == STRING:
+            self._spill()
+            right = self._address(self._pop(STRING))
+            left = self._address(self._pop(STRING))
+            self._set_pointer("ptr1", left)
+            self._set_pointer("ptr2", right)
+            self._call("string_compare")
+        elif self._integer_compare(mnemonic):
+            self._push_truth()
+            return
+        else:
+            address, swapped = self._operands(True)
+            if swapped:
+                relations = (relations & 2) | (relations & 1) << 2 | relations >> 2
+            self._pointer(address)
+            self._rom("FCOMP")
+        self.asm.op("LDX", IMMEDIATE, relations)
+        self._call("compare_result")
+        self._push_truth()
+
+    def _push_truth(self) -> None:
+        """
+        Push the result of a comparison, -1 when A is not 0: comparisons
+        followed by a conditional instruction are left in the Z flag.
+        """
+        following = self.instructions[self.index + 1 : self.index + 2]
+        if following and following[0][0] in ("IF_START", "COND_JUMP"):
+            self.stack.append(_Value(NUMBER, constant="compare"))
+            return
+        asm = self.asm
+        slot = self._integer_slot()
+        done = self._new_label()
+        asm.branch("BEQ", Ref(done))
+        asm.op("LDA", IMMEDIATE, 0xFF)
+        asm.label(done)
+        asm.op("STA", ABSOLUTE, slot)
+        asm.op("STA", ABSOLUTE, slot._replace(offset=slot.offset + 1))
+        self._push_integer(slot, BOOLEAN)
+
+    def _integer_compare(self, mnemonic: str) -> bool:
+        """
+        Compare integers, both signed or both unsigned, with 16-bit code.
+        """
+        ranges = self._integer_operands()
+        if ranges is None:
+            return False
+        left_range, right_range = ranges
+        signed = left_range.signed and right_range.signed
+        if not signed and not (left_range.unsigned and right_range.unsigned):
+            return False
+        right = self.stack.pop()
+        left = self.stack.pop()
+        asm = self.asm
+        if mnemonic in ("EQUAL", "NOT_EQUAL"):
+            different = self._new_label()
+            self._integer_byte("LDA", left, 0)
+            self._integer_byte("CMP", right, 0)
+            asm.branch("BNE", Ref(different))
+            self._integer_byte("LDA", left, 1)
+            self._integer_byte("CMP", right, 1)
+            asm.label(different)
+            # A = the Z flag
+            asm.op("PHP")
+            asm.op("PLA")
+            asm.op("AND", IMMEDIATE, 2)
+            if mnemonic == "NOT_EQUAL":
+                asm.op("EOR", IMMEDIATE, 2)
+            return True
+
+        # Every relation is a < b or its negation
+        if mnemonic in ("LESS", "GREATER_EQUAL"):
+            a, b = left, right
+        else:
+            a, b = right, left
+        self._less(a, b, signed)
+        if signed:
+            # N = a < b
+            asm.op("ASL", ACCUMULATOR)
+        # C = a < b when signed, a >= b otherwise
+        asm.op("LDA", IMMEDIATE, 0)
+        asm.op("ROL", ACCUMULATOR)
+        if signed != (mnemonic in ("LESS", "GREATER")):
+            asm.op("EOR", IMMEDIATE, 1)
+        return True
+
+    def _less(self, a: _Value, b: _Value, signed: bool) -> None:
+        """
+        Subtract two integers, setting the N flag when a < b (signed), or
+        clearing the C flag (unsigned)
+        """
+        asm = self.asm
+        self._integer_byte("LDA", a, 0)
+        self._integer_byte("CMP", b, 0)
+        self._integer_byte("LDA", a, 1)
+        self._integer_byte("SBC", b, 1)
+        if signed:
+            overflow = self._new_label()
+            asm.branch("BVC", Ref(overflow))
+            asm.op("EOR", IMMEDIATE, 0x80)
+            asm.label(overflow)
+
+    def _EQUAL(self, operand: None) -> None:
+        self._compare("EQUAL")
+
+    def _NOT_EQUAL(self, operand: None) -> None:
+        self._compare("NOT_EQUAL")
+
+    def _LESS(self, operand: None) -> None:
+        self._compare("LESS")
+
+    def _LESS_EQUAL(self, operand: None) -> None:
+        self._compare("LESS_EQUAL")
+
+    def _GREATER(self, operand: None) -> None:
+        self._compare("GREATER")
+
+    def _GREATER_EQUAL(self, operand: None) -> None:
+        self._compare("GREATER_EQUAL")
+
+    def _function(self, mnemonic: str) -> None:
+        self._top_to_fac()
+        self._rom(FUNCTIONS[mnemonic])
+        self._push_fac()
+
+    def _NEGATE(self, operand: None) -> None:
+        range = self._integer_range(self.stack[-1])
+        if range is not None and negate(range).word:
+            # -x = 0 - x
+            self.stack.insert(-1, _Value(NUMBER, constant=0))
+            self._integer_binary("SBC", negate(range), "SEC")
+            return
+        self._function("NEGATE")
+
+    def _ABS(self, operand: None) -> None:
+        self._function("ABS")
+
+    def _INT(self, operand: None) -> None:
+        if self.stack[-1].range is None:
+            self._function("INT")
+
+    def _SGN(self, operand: None) -> None:
+        self._function("SGN")
+
+    def _SQR(self, operand: None) -> None:
+        self._function("SQR")
+
+    def _LOG(self, operand: None) -> None:
+        self._function("LOG")
+
+    def _EXP(self, operand: None) -> None:
+        self._function("EXP")
+
+    def _SIN(self, operand: None) -> None:
+        self._function("SIN")
+
+    def _COS(self, operand: None) -> None:
+        self._function("COS")
+
+    def _TAN(self, operand: None) -> None:
+        self._function("TAN")
+
+    def _ATN(self, operand: None) -> None:
+        self._function("ATN")
+
+    def _RND(self, operand: None) -> None:
+        self._function("RND")
+
+    def _PEEK(self, operand: None) -> None:
+        asm = self.asm
+        address = _byte_address(self.stack[-1].constant, 0xFFFF)
+        if address is not None:
+            self.stack.pop()
+            asm.op("LDA", ABSOLUTE, address)
+        else:
+            pointer = self._pop_address("LINNUM")
+            asm.op("LDY", IMMEDIATE, 0)
+            asm.op("LDA", INDIRECT_Y, pointer)
+        self._push_byte()
+
+    def _pop_address(self, zero_page: str) -> int:
+        """
+        Pop an address into a zero page pointer, converted by GETADR unless
+        it is an unsigned integer. Returns the address of the pointer.
+        """
+        asm = self.asm
+        pointer = asm.equates[zero_page]
+        value = self.stack[-1]
+        if value.range is not None and value.range.unsigned:
+            self.stack.pop()
+            for byte in (0, 1):
+                self._integer_byte("LDA", value, byte)
+                asm.op("STA", ABSOLUTE, pointer + byte)
+            return pointer
+        self._top_to_fac()
+        self.fac = None
+        self._rom("GETADR")
+        linnum = asm.equates["LINNUM"]
+        if pointer != linnum:
+            for byte in (0, 1):
+                asm.op("LDA", ABSOLUTE, linnum + byte)
+                asm.op("STA", ABSOLUTE, pointer + byte)
+        return pointer
+
+    def _push_byte(self) -> None:
+        """Push the byte in A as an integer"""
+        asm = self.asm
+        slot = self._integer_slot()
+        asm.op("STA", ABSOLUTE, slot)
+        asm.op("LDA", IMMEDIATE, 0)
+        asm.op("STA", ABSOLUTE, slot._replace(offset=slot.offset + 1))
+        self._push_integer(slot, BYTE)
+
+    def _LEN(self, operand: None) -> None:
+        address = self._address(self._pop(STRING))
+        self.asm.op("LDA", ABSOLUTE, address)
+        self._push_byte()
+
+    def _ASC(self, operand: None) -> None:
+        address = self._address(self._pop(STRING))
+        self._spill()
+        self._set_pointer("ptr1", address)
+        self._call("asc")
+        self._push_fac()
+
+    def _VAL(self, operand: None) -> None:
+        address = self._address(self._pop(STRING))
+        self._spill()
+        self._set_pointer("ptr1", address)
+        self._call("string_to_buffer")
+        self._call("parse_buffer")
+        self._push_fac()
+
+    def _STR_str(self, operand: None) -> None:
+        self._top_to_fac()
+        self.fac = None
+        buffer = self._buffer()
+        self._set_pointer("ptr2", buffer)
+        self._call("string_from_number")
+        self._push_string(buffer)
+
+    def _CHR_str(self, operand: None) -> None:
+        asm = self.asm
+        self._top_to_fac()
+        self.fac = None
+        self._call("to_byte")
+        buffer = self._buffer()
+        asm.op("STA", ABSOLUTE, buffer._replace(offset=buffer.offset + 1))
+        asm.op("LDA", IMMEDIATE, 1)
+        asm.op("STA", ABSOLUTE, buffer)
+        self._push_string(buffer)
+
+    def _PRINT_VALUE(self, operand: None) -> None:
+        if self.stack[-1].type == STRING:
+            self._set_pointer("ptr1", self._address(self.stack.pop()))
+            self._call("print_string")
+        else:
+            self._top_to_fac()
+            self.fac = None
+            self._call("print_number")
+
+    def _PRINT_NEWLINE(self, operand: None) -> None:
+        self.asm.op("LDA", IMMEDIATE, 0x0D)
+        self._rom("CHROUT")
+
+    def _PRINT_NO_NEWLINE(self, operand: None) -> None:
+        pass
+
+    def _PRINT_TAB(self, operand: None) -> None:
+        self._call("print_tab")
+
+    def _IF_START(self, operand: None) -> None:
+        self._condition()
+        label = self._new_label()
+        self.ifs.append(label)
+        self._jump_if(True, label)
+
+    def _IF_END(self, operand: None) -> None:
+        if not self.ifs:
+            raise self._error("IF_END without IF_START")
+        self.asm.label(self.ifs.pop())
+
+    def _COND_JUMP(self, operand: str) -> None:
+        self._condition()
+        self._jump_if(False, operand)
+
+    def _STORE_LIMIT(self, operand: str) -> None:
+        record = self._for_record(operand)
+        if operand in self.integers.steps:
+            signed = self.integers.ranges[operand].signed
+            self._store_integer(self._pop(NUMBER), record, signed)
+            return
+        self._top_to_fac()
+        self.fac = None
+        self._store_fac(record)
+
+    def _STORE_STEP(self, operand: str) -> None:
+        if operand in self.integers.steps:
+            # The step of integer counters is a constant, added by NEXT
+            self._drop()
+            return
+        self._top_to_fac()
+        self.fac = None
+        record = self._for_record(operand)
+        self._store_fac(record._replace(offset=NUMBER_SIZE))
+        self._rom("SIGN")
+        self.asm.op("STA", ABSOLUTE, record._replace(offset=2 * NUMBER_SIZE))
+
+    def _for_record(self, name: str) -> Ref:
+        self.for_records.add(name)
+        return Ref(f"for {name}")
+
+    def _FOR_START(self, operand: str) -> None:
+        if operand.endswith("%"):
+            raise self._error(f"?SYNTAX ERROR: FOR with integer variable {operand}")
+        label = self._new_label()
+        self.asm.label(label)
+        self.loops.append((operand, label))
+
+    def _NEXT(self, operand: str | None) -> None:
+        """
+        Add the step to the loop variable, and go back to the start of the
+        loop until the variable passes the limit (compares with it as the
+        sign of the step), as BASIC does.
+        """
+        loops = self.loops
+        index = len(loops) - 1
+        if operand is not None:
+            while index >= 0 and loops[index][0] != operand:
+                index -= 1
+        if index < 0:
+            raise self._error("?NEXT WITHOUT FOR")
+        # Inner loops are closed by the NEXT of an outer one
+        del loops[index + 1 :]
+        name, start = loops[index]
+        if name in self.integers.steps:
+            self._integer_next(name, start)
+            return
+
+        asm = self.asm
+        variable = self._variable(name)
+        record = self._for_record(name)
+        self._pointer(variable)
+        self._rom("MOVFM")
+        self._pointer(record._replace(offset=NUMBER_SIZE))
+        self._rom("FADD")
+        self._store_fac(variable)
+        self._pointer(record)
+        self._rom("FCOMP")
+        asm.op("CMP", ABSOLUTE, record._replace(offset=2 * NUMBER_SIZE))
+        self._jump_if(False, start)
+
+    def _integer_next(self, name: str, start: str) -> None:
+        """NEXT of an integer counter, whose step is a constant"""
+        asm = self.asm
+        range = self.integers.ranges[name]
+        step = self.integers.steps[name]
+        variable = self._variable(name)
+        counter = _Value(NUMBER, variable, range=range)
+        limit = _Value(NUMBER, self._for_record(name), range=range)
+        high = variable._replace(offset=variable.offset + 1)
+        if step == 1:
+            done = self._new_label()
+            asm.op("INC", ABSOLUTE, variable)
+            asm.branch("BNE", Ref(done))
+            asm.op("INC", ABSOLUTE, high)
+            asm.label(done)
+        elif step:
+            asm.op("CLC")
+            for byte, address in enumerate((variable, high)):
+                asm.op("LDA", ABSOLUTE, address)
+                asm.op("ADC", IMMEDIATE, step >> 8 * byte & 0xFF)
+                asm.op("STA", ABSOLUTE, address)
+
+        if step == 0:
+            # Loop until the counter is the limit
+            for byte in (0, 1):
+                self._integer_byte("LDA", counter, byte)
+                self._integer_byte("CMP", limit, byte)
+                asm.branch("BNE", Ref(start))
+        elif step > 0:
+            # Loop while limit >= counter
+            self._less(limit, counter, range.signed)
+        else:
+            self._less(counter, limit, range.signed)
+        if step:
+            asm.branch("BPL" if range.signed else "BCS", Ref(start))
+
+    def _INPUT_PROMPT(self, operand: None) -> None:
+        self._set_pointer("ptr1", self._address(self._pop(STRING)))
+        self._call("print_string")
+
+    def _INPUT_STRING(self, operand: str) -> None:
+        self._call("input_line")
+        self._set_pointer("ptr2", self._variable(operand))
+        self._call("buffer_to_string")
+
+    def _INPUT_NUMBER(self, operand: str) -> None:
+        self._call("input_line")
+        self._call("parse_buffer")
+        range = self._range(operand)
+        if range is not None:
+            self._fac_to_integer(self._variable(operand), range.signed)
+        else:
+            self._store_fac(self._variable(operand))
+
+    def _GET_CHAR(self, operand: str) -> None:
+        self._set_pointer("ptr2", self._variable(operand))
+        self._call("get_char")
+
+    def _GET_CHAR_CODE(self, operand: str) -> None:
+        asm = self.asm
+        self._rom("GETIN")
+        if self._range(operand) is not None:
+            variable = self._variable(operand)
+            asm.op("STA", ABSOLUTE, variable)
+            asm.op("LDA", IMMEDIATE, 0)
+            asm.op("STA", ABSOLUTE, variable._replace(offset=variable.offset + 1))
+            return
+        asm.op("TAY")
+        asm.op("LDA", IMMEDIATE, 0)
+        self._rom("GIVAYF")
+        self._store_fac(self._variable(operand))
+
+    def _VALIDATE_INT_RANGE_ADDRESS(self, operand: None) -> None:
+        """
+        POKE, lowered as a whole: the value and the address are on the
+        stack, followed by VALIDATE_INT_RANGE_VALUE and POKE_MEMORY.
+        Constant addresses and values are used as they are.
+        """
+        following = tuple(
+            mnemonic
+            for mnemonic, _ in self.instructions[self.index + 1 : self.index + 3]
+        )
+        if following != POKE_SEQUENCE:
+            raise self._error(
+                "VALIDATE_INT_RANGE_ADDRESS outside of a POKE",
+                UnsupportedInstructionError,
+            )
+        self.index += 2
+
+        asm = self.asm
+        address = _byte_address(self.stack[-1].constant, 0xFFFF)
+        if address is not None:
+            self.stack.pop()
+        else:
+            # to_byte uses LINNUM
+            self._pop_address("ptr2")
+
+        value = _byte_address(self.stack[-1].constant, 0xFF)
+        range = self.stack[-1].range
+        if value is not None:
+            self.stack.pop()
+            asm.op("LDA", IMMEDIATE, value)
+        elif range is not None and 0 <= range.lo and range.hi <= 0xFF:
+            self._integer_byte("LDA", self.stack.pop(), 0)
+        else:
+            self._top_to_fac()
+            self.fac = None
+            self._call("to_byte")
+
+        if address is not None:
+            asm.op("STA", ABSOLUTE, address)
+        else:
+            asm.op("LDY", IMMEDIATE, 0)
+            asm.op("STA", INDIRECT_Y, asm.equates["ptr2"])
+
+
+def _byte_address(constant: int | float | str | None, top: int) -> int | None:
+    """
+    The integer a constant number converts to, when it is in 0..top.
+    """
+    if isinstance(constant, (int, float)) and 0 <= constant <= top:
+        return int(constant)
+    return None
+
+
+def lower(code: Code | Iterable[str]) -> Assembler:
+    """
+    Lower a program, a Code or lines of text pseudocode, into 6502 code.
+
+    Raises:
+        BackendError: When the program has compile errors or pseudocode that
+            cannot be lowered
+    """
+    if not isinstance(code, Code):
+        code = Code.from_text(code)
+    return Backend().lower(code)
+
+
+def assemble(code: Code | Iterable[str], origin: int) -> bytearray:
+    """
+    Return the machine code of a program, to be loaded at an address.
+
+    Raises:
+        BackendError: When the program cannot be lowered, or does not fit in
+            the memory below the BASIC ROM
+    """
+    asm = lower(code)
+    asm.layout(origin)
+    if asm.top > MEMORY_TOP:
+        raise ProgramTooLargeError(
+            f"Program needs memory up to ${asm.top:04X}, "
+            f"above the BASIC ROM at ${MEMORY_TOP:04X}"
+        )
+    return asm.encode(origin)
@@ -1,26 +1,21 @@
+from collections.abc import Iterable
+
 import c64basic_compiler.common.basic_tokens as basic_tokens
-import c64basic_compiler.common.opcodes_6502 as opcodes
 from c64basic_compiler.common.compile_context import CompileContext
 from c64basic_compiler.common.petscii_map import PETSCII_ALL
-from c64basic_compiler.compiler.instructions_registry import get_instruction_handler
-from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.compiler import backend
+from c64basic_compiler.pseudocode.codegen import generate_ir
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
+BASIC_START = 0x0801
 
-def generate_code(ast, ctx: CompileContext):
-    logger.debug("Generating code...")
-    code: bytearray = bytearray()
-    machine_code: bytearray = bytearray()
-    line_addresses: dict[str, int] = ctx.symbol_table.table.setdefault(
-        "__line_addresses__", {}
-    )
-
-    # -----------------------------------------------
-    # 1. Generate BASIC header that makes SYS jump to our code
-    # -----------------------------------------------
-    logger.debug("Generating BASIC header...")
-    basic_start_addr = 0x0801
 
+def basic_header(start: int = BASIC_START) -> bytearray:
+    """
+    Return the BASIC program "10 SYS <address>" that starts the machine code
+    following it, when loaded at an address.
+    """
     basic_line: bytearray = bytearray()
     sys_line_number = 10
 
@@ -36,58 +31,43 @@ def generate_code(ast, ctx: CompileContext):
     basic_line.append(0x00)
     basic_line += (0x0000).to_bytes(2, "little")
 
-    start_machine_code_addr = basic_start_addr + len(basic_line)
+    start_machine_code_addr = start + len(basic_line)
 
     basic_line[6] = ord(str(start_machine_code_addr)[0])
     basic_line[7] = ord(str(start_machine_code_addr)[1])
     basic_line[8] = ord(str(start_machine_code_addr)[2])
     basic_line[9] = ord(str(start_machine_code_addr)[3])
 
-    next_line_addr = basic_start_addr + len(basic_line) - 4
+    next_line_addr = start + len(basic_line) - 2
     basic_line[0] = next_line_addr & 0xFF
     basic_line[1] = (next_line_addr >> 8) & 0xFF
 
-    code += basic_line
-
-    logger.debug(f"Basic header generated: {basic_line.hex()}")
+    return basic_line
 
-    # -----------------------------------------------
-    # 2. First pass: calculate addresses for each instruction
-    # -----------------------------------------------
-    logger.debug("Calculating addresses for each instruction...")
-    current_addr = start_machine_code_addr
 
-    for instr in ast:
-        handler = get_instruction_handler(instr, ctx)
-        line_addresses[instr["line"]] = current_addr
-        current_addr += handler.size()
+def generate_binary(code: Code | Iterable[str]) -> bytearray:
+    """
+    Return the contents of a .prg file, after its load address, for a program
+    in pseudocode: the BASIC header followed by the machine code.
 
-    logger.debug(f"Addresses calculated: {line_addresses}")
+    Raises:
+        BackendError: When the program cannot be compiled to machine code
+    """
+    logger.debug("Generating BASIC header...")
+    binary = basic_header()
+    logger.debug("Basic header generated: {}", binary.hex())
 
-    # -----------------------------------------------
-    # 3. Generate machine code
-    # -----------------------------------------------
     logger.debug("Generating machine code...")
+    binary += backend.assemble(code, BASIC_START + len(binary))
+    logger.debug("Machine code generated: {} bytes", len(binary))
+    return binary
 
-    for instr in ast:
-        handler: InstructionHandler = get_instruction_handler(instr, ctx)
-        handler.current_address = line_addresses[instr["line"]]
-        machine_code += handler.emit()
-
-    logger.debug(f"Machine code generated: {machine_code.hex()}")
-
-    # Check if the last line of code is RTS, and, if not, append it
-    # to the end of the code. This is necessary to return to BASIC.
-    # TODO: make it configurable in the compiler options
-    if machine_code[-1] != opcodes.RTS:
-        logger.debug("Appending RTS to the end of the code...")
-        machine_code.append(opcodes.RTS)
 
-    # -----------------------------------------------
-    # 4. Combine BASIC header and machine code
-    # -----------------------------------------------
-    logger.debug("Combining BASIC header and machine code...")
-    code += machine_code
-    code += ctx.string_area.emit()  # adjuntar datos de cadena en RAM
+def generate_code(ast, ctx: CompileContext) -> bytearray:
+    """
+    Return the contents of a .prg file for a parsed program.
 
-    return code
+    Raises:
+        BackendError: When the program cannot be compiled to machine code
+    """
+    return generate_binary(generate_ir(ast, ctx))
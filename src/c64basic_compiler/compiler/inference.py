@@ -0,0 +1,481 @@
+"""
+Integer inference.
+
+A whole-program pass over pseudocode that finds the numeric variables that
+only ever hold whole numbers in -32768..32767 or in 0..65535, so the backend
+can keep them in 2 bytes and add, subtract and compare them with 16-bit
+instructions instead of the floating point routines of the BASIC ROM.
+
+The pass follows the values on the pseudocode stack as ranges: the lowest
+and highest value an expression can have, and whether it can only be a
+whole number. The range of a variable is that of all the values stored in
+it, wherever they are stored, so the pass does not need to follow jumps; it
+is run again until the ranges no longer change. Variables start at 0.
+
+A FOR loop counter is an integer when its limits are whole numbers and its
+step is always the same whole number: the values NEXT gives it are then
+bounded by the values stored in it and by the limit.
+
+Integer (%) variables are always integers: the numbers stored in them are
+rounded down, and must be in -32768..32767.
+"""
+
+import math
+from collections.abc import Callable
+from typing import NamedTuple
+
+from c64basic_compiler.pseudocode.ir import MNEMONICS, Code
+
+
+class Range(NamedTuple):
+    """
+    The values a number can have: from lo to hi, only whole numbers when
+    integral.
+    """
+
+    lo: float
+    hi: float
+    integral: bool = True
+
+    @property
+    def signed(self) -> bool:
+        """True when the values fit in a signed 16-bit integer"""
+        return self.integral and -32768 <= self.lo and self.hi <= 32767
+
+    @property
+    def unsigned(self) -> bool:
+        """True when the values fit in an unsigned 16-bit integer"""
+        return self.integral and 0 <= self.lo and self.hi <= 65535
+
+    @property
+    def word(self) -> bool:
+        """True when the values fit in 16 bits, signed or unsigned"""
+        return self.signed or self.unsigned
+
+
+class Integers(NamedTuple):
+    """
+    Result of the inference: the range of each integer variable, and the
+    step of the FOR loops of the integer counters.
+    """
+
+    ranges: dict[str, Range]
+    steps: dict[str, int]
+
+
+ZERO = Range(0, 0)
+# Range of the results of AND, OR and NOT, which raise an error for numbers
+# out of it
+SIGNED = Range(-32768, 32767)
+BYTE = Range(0, 255)
+BOOLEAN = Range(-1, 0)
+# Whole numbers are exact in 5 bytes up to 32 bits
+EXACT_LIMIT = 2**32
+# Bound of the rounding error of a floating point operation, relative to
+# its result
+ROUNDING = 2**-30
+# Largest number BASIC can store
+LARGEST = 1.7e38
+
+# Exact passes over the program before ranges that still grow are given up
+PASSES = 8
+
+STRING = "string"
+
+
+def join(a: Range | None, b: Range | None) -> Range | None:
+    """Smallest range holding two ranges; None stands for any number"""
+    if a is None or b is None:
+        return None
+    return Range(min(a.lo, b.lo), max(a.hi, b.hi), a.integral and b.integral)
+
+
+def computed(lo: float, hi: float, integral: bool) -> Range | None:
+    """
+    Range of the result of an operation, from the exact results for the
+    ends of the ranges of its operands. Results that are not whole numbers,
+    or too large for 32 bits, may be rounded.
+    """
+    if not (-LARGEST < lo <= hi < LARGEST):
+        return None
+    if integral and -EXACT_LIMIT < lo and hi < EXACT_LIMIT:
+        return Range(lo, hi)
+    return Range(lo - abs(lo) * ROUNDING, hi + abs(hi) * ROUNDING, False)
+
+
+def constant(value: int | float) -> Range | None:
+    """Range of a number written in a program"""
+    if not -LARGEST < value < LARGEST:
+        return None
+    return computed(value, value, value == int(value))
+
+
+def add(a: Range, b: Range) -> Range | None:
+    return computed(a.lo + b.lo, a.hi + b.hi, a.integral and b.integral)
+
+
+def subtract(a: Range, b: Range) -> Range | None:
+    return computed(a.lo - b.hi, a.hi - b.lo, a.integral and b.integral)
+
+
+def multiply(a: Range, b: Range) -> Range | None:
+    corners = (a.lo * b.lo, a.lo * b.hi, a.hi * b.lo, a.hi * b.hi)
+    return computed(min(corners), max(corners), a.integral and b.integral)
+
+
+def divide(a: Range, b: Range) -> Range | None:
+    if b.lo <= 0 <= b.hi:
+        return None
+    corners = (a.lo / b.lo, a.lo / b.hi, a.hi / b.lo, a.hi / b.hi)
+    return computed(min(corners), max(corners), False)
+
+
+def negate(a: Range) -> Range:
+    return Range(-a.hi, -a.lo, a.integral)
+
+
+def absolute(a: Range) -> Range:
+    if a.lo >= 0:
+        return a
+    if a.hi <= 0:
+        return negate(a)
+    return Range(0, max(-a.lo, a.hi), a.integral)
+
+
+def integer(a: Range) -> Range:
+    return a if a.integral else Range(math.floor(a.lo), math.floor(a.hi))
+
+
+def to_integer(a: Range | None) -> Range:
+    """
+    Range of a number stored in an integer (%) variable: rounded down, and
+    in SIGNED (AYINT raises an error for the others).
+    """
+    if a is None:
+        return SIGNED
+    a = integer(a)
+    lo, hi = max(a.lo, SIGNED.lo), min(a.hi, SIGNED.hi)
+    return Range(lo, hi) if lo <= hi else SIGNED
+
+
+def sign(a: Range) -> Range:
+    return Range((a.lo > 0) - (a.lo < 0), (a.hi > 0) - (a.hi < 0))
+
+
+def logic_and(a: Range | None, b: Range | None) -> Range:
+    """Range of AND: no larger than that of an operand that is not negative"""
+    highs = [r.hi for r in (a, b) if r is not None and r.signed and r.lo >= 0]
+    return Range(0, min(highs)) if highs else SIGNED
+
+
+def logic_or(a: Range | None, b: Range | None) -> Range:
+    """Range of OR: the bits of two operands that are not negative"""
+    if a is None or b is None or not (a.signed and b.signed):
+        return SIGNED
+    if a.lo < 0 or b.lo < 0:
+        return SIGNED
+    return Range(max(a.lo, b.lo), (1 << int(max(a.hi, b.hi)).bit_length()) - 1)
+
+
+def logic_not(a: Range | None) -> Range:
+    if a is not None and a.signed:
+        return Range(-a.hi - 1, -a.lo - 1)
+    return SIGNED
+
+
+class _Pass:
+    """
+    One pass over a program: the ranges of the values stored in each
+    variable, given the ranges of the variables found so far. Each
+    instruction is followed by the method named after it, if any.
+    """
+
+    def __init__(self, ranges: dict[str, Range | None]) -> None:
+        self.ranges = ranges
+        self.stack: list[Range | str | None] = []
+        # Values stored in each variable, other than by NEXT
+        self.stores: dict[str, Range | None] = {}
+        self.limits: dict[str, Range | None] = {}
+        self.steps: dict[str, Range | None] = {}
+        # Loop variables of the open FOR loops, and the counters of NEXTs
+        self.loops: list[str] = []
+        self.counters: set[str] = set()
+
+    def run(self, instructions: list[tuple[str, object]]) -> None:
+        """
+        Follow a program.
+
+        Raises:
+            ValueError: When the program has pseudocode the pass does not
+                know, or that is not consistent
+        """
+        methods: dict[str, Callable[[object], None]] = {}
+        for mnemonic, operand in instructions:
+            method = methods.get(mnemonic)
+            if method is None:
+                method = getattr(self, "_" + mnemonic.replace("$", "_str"), None)
+                if method is None:
+                    raise ValueError(f"Unknown pseudocode {mnemonic}")
+                methods[mnemonic] = method
+            method(operand)
+
+    def result(self) -> dict[str, Range | None]:
+        """Range of every variable after the pass"""
+        ranges = dict(self.stores)
+        for name in self.counters:
+            ranges[name] = self._counter(name)
+        return ranges
+
+    def _counter(self, name: str) -> Range | None:
+        """
+        Range of a FOR loop counter: the values stored in it, its limits and
+        the values NEXT gives it. Counted up, these are no lower than the
+        values stored and no higher than the highest value before NEXT (a
+        value stored or the limit) plus the step; counted down, the other
+        way round.
+        """
+        stored = self.stores.get(name, ZERO)
+        limit = self.limits.get(name)
+        step = self.steps.get(name)
+        if stored is None or limit is None or step is None:
+            return None
+        if not (stored.integral and limit.integral and step.integral):
+            return None
+        if step.lo >= 0:
+            following = Range(stored.lo, max(stored.hi, limit.hi) + step.lo)
+        else:
+            following = Range(min(stored.lo, limit.lo) + step.lo, stored.hi)
+        return join(join(stored, limit), following)
+
+    def _store(self, table: dict[str, Range | None], name: str) -> None:
+        value = self.stack.pop()
+        if isinstance(value, str):
+            raise ValueError(f"String stored in {name}")
+        if name.endswith("%"):
+            value = to_integer(value)
+        table[name] = join(table.get(name, ZERO), value)
+
+    def _number(self) -> Range | None:
+        value = self.stack.pop()
+        if isinstance(value, str):
+            raise ValueError("String used as a number")
+        return value
+
+    def _unary(self, function: Callable[[Range], Range | None]) -> None:
+        value = self._number()
+        self.stack.append(None if value is None else function(value))
+
+    def _binary(self, function: Callable[[Range, Range], Range | None]) -> None:
+        right = self._number()
+        left = self._number()
+        if left is None or right is None:
+            self.stack.append(None)
+        else:
+            self.stack.append(function(left, right))
+
+    def _pop(self, operand: object = None) -> None:
+        self.stack.pop()
+
+    def _none(self, operand: object = None) -> None:
+        pass
+
+    _REM = _LABEL = _JMP = _CALL = _RET = _END = _IF_END = _none
+    _PRINT_NEWLINE = _PRINT_NO_NEWLINE = _PRINT_TAB = _none
+    _INPUT_STRING = _GET_CHAR = _none
+    _VALIDATE_INT_RANGE_ADDRESS = _VALIDATE_INT_RANGE_VALUE = _none
+    _PRINT_VALUE = _IF_START = _COND_JUMP = _INPUT_PROMPT = _pop
+
+    def _PUSH_CONST(self, operand: Range | str | None) -> None:
+        self.stack.append(operand)
+
+    def _LOAD(self, operand: str) -> None:
+        if operand.endswith("$"):
+            self.stack.append(STRING)
+        else:
+            self.stack.append(self.ranges.get(operand, ZERO))
+
+    def _STORE(self, operand: str) -> None:
+        if operand.endswith("$"):
+            self.stack.pop()
+        else:
+            self._store(self.stores, operand)
+
+    def _ADD(self, operand: object) -> None:
+        if self.stack[-1] is STRING:
+            self.stack.pop()
+        else:
+            self._binary(add)
+
+    def _SUB(self, operand: object) -> None:
+        self._binary(subtract)
+
+    def _MUL(self, operand: object) -> None:
+        self._binary(multiply)
+
+    def _DIV(self, operand: object) -> None:
+        self._binary(divide)
+
+    def _AND(self, operand: object) -> None:
+        right, left = self._number(), self._number()
+        self.stack.append(logic_and(left, right))
+
+    def _OR(self, operand: object) -> None:
+        right, left = self._number(), self._number()
+        self.stack.append(logic_or(left, right))
+
+    def _NOT(self, operand: object) -> None:
+        self.stack.append(logic_not(self._number()))
+
+    def _compare(self, operand: object) -> None:
+        self.stack.pop()
+        self.stack.pop()
+        self.stack.append(BOOLEAN)
+
+    _EQUAL = _NOT_EQUAL = _LESS = _LESS_EQUAL = _compare
+    _GREATER = _GREATER_EQUAL = _compare
+
+    def _NEGATE(self, operand: object) -> None:
+        self._unary(negate)
+
+    def _ABS(self, operand: object) -> None:
+        self._unary(absolute)
+
+    def _INT(self, operand: object) -> None:
+        self._unary(integer)
+
+    def _SGN(self, operand: object) -> None:
+        self._unary(sign)
+
+    def _function(self, operand: object) -> None:
+        self.stack.pop()
+        self.stack.append(None)
+
+    _SQR = _LOG = _EXP = _SIN = _COS = _TAN = _ATN = _VAL = _function
+
+    def _POW(self, operand: object) -> None:
+        self.stack.pop()
+        self._function(operand)
+
+    def _RND(self, operand: object) -> None:
+        self.stack.pop()
+        self.stack.append(Range(0, 1, False))
+
+    def _PI(self, operand: object) -> None:
+        self.stack.append(Range(3.14, 3.15, False))
+
+    def _byte(self, operand: object) -> None:
+        self.stack.pop()
+        self.stack.append(BYTE)
+
+    _PEEK = _LEN = _ASC = _byte
+
+    def _string(self, operand: object) -> None:
+        self.stack.pop()
+        self.stack.append(STRING)
+
+    _STR_str = _CHR_str = _string
+
+    def _POKE_MEMORY(self, operand: object) -> None:
+        self.stack.pop()
+        self.stack.pop()
+
+    def _STORE_LIMIT(self, operand: str) -> None:
+        self._store(self.limits, operand)
+
+    def _STORE_STEP(self, operand: str) -> None:
+        value = self._number()
+        if value is None or value.lo != value.hi:
+            value = None
+        if self.steps.get(operand, value) != value:
+            value = None
+        self.steps[operand] = value
+
+    def _FOR_START(self, operand: str) -> None:
+        self.loops.append(operand)
+
+    def _NEXT(self, operand: str | None) -> None:
+        # Paired with their FOR as the backend does
+        loops = self.loops
+        index = len(loops) - 1
+        if operand is not None:
+            while index >= 0 and loops[index] != operand:
+                index -= 1
+        if index < 0:
+            raise ValueError("NEXT without FOR")
+        self.counters.add(loops[index])
+        del loops[index + 1 :]
+
+    def _INPUT_NUMBER(self, operand: str) -> None:
+        self.stack.append(None)
+        self._store(self.stores, operand)
+
+    def _GET_CHAR_CODE(self, operand: str) -> None:
+        self.stack.append(BYTE)
+        self._store(self.stores, operand)
+
+
+def _instructions(code: Code) -> list[tuple[str, object]]:
+    """
+    Mnemonic and operand of every instruction, numbers pushed given as their
+    range.
+    """
+    operands = [
+        value if isinstance(value, str) else constant(value) for value in code.constants
+    ]
+    pushed = [
+        value if isinstance(value, Range) or value is None else STRING
+        for value in operands
+    ]
+    push = MNEMONICS.index("PUSH_CONST")
+    return [
+        (
+            MNEMONICS[opcode],
+            None
+            if operand < 0
+            else (pushed[operand] if opcode == push else operands[operand]),
+        )
+        for opcode, operand in zip(code.opcodes, code.operands, strict=True)
+    ]
+
+
+def _widest(name: str) -> Range | None:
+    return SIGNED if name.endswith("%") else None
+
+
+def infer_integers(code: Code) -> Integers:
+    """
+    Find the integer variables of a program, and their ranges. Programs with
+    pseudocode the pass does not know have none.
+    """
+    instructions = _instructions(code)
+    ranges: dict[str, Range | None] = {}
+    passes = 0
+    while True:
+        current = _Pass(ranges)
+        try:
+            current.run(instructions)
+        except (ValueError, IndexError, AttributeError):
+            return Integers({}, {})
+        found = current.result()
+        passes += 1
+        if passes >= PASSES:
+            # Ranges that still grow could grow for ever
+            found = {
+                name: value if value == ranges.get(name) else _widest(name)
+                for name, value in found.items()
+            }
+        if found == ranges:
+            break
+        ranges = found
+
+    integers = {
+        name: value
+        for name, value in ranges.items()
+        if value is not None and value.word
+    }
+    steps = {
+        name: int(step.lo)
+        for name in current.counters
+        if name in integers and (step := current.steps[name]) is not None
+    }
+    return Integers(integers, steps)
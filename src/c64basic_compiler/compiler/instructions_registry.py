@@ -1,44 +1,89 @@
-from c64basic_compiler.handlers.end_handler import EndHandler
-from c64basic_compiler.handlers.for_handler import ForHandler
-from c64basic_compiler.handlers.get_handler import GetHandler  # Add import for GET
-from c64basic_compiler.handlers.gosub_handler import GosubHandler
-from c64basic_compiler.handlers.goto_handler import GotoHandler
-from c64basic_compiler.handlers.if_handler import IfHandler
-from c64basic_compiler.handlers.input_handler import InputHandler
-from c64basic_compiler.handlers.let_handler import LetHandler
-from c64basic_compiler.handlers.next_handler import NextHandler
-from c64basic_compiler.handlers.poke_handler import PokeHandler
-from c64basic_compiler.handlers.print_handler import PrintHandler
-from c64basic_compiler.handlers.rem_handler import RemHandler
-from c64basic_compiler.handlers.return_handler import ReturnHandler
+import importlib
+from collections.abc import Iterator, Mapping
 
-# Create a dictionary of handler classes
-instruction_handlers = {
-    "PRINT": PrintHandler,
-    "GOTO": GotoHandler,
-    "END": EndHandler,
-    "REM": RemHandler,
-    "LET": LetHandler,
-    "GOSUB": GosubHandler,
-    "RETURN": ReturnHandler,
-    "FOR": ForHandler,
-    "NEXT": NextHandler,
-    "POKE": PokeHandler,
-    "INPUT": InputHandler,
-    "GET": GetHandler,  # Add entry for GET
+from c64basic_compiler.compiler.statement import Command, Statement
+from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+
+# Handler class of each command, as "module:class". Handler modules are only
+# imported when a program first uses their command.
+HANDLER_CLASSES = {
+    "PRINT": "c64basic_compiler.handlers.print_handler:PrintHandler",
+    "GOTO": "c64basic_compiler.handlers.goto_handler:GotoHandler",
+    "END": "c64basic_compiler.handlers.end_handler:EndHandler",
+    "REM": "c64basic_compiler.handlers.rem_handler:RemHandler",
+    "LET": "c64basic_compiler.handlers.let_handler:LetHandler",
+    "GOSUB": "c64basic_compiler.handlers.gosub_handler:GosubHandler",
+    "RETURN": "c64basic_compiler.handlers.return_handler:ReturnHandler",
+    "FOR": "c64basic_compiler.handlers.for_handler:ForHandler",
+    "NEXT": "c64basic_compiler.handlers.next_handler:NextHandler",
+    "POKE": "c64basic_compiler.handlers.poke_handler:PokeHandler",
+    "INPUT": "c64basic_compiler.handlers.input_handler:InputHandler",
+    "GET": "c64basic_compiler.handlers.get_handler:GetHandler",
+    "IF": "c64basic_compiler.handlers.if_handler:IfHandler",
 }
 
 
+class HandlerRegistry(Mapping[str, type[InstructionHandler]]):
+    """
+    Handler classes by command name, imported on first lookup.
+    """
+
+    def __init__(self, classes: dict[str, str]):
+        self._paths = classes
+        self._classes: dict[str, type[InstructionHandler]] = {}
+
+    def __getitem__(self, command: str) -> type[InstructionHandler]:
+        handler_class = self._classes.get(command)
+        if handler_class is None:
+            module_name, class_name = self._paths[command].split(":")
+            module = importlib.import_module(module_name)
+            handler_class = self._classes[command] = getattr(module, class_name)
+        return handler_class
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+
+# Create a dictionary of handler classes
+instruction_handlers = HandlerRegistry(HANDLER_CLASSES)
+
+
+# Dispatch table indexed by Command, filled in by get_handler as commands are
+# first used: None stands for a handler not loaded yet, or for no handler
+handler_table: list[InstructionHandler | None] = [None] * (max(Command) + 1)
+
+
+def get_handler(command: Command) -> InstructionHandler | None:
+    """
+    Return the shared handler of a command, loading it on first use, or None
+    if the command has no handler.
+    """
+    handler = handler_table[command]
+    if handler is None:
+        handler_class = instruction_handlers.get(Command(command).keyword)
+        if handler_class is not None:
+            handler = handler_table[command] = handler_class()
+    return handler
+
+
 def get_instruction_handler(instr, context):
-    command = instr["command"].upper()
+    """
+    Return a handler bound to a statement, to be called through pseudocode().
+
+    Code generation dispatches through handler_table; this is kept for callers
+    that work with one statement at a time.
+    """
+    # Plain {"line", "command", "args"} dictionaries are still accepted
+    if not isinstance(instr, Statement):
+        instr = Statement.from_dict(instr)
+
+    command = instr.name
     handler_class = instruction_handlers.get(command)
 
     if handler_class is None:
         raise Exception(f"Unknown command '{command}'")
 
     return handler_class(instr, context)
-
-
-# Import IfHandler at the end to avoid circular import
-
-instruction_handlers["IF"] = IfHandler
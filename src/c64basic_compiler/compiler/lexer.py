@@ -0,0 +1,249 @@
+# c64basic_compiler/compiler/lexer.py
+
+import re
+from enum import IntEnum
+from typing import NamedTuple
+
+from c64basic_compiler.basic import FUNCTION_TABLE, BasicFunction
+from c64basic_compiler.common.basic_tokens import SUPPORTED_COMMANDS
+from c64basic_compiler.exceptions import UnhandledTokenError
+
+
+class TokenKind(IntEnum):
+    """Kinds of lexical tokens produced by the lexer."""
+
+    NUMBER = 1
+    STRING = 2
+    IDENTIFIER = 3
+    KEYWORD = 4
+    OPERATOR = 5
+    LPAREN = 6
+    RPAREN = 7
+    COMMA = 8
+    SEMICOLON = 9
+    OTHER = 10  # Any other character (only produced by the source scanner)
+
+
+class ExprToken(NamedTuple):
+    """
+    A classified token with its position in the source text.
+
+    Attributes:
+        kind: The token kind
+        text: The token text (negative literals include their sign)
+        start: Offset of the first character of the token in the source
+        end: Offset just past the last character of the token in the source
+        func: The BASIC function or operator the token names, if any
+    """
+
+    kind: TokenKind
+    text: str
+    start: int
+    end: int
+    func: BasicFunction | None = None
+
+
+# Words that are reserved by BASIC but are not functions nor operators
+RESERVED_WORDS = frozenset(SUPPORTED_COMMANDS | {"THEN", "TO", "STEP", "FN", "GO"})
+
+# Words that behave as operators inside expressions
+WORD_OPERATORS = frozenset({"AND", "OR", "NOT"})
+
+# Building blocks shared with the source scanner (compiler/tokenizer.py)
+NUMBER_SYNTAX = r"(?:\d+\.?\d*|\.\d+)(?:E[+-]?\d+)?"
+WORD_SYNTAX = r"[A-Z_][A-Z0-9_]*[$%]?"
+OPERATOR_SYNTAX = r"<=|>=|<>|[-+*/^=<>]"
+
+# Single master pattern: one alternative per token class. The order matters:
+# numbers must be tried before words so "1E3" is read as a number.
+_EXPRESSION_RE = re.compile(
+    rf"""
+    (?P<space>\s+)
+    |(?P<string>"[^"]*"?)
+    |(?P<number>{NUMBER_SYNTAX})
+    |(?P<word>{WORD_SYNTAX})
+    |(?P<operator>{OPERATOR_SYNTAX})
+    |(?P<lparen>\()
+    |(?P<rparen>\))
+    |(?P<comma>,)
+    |(?P<semicolon>;)
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+_SIGNED_NUMBER_RE = re.compile(rf"-?{NUMBER_SYNTAX}", re.IGNORECASE)
+_OPERATOR_RE = re.compile(OPERATOR_SYNTAX)
+# A sign is not folded into the left operand of "^": -2^2 is -(2^2)
+_POWER_RE = re.compile(r"\s*\^")
+
+_PUNCTUATION_KINDS = {
+    "(": TokenKind.LPAREN,
+    ")": TokenKind.RPAREN,
+    ",": TokenKind.COMMA,
+    ";": TokenKind.SEMICOLON,
+}
+
+_GROUP_KINDS = {
+    "string": TokenKind.STRING,
+    "number": TokenKind.NUMBER,
+    "operator": TokenKind.OPERATOR,
+    "lparen": TokenKind.LPAREN,
+    "rparen": TokenKind.RPAREN,
+    "comma": TokenKind.COMMA,
+    "semicolon": TokenKind.SEMICOLON,
+}
+
+
+def classify_word(word: str) -> tuple[TokenKind, str]:
+    """
+    Classify an alphanumeric word as an operator, keyword or identifier.
+
+    Args:
+        word: The word as written in the source
+
+    Returns:
+        A tuple (kind, text). Word operators are returned in uppercase,
+        everything else keeps its original spelling.
+    """
+    upper = word.upper()
+    if upper in WORD_OPERATORS:
+        return TokenKind.OPERATOR, upper
+    if upper in FUNCTION_TABLE or upper in RESERVED_WORDS:
+        return TokenKind.KEYWORD, word
+    return TokenKind.IDENTIFIER, word
+
+
+def resolve_function(kind: TokenKind, text: str) -> BasicFunction | None:
+    """
+    Return the BASIC function or operator named by a token, if any.
+
+    Args:
+        kind: The token kind
+        text: The token text
+
+    Returns:
+        The function from FUNCTION_TABLE, or None for any other token
+    """
+    if kind == TokenKind.KEYWORD or kind == TokenKind.OPERATOR:
+        return FUNCTION_TABLE.get(text.upper())
+    return None
+
+
+def token_from_text(text: str) -> ExprToken:
+    """
+    Classify a single token given as text.
+
+    Used where tokens are only available as strings (hand-built statements,
+    the string based evaluator API). Offsets are not known and are set to 0.
+
+    Args:
+        text: The token text, e.g. "A$", "-1.5", "<=" or '"HI"'
+
+    Returns:
+        The classified token
+    """
+    if text.startswith('"'):
+        return ExprToken(TokenKind.STRING, text, 0, 0)
+    if _SIGNED_NUMBER_RE.fullmatch(text):
+        return ExprToken(TokenKind.NUMBER, text, 0, 0)
+    kind = _PUNCTUATION_KINDS.get(text)
+    if kind is None:
+        if _OPERATOR_RE.fullmatch(text):
+            kind = TokenKind.OPERATOR
+        else:
+            kind, text = classify_word(text)
+    return ExprToken(kind, text, 0, 0, resolve_function(kind, text))
+
+
+def is_operand(token: ExprToken) -> bool:
+    """
+    Check whether a token ends an operand.
+
+    A minus sign that follows an operand is a binary subtraction; otherwise
+    it is a sign and can be merged into the numeric literal that follows it.
+
+    Args:
+        token: The token to check
+
+    Returns:
+        True if the token completes an operand, False otherwise
+    """
+    kind = token.kind
+    if kind in (
+        TokenKind.NUMBER,
+        TokenKind.STRING,
+        TokenKind.IDENTIFIER,
+        TokenKind.RPAREN,
+    ):
+        return True
+    if kind == TokenKind.KEYWORD:
+        return token.func is not None and token.func.arity == 0
+    return False
+
+
+def lex_expression(expr: str) -> list[ExprToken]:
+    """
+    Split an expression into classified tokens in a single forward scan.
+
+    Negative numeric literals are recognised when the minus sign appears where
+    an operand is expected (start of expression, after an operator, an opening
+    parenthesis or a separator), so "A * -1" yields a single "-1" literal
+    while "X - 1" and "X-1" yield a subtraction. A literal raised to a power
+    keeps its sign apart, since "^" binds tighter than the sign.
+
+    Args:
+        expr: The expression to tokenize
+
+    Returns:
+        A list of tokens with their offsets in ``expr``
+
+    Raises:
+        UnhandledTokenError: When a character cannot start any token
+    """
+    tokens: list[ExprToken] = []
+    append = tokens.append
+    match = _EXPRESSION_RE.match
+    pending_sign: ExprToken | None = None
+    pos = 0
+    length = len(expr)
+
+    while pos < length:
+        m = match(expr, pos)
+        if m is None or m.lastgroup is None:
+            raise UnhandledTokenError(
+                f"Unexpected character '{expr[pos]}' at offset {pos} in '{expr}'"
+            )
+        group = m.lastgroup
+        text = m.group()
+        start = pos
+        pos = m.end()
+
+        if group == "space":
+            continue
+
+        if group == "word":
+            kind, text = classify_word(text)
+            func = resolve_function(kind, text)
+        else:
+            kind = _GROUP_KINDS[group]
+            func = FUNCTION_TABLE[text] if kind == TokenKind.OPERATOR else None
+
+        if pending_sign is not None:
+            if kind == TokenKind.NUMBER and not _POWER_RE.match(expr, pos):
+                # Fold the sign into the literal
+                append(ExprToken(TokenKind.NUMBER, "-" + text, pending_sign.start, pos))
+                pending_sign = None
+                continue
+            append(pending_sign)
+            pending_sign = None
+
+        if text == "-" and (not tokens or not is_operand(tokens[-1])):
+            pending_sign = ExprToken(kind, text, start, pos, func)
+            continue
+
+        append(ExprToken(kind, text, start, pos, func))
+
+    if pending_sign is not None:
+        append(pending_sign)
+
+    return tokens
@@ -1,66 +1,89 @@
 # c64basic_compiler/compiler/parser.py
 
-from typing import Any
+import sys
+from collections.abc import Iterable
 
-from c64basic_compiler.common.basic_tokens import SUPPORTED_COMMANDS
+from c64basic_compiler.compiler.lexer import is_operand, token_from_text
+from c64basic_compiler.compiler.statement import Command, Statement
+from c64basic_compiler.compiler.tokenizer import TokenStream
 
 
-def parse(tokens: list[tuple[int, list[str]]]) -> list[dict[str, Any]]:
+def parse(
+    tokens: TokenStream | Iterable[tuple[int, list[str]]],
+) -> list[Statement]:
     """
     Parses a list of tokens into an abstract syntax tree (AST).
 
     Supports multiple statements per line (as multiple tuples with same line number).
+    Accepts the list returned by tokenize() or a TokenStream returned by scan().
 
     Returns:
-        List of dicts, each representing a statement with line number, command, and args.
+        List of Statement nodes with line number, command, and args. Statements
+        parsed from a TokenStream also give handlers the classified tokens of
+        their args without lexing them again.
     """
-    ast = []
-    for lineno, parts in tokens:
-        if not parts:
-            continue
-
-        # Process negative numbers: if we see a - followed by a number, combine them
-        processed_tokens = []
-        i = 0
-        while i < len(parts):
-            # Check if this is a negative number pattern
-            if (
-                i + 1 < len(parts)
-                and parts[i] == "-"
-                and (
-                    parts[i + 1].isdigit() or parts[i + 1].replace(".", "", 1).isdigit()
-                )
-            ):
-                # Combine the negative sign with the number
-                processed_tokens.append(f"-{parts[i + 1]}")
-                i += 2  # Skip both tokens
-            else:
-                processed_tokens.append(parts[i])
-                i += 1
+    stream = tokens if isinstance(tokens, TokenStream) else None
+    if stream is not None:
+        statements = (stream.statement(index) for index in range(len(stream)))
+    else:
+        statements = ((lineno, _merge_signs(parts)) for lineno, parts in tokens)
 
-        # If we have no tokens after processing, skip this line
+    ast = []
+    for index, (lineno, processed_tokens) in enumerate(statements):
+        # If we have no tokens, skip this line
         if not processed_tokens:
             continue
 
-        command = processed_tokens[0].upper()
-        args = processed_tokens[1:] if len(processed_tokens) > 1 else []
+        name = processed_tokens[0].upper()
+        command = Command.lookup(name)
+        first = 1  # Index of the first argument
 
         # Special case for implicit LET command (no LET keyword)
-        if command not in SUPPORTED_COMMANDS and "=" in processed_tokens:
-            command = "LET"
-            args = processed_tokens
-        else:
-            # Regular command processing
-            args = processed_tokens[1:]  # Skip the command
-
-            # Special handling for IF command to preserve statement structure
-            if command == "IF":
-                # Keep IF and everything as is
-                pass
+        if command == Command.UNKNOWN and "=" in processed_tokens:
+            command = Command.LET
+            name = "LET"
+            first = 0
 
         # Create the AST node
-        instruction = {"line": lineno, "command": command, "args": args}
+        instruction = Statement(
+            lineno,
+            command,
+            sys.intern(name),
+            tuple([sys.intern(arg) for arg in processed_tokens[first:]]),
+            stream=stream,
+            first=stream.bounds[index] + first if stream is not None else 0,
+        )
 
         ast.append(instruction)
 
     return ast
+
+
+def _merge_signs(parts: list[str]) -> list[str]:
+    """
+    Process negative numbers: if we see a - followed by a number, combine them.
+
+    As in scan(), the sign is only merged where an operand is expected, so
+    "Y - 1" stays a subtraction while "= - 1" becomes the literal "-1". A
+    literal raised to a power keeps its sign apart.
+    """
+    processed_tokens: list[str] = []
+    i = 0
+    while i < len(parts):
+        # Check if this is a negative number pattern
+        if (
+            i + 1 < len(parts)
+            and parts[i] == "-"
+            and (parts[i + 1].isdigit() or parts[i + 1].replace(".", "", 1).isdigit())
+            and (i + 2 == len(parts) or parts[i + 2] != "^")
+            and not (
+                processed_tokens and is_operand(token_from_text(processed_tokens[-1]))
+            )
+        ):
+            # Combine the negative sign with the number
+            processed_tokens.append(f"-{parts[i + 1]}")
+            i += 2  # Skip both tokens
+        else:
+            processed_tokens.append(parts[i])
+            i += 1
+    return processed_tokens
@@ -1,4 +1,7 @@
-def write_pseudocode(filename: str, data: list[str]) -> None:
+from collections.abc import Iterable
+
+
+def write_pseudocode(filename: str, data: Iterable[str]) -> None:
     """Writes pseudocode data to a file.
 
     Args:
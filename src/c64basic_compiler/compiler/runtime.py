@@ -0,0 +1,484 @@
+"""
+Runtime routines of compiled programs.
+
+Code generated by the backend calls these routines for whatever does not fit
+in a few inline instructions; arithmetic, functions and number conversions
+are done by the routines of the BASIC ROM (see basic_rom_routines). Only the
+routines a program uses, and the routines they use, are linked into it.
+
+Strings are kept in memory as a length byte followed by the characters.
+Routines that work on strings take their addresses in the zero page
+pointers ptr1 (the source) and ptr2 (the destination).
+"""
+
+from typing import NamedTuple
+
+from c64basic_compiler.common import basic_rom_routines, kernal_routines
+from c64basic_compiler.compiler.assembler import Assembler
+
+# Zero page locations used by the runtime (free for programs on the C64)
+PTR1 = 0xFB
+PTR2 = 0xFD
+
+
+class Routine(NamedTuple):
+    source: str
+    needs: tuple[str, ...] = ()
+
+
+# Routines in the order they are linked
+ROUTINES: dict[str, Routine] = {
+    "clear_memory": Routine(
+        """
+clear_memory:           ; Zero the reserved memory, a page at a time
+        LDA #<__reserved
+        STA ptr1
+        LDA #>__reserved
+        STA ptr1+1
+        LDX #__reserved_pages
+        BEQ clear_memory_done
+        LDA #0
+        TAY
+clear_memory_loop:
+        STA (ptr1),Y
+        INY
+        BNE clear_memory_loop
+        INC ptr1+1
+        DEX
+        BNE clear_memory_loop
+clear_memory_done:
+        RTS
+"""
+    ),
+    "end": Routine(
+        """
+end:                    ; Return to BASIC, from any depth of GOSUB
+        LDX saved_sp
+        TXS
+        RTS
+saved_sp: .res 1
+"""
+    ),
+    "illegal_quantity": Routine(
+        """
+illegal_quantity:
+        LDX #ERROR_ILLEGAL_QUANTITY
+        JMP ERROR
+"""
+    ),
+    "string_registers": Routine(
+        """
+string_length: .res 1
+string_index: .res 1
+"""
+    ),
+    "print_string": Routine(
+        """
+print_string:           ; Print the string at (ptr1)
+        LDY #0
+        LDA (ptr1),Y
+        BEQ print_string_done
+        STA string_length
+print_string_loop:
+        INY
+        LDA (ptr1),Y
+        JSR CHROUT
+        CPY string_length
+        BNE print_string_loop
+print_string_done:
+        RTS
+""",
+        ("string_registers",),
+    ),
+    "print_number": Routine(
+        """
+print_number:           ; Print FAC as PRINT does, then a cursor right
+        JSR FOUT
+        STA ptr1
+        STY ptr1+1
+        LDY #0
+print_number_loop:
+        LDA (ptr1),Y
+        BEQ print_number_done
+        JSR CHROUT
+        INY
+        BNE print_number_loop
+print_number_done:
+        LDA #$1D
+        JMP CHROUT
+"""
+    ),
+    "print_tab": Routine(
+        """
+print_tab:              ; Move the cursor right to the next 10 column zone
+        LDA PNTR
+        SEC
+print_tab_zone:
+        SBC #10
+        BCS print_tab_zone
+        EOR #$FF
+        TAX
+        INX
+print_tab_loop:
+        LDA #$1D
+        JSR CHROUT
+        DEX
+        BNE print_tab_loop
+        RTS
+"""
+    ),
+    "string_copy": Routine(
+        """
+string_copy:            ; Copy the string at (ptr1) to (ptr2)
+        LDY #0
+        LDA (ptr1),Y
+        TAY
+string_copy_loop:
+        LDA (ptr1),Y
+        STA (ptr2),Y
+        DEY
+        CPY #$FF
+        BNE string_copy_loop
+        RTS
+"""
+    ),
+    "string_append": Routine(
+        """
+string_append:          ; Append the string at (ptr1) to the string at (ptr2)
+        LDY #0
+        LDA (ptr1),Y
+        BEQ string_append_done
+        STA string_length
+        LDA (ptr2),Y
+        STA string_index
+        CLC
+        ADC string_length
+        BCS string_too_long
+        STA (ptr2),Y
+        LDA string_index
+        CLC
+        ADC ptr2
+        STA ptr2
+        BCC string_append_copy
+        INC ptr2+1
+string_append_copy:
+        LDY string_length
+string_append_loop:
+        LDA (ptr1),Y
+        STA (ptr2),Y
+        DEY
+        BNE string_append_loop
+string_append_done:
+        RTS
+string_too_long:
+        LDX #ERROR_STRING_TOO_LONG
+        JMP ERROR
+""",
+        ("string_registers",),
+    ),
+    "string_compare": Routine(
+        """
+string_compare:         ; Compare the string at (ptr2) with the one at (ptr1),
+                        ; as FCOMP does: A = 0 (equal), 1 (greater) or $FF
+        LDY #0
+        LDA (ptr1),Y
+        STA string_length
+        LDA (ptr2),Y
+        STA string_index
+string_compare_loop:
+        CPY string_length
+        BEQ string_compare_end
+        CPY string_index
+        BEQ string_compare_less
+        INY
+        LDA (ptr2),Y
+        CMP (ptr1),Y
+        BEQ string_compare_loop
+        BCC string_compare_less
+string_compare_greater:
+        LDA #1
+        RTS
+string_compare_end:
+        CPY string_index
+        BNE string_compare_greater
+        LDA #0
+        RTS
+string_compare_less:
+        LDA #$FF
+        RTS
+""",
+        ("string_registers",),
+    ),
+    "string_from_number": Routine(
+        """
+string_from_number:     ; Store the text of FAC, as STR$ makes it, at (ptr2)
+        JSR FOUT
+        STA ptr1
+        STY ptr1+1
+        LDY #0
+string_from_number_loop:
+        LDA (ptr1),Y
+        BEQ string_from_number_done
+        INY
+        STA (ptr2),Y
+        BNE string_from_number_loop
+string_from_number_done:
+        TYA
+        LDY #0
+        STA (ptr2),Y
+        RTS
+"""
+    ),
+    "compare_result": Routine(
+        """
+compare_result:         ; Truth of the relations in X for a comparison result
+                        ; in A (see FCOMP): A = 0, and Z set, when false
+        STX compare_mask
+        CLC
+        ADC #1
+        TAX
+        LDA compare_bits,X
+        AND compare_mask
+        RTS
+compare_bits:
+        .byte 1, 2, 4
+compare_mask: .res 1
+"""
+    ),
+    "unsigned_to_fac": Routine(
+        """
+unsigned_to_fac:        ; FAC = the unsigned integer in A (high byte) and Y
+        PHA
+        JSR GIVAYF
+        PLA
+        BPL unsigned_to_fac_done
+        LDA #<unsigned_to_fac_65536
+        LDY #>unsigned_to_fac_65536
+        JMP FADD
+unsigned_to_fac_done:
+        RTS
+unsigned_to_fac_65536:
+        .byte $91, 0, 0, 0, 0
+"""
+    ),
+    "to_byte": Routine(
+        """
+to_byte:                ; A = FAC, which must be in 0..255
+        JSR GETADR
+        LDA LINNUM+1
+        BEQ to_byte_done
+        JMP illegal_quantity
+to_byte_done:
+        LDA LINNUM
+        RTS
+""",
+        ("illegal_quantity",),
+    ),
+    "logic_operands": Routine(
+        """
+logic_operands:         ; Integer of FAC in logic_high/logic_low, and of the
+                        ; number at (A/Y) in FACMO/FACMO+1
+        STA logic_pointer
+        STY logic_pointer+1
+        JSR AYINT
+        LDA FACMO
+        STA logic_high
+        LDA FACMO+1
+        STA logic_low
+        LDA logic_pointer
+        LDY logic_pointer+1
+        JSR MOVFM
+        JMP AYINT
+logic_pointer: .res 2
+logic_high: .res 1
+logic_low: .res 1
+"""
+    ),
+    "and_op": Routine(
+        """
+and_op:                 ; FAC = number at (A/Y) AND FAC
+        JSR logic_operands
+        LDA FACMO+1
+        AND logic_low
+        TAY
+        LDA FACMO
+        AND logic_high
+        JMP GIVAYF
+""",
+        ("logic_operands",),
+    ),
+    "or_op": Routine(
+        """
+or_op:                  ; FAC = number at (A/Y) OR FAC
+        JSR logic_operands
+        LDA FACMO+1
+        ORA logic_low
+        TAY
+        LDA FACMO
+        ORA logic_high
+        JMP GIVAYF
+""",
+        ("logic_operands",),
+    ),
+    "not_op": Routine(
+        """
+not_op:                 ; FAC = NOT FAC
+        JSR AYINT
+        LDA FACMO+1
+        EOR #$FF
+        TAY
+        LDA FACMO
+        EOR #$FF
+        JMP GIVAYF
+"""
+    ),
+    "asc": Routine(
+        """
+asc:                    ; FAC = code of the first character of the string at
+                        ; (ptr1)
+        LDY #0
+        LDA (ptr1),Y
+        BNE asc_char
+        JMP illegal_quantity
+asc_char:
+        INY
+        LDA (ptr1),Y
+        TAY
+        LDA #0
+        JMP GIVAYF
+""",
+        ("illegal_quantity",),
+    ),
+    "input_line": Routine(
+        """
+input_line:             ; Print "? " and read a line from the keyboard into
+                        ; BUF, zero-terminated, its length in string_length
+        LDA #$3F
+        JSR CHROUT
+        LDA #$20
+        JSR CHROUT
+        LDA #0
+        STA string_length
+input_line_read:
+        JSR CHRIN
+        CMP #$0D
+        BEQ input_line_done
+        LDX string_length
+        CPX #88
+        BCS input_line_read
+        STA BUF,X
+        INC string_length
+        BNE input_line_read
+input_line_done:
+        LDX string_length
+        LDA #0
+        STA BUF,X
+        RTS
+""",
+        ("string_registers",),
+    ),
+    "buffer_to_string": Routine(
+        """
+buffer_to_string:       ; Store the line read by input_line at (ptr2)
+        LDY string_length
+        BEQ buffer_to_string_done
+buffer_to_string_loop:
+        LDA BUF-1,Y
+        STA (ptr2),Y
+        DEY
+        BNE buffer_to_string_loop
+buffer_to_string_done:
+        LDA string_length
+        STA (ptr2),Y
+        RTS
+""",
+        ("string_registers",),
+    ),
+    "string_to_buffer": Routine(
+        """
+string_to_buffer:       ; Copy the string at (ptr1) to BUF, zero-terminated
+        LDY #0
+        LDA (ptr1),Y
+        CMP #88
+        BCC string_to_buffer_length
+        LDA #88
+string_to_buffer_length:
+        TAY
+        LDA #0
+        STA BUF,Y
+        CPY #0
+        BEQ string_to_buffer_done
+string_to_buffer_loop:
+        LDA (ptr1),Y
+        STA BUF-1,Y
+        DEY
+        BNE string_to_buffer_loop
+string_to_buffer_done:
+        RTS
+"""
+    ),
+    "parse_buffer": Routine(
+        """
+parse_buffer:           ; FAC = the number BUF starts with, as VAL reads it
+        LDA TXTPTR
+        PHA
+        LDA TXTPTR+1
+        PHA
+        LDA #<BUF
+        STA TXTPTR
+        LDA #>BUF
+        STA TXTPTR+1
+        JSR CHRGOT
+        JSR FIN
+        PLA
+        STA TXTPTR+1
+        PLA
+        STA TXTPTR
+        RTS
+"""
+    ),
+    "get_char": Routine(
+        """
+get_char:               ; Store the key pressed, if any, as a string at (ptr2)
+        JSR GETIN
+        LDY #0
+        CMP #0
+        BEQ get_char_done
+        INY
+        STA (ptr2),Y
+        TYA
+        DEY
+get_char_done:
+        STA (ptr2),Y
+        RTS
+"""
+    ),
+}
+
+
+def define_symbols(asm: Assembler) -> None:
+    """
+    Define the zero page pointers and the ROM entry points as equates.
+    """
+    asm.equ("ptr1", PTR1)
+    asm.equ("ptr2", PTR2)
+    for module in (basic_rom_routines, kernal_routines):
+        for name, value in vars(module).items():
+            if name.isupper():
+                asm.equ(name, value)
+
+
+def link(asm: Assembler, names: set[str]) -> None:
+    """
+    Add the routines named, and the routines they need, to a program.
+    """
+    needed = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(ROUTINES[name].needs)
+    for name, routine in ROUTINES.items():
+        if name in needed:
+            asm.source(routine.source)
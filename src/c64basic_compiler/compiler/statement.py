@@ -0,0 +1,134 @@
+# c64basic_compiler/compiler/statement.py
+
+from collections.abc import Mapping, Sequence
+from enum import IntEnum
+from typing import Any
+
+from c64basic_compiler.common import basic_tokens
+from c64basic_compiler.compiler.lexer import ExprToken, token_from_text
+from c64basic_compiler.compiler.tokenizer import TokenStream
+
+
+class Command(IntEnum):
+    """
+    BASIC statement keywords, valued by their C64 token byte.
+
+    UNKNOWN stands for any word that is not a statement keyword; the original
+    spelling is kept in Statement.name.
+    """
+
+    UNKNOWN = 0
+    END = basic_tokens.END
+    FOR = basic_tokens.FOR
+    NEXT = basic_tokens.NEXT
+    DATA = basic_tokens.DATA
+    INPUT_HASH = basic_tokens.INPUT_HASH
+    INPUT = basic_tokens.INPUT
+    DIM = basic_tokens.DIM
+    READ = basic_tokens.READ
+    LET = basic_tokens.LET
+    GOTO = basic_tokens.GOTO
+    RUN = basic_tokens.RUN
+    IF = basic_tokens.IF
+    RESTORE = basic_tokens.RESTORE
+    GOSUB = basic_tokens.GOSUB
+    RETURN = basic_tokens.RETURN
+    REM = basic_tokens.REM
+    STOP = basic_tokens.STOP
+    ON = basic_tokens.ON
+    WAIT = basic_tokens.WAIT
+    LOAD = basic_tokens.LOAD
+    SAVE = basic_tokens.SAVE
+    VERIFY = basic_tokens.VERIFY
+    DEF = basic_tokens.DEF
+    POKE = basic_tokens.POKE
+    PRINT_HASH = basic_tokens.PRINT_HASH
+    PRINT = basic_tokens.PRINT
+    CONT = basic_tokens.CONT
+    LIST = basic_tokens.LIST
+    CLR = basic_tokens.CLR
+    CMD = basic_tokens.CMD
+    SYS = basic_tokens.SYS
+    OPEN = basic_tokens.OPEN
+    CLOSE = basic_tokens.CLOSE
+    GET = basic_tokens.GET
+    NEW = basic_tokens.NEW
+
+    @property
+    def keyword(self) -> str:
+        """The keyword as written in BASIC (e.g. "PRINT#")."""
+        return self.name.replace("_HASH", "#")
+
+    @classmethod
+    def lookup(cls, word: str) -> "Command":
+        """Return the command for a keyword, or UNKNOWN."""
+        return _COMMANDS.get(word.upper(), cls.UNKNOWN)
+
+
+_COMMANDS = {command.keyword: command for command in Command if command}
+
+
+class Statement:
+    """
+    A single BASIC statement of the AST.
+
+    Statements are compact: the command is an int enum, the arguments are a
+    tuple of interned strings and, for statements parsed from a TokenStream,
+    the classified tokens are only materialized when a handler asks for them.
+
+    Attributes:
+        line: BASIC line number
+        command: The statement keyword (Command.UNKNOWN if it is not one)
+        name: The statement keyword as text, in uppercase
+        args: The argument tokens as text
+    """
+
+    __slots__ = ("line", "command", "name", "args", "_tokens", "_stream", "_first")
+
+    def __init__(
+        self,
+        line: int,
+        command: Command,
+        name: str,
+        args: tuple[str, ...],
+        tokens: Sequence[ExprToken] | None = None,
+        stream: TokenStream | None = None,
+        first: int = 0,
+    ):
+        self.line = line
+        self.command = command
+        self.name = name
+        self.args = args
+        self._tokens = tuple(tokens) if tokens is not None else None
+        self._stream = stream
+        self._first = first
+
+    @property
+    def tokens(self) -> tuple[ExprToken, ...]:
+        """
+        Classified tokens of the arguments, parallel to args.
+        """
+        if self._tokens is not None:
+            return self._tokens
+        if self._stream is not None:
+            token = self._stream.token
+            first = self._first
+            return tuple([token(first + i) for i in range(len(self.args))])
+        return tuple([token_from_text(arg) for arg in self.args])
+
+    @classmethod
+    def from_dict(cls, instr: Mapping[str, Any]) -> "Statement":
+        """
+        Build a statement from a {"line", "command", "args"} dictionary.
+        """
+        name = instr["command"].upper()
+        return cls(
+            instr["line"],
+            Command.lookup(name),
+            name,
+            tuple(instr.get("args", ())),
+            instr.get("tokens"),
+        )
+
+    def __repr__(self) -> str:
+        return f"<Statement line={self.line} {self.name} args={list(self.args)}>"
@@ -1,55 +1,267 @@
 # c64basic_compiler/compiler/tokenizer.py
 
+import re
+from array import array
+from collections.abc import Iterator
 
-def tokenize(source: str) -> list[tuple[int, list[str]]]:
+from c64basic_compiler.basic import FUNCTION_TABLE
+from c64basic_compiler.compiler.lexer import (
+    NUMBER_SYNTAX,
+    OPERATOR_SYNTAX,
+    RESERVED_WORDS,
+    WORD_OPERATORS,
+    WORD_SYNTAX,
+    ExprToken,
+    TokenKind,
+    classify_word,
+    resolve_function,
+)
+
+# Master pattern for a whole listing. Leading blanks are consumed together
+# with the token that follows them. Strings never cross a line end and an
+# unterminated string runs up to the end of its line, as on the C64. The group
+# order below must match the _GROUP_* indices.
+_SOURCE_RE = re.compile(
+    rf"""
+    [^\S\n]*
+    (?:
+    (?P<newline>\n)
+    |(?P<colon>:)
+    |(?P<string>"[^"\n]*"?)
+    |(?P<signed>-(?>{NUMBER_SYNTAX})(?![^\S\n]*\^))
+    |(?P<number>{NUMBER_SYNTAX})
+    |(?P<word>{WORD_SYNTAX})
+    |(?P<operator>{OPERATOR_SYNTAX})
+    |(?P<lparen>\()
+    |(?P<rparen>\))
+    |(?P<comma>,)
+    |(?P<semicolon>;)
+    |(?P<other>.)
+    )
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+_GROUP_NEWLINE = 1
+_GROUP_COLON = 2
+_GROUP_SIGNED = 4
+_GROUP_NUMBER = 5
+_GROUP_WORD = 6
+
+# Kind code and "ends an operand" flag of every other group
+_GROUP_KINDS = {
+    3: (TokenKind.STRING, True),
+    5: (TokenKind.NUMBER, True),
+    7: (TokenKind.OPERATOR, False),
+    8: (TokenKind.LPAREN, False),
+    9: (TokenKind.RPAREN, True),
+    10: (TokenKind.COMMA, False),
+    11: (TokenKind.SEMICOLON, False),
+    12: (TokenKind.OTHER, False),
+}
+
+# Kind code and "ends an operand" flag of reserved words; any other word is
+# an identifier. Zero-argument functions (PI, TI...) are operands.
+_WORD_KINDS = {
+    word: (
+        classify_word(word)[0],
+        word in FUNCTION_TABLE and FUNCTION_TABLE[word].arity == 0,
+    )
+    for word in FUNCTION_TABLE.keys() | RESERVED_WORDS | WORD_OPERATORS
+}
+_IDENTIFIER = (TokenKind.IDENTIFIER, True)
+
+
+class TokenStream:
+    """
+    Columnar token storage for a whole BASIC listing.
+
+    Tokens are not stored as strings: each token is a kind code plus a pair of
+    offsets into the original source, so memory stays a small multiple of the
+    source size. Statements are contiguous token ranges.
+
+    Attributes:
+        source: The original source text
+        kinds: Kind code (TokenKind) of every token
+        starts: Offset of the first character of every token
+        ends: Offset just past the last character of every token
+        lines: BASIC line number of every statement
+        bounds: Statement ``i`` covers tokens ``bounds[i]:bounds[i + 1]``
+    """
+
+    __slots__ = ("source", "kinds", "starts", "ends", "lines", "bounds")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.lines = array("I")
+        self.bounds = array("I", [0])
+
+    def __len__(self) -> int:
+        """Number of statements in the stream."""
+        return len(self.lines)
+
+    def __iter__(self) -> Iterator[tuple[int, list[str]]]:
+        """Iterate statements as (line_number, [tokens]) tuples."""
+        for index in range(len(self.lines)):
+            yield self.statement(index)
+
+    def __repr__(self) -> str:
+        return f"<TokenStream statements={len(self.lines)} tokens={len(self.kinds)}>"
+
+    def token_range(self, index: int) -> range:
+        """Range of token indices that belong to statement ``index``."""
+        return range(self.bounds[index], self.bounds[index + 1])
+
+    def text(self, token_index: int) -> str:
+        """Source text of a single token."""
+        return self.source[self.starts[token_index] : self.ends[token_index]]
+
+    def token(self, token_index: int) -> ExprToken:
+        """Materialize a single token as an ExprToken."""
+        start = self.starts[token_index]
+        end = self.ends[token_index]
+        kind = TokenKind(self.kinds[token_index])
+        text = self.source[start:end]
+        if kind == TokenKind.OPERATOR:
+            # Word operators are normalized to uppercase, as in lex_expression
+            text = text.upper()
+        return ExprToken(kind, text, start, end, resolve_function(kind, text))
+
+    def tokens(self, index: int) -> list[ExprToken]:
+        """Tokens of statement ``index`` as ExprTokens."""
+        return [self.token(i) for i in self.token_range(index)]
+
+    def statement(self, index: int) -> tuple[int, list[str]]:
+        """Statement ``index`` as a (line_number, [tokens]) tuple."""
+        source = self.source
+        starts = self.starts
+        ends = self.ends
+        return self.lines[index], [
+            source[starts[i] : ends[i]] for i in self.token_range(index)
+        ]
+
+
+def scan(source: str) -> TokenStream:
     """
-    Tokenizes BASIC source code with support for multiple statements per line (separated by ':').
+    Tokenizes a whole BASIC listing in a single forward scan.
+
+    Lines start with a line number and may hold several statements separated
+    by ':' (outside strings). A minus sign directly followed by a number is
+    part of the literal only where an operand is expected and the literal is
+    not raised to a power.
+
+    Args:
+        source: The BASIC source code
 
     Returns:
-        List of tuples: (line_number, [tokens])
+        A TokenStream with the tokens and statements of the listing
+
+    Raises:
+        ValueError: When a non-empty line does not start with a line number
     """
-    import re
+    stream = TokenStream(source)
+    append_kind = stream.kinds.append
+    append_start = stream.starts.append
+    append_end = stream.ends.append
+    group_kinds = _GROUP_KINDS
+    word_kinds = _WORD_KINDS
 
-    # Updated regex pattern to better handle negative numbers
-    # The order is important: we need to detect negative numbers before other tokens
-    token_pattern = r'("[^"]*"|-\d+\.\d+|-\d+|\d+\.\d+|\d+|\w+\$?|\=|[^\s:])'
+    line_number = -1  # -1 while the current line has no line number
+    pending = 0  # Index of the first token of the open statement
+    operand = False
 
-    lines = source.strip().splitlines()
-    result = []
+    for m in _SOURCE_RE.finditer(source):
+        group = m.lastindex
+        if group is None:  # Every alternative is a group
+            continue
 
-    for line in lines:
-        line = line.strip()
-        if not line:
+        if group == _GROUP_NEWLINE:
+            pending = _end_statement(stream, line_number, pending)
+            line_number = -1
             continue
 
-        if " " not in line:
+        start, end = m.span(group)
+
+        if line_number < 0:
+            line_number = _line_number(source, group, start, end)
+            operand = False
             continue
-        number_str, rest = line.split(" ", 1)
-        line_number = int(number_str)
-
-        # Divide en subinstrucciones por ':' (fuera de strings)
-        statements = []
-        current_stmt = ""
-        in_string = False
-        for c in rest:
-            if c == '"':
-                in_string = not in_string
-            if c == ":" and not in_string:
-                statements.append(current_stmt.strip())
-                current_stmt = ""
-            else:
-                current_stmt += c
-        if current_stmt:
-            statements.append(current_stmt.strip())
-
-        for stmt in statements:
-            # Use regex to tokenize the statement, capturing decimal numbers correctly
-            tokens = re.findall(token_pattern, stmt)
-            # Debug output to verify tokenization
-            # print(f"Statement: '{stmt}', Tokens: {tokens}")
-            result.append((line_number, tokens))
-
-    return result
+
+        if group == _GROUP_COLON:
+            pending = _end_statement(stream, line_number, pending, keep_empty=True)
+            operand = False
+            continue
+
+        if group == _GROUP_WORD:
+            kind, operand = word_kinds.get(source[start:end].upper(), _IDENTIFIER)
+        elif group == _GROUP_SIGNED:
+            if operand:
+                # Subtraction: emit the operator and the literal separately
+                append_kind(TokenKind.OPERATOR)
+                append_start(start)
+                append_end(start + 1)
+                start += 1
+            kind = TokenKind.NUMBER
+            operand = True
+        else:
+            kind, operand = group_kinds[group]
+
+        append_kind(kind)
+        append_start(start)
+        append_end(end)
+
+    # Close the last statement unless it is empty
+    _end_statement(stream, line_number, pending)
+
+    return stream
+
+
+def _line_number(source: str, group: int, start: int, end: int) -> int:
+    """
+    Value of the line number a line starts with, given its first token.
+
+    Raises:
+        ValueError: When the token is not a line number
+    """
+    if group != _GROUP_NUMBER or not source[start:end].isdigit():
+        line_end = source.find("\n", start)
+        raise ValueError(
+            "Missing line number: "
+            f"'{source[start : line_end if line_end >= 0 else None]}'"
+        )
+    return int(source[start:end])
+
+
+def _end_statement(
+    stream: TokenStream, line_number: int, pending: int, keep_empty: bool = False
+) -> int:
+    """
+    Close the open statement, whose first token is at index ``pending``.
+    Empty statements are dropped unless keep_empty is set (statements ended
+    by ':').
+
+    Returns:
+        The index of the first token of the next statement
+    """
+    count = len(stream.kinds)
+    if keep_empty or count > pending:
+        stream.lines.append(line_number)
+        stream.bounds.append(count)
+    return count
+
+
+def tokenize(source: str) -> list[tuple[int, list[str]]]:
+    """
+    Tokenizes BASIC source code with support for multiple statements per line
+    (separated by ':').
+
+    Returns:
+        List of tuples: (line_number, [tokens])
+    """
+    return list(scan(source))
 
 
 def tokenize_line(line: str) -> list[str]:
@@ -1,8 +1,18 @@
 import re
+from collections.abc import Iterable, Mapping, Sequence
+from types import MappingProxyType
 from typing import Union
 
 from c64basic_compiler.basic import FUNCTION_TABLE, Type
-from c64basic_compiler.basic.basic_function import BasicFunction
+from c64basic_compiler.basic.basic_function import BasicFunction, Constant
+from c64basic_compiler.common.c64_float import exact
+from c64basic_compiler.common.expression_cache import ExpressionCache
+from c64basic_compiler.compiler.lexer import (
+    ExprToken,
+    TokenKind,
+    lex_expression,
+    token_from_text,
+)
 from c64basic_compiler.exceptions import (
     EvaluationError,
     ExpressionReduceError,
@@ -11,176 +21,136 @@ from c64basic_compiler.exceptions import (
     TypeMismatchError,
     UnhandledTokenError,
 )
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
 # Use lowercase type hints instead of capitalized ones
 Token = Union[str, float, int]
 
+# Instruction of an expression: mnemonic and operand text (None for none)
+Instruction = tuple[str, str | None]
+
+# Numeric literal as produced by the lexer (optionally signed)
+NUMBER_PATTERN = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:E[+-]?\d+)?", re.IGNORECASE)
+
+
+def number_value(text: str) -> int | float:
+    """
+    Convert a numeric literal to its value.
+
+    Literals with a decimal point or an exponent become floats, the rest ints.
+
+    Args:
+        text: The literal text, optionally signed
+
+    Returns:
+        The numeric value of the literal
+    """
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+
+def string_value(text: str) -> str:
+    """
+    Contents of a string literal.
+
+    As on the C64, a literal left open at the end of its line runs up to
+    there, so only a closing quote that is present is removed.
+
+    Args:
+        text: The literal text, with its opening quote
+
+    Returns:
+        The characters between the quotes
+    """
+    if len(text) > 1 and text.endswith('"'):
+        return text[1:-1]
+    return text[1:]
+
+
+def constant_text(value: Constant) -> str:
+    """
+    Write a constant as the operand of PUSH_CONST.
+
+    Args:
+        value: A number or the contents of a string
+
+    Returns:
+        The operand text
+    """
+    if isinstance(value, str):
+        return f'"{value}"'
+    return repr(value)
+
 
 # --- Tokens: literales, variables, operadores, funciones ---
 def tokenize(expr: str) -> list[str]:
     """
     Tokenize an expression while preserving spaces in string literals.
 
+    This is a thin view over :func:`lex_expression`, which performs a single
+    forward scan of the expression and keeps the kind and offsets of every
+    token.
+
     Args:
         expr: The expression to tokenize
 
     Returns:
         A list of tokens
     """
-    # Find and combine negative numbers first
-    # This captures patterns like "- 1" or "- __INT_LITERAL_0_" and combines them into "-1" or "-__INT_LITERAL_0_"
-    expr = re.sub(r"- +(__INT_LITERAL_\d+_)", r"-\1", expr)
-    expr = re.sub(r"- +(\d+)", r"-\1", expr)
-
-    # First check for decimal numbers in the input and join them
-    result = []
-    i = 0
-    in_number = False
-    decimal_buffer = ""
-
-    # Pre-process to handle decimal numbers properly and negative numbers
-    while i < len(expr):
-        # If we're building a number
-        if in_number:
-            if expr[i].isdigit() or expr[i] == ".":
-                decimal_buffer += expr[i]
-                i += 1
-            else:
-                # End of number - add it to results
-                result.append(decimal_buffer)
-                decimal_buffer = ""
-                in_number = False
-        else:
-            # Check if this is the start of a negative number
-            if expr[i] == "-" and i + 1 < len(expr) and expr[i + 1].isdigit():
-                # It's likely a negative number
-                in_number = True
-                decimal_buffer = "-"
-                i += 1
-            # Check if this is the start of a positive number
-            elif expr[i].isdigit():
-                in_number = True
-                decimal_buffer = expr[i]
-                i += 1
-            else:
-                # Just a regular character
-                result.append(expr[i])
-                i += 1
-
-    # Don't forget any remaining decimal number
-    if decimal_buffer:
-        result.append(decimal_buffer)
-
-    # Now join it back for the rest of the processing
-    expr = "".join(result)
-
-    # First, let's normalize spacing around logical operators to make them easier to identify
-    expr = re.sub(r"\bAND\b", " AND ", expr, flags=re.IGNORECASE)
-    expr = re.sub(r"\bOR\b", " OR ", expr, flags=re.IGNORECASE)
-    expr = re.sub(r"\bNOT\b", " NOT ", expr, flags=re.IGNORECASE)
-
-    # Handle decimal numbers before tokenization by joining digits and decimal points
-    # Replace decimal numbers with placeholders to protect them
-    decimal_pattern = r"(\d+\.\d+)"
-    decimal_literals = {}
-    decimal_marker = "__DECIMAL_LITERAL_"
-
-    def replace_decimal(match):
-        nonlocal decimal_literals
-        placeholder = f"{decimal_marker}{len(decimal_literals)}_"
-        decimal_literals[placeholder] = match.group(0)
-        return (
-            f" {placeholder} "  # Add spaces to ensure it's separated from other tokens
-        )
-
-    expr = re.sub(decimal_pattern, replace_decimal, expr)
-
-    # Extract and protect integer literals too
-    int_pattern = r"(?<![a-zA-Z0-9_\.])\d+(?![a-zA-Z0-9_\.])"
-    int_literals = {}
-    int_marker = "__INT_LITERAL_"
-
-    def replace_int(match):
-        nonlocal int_literals
-        placeholder = f"{int_marker}{len(int_literals)}_"
-        int_literals[placeholder] = match.group(0)
-        return f" {placeholder} "  # Add spaces for separation
-
-    expr = re.sub(int_pattern, replace_int, expr)
-
-    # Find and extract string literals to protect their content
-    string_literals = {}
-    string_marker = "__STRING_LITERAL_"
-
-    def replace_string(match):
-        nonlocal string_literals
-        placeholder = f"{string_marker}{len(string_literals)}_"
-        string_literals[placeholder] = match.group(0)
-        return f" {placeholder} "  # Add spaces for separation
-
-    # Replace string literals with placeholders
-    pattern_strings = r'"[^"]*"'
-    expr_with_placeholders = re.sub(pattern_strings, replace_string, expr)
-
-    # Pre-process expression to add spaces around operators for proper tokenization
-    for op in ["<=", ">=", "<>", "=", "<", ">", "+", "-", "*", "/", "^", "(", ")"]:
-        expr_with_placeholders = expr_with_placeholders.replace(op, f" {op} ")
-
-    # Split the expression by whitespace to get individual tokens
-    raw_tokens = [token for token in expr_with_placeholders.split() if token.strip()]
-
-    # Process each token to handle the special cases
-    result = []
-    i = 0
-    while i < len(raw_tokens):
-        token = raw_tokens[i]
-
-        # Restore decimal number placeholders
-        if token.startswith(decimal_marker):
-            result.append(decimal_literals[token])
-        # Restore integer placeholders
-        elif token.startswith(int_marker):
-            result.append(int_literals[token])
-        # Restore string literal placeholders
-        elif token.startswith(string_marker):
-            result.append(string_literals[token])
-        # Handle logical operators (making sure they're uppercase)
-        elif token.upper() in ["AND", "OR", "NOT"]:
-            result.append(token.upper())
-        # Handle other tokens
-        else:
-            result.append(token)
-
-        i += 1
-
-    # Before returning the tokens, perform a second pass to combine negative numbers
-    final_result = []
-    i = 0
-    while i < len(result):
-        # Check for a negative sign followed by a number
-        if (
-            i < len(result) - 1
-            and result[i] == "-"
-            and isinstance(result[i + 1], str)
-            and result[i + 1].isdigit()
-        ):
-            # Create a negative number
-            final_result.append(f"-{result[i + 1]}")
-            i += 2  # Skip both tokens
-        else:
-            final_result.append(result[i])
-            i += 1
+    tokens = [token.text for token in lex_expression(expr)]
+    logger.debug("Tokenize input: '{}'", expr)
+    logger.debug("Final tokens: {}", tokens)
+    return tokens
+
+
+# --- Tablas de operadores ---
+# Precedence of binary operators, higher binds tighter. As on the C64,
+# operators of equal precedence are evaluated left to right.
+BINARY_PRECEDENCE: Mapping[str, int] = MappingProxyType(
+    {
+        "OR": 1,
+        "AND": 2,
+        "=": 4,
+        "<": 4,
+        ">": 4,
+        "<=": 4,
+        ">=": 4,
+        "<>": 4,
+        "+": 5,
+        "-": 5,
+        "*": 6,
+        "/": 6,
+        "^": 8,
+    }
+)
+
+# Prefix operators: token text -> (precedence, function applied)
+PREFIX_OPERATORS: Mapping[str, tuple[int, BasicFunction]] = MappingProxyType(
+    {
+        "NOT": (3, FUNCTION_TABLE["NOT"]),
+        "-": (7, FUNCTION_TABLE["UNARY-"]),
+    }
+)
 
-    logger.debug(f"Tokenize input: '{expr}'")
-    logger.debug(f"Final tokens: {final_result}")
-    return final_result
+# Stack level of a function name waiting for its argument list; it leaves the
+# stack when its closing parenthesis is read.
+_FUNCTION_LEVEL = 9
+# Stack level of an opening parenthesis: no operator can pop it
+_PAREN_LEVEL = 0
+
+_OPERAND_KINDS = frozenset({TokenKind.NUMBER, TokenKind.STRING, TokenKind.IDENTIFIER})
+
+# Type of the variables whose names end with a suffix; the others are numbers
+SUFFIX_TYPES: Mapping[str, Type] = MappingProxyType({"$": Type.STR, "%": Type.INT})
 
 
 # --- Conversión infijo → RPN ---
-def shunting_yard(tokens: list[str]) -> list[Token]:
+def tokens_to_rpn(tokens: Sequence[ExprToken]) -> list[ExprToken]:
     """
-    Converts an infix expression to Reverse Polish Notation (RPN) using the Shunting Yard algorithm.
+    Converts classified tokens to Reverse Polish Notation (RPN) using the
+    Shunting Yard algorithm.
 
     The Shunting Yard algorithm, created by Edsger Dijkstra, is a method for parsing
     mathematical expressions specified in infix notation. It produces either a postfix
@@ -191,241 +161,133 @@ def shunting_yard(tokens: list[str]) -> list[Token]:
     - Infix: 3 + 4 × (2 - 1)
     - RPN: 3 4 2 1 - × +
 
-    This notation eliminates the need for parentheses and makes evaluation simpler
-    by using a stack-based approach.
+    Tokens carry their kind and resolved BasicFunction, so the conversion only
+    compares kinds and precedence levels. A minus sign in operand position is
+    emitted with the UNARY- function attached.
 
     Args:
-        tokens (list[str]): A list of tokens from the tokenized infix expression,
-                           which may include numbers, operators, functions, and parentheses.
+        tokens: Tokens as produced by :func:`lex_expression`
 
     Returns:
-        list[Token]: A list of tokens in RPN (postfix) order, ready for evaluation.
+        The same tokens in RPN (postfix) order, without parentheses or commas
 
     Raises:
         MismatchedParenthesesError: If parentheses in the expression are mismatched.
+        UnhandledTokenError: If a token cannot appear in an expression.
     """
-    output: list[Token] = []
-    stack: list[str] = []
-
-    # Track if we expect an operand, to distinguish unary from binary operators
-    expect_operand = True  # Initially we expect an operand
-
-    # Handler functions for different token types
-    def handle_string_literal(token: str) -> None:
-        """Handle string literals enclosed in quotes."""
-        nonlocal expect_operand
-        output.append(token)
-        expect_operand = False  # After a string literal, we expect an operator
-
-    def handle_number(token: str) -> None:
-        """Convert and handle numeric tokens."""
-        nonlocal expect_operand
-
-        # Check if this is a negative number
-        if token.startswith("-") and len(token) > 1:
-            # It's a negative number, convert it properly
-            value = token[1:]  # Remove the negative sign
-            numeric_value: Token = float(value) if "." in value else int(value)
-            numeric_value = -numeric_value  # Make it negative
-        else:
-            # Regular number
-            numeric_value: Token = float(token) if "." in token else int(token)
-
-        output.append(numeric_value)
-        expect_operand = False  # After a number, we expect an operator
-
-    def handle_function(token: str) -> None:
-        """Handle functions by pushing them onto stack."""
-        nonlocal expect_operand
-        # Special case for no-argument functions like PI
-        if token in FUNCTION_TABLE and FUNCTION_TABLE[token].arity == 0:
-            # Functions with no arguments can be directly added to output
-            output.append(token)
-            expect_operand = False  # After a function, we expect an operator
-        else:
-            # Regular functions that expect arguments are pushed to stack
-            stack.append(token)
-            expect_operand = True  # After a function name, we expect operands
-
-    def handle_left_paren(token: str) -> None:
-        """Handle opening parentheses."""
-        nonlocal expect_operand
-        stack.append(token)
-        expect_operand = True  # After an opening paren, we expect an operand
-
-    def handle_right_paren(token: str) -> None:
-        """Handle closing parentheses and handle mismatched cases."""
-        nonlocal expect_operand
-        # Pop operators until left parenthesis
-        while stack and stack[-1] != "(":
-            output.append(stack.pop())
-
-        # Check for mismatched parentheses
-        if not stack:
-            raise MismatchedParenthesesError(
-                "Mismatched parentheses: missing opening parenthesis"
-            )
+    output: list[ExprToken] = []
+    stack: list[ExprToken] = []
+    levels: list[int] = []  # Precedence level of every stack entry
+    expect_operand = True  # Distinguishes prefix from binary operators
 
-        # Pop the left parenthesis
-        stack.pop()
-
-        # If there's a function name at the top of the stack, pop it
-        if stack and stack[-1] in FUNCTION_TABLE:
-            output.append(stack.pop())
-
-        expect_operand = False  # After a closing paren, we expect an operator
-
-    def handle_operator(token: str) -> None:
-        """Handle operators with proper precedence."""
-        nonlocal expect_operand
-
-        # Define operator precedence (higher means higher precedence)
-        precedence = {
-            "OR": 1,
-            "AND": 2,
-            "NOT": 3,
-            "=": 4,
-            "<": 4,
-            ">": 4,
-            "<=": 4,
-            ">=": 4,
-            "<>": 4,
-            "+": 5,
-            "-": 5,
-            "UNARY-": 8,  # Unary minus has higher precedence
-            "*": 6,
-            "/": 6,
-            "^": 7,
-        }
-
-        # Handle unary operators
-        if expect_operand and token == "-":
-            # This is a unary minus - pushing negative one directly to output
-            logger.debug(
-                "Detected unary minus - pushing -1 and setting up for multiplication"
-            )
-            # Push a constant -1 and prepare for multiplication
-            if isinstance(tokens[i + 1], str) and tokens[i + 1].isdigit():
-                # If next token is a number, combine into a negative number
-                output.append(-int(tokens[i + 1]))
-                # Skip the next token (the number)
-                i += 1
+    for token in tokens:
+        kind = token.kind
+
+        if kind in _OPERAND_KINDS:
+            output.append(token)
+            expect_operand = False
+
+        elif kind == TokenKind.KEYWORD:
+            func = token.func
+            if func is None:
+                raise UnhandledTokenError(f"Unexpected keyword: {token.text}")
+            if func.arity == 0:
+                # Functions with no arguments (PI, TI...) are operands
+                output.append(token)
+                expect_operand = False
             else:
-                # Otherwise just push -1
-                output.append(-1)
-            expect_operand = False  # After pushing a value, we expect an operator
-        else:
-            # Regular binary operator processing
-            token_precedence = precedence.get(token, 0)
-
-            # While there's an operator with higher or equal precedence on the stack
-            while (
-                stack
-                and stack[-1] in precedence
-                and precedence.get(stack[-1], 0) >= token_precedence
-            ):
+                stack.append(token)
+                levels.append(_FUNCTION_LEVEL)
+                expect_operand = True
+
+        elif kind == TokenKind.OPERATOR:
+            prefix = PREFIX_OPERATORS.get(token.text) if expect_operand else None
+            if prefix is not None:
+                level, func = prefix
+                stack.append(token._replace(func=func))
+                levels.append(level)
+                continue
+
+            level = BINARY_PRECEDENCE.get(token.text)
+            if level is None:
+                raise UnhandledTokenError(f"Unexpected operator: {token.text}")
+            while levels and levels[-1] >= level:
                 output.append(stack.pop())
+                levels.pop()
+            stack.append(token)
+            levels.append(level)
+            expect_operand = True
 
+        elif kind == TokenKind.LPAREN:
             stack.append(token)
-            expect_operand = True  # After a binary operator, we expect an operand
-
-    def handle_variable(token: str) -> None:
-        """Handle variable names."""
-        nonlocal expect_operand
-        output.append(token)
-        expect_operand = False  # After a variable, we expect an operator
-
-    # Process each token
-    i = 0
-    paren_counter = 0  # Track nesting level of parentheses
-
-    while i < len(tokens):
-        token = tokens[i]
-
-        # Debug print
-        logger.debug(f"Processing token: {token}, expect_operand: {expect_operand}")
-
-        # Special handling for negative numbers - if we see a '-' followed by a number
-        if (
-            expect_operand
-            and token == "-"
-            and i + 1 < len(tokens)
-            and (isinstance(tokens[i + 1], str) and tokens[i + 1].isdigit())
-        ):
-            # Treat this as a negative number
-            value = tokens[i + 1]
-            numeric_value = float(value) if "." in value else int(value)
-            output.append(-numeric_value)  # Push as a negative number
-            expect_operand = False  # After a number, we expect an operator
-            i += 2  # Skip the minus and the number
-            continue
-
-        # Update parenthesis counter for tracking
-        if token == "(":
-            paren_counter += 1
-        elif token == ")":
-            paren_counter -= 1
-            if paren_counter < 0:
-                raise MismatchedParenthesesError("Unmatched closing parenthesis")
-
-        # Special case for NOT (unary operator)
-        if token.upper() == "NOT":
-            # For NOT, we need to get the next token and apply NOT to it
-            if i + 1 < len(tokens):
-                # Push NOT onto the stack
-                stack.append("NOT")
-                expect_operand = True  # After NOT, we expect an operand
-            else:
-                raise EvaluationError("NOT operator requires an operand")
-
-        # Handle other token types
-        elif isinstance(token, str) and token.startswith('"') and token.endswith('"'):
-            handle_string_literal(token)
-        elif isinstance(token, str) and re.fullmatch(r"-?\d+\.\d+|-?\d+", token):
-            handle_number(token)
-        elif isinstance(token, str) and token.upper() in FUNCTION_TABLE:
-            handle_function(token.upper())
-        elif token == "(":
-            handle_left_paren(token)
-        elif token == ")":
-            handle_right_paren(token)
-        elif token in (
-            "AND",
-            "OR",
-            "+",
-            "-",
-            "*",
-            "/",
-            "^",
-            "=",
-            "<>",
-            "<",
-            ">",
-            "<=",
-            ">=",
-        ):
-            handle_operator(token)
-        else:
-            handle_variable(token)
+            levels.append(_PAREN_LEVEL)
+            expect_operand = True
 
-        i += 1
+        elif kind == TokenKind.RPAREN or kind == TokenKind.COMMA:
+            while levels and levels[-1] != _PAREN_LEVEL:
+                output.append(stack.pop())
+                levels.pop()
+            if not stack:
+                raise MismatchedParenthesesError(
+                    "Mismatched parentheses: missing opening parenthesis"
+                )
+            if kind == TokenKind.COMMA:
+                # Argument separator: keep the parenthesis open
+                expect_operand = True
+                continue
+
+            stack.pop()
+            levels.pop()
+            # If there's a function name at the top of the stack, pop it
+            if levels and levels[-1] == _FUNCTION_LEVEL:
+                output.append(stack.pop())
+                levels.pop()
+            expect_operand = False
 
-    # Check if all parentheses were matched
-    if paren_counter != 0:
-        raise MismatchedParenthesesError(
-            f"Mismatched parentheses: {paren_counter} unclosed opening parentheses"
-        )
+        else:
+            raise UnhandledTokenError(f"Unexpected token: {token.text}")
 
     # Process any remaining operators on the stack
     while stack:
-        top_token: str = stack[-1]
-        if top_token in ("(", ")"):
-            raise MismatchedParenthesesError("Mismatched parentheses")
+        if levels.pop() == _PAREN_LEVEL:
+            raise MismatchedParenthesesError(
+                "Mismatched parentheses: unclosed opening parenthesis"
+            )
         output.append(stack.pop())
 
     return output
 
 
+def shunting_yard(tokens: list[str]) -> list[Token]:
+    """
+    Converts an infix expression to Reverse Polish Notation (RPN).
+
+    String based front end to :func:`tokens_to_rpn`: numbers are returned as
+    int/float values and functions and operators by their FUNCTION_TABLE name.
+
+    Args:
+        tokens (list[str]): A list of tokens from the tokenized infix expression,
+                           which may include numbers, operators, functions, and parentheses.
+
+    Returns:
+        list[Token]: A list of tokens in RPN (postfix) order, ready for evaluation.
+
+    Raises:
+        MismatchedParenthesesError: If parentheses in the expression are mismatched.
+    """
+    rpn = tokens_to_rpn([token_from_text(token) for token in tokens])
+    return [_rpn_item(token) for token in rpn]
+
+
+def _rpn_item(token: ExprToken) -> Token:
+    """Convert an RPN token back to the string based representation."""
+    if token.kind == TokenKind.NUMBER:
+        return number_value(token.text)
+    if token.func is not None:
+        return token.func.name
+    return token.text
+
+
 # --- Visual tracer ---
 def print_stack(stack: list[Type], label: str) -> None:
     print(f"\n>> {label}")
@@ -433,17 +295,50 @@ def print_stack(stack: list[Type], label: str) -> None:
         print(f"  {i:2}: {val.name}")
 
 
+def render(instructions: Iterable[Instruction]) -> list[str]:
+    """Render instructions as lines of text pseudocode."""
+    return [
+        mnemonic if operand is None else f"{mnemonic} {operand}"
+        for mnemonic, operand in instructions
+    ]
+
+
+def _fold(
+    func: BasicFunction, values: list[Constant | None], code: list[Instruction]
+) -> Instruction | None:
+    """
+    Replace the values of the arguments of a function by the value of its
+    result. When it is computed at compile time, the PUSH_CONST instructions
+    of the arguments are removed from the code and the PUSH_CONST of the
+    result is returned; otherwise None.
+    """
+    arity = func.arity
+    constants = values[len(values) - arity :]
+    del values[len(values) - arity :]
+    value = func.fold(constants) if arity and None not in constants else None
+    values.append(value)
+    if value is None:
+        return None
+    del code[len(code) - arity :]
+    return "PUSH_CONST", constant_text(value)
+
+
 # --- Generador de pseudocódigo ---
-def generate_pseudocode(rpn: list[Token], verbose: bool = False) -> list[str]:
+def rpn_to_instructions(
+    rpn: Sequence[ExprToken], verbose: bool = False
+) -> list[Instruction]:
     """
     Generates pseudocode instructions from RPN tokens and performs type checking.
 
+    Operations on constants are folded into one PUSH_CONST when the function
+    computes the result at compile time (see :meth:`BasicFunction.fold`).
+
     Args:
-        rpn: List of tokens in Reverse Polish Notation
+        rpn: Tokens in Reverse Polish Notation, as produced by :func:`tokens_to_rpn`
         verbose: When True, prints the stack state after each operation
 
     Returns:
-        A list of pseudocode instructions
+        A list of (mnemonic, operand) instructions
 
     Raises:
         NotEnoughOperandsError: When not enough operands are available for an operation
@@ -451,198 +346,242 @@ def generate_pseudocode(rpn: list[Token], verbose: bool = False) -> list[str]:
         ExpressionReduceError: When expression doesn't reduce to a single result
         UnhandledTokenError: When encountering an unhandled token type
     """
-    code: list[str] = []
+    code: list[Instruction] = []
     stack: list[Type] = []
+    # Value of every stack entry known at compile time, None for the rest
+    values: list[Constant | None] = []
 
-    def handle_constant(token: int | float) -> None:
-        """Handle numeric constants (integers and floats)."""
-        code.append(f"PUSH_CONST {token}")
-        typ: Type = Type.INT if isinstance(token, int) else Type.NUM
-        stack.append(typ)
-        if verbose:
-            print_stack(stack, f"after PUSH_CONST {token}")
-
-    def handle_function(token: str) -> None:
-        """Handle function calls and operators with type checking."""
-        # Debug output
-        logger.debug(f"Handling function/operator: {token}")
+    for token in rpn:
+        kind = token.kind
+
+        if kind == TokenKind.NUMBER:
+            value = number_value(token.text)
+            line = ("PUSH_CONST", f"{value}")
+            stack.append(Type.INT if isinstance(value, int) else Type.NUM)
+            # Literals that BASIC rounds, like 0.1, are not folded
+            values.append(exact(*value.as_integer_ratio()))
+        elif kind == TokenKind.STRING:
+            line = ("PUSH_CONST", token.text)
+            stack.append(Type.STR)
+            values.append(string_value(token.text))
+        elif kind == TokenKind.IDENTIFIER:
+            line = ("LOAD", token.text)
+            # In BASIC, variable type is determined by the suffix
+            stack.append(SUFFIX_TYPES.get(token.text[-1], Type.NUM))
+            values.append(None)
+        else:
+            func = token.func
+            if func is None:
+                raise UnhandledTokenError(f"Unhandled token in RPN: {token.text}")
 
-        # Special handling for unary minus
-        if token == "UNARY-":
-            # Unary minus only requires one operand
-            if len(stack) < 1:
+            arity = func.arity
+            if len(stack) < arity:
                 raise NotEnoughOperandsError(
-                    f"Not enough operands for unary minus. Need 1, have {len(stack)}"
+                    f"Not enough operands for {func.name}. "
+                    f"Need {arity}, have {len(stack)}"
                 )
 
-            # Get the operand type
-            arg_type = stack.pop()
+            # Pop arguments from stack (in original order)
+            args: list[Type] = stack[len(stack) - arity :]
+            del stack[len(stack) - arity :]
 
-            # Check if it's a numeric type
-            if arg_type not in [Type.NUM, Type.INT]:
+            if not func.is_type_compatible(args):
                 raise TypeMismatchError(
-                    f"TYPE MISMATCH in unary minus: got {arg_type.name}, need numeric type"
+                    f"TYPE MISMATCH in {func.name}: got {[a.name for a in args]}"
                 )
 
-            # Push the same type back
-            stack.append(arg_type)
-            code.append("NEGATE")
-
-            if verbose:
-                print_stack(stack, "after NEGATE")
-            return
-
-        if token.upper() not in FUNCTION_TABLE:
-            logger.error(f"WARNING: Function {token} not found in FUNCTION_TABLE!")
-            logger.error(f"Available functions: {list(FUNCTION_TABLE.keys())}")
-            raise UnhandledTokenError(f"Unknown function: {token}")
-
-        func: BasicFunction = FUNCTION_TABLE[token.upper()]
-
-        # Special handling for functions with no arguments (like PI)
-        if func.arity == 0:
-            # For zero-argument functions, we don't need to pop anything from stack
-            out_type = func.return_type
-            stack.append(out_type)
-            code.append(f"{func.mnemonic}")
-            if verbose:
-                print_stack(stack, f"after {func.mnemonic}")
-            return
-
-        # Regular function processing for functions with arguments
-        # Check if we have enough operands
-        if len(stack) < func.arity:
-            raise NotEnoughOperandsError(
-                f"Not enough operands for {token}. Need {func.arity}, have {len(stack)}"
-            )
+            stack.append(func.resolve_return_type(args) if arity else func.return_type)
+            line = _fold(func, values, code) or (func.mnemonic, None)
 
-        # Pop arguments from stack (in reverse order)
-        args: list[Type] = [stack.pop() for _ in range(func.arity)][::-1]
+        code.append(line)
+        if verbose:
+            print_stack(stack, f"after {render([line])[0]}")
 
-        # Type check the arguments
-        if not func.is_type_compatible(args):
-            raise TypeMismatchError(
-                f"TYPE MISMATCH in {token}: got {[a.name for a in args]}"
-            )
+    # Check that we've reduced to exactly one value
+    if len(stack) != 1:
+        raise ExpressionReduceError("Expression did not reduce to a single result")
 
-        # Determine return type and update stack
-        out_type: Type = func.resolve_return_type(args)
-        stack.append(out_type)
+    return code
 
-        # Add instruction to pseudocode
-        code.append(f"{func.mnemonic}")
 
-        if verbose:
-            print_stack(stack, f"after {func.mnemonic}")
+def rpn_to_pseudocode(rpn: Sequence[ExprToken], verbose: bool = False) -> list[str]:
+    """
+    Generates pseudocode from RPN tokens, as lines of text.
 
-    def handle_string_literal(token: str) -> None:
-        """Handle string literals."""
-        code.append(f"PUSH_CONST {token}")
-        stack.append(Type.STR)
-        if verbose:
-            print_stack(stack, f"after PUSH_CONST {token}")
-
-    def handle_variable(token: str) -> None:
-        """Handle variable references."""
-        code.append(f"LOAD {token}")
-        # In BASIC, variable type is determined by the suffix
-        var_type: Type = Type.STR if token.endswith("$") else Type.NUM
-        stack.append(var_type)
-        if verbose:
-            print_stack(stack, f"after LOAD {token}")
+    See :func:`rpn_to_instructions`, which it renders.
+    """
+    return render(rpn_to_instructions(rpn, verbose=verbose))
 
-    # Process each token in the RPN list
-    for token in rpn:
-        if isinstance(token, (int, float)):
-            handle_constant(token)
-        elif isinstance(token, str):
-            if token == "UNARY-":
-                # Special handling for unary minus
-                if len(stack) < 1:
-                    raise NotEnoughOperandsError(
-                        f"Not enough operands for unary minus. Need 1, have {len(stack)}"
-                    )
-
-                # Get the operand type
-                arg_type = stack.pop()
-
-                # Check if it's a numeric type
-                if arg_type not in [Type.NUM, Type.INT]:
-                    raise TypeMismatchError(
-                        f"TYPE MISMATCH in unary minus: got {arg_type.name}, need numeric type"
-                    )
-
-                # Push the same type back
-                stack.append(arg_type)
-                code.append("NEGATE")
-
-                if verbose:
-                    print_stack(stack, "after NEGATE")
-            elif token.upper() in FUNCTION_TABLE:
-                handle_function(token)
-            elif token.startswith('"') and token.endswith('"'):
-                handle_string_literal(token)
-            else:
-                handle_variable(token)
+
+def generate_pseudocode(rpn: list[Token], verbose: bool = False) -> list[str]:
+    """
+    Generates pseudocode instructions from RPN tokens and performs type checking.
+
+    String based front end to :func:`rpn_to_pseudocode`: numbers are given as
+    int/float values, the unary minus as "UNARY-".
+
+    Args:
+        rpn: List of tokens in Reverse Polish Notation
+        verbose: When True, prints the stack state after each operation
+
+    Returns:
+        A list of pseudocode instructions
+
+    Raises:
+        NotEnoughOperandsError: When not enough operands are available for an operation
+        TypeMismatchError: When operand types don't match required types
+        ExpressionReduceError: When expression doesn't reduce to a single result
+        UnhandledTokenError: When encountering an unhandled token type
+    """
+    tokens: list[ExprToken] = []
+    for item in rpn:
+        if isinstance(item, (int, float)):
+            tokens.append(ExprToken(TokenKind.NUMBER, str(item), 0, 0))
+        elif not isinstance(item, str):
+            raise UnhandledTokenError(f"Unhandled token in RPN: {item}")
+        elif item.startswith('"') and item.endswith('"'):
+            tokens.append(ExprToken(TokenKind.STRING, item, 0, 0))
+        elif item.upper() in FUNCTION_TABLE:
+            func = FUNCTION_TABLE[item.upper()]
+            tokens.append(ExprToken(TokenKind.OPERATOR, item, 0, 0, func))
         else:
-            raise UnhandledTokenError(f"Unhandled token in RPN: {token}")
-    # Check that we've reduced to exactly one value
-    if len(stack) != 1:
-        raise ExpressionReduceError("Expression did not reduce to a single result")
+            tokens.append(ExprToken(TokenKind.IDENTIFIER, item, 0, 0))
+    return rpn_to_pseudocode(tokens, verbose=verbose)
+
+
+# --- Evaluador completo ---
+def compile_tokens(
+    tokens: Sequence[ExprToken], cache: ExpressionCache | None = None
+) -> tuple[Instruction, ...]:
+    """
+    Compile already tokenized expression to an immutable instruction sequence.
+
+    This is the entry point for handlers, which get their tokens from the
+    source scanner, so the expression text is never lexed again. The cache is
+    keyed on the token sequence. Expressions that fail to compile are not
+    cached.
+
+    Args:
+        tokens: The tokens of the expression
+        cache: Optional cache of compiled expressions
 
+    Returns:
+        A tuple of (mnemonic, operand) instructions
+    """
+    if cache is None:
+        return tuple(rpn_to_instructions(tokens_to_rpn(tokens)))
+
+    key = tuple([token.text for token in tokens])
+    code = cache.get(key)
+    if code is None:
+        code = tuple(rpn_to_instructions(tokens_to_rpn(tokens)))
+        cache.put(key, code)
     return code
 
 
-# --- Evaluador completo ---
-def evaluate_expression(expr: str, verbose: bool = False) -> list[str]:
-    tokens: list[str] = tokenize(expr)
-    rpn: list[Token] = shunting_yard(tokens)
-    if verbose:
-        print(f"\nRPN: {rpn}")
-    pseudocode: list[str] = generate_pseudocode(rpn, verbose=verbose)
-    return pseudocode
+def emit_tokens(
+    tokens: Sequence[ExprToken], code: Code, cache: ExpressionCache | None = None
+) -> None:
+    """
+    Compile already tokenized expression and append its instructions to a Code.
+
+    Args:
+        tokens: The tokens of the expression
+        code: Code to append to
+        cache: Optional cache of compiled expressions
+    """
+    code.emit_all(compile_tokens(tokens, cache))
+
+
+def evaluate_tokens(
+    tokens: Sequence[ExprToken], cache: ExpressionCache | None = None
+) -> list[str]:
+    """
+    Compile already tokenized expression to a new list of pseudocode lines.
+
+    Args:
+        tokens: The tokens of the expression
+        cache: Optional cache of compiled expressions
+
+    Returns:
+        A list of pseudocode instructions that the caller may extend
+    """
+    return render(compile_tokens(tokens, cache))
+
+
+def compile_expression(
+    expr: str, cache: ExpressionCache | None = None
+) -> tuple[Instruction, ...]:
+    """
+    Compile an expression to an immutable instruction sequence.
+
+    The cache is keyed on the token sequence, so expressions that only differ
+    in spacing or in the case of AND/OR/NOT share one entry.
+
+    Args:
+        expr: The expression to compile
+        cache: Optional cache of compiled expressions
+
+    Returns:
+        A tuple of (mnemonic, operand) instructions
+    """
+    return compile_tokens(lex_expression(expr), cache)
+
+
+def evaluate_expression(
+    expr: str, verbose: bool = False, cache: ExpressionCache | None = None
+) -> list[str]:
+    if not verbose:
+        return render(compile_expression(expr, cache))
+
+    rpn = tokens_to_rpn(lex_expression(expr))
+    print(f"\nRPN: {[_rpn_item(token) for token in rpn]}")
+    return rpn_to_pseudocode(rpn, verbose=verbose)
 
 
 # --- Ejemplo ---
+# Sample expressions, also used by benchmarks/bench_evaluate.py
+EXAMPLE_EXPRESSIONS: tuple[str, ...] = (
+    "STR$(ABS(X * -1)) + CHR$(65)",
+    'VAL("123") + 5',
+    "RND(1) * 10 + 5",
+    "INT(3.7 + RND(0))",
+    "ABS(-99) + SGN(-5)",
+    "SQR(16) + LOG(100)",
+    "EXP(1) + 1",
+    "SIN(3.14 / 2) + COS(0)",
+    "TAN(1) + ATN(1)",
+    "X * Y + Z / 2",
+    "INT(SQR(81)) * 2",
+    "STR$(RND(1) * 100)",
+    "STR$(VAL(A$) + 1)",
+    "LEN(A$) * 2 + 1",
+    'CHR$(ASC("A") + 1)',
+    "STR$(SGN(-42)) + STR$(INT(3.99))",
+    "ABS(X - Y) + SQR(Z)",
+    "RND(1) + SQR(LOG(1000))",
+    "STR$(RND(0) * 50 + VAL(A$))",
+    "VAL(STR$(65)) + 5",
+    "STR$(LEN(A$) + SGN(-1))",
+    "STR$(ABS(-1) + SQR(4))",
+    "STR$(ABS(X * -1))",
+    "STR$(ABS(X * -1) + CHR$(65))",
+    "STR$(ABS(X * -1) + STR$(X))",
+    "STR$(ABS(X * -1) + STR$(X) + 1)",
+    "STR$(ABS(X * -1) + STR$(X) + 1.0)",
+    "STR$(ABS(X * -1) + STR$(X) + 1.0 + 2)",
+    "STR$(ABS(X * -1) + STR$(X) + 1.0 + 2.0)",
+    '"A" + 1',
+    "PEEK(49152) + 1",
+    "PEEK(49152) + PEEK(49153)",
+    "PEEK(49152) + PEEK(INT(SQR(AB)) * 2)",
+    "PI / 2",
+)
+
+
 def main() -> None:
-    expresions: list[str] = [
-        "STR$(ABS(X * -1)) + CHR$(65)",
-        'VAL("123") + 5',
-        "RND(1) * 10 + 5",
-        "INT(3.7 + RND(0))",
-        "ABS(-99) + SGN(-5)",
-        "SQR(16) + LOG(100)",
-        "EXP(1) + 1",
-        "SIN(3.14 / 2) + COS(0)",
-        "TAN(1) + ATN(1)",
-        "X * Y + Z / 2",
-        "INT(SQR(81)) * 2",
-        "STR$(RND(1) * 100)",
-        "STR$(VAL(A$) + 1)",
-        "LEN(A$) * 2 + 1",
-        'CHR$(ASC("A") + 1)',
-        "STR$(SGN(-42)) + STR$(INT(3.99))",
-        "ABS(X - Y) + SQR(Z)",
-        "RND(1) + SQR(LOG(1000))",
-        "STR$(RND(0) * 50 + VAL(A$))",
-        "VAL(STR$(65)) + 5",
-        "STR$(LEN(A$) + SGN(-1))",
-        "STR$(ABS(-1) + SQR(4))",
-        "STR$(ABS(X * -1))",
-        "STR$(ABS(X * -1) + CHR$(65))",
-        "STR$(ABS(X * -1) + STR$(X))",
-        "STR$(ABS(X * -1) + STR$(X) + 1)",
-        "STR$(ABS(X * -1) + STR$(X) + 1.0)",
-        "STR$(ABS(X * -1) + STR$(X) + 1.0 + 2)",
-        "STR$(ABS(X * -1) + STR$(X) + 1.0 + 2.0)",
-        '"A" + 1',
-        "PEEK(49152) + 1",
-        "PEEK(49152) + PEEK(49153)",
-        "PEEK(49152) + PEEK(INT(SQR(AB)) * 2)",
-        "PI / 2",
-    ]
 
-    for expression in expresions:
+    for expression in EXAMPLE_EXPRESSIONS:
         try:
             print(f"Evaluating: {expression}")
             code: list[str] = evaluate_expression(expression, verbose=False)
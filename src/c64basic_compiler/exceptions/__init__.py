@@ -1,3 +1,9 @@
+from c64basic_compiler.exceptions.backend_exceptions import (
+    AssemblyError,
+    BackendError,
+    ProgramTooLargeError,
+    UnsupportedInstructionError,
+)
 from c64basic_compiler.exceptions.evaluation_exceptions import (
     EvaluationError,
     ExpressionReduceError,
@@ -24,4 +30,8 @@ __all__ = [
     "InvalidSyntaxError",
     "EvaluationHandlerError",
     "CommandProcessingError",
+    "BackendError",
+    "AssemblyError",
+    "UnsupportedInstructionError",
+    "ProgramTooLargeError",
 ]
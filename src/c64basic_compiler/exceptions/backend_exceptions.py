@@ -0,0 +1,22 @@
+class BackendError(Exception):
+    """Base exception class for machine code generation errors"""
+
+    pass
+
+
+class AssemblyError(BackendError):
+    """Exception raised when 6502 code cannot be assembled"""
+
+    pass
+
+
+class UnsupportedInstructionError(BackendError):
+    """Exception raised for pseudocode the machine code backend cannot lower"""
+
+    pass
+
+
+class ProgramTooLargeError(BackendError):
+    """Exception raised when a program does not fit in the memory of the C64"""
+
+    pass
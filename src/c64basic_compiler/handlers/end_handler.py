@@ -1,12 +1,15 @@
 # c64basic_compiler/handlers/end_handler.py
 
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
 
 class EndHandler(InstructionHandler):
-    def pseudocode(self) -> list[str]:
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
         # Pseudocode for END could be a no-operation (NOP) or a RTS
         # depending on the context of the program.
         logger.debug("Generating pseudocode for END instruction")
-        return ["END"]
+        code.emit("END")
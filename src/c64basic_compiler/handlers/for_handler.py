@@ -1,12 +1,19 @@
-from c64basic_compiler.evaluate import evaluate_expression
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.lexer import token_from_text
+from c64basic_compiler.compiler.statement import Statement
+from c64basic_compiler.evaluate import emit_tokens
 from c64basic_compiler.exceptions import (
     EvaluationError,
     EvaluationHandlerError,
     InvalidSyntaxError,
 )
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
+# Step used when the FOR statement has no STEP clause
+DEFAULT_STEP = token_from_text("1")
+
 
 class ForHandler(InstructionHandler):
     """
@@ -18,7 +25,8 @@ class ForHandler(InstructionHandler):
         FOR <variable> = <start> TO <end> [STEP <increment>]
 
     Where:
-        - variable: A numeric variable that will be used as the counter
+        - variable: A numeric variable that will be used as the counter, not an
+          integer (%) one
         - start: Initial value for the counter
         - end: Final value that determines when the loop will end
         - increment: Optional value to add to the counter in each iteration (default: 1)
@@ -29,19 +37,16 @@ class ForHandler(InstructionHandler):
         FOR X = 10 TO 1 STEP -1
     """
 
-    def pseudocode(self) -> list[str]:
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
         """
-        Generate pseudocode for the FOR statement.
-
-        Returns:
-            list[str]: List of pseudocode instructions
+        Append pseudocode for the FOR statement.
 
         Raises:
             InvalidSyntaxError: When the FOR statement has invalid syntax
             EvaluationHandlerError: When an expression cannot be evaluated
         """
         logger.debug("Generating pseudocode for FOR instruction")
-        args = self.instr["args"]
+        args = instr.args
 
         # Check for valid syntax
         if len(args) < 4 or args[1] != "=" or "TO" not in args:
@@ -52,50 +57,59 @@ class ForHandler(InstructionHandler):
 
         # Extract components
         loop_var = args[0]
+        if loop_var.endswith("%"):
+            # As in C64 BASIC, where counters are always floating point
+            raise InvalidSyntaxError(
+                f"Invalid FOR statement: {loop_var} is an integer variable"
+            )
         to_index = args.index("TO")
+        tokens = instr.tokens
 
         # Get initial value expression (everything between = and TO)
+        start_tokens = tokens[2:to_index]
         start_expr = " ".join(args[2:to_index])
 
         # Check if STEP is specified
         if "STEP" in args:
             step_index = args.index("STEP")
+            end_tokens = tokens[to_index + 1 : step_index]
             end_expr = " ".join(args[to_index + 1 : step_index])
+            step_tokens = tokens[step_index + 1 :]
             step_expr = " ".join(args[step_index + 1 :])
             has_step = True
         else:
+            end_tokens = tokens[to_index + 1 :]
             end_expr = " ".join(args[to_index + 1 :])
-            step_expr = "1"  # Default step value
+            step_tokens = [DEFAULT_STEP]
+            step_expr = DEFAULT_STEP.text
             has_step = False
 
         logger.debug(
-            f"FOR loop: {loop_var} = {start_expr} TO {end_expr}"
-            + (f" STEP {step_expr}" if has_step else "")
+            "FOR loop: {} = {} TO {}{}",
+            loop_var,
+            start_expr,
+            end_expr,
+            f" STEP {step_expr}" if has_step else "",
         )
 
         # Generate code for start expression and store in loop variable
         try:
-            result = []
+            cache = context.expression_cache
 
             # Start value
-            start_code = evaluate_expression(start_expr)
-            result.extend(start_code)
-            result.append(f"STORE {loop_var}")
+            emit_tokens(start_tokens, code, cache=cache)
+            code.emit("STORE", loop_var)
 
             # End value (store in temporary)
-            end_code = evaluate_expression(end_expr)
-            result.extend(end_code)
-            result.append(f"STORE_LIMIT {loop_var}")
+            emit_tokens(end_tokens, code, cache=cache)
+            code.emit("STORE_LIMIT", loop_var)
 
             # Step value (store in temporary)
-            step_code = evaluate_expression(step_expr)
-            result.extend(step_code)
-            result.append(f"STORE_STEP {loop_var}")
+            emit_tokens(step_tokens, code, cache=cache)
+            code.emit("STORE_STEP", loop_var)
 
             # Mark loop start
-            result.append(f"FOR_START {loop_var}")
-
-            return result
+            code.emit("FOR_START", loop_var)
 
         except EvaluationError as e:
             logger.error(f"Error evaluating FOR expressions: {e}")
@@ -1,5 +1,8 @@
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
 from c64basic_compiler.exceptions import InvalidSyntaxError
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
 
@@ -21,19 +24,15 @@ class GetHandler(InstructionHandler):
         GET K       (Gets the ASCII value of a key into K)
     """
 
-    def pseudocode(self) -> list[str]:
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
         """
-        Generate pseudocode for the GET instruction.
-
-        Returns:
-            list[str]: List of pseudocode instructions
+        Append pseudocode for the GET instruction.
 
         Raises:
             InvalidSyntaxError: When the GET statement has invalid syntax
         """
         logger.debug("Generating pseudocode for GET instruction")
-        args = self.instr["args"]
-        result = []
+        args = instr.args
 
         # Check if we have exactly one variable
         if not args or len(args) != 1:
@@ -46,9 +45,7 @@ class GetHandler(InstructionHandler):
         # Generate appropriate code based on variable type
         if var_name.endswith("$"):
             # String variable - store character
-            result.append(f"GET_CHAR {var_name}")
+            code.emit("GET_CHAR", var_name)
         else:
             # Numeric variable - store ASCII code
-            result.append(f"GET_CHAR_CODE {var_name}")
-
-        return result
+            code.emit("GET_CHAR_CODE", var_name)
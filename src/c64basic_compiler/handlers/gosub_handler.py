@@ -1,13 +1,16 @@
 # c64basic_compiler/handlers/gosub_handler.py
 
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
 
 class GosubHandler(InstructionHandler):
-    def pseudocode(self) -> list[str]:
-        target_line = int(self.instr["args"][0])
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
+        target_line = int(instr.args[0])
         logger.debug(
-            f"Generating pseudocode for GOSUB instruction: GOSUB {target_line}"
+            "Generating pseudocode for GOSUB instruction: GOSUB {}", target_line
         )
-        return [f"CALL label_{target_line}"]
+        code.emit("CALL", f"label_{target_line}")
@@ -1,11 +1,14 @@
 # c64basic_compiler/handlers/goto_handler.py
 
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
 
 class GotoHandler(InstructionHandler):
-    def pseudocode(self) -> list[str]:
-        target_line = int(self.instr["args"][0])
-        logger.debug(f"Generating pseudocode for GOTO instruction: GOTO {target_line}")
-        return [f"JMP label_{target_line}"]
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
+        target_line = int(instr.args[0])
+        logger.debug("Generating pseudocode for GOTO instruction: GOTO {}", target_line)
+        code.emit("JMP", f"label_{target_line}")
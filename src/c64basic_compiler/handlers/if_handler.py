@@ -1,4 +1,8 @@
-from c64basic_compiler.evaluate import evaluate_expression
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.instructions_registry import get_handler
+from c64basic_compiler.compiler.lexer import ExprToken, TokenKind
+from c64basic_compiler.compiler.statement import Command, Statement
+from c64basic_compiler.evaluate import emit_tokens
 from c64basic_compiler.exceptions import (
     CommandProcessingError,
     EvaluationError,
@@ -6,8 +10,12 @@ from c64basic_compiler.exceptions import (
     InvalidSyntaxError,
 )
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
+# Operators that already yield a truth value
+CONDITION_OPERATORS = frozenset(["=", "<", ">", "<>", "<=", ">=", "AND", "OR", "NOT"])
+
 
 class IfHandler(InstructionHandler):
     """
@@ -29,18 +37,16 @@ class IfHandler(InstructionHandler):
         IF (X > 5) AND (X < 10) THEN LET Y = X
     """
 
-    def pseudocode(self) -> list[str]:
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
         """
-        Generate pseudocode for the IF...THEN statement.
+        Append pseudocode for the IF...THEN statement.
 
         Parses the condition expression, evaluates it, and generates conditional
         jump instructions based on the result.
-
-        Returns:
-            list[str]: List of pseudocode instructions
         """
         logger.debug("Generating pseudocode for IF instruction")
-        args = self.instr["args"]
+        args = instr.args
+        tokens = instr.tokens
 
         # Find the position of THEN
         try:
@@ -54,8 +60,9 @@ class IfHandler(InstructionHandler):
                 raise InvalidSyntaxError("Invalid IF statement: THEN keyword not found")
 
         # Extract condition (everything before THEN)
+        condition_tokens = tokens[:then_index]
         condition = " ".join(args[:then_index])
-        logger.debug(f"IF condition: {condition}")
+        logger.debug("IF condition: {}", condition)
 
         # Extract action (everything after THEN)
         action_tokens = args[then_index + 1 :]
@@ -63,12 +70,11 @@ class IfHandler(InstructionHandler):
         # Check if the action is a line number (for jumps)
         if len(action_tokens) == 1 and action_tokens[0].isdigit():
             target_line = action_tokens[0]
-            logger.debug(f"IF jump target: {target_line}")
+            logger.debug("IF jump target: {}", target_line)
 
             # Generate code for conditional jump to line number
-            condition_code = self._evaluate_condition(condition)
-            condition_code.append(f"COND_JUMP label_{target_line}")
-            return condition_code
+            self._evaluate_condition(condition_tokens, context, code)
+            code.emit("COND_JUMP", f"label_{target_line}")
 
         # Otherwise, it's an inline command
         else:
@@ -79,27 +85,31 @@ class IfHandler(InstructionHandler):
             if not command:
                 raise InvalidSyntaxError("IF statement requires a command after THEN")
 
-            logger.debug(f"IF inline command: {command} with args {command_args}")
+            logger.debug("IF inline command: {} with args {}", command, command_args)
 
             # Generate code for condition evaluation
-            condition_code = self._evaluate_condition(condition)
+            self._evaluate_condition(condition_tokens, context, code)
 
             # Add a conditional block for the action
-            condition_code.append("IF_START")
+            code.emit("IF_START")
 
             # Create a fake instruction to handle the action
-            fake_instr = {
-                "command": command,
-                "args": command_args,
-                "line": self.instr["line"],  # Use the same line number
-            }
+            name = command.upper()
+            fake_instr = Statement(
+                instr.line,  # Use the same line number
+                Command.lookup(name),
+                name,
+                command_args,
+                tokens[then_index + 2 :],
+            )
 
             try:
                 # Get handler for the inline command
-                action_handler = self._get_handler_for_instruction(fake_instr)
+                action_handler = get_handler(fake_instr.command)
+                if action_handler is None:
+                    raise Exception(f"Unknown command '{name}'")
                 # Generate pseudocode for the action
-                action_code = action_handler.pseudocode()
-                condition_code.extend(action_code)
+                action_handler.emit(fake_instr, context, code)
             except Exception as e:
                 logger.error(f"Error processing inline command: {e}")
                 raise CommandProcessingError(
@@ -107,67 +117,38 @@ class IfHandler(InstructionHandler):
                 )
 
             # End the conditional block
-            condition_code.append("IF_END")
+            code.emit("IF_END")
 
-            return condition_code
-
-    def _get_handler_for_instruction(self, instr: dict) -> InstructionHandler:
+    def _evaluate_condition(
+        self, condition_tokens: list[ExprToken], context: CompileContext, code: Code
+    ) -> None:
         """
-        Get the appropriate handler for a command without creating circular imports.
+        Evaluates a logical condition and appends pseudocode for it.
 
         Args:
-            instr: The instruction dictionary
-
-        Returns:
-            An instantiated handler for the instruction
-
-        Raises:
-            Exception: If the command is unknown
-        """
-        # Delayed import to avoid circular dependency
-        from c64basic_compiler.compiler.instructions_registry import (
-            instruction_handlers,
-        )
-
-        command = instr["command"].upper()
-        handler_class = instruction_handlers.get(command)
-
-        if handler_class is None:
-            raise Exception(f"Unknown command '{command}'")
-
-        return handler_class(instr, self.context)
-
-    def _evaluate_condition(self, condition: str) -> list[str]:
-        """
-        Evaluates a logical condition and generates pseudocode for it.
-
-        Args:
-            condition: The condition expression to evaluate
-
-        Returns:
-            list[str]: Pseudocode instructions for evaluating the condition
+            condition_tokens: The tokens of the condition expression
+            context: Compilation context
+            code: Code to append to
 
         Raises:
             EvaluationHandlerError: If the condition cannot be evaluated
         """
+        condition = " ".join(token.text for token in condition_tokens)
         try:
             # Use the expression evaluator to generate pseudocode for the condition
-            condition_code = evaluate_expression(condition)
+            emit_tokens(condition_tokens, code, cache=context.expression_cache)
 
             # Check if this is a comparison operation
             # If not, we need to add a comparison against zero (True/False check)
             has_comparison = any(
-                op in condition
-                for op in ["=", "<", ">", "<>", "<=", ">=", "AND", "OR", "NOT"]
+                token.kind == TokenKind.OPERATOR and token.text in CONDITION_OPERATORS
+                for token in condition_tokens
             )
 
             if not has_comparison:
                 # For expressions without explicit comparison, evaluate to True if non-zero
-                condition_code.append("PUSH_CONST 0")  # Compare with 0
-                condition_code.append("NOT_EQUAL")  # Not equal to zero means True
-
-            logger.debug(f"Condition evaluation code: {condition_code}")
-            return condition_code
+                code.emit("PUSH_CONST", "0")  # Compare with 0
+                code.emit("NOT_EQUAL")  # Not equal to zero means True
 
         except EvaluationError as e:
             logger.error(f"Error evaluating condition '{condition}': {e}")
@@ -1,5 +1,8 @@
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
 from c64basic_compiler.exceptions import InvalidSyntaxError
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
 
@@ -23,19 +26,15 @@ class InputHandler(InstructionHandler):
         INPUT A, B, C      (asks for multiple values for variables A, B, and C)
     """
 
-    def pseudocode(self) -> list[str]:
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
         """
-        Generate pseudocode for the INPUT instruction.
-
-        Returns:
-            list[str]: List of pseudocode instructions
+        Append pseudocode for the INPUT instruction.
 
         Raises:
             InvalidSyntaxError: When the INPUT statement has invalid syntax
         """
         logger.debug("Generating pseudocode for INPUT instruction")
-        args = self.instr["args"]
-        result = []
+        args = instr.args
 
         if not args:
             logger.error("Invalid INPUT syntax - no variables specified")
@@ -93,14 +92,12 @@ class InputHandler(InstructionHandler):
 
         # Generate the pseudocode instructions
         if has_prompt:
-            result.append(f"PUSH_CONST {prompt_text}")
-            result.append("INPUT_PROMPT")
+            code.emit("PUSH_CONST", prompt_text)
+            code.emit("INPUT_PROMPT")
 
         # Generate code for each variable
         for var in processed_vars:
             if var.endswith("$"):
-                result.append(f"INPUT_STRING {var}")
+                code.emit("INPUT_STRING", var)
             else:
-                result.append(f"INPUT_NUMBER {var}")
-
-        return result
+                code.emit("INPUT_NUMBER", var)
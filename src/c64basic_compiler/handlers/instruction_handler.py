@@ -1,12 +1,27 @@
 from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
+from c64basic_compiler.pseudocode.ir import Code
 
 
 class InstructionHandler:
-    """Base class for handling instructions in the C64 BASIC compiler."""
+    """Base class for handling instructions in the C64 BASIC compiler.
 
-    def __init__(self, instr: str, context: CompileContext):
+    Handlers are stateless: a single instance serves every statement of its
+    command, which is passed to generate() together with the compilation
+    context. A handler can still be bound to one statement and context, as
+    get_instruction_handler does, and then be called through pseudocode().
+
+    Code generation appends the code of each statement to a Code through
+    emit(). Handlers implement emit(), or generate() to return text, and get
+    the other one for free; the text of generate() is parsed again, so the
+    built-in handlers implement emit().
+    """
+
+    def __init__(
+        self, instr: Statement | None = None, context: CompileContext | None = None
+    ):
         self.instr = instr
-        self.context: CompileContext = context  # line_addresses, symbol_table, etc.
+        self.context = context  # line_addresses, symbol_table, etc.
         self.current_address: int | None = None  # Set externally in generate_code()
 
     # def size(self) -> int:
@@ -32,13 +47,45 @@ class InstructionHandler:
 
     #     raise NotImplementedError
 
-    def pseudocode(self) -> list[str]:
-        """Generate the pseudocode for the instruction.
+    def generate(self, instr: Statement, context: CompileContext) -> list[str]:
+        """Generate the pseudocode for a statement.
+
+        Args:
+            instr: The statement to translate
+            context: Compilation context
 
         Raises:
-            NotImplementedError: _description_
+            NotImplementedError: When the handler implements neither generate()
+                nor emit()
+
+        Returns:
+            list[str]: Pseudocode instructions
+        """
+        if type(self).emit is InstructionHandler.emit:
+            raise NotImplementedError
+        code = Code()
+        self.emit(instr, context, code)
+        return code.text()
+
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
+        """Append the pseudocode for a statement to a Code.
+
+        Args:
+            instr: The statement to translate
+            context: Compilation context
+            code: Code to append to
+        """
+        code.extend_text(self.generate(instr, context))
+
+    def pseudocode(self) -> list[str]:
+        """Generate the pseudocode for the bound statement.
 
         Returns:
-            str: _description_
+            list[str]: Pseudocode instructions
+
+        Raises:
+            ValueError: When the handler is not bound to a statement
         """
-        raise NotImplementedError
+        if self.instr is None or self.context is None:
+            raise ValueError(f"{type(self).__name__} is not bound to a statement")
+        return self.generate(self.instr, self.context)
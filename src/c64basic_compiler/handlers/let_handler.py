@@ -1,8 +1,11 @@
 # c64basic_compiler/handlers/let_handler.py
 
-from c64basic_compiler.evaluate import evaluate_expression
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
+from c64basic_compiler.evaluate import emit_tokens
 from c64basic_compiler.exceptions import EvaluationHandlerError, InvalidSyntaxError
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
 # TODO: Make configurable
@@ -22,36 +25,30 @@ class LetHandler(InstructionHandler):
         C$ = "HELLO"
     """
 
-    def pseudocode(self) -> list[str]:
-        """Generate pseudocode for the LET instruction by evaluating the right-hand expression
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
+        """Append pseudocode for the LET instruction by evaluating the right-hand expression
         and assigning it to the variable.
 
-        Returns:
-            list[str]: List of pseudocode instructions
-
         Raises:
             InvalidSyntaxError: When the LET statement has invalid syntax
             EvaluationHandlerError: When the expression cannot be evaluated
         """
         # Extract variable name (always first argument)
-        var_name = self.instr["args"][0]
+        var_name = instr.args[0]
 
         # Find the expression part (everything after the '=')
-        if len(self.instr["args"]) >= 3 and self.instr["args"][1] == "=":
-            # Join the expression parts into a string for evaluation, preserving spacing
-            expression = " ".join(self.instr["args"][2:])
+        if len(instr.args) >= 3 and instr.args[1] == "=":
+            # The joined text is only used for messages, the evaluator gets tokens
+            expression = " ".join(instr.args[2:])
 
-            logger.debug(f"Processing LET: {var_name} = {expression}")
+            logger.debug("Processing LET: {} = {}", var_name, expression)
 
             try:
                 # Use the expression evaluator to generate pseudocode for the expression
-                expr_code = evaluate_expression(expression)
+                emit_tokens(instr.tokens[2:], code, cache=context.expression_cache)
 
                 # Add the store operation to assign the result to the variable
-                expr_code.append(f"STORE {var_name}")
-
-                logger.debug(f"Generated pseudocode for LET: {expr_code}")
-                return expr_code
+                code.emit("STORE", var_name)
             except Exception as e:
                 logger.error(
                     f"(LetHandler) Error evaluating expression '{expression}': {e}"
@@ -61,7 +58,5 @@ class LetHandler(InstructionHandler):
                 )
         else:
             # Invalid LET statement format
-            logger.warning(f"Invalid LET statement format: {self.instr}")
-            raise InvalidSyntaxError(
-                f"Invalid LET statement: {' '.join(self.instr['args'])}"
-            )
+            logger.warning(f"Invalid LET statement format: {instr}")
+            raise InvalidSyntaxError(f"Invalid LET statement: {' '.join(instr.args)}")
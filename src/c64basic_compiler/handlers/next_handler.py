@@ -1,4 +1,7 @@
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
 
@@ -22,25 +25,22 @@ class NextHandler(InstructionHandler):
         NEXT (closes most recent loop)
     """
 
-    def pseudocode(self) -> list[str]:
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
         """
-        Generate pseudocode for the NEXT statement.
-
-        Returns:
-            list[str]: List of pseudocode instructions
+        Append the pseudocode for the NEXT statement.
 
         Raises:
             InvalidSyntaxError: When the NEXT statement has invalid syntax
         """
         logger.debug("Generating pseudocode for NEXT instruction")
-        args = self.instr["args"]
+        args = instr.args
 
         # Check if variable is specified
         if args:
             loop_var = args[0]
-            logger.debug(f"NEXT for variable {loop_var}")
-            return [f"NEXT {loop_var}"]
+            logger.debug("NEXT for variable {}", loop_var)
+            code.emit("NEXT", loop_var)
         else:
             # No variable specified, close most recent loop
             logger.debug("NEXT without variable")
-            return ["NEXT"]
+            code.emit("NEXT")
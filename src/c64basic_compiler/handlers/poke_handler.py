@@ -1,9 +1,12 @@
-from c64basic_compiler.evaluate import evaluate_expression
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
+from c64basic_compiler.evaluate import emit_tokens
 from c64basic_compiler.exceptions import (
     EvaluationHandlerError,
     InvalidSyntaxError,
 )
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
 
@@ -26,12 +29,9 @@ class PokeHandler(InstructionHandler):
         POKE 646, 5       (sets the text color to green)
     """
 
-    def pseudocode(self) -> list[str]:
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
         """
-        Generate pseudocode for the POKE instruction.
-
-        Returns:
-            list[str]: List of pseudocode instructions
+        Append pseudocode for the POKE instruction.
 
         Raises:
             InvalidSyntaxError: When the POKE statement has invalid syntax
@@ -39,8 +39,7 @@ class PokeHandler(InstructionHandler):
             TypeMismatchError: When the address or value isn't an integer
         """
         logger.debug("Generating pseudocode for POKE instruction")
-        args = self.instr["args"]
-        result = []
+        args = instr.args
 
         # Check syntax - need at least two arguments (address and value) separated by comma
         if len(args) < 3 or "," not in args:
@@ -51,39 +50,34 @@ class PokeHandler(InstructionHandler):
         comma_index = args.index(",")
 
         # Extract the address part and value part
-        address_tokens = args[:comma_index]
-        value_tokens = args[comma_index + 1 :]
+        tokens = instr.tokens
+        address_tokens = tokens[:comma_index]
+        value_tokens = tokens[comma_index + 1 :]
 
-        # Join these tokens into strings for the evaluator
-        address_expr = " ".join(address_tokens)
-        value_expr = " ".join(value_tokens)
+        # Join these tokens into strings for the log
+        address_expr = " ".join(args[:comma_index])
+        value_expr = " ".join(args[comma_index + 1 :])
 
-        logger.debug(f"POKE address expression: {address_expr}")
-        logger.debug(f"POKE value expression: {value_expr}")
+        logger.debug("POKE address expression: {}", address_expr)
+        logger.debug("POKE value expression: {}", value_expr)
 
         try:
-            # Evaluar ambas expresiones
-            address_code = evaluate_expression(address_expr)
-            value_code = evaluate_expression(value_expr)
+            cache = context.expression_cache
 
             # Primero ponemos el valor en la pila
-            result.extend(value_code)
+            emit_tokens(value_tokens, code, cache=cache)
 
             # Luego ponemos la dirección en la pila
-            result.extend(address_code)
+            emit_tokens(address_tokens, code, cache=cache)
 
             # Ahora la dirección está en el tope de la pila y el valor debajo
             # Por lo que validamos en este orden:
-            result.append("VALIDATE_INT_RANGE_ADDRESS")  # Luego la dirección (0-65535)
+            code.emit("VALIDATE_INT_RANGE_ADDRESS")  # Luego la dirección (0-65535)
 
-            result.append(
-                "VALIDATE_INT_RANGE_VALUE"
-            )  # Primero validamos el valor (0-255)
+            code.emit("VALIDATE_INT_RANGE_VALUE")  # Primero validamos el valor (0-255)
 
             # Ejecutar POKE (que espera primero dirección y luego valor)
-            result.append("POKE_MEMORY")
-
-            return result
+            code.emit("POKE_MEMORY")
 
         except Exception as e:
             logger.error(f"Error evaluating POKE expressions: {e}")
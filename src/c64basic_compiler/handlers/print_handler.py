@@ -1,9 +1,12 @@
 # c64basic_compiler/handlers/print_handler.py
 
 
-from c64basic_compiler.evaluate import evaluate_expression
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
+from c64basic_compiler.evaluate import emit_tokens
 from c64basic_compiler.exceptions import EvaluationHandlerError
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
 BASE_VARIABLES_ADDR = 0xC000
@@ -25,24 +28,22 @@ class PrintHandler(InstructionHandler):
         PRINT X*2+1
     """
 
-    def pseudocode(self) -> list[str]:
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
         """
-        Generate pseudocode for the PRINT instruction.
-
-        Returns:
-            list[str]: List of pseudocode instructions
+        Append pseudocode for the PRINT instruction.
 
         Raises:
             EvaluationHandlerError: When expression evaluation fails
         """
         logger.debug("Generating pseudocode for PRINT instruction")
-        args = self.instr["args"]
-        output = []
+        args = instr.args
+        tokens = instr.tokens
 
         # Track whether we're inside a quoted string
         in_string = False
         string_buffer = ""
         expr_buffer = []
+        token_buffer = []  # Tokens of expr_buffer, handed to the evaluator
         i = 0
 
         # Process each argument
@@ -53,15 +54,14 @@ class PrintHandler(InstructionHandler):
             if arg in [",", ";"]:
                 # Process any pending expression or string
                 if string_buffer:
-                    output.append(f'PUSH_CONST "{string_buffer}"')
-                    output.append("PRINT_VALUE")
+                    code.emit("PUSH_CONST", f'"{string_buffer}"')
+                    code.emit("PRINT_VALUE")
                     string_buffer = ""
                 elif expr_buffer:
                     expr_str = " ".join(expr_buffer)
                     try:
-                        expr_code = evaluate_expression(expr_str)
-                        output.extend(expr_code)
-                        output.append("PRINT_VALUE")
+                        emit_tokens(token_buffer, code, cache=context.expression_cache)
+                        code.emit("PRINT_VALUE")
                     except Exception as e:
                         logger.error(
                             f"(PrintHandler 1) Error evaluating expression '{expr_str}': {e}"
@@ -70,20 +70,21 @@ class PrintHandler(InstructionHandler):
                             f"Failed to evaluate expression in PRINT: '{expr_str}': {str(e)}"
                         )
                     expr_buffer = []
+                    token_buffer = []
 
                 # Add separator instruction
                 if arg == ",":
-                    output.append("PRINT_TAB")
+                    code.emit("PRINT_TAB")
                 elif arg == ";":
-                    output.append("PRINT_NO_NEWLINE")
+                    code.emit("PRINT_NO_NEWLINE")
 
                 i += 1
 
             # Handle string literals
             elif arg.startswith('"') and arg.endswith('"'):
                 # Full quoted string in a single argument
-                output.append(f"PUSH_CONST {arg}")
-                output.append("PRINT_VALUE")
+                code.emit("PUSH_CONST", arg)
+                code.emit("PRINT_VALUE")
                 i += 1
 
             # Start of a multi-token string
@@ -105,23 +106,23 @@ class PrintHandler(InstructionHandler):
                         i += 1
 
                 # Output the complete string
-                output.append(f'PUSH_CONST "{string_buffer}"')
-                output.append("PRINT_VALUE")
+                code.emit("PUSH_CONST", f'"{string_buffer}"')
+                code.emit("PRINT_VALUE")
                 string_buffer = ""
                 in_string = False
 
             # Part of an expression
             else:
                 expr_buffer.append(arg)
+                token_buffer.append(tokens[i])
                 i += 1
 
         # Process any remaining expression
         if expr_buffer:
             expr_str = " ".join(expr_buffer)
             try:
-                expr_code = evaluate_expression(expr_str)
-                output.extend(expr_code)
-                output.append("PRINT_VALUE")
+                emit_tokens(token_buffer, code, cache=context.expression_cache)
+                code.emit("PRINT_VALUE")
             except Exception as e:
                 logger.error(
                     f"(PrintHandler 2) Error evaluating expression '{expr_str}': {e}"
@@ -132,6 +133,4 @@ class PrintHandler(InstructionHandler):
 
         # Add final newline unless the statement ended with a separator
         if not (args and args[-1] in [",", ";"]):
-            output.append("PRINT_NEWLINE")
-
-        return output
+            code.emit("PRINT_NEWLINE")
@@ -1,10 +1,13 @@
 # c64basic_compiler/handlers/rem_handler.py
 
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 
 
 class RemHandler(InstructionHandler):
-    def pseudocode(self) -> list[str]:
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
         # Generate pseudocode for REM
         # It is just a comment and does not affect the program
-        return [f"REM {' '.join(self.instr['args'])}"]
+        code.emit("REM", " ".join(instr.args))
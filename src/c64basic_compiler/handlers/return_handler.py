@@ -1,10 +1,13 @@
 # c64basic_compiler/handlers/return_handler.py
 
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.statement import Statement
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
 from c64basic_compiler.utils.logging import logger
 
 
 class ReturnHandler(InstructionHandler):
-    def pseudocode(self) -> list[str]:
+    def emit(self, instr: Statement, context: CompileContext, code: Code) -> None:
         logger.debug("Generating pseudocode for RETURN instruction")
-        return ["RET"]
+        code.emit("RET")
@@ -1,7 +1,9 @@
+import time
 from typing import Any
 
 from c64basic_compiler.common.compile_context import CompileContext
-from c64basic_compiler.compiler.instructions_registry import get_instruction_handler
+from c64basic_compiler.compiler.instructions_registry import get_handler, handler_table
+from c64basic_compiler.compiler.statement import Command, Statement
 from c64basic_compiler.exceptions import (
     CommandProcessingError,
     EvaluationHandlerError,
@@ -9,28 +11,30 @@ from c64basic_compiler.exceptions import (
     InvalidSyntaxError,
 )
 from c64basic_compiler.handlers.instruction_handler import InstructionHandler
+from c64basic_compiler.pseudocode.ir import Code
+from c64basic_compiler.utils import tracing
 from c64basic_compiler.utils.logging import logger
 
 
-def extract_jump_targets(ast: list[dict]) -> set[int]:
+def extract_jump_targets(ast: list[Statement]) -> set[int]:
     targets = set()
 
     # Track FOR loops to handle NEXT statements
     for_loops = {}  # Maps line numbers to loop variables
 
     for instr in ast:
-        cmd = instr["command"].upper()
-        args = instr.get("args", [])
-        line = instr["line"]
+        cmd = instr.command
+        args = instr.args
+        line = instr.line
 
-        if cmd in {"GOTO", "GOSUB"} and args:
+        if (cmd == Command.GOTO or cmd == Command.GOSUB) and args:
             try:
                 targets.add(int(args[0]))
             except ValueError:
                 pass  # ignora valores no válidos (por ejemplo, variables aún no resueltas)
 
         # Handle IF...THEN line_number
-        elif cmd == "IF" and "THEN" in args:
+        elif cmd == Command.IF and "THEN" in args:
             try:
                 then_index = args.index("THEN")
                 if then_index < len(args) - 1:
@@ -42,73 +46,256 @@ def extract_jump_targets(ast: list[dict]) -> set[int]:
                 pass
 
         # Track FOR loops
-        elif cmd == "FOR" and len(args) >= 3:
+        elif cmd == Command.FOR and len(args) >= 3:
             # Store the line number and loop variable
             for_loops[line] = args[0]  # The loop variable
 
     return targets
 
 
-def generate_code(ast, ctx: CompileContext) -> list[Any]:
+def generate_code(
+    ast: list[Statement], ctx: CompileContext, jobs: int = 1
+) -> list[Any]:
+    """
+    Generate the pseudocode of a program.
+
+    With jobs > 1 the statements are split into chunks that are generated in a
+    pool of worker processes. Labels come from the jump targets of the whole
+    program, which are found before the split, and the chunks are joined in
+    program order, so the output is the same as with a single job.
+
+    Args:
+        ast: Parsed statements
+        ctx: Compilation context
+        jobs: Number of worker processes
+    """
     logger.debug("Generating pseudocode...")
     line_addresses: dict[str, int] = ctx.symbol_table.table.setdefault(
         "__line_addresses__", {}
     )
 
     jump_targets = extract_jump_targets(ast)
-    pseudo_code: list[str] = []
 
     # -----------------------------------------------
     # 3. Generate pseudocode
     # -----------------------------------------------
     logger.debug("Generating pseudocode...")
 
+    return generate_statements(ast, ctx, jump_targets, jobs)[0]
+
+
+def generate_ir(ast: list[Statement], ctx: CompileContext, jobs: int = 1) -> Code:
+    """
+    Generate the pseudocode of a program as a Code, without rendering any
+    text. Same arguments and same instructions as generate_code.
+    """
+    logger.debug("Generating pseudocode...")
+    ctx.symbol_table.table.setdefault("__line_addresses__", {})
+    jump_targets = extract_jump_targets(ast)
+    if jobs > 1 and len(ast) > 1:
+        return _emit_parallel(ast, jump_targets, jobs)[0]
+    code = Code()
+    emit_statements(ast, ctx, jump_targets, code)
+    return code
+
+
+def generate_statements(
+    ast: list[Statement], ctx: CompileContext, jump_targets: set[int], jobs: int = 1
+) -> tuple[list[str], list[int]]:
+    """
+    Generate the pseudocode of some statements of a program.
+
+    Args:
+        ast: Statements to translate
+        ctx: Compilation context
+        jump_targets: Jump targets of the whole program; their lines are
+            preceded by a label
+        jobs: Number of worker processes
+
+    Returns:
+        The pseudocode and, for each statement, the offset in it where the code
+        of the statement ends
+    """
+    if jobs > 1 and len(ast) > 1:
+        code, ends = _emit_parallel(ast, jump_targets, jobs)
+    else:
+        code = Code()
+        ends = emit_statements(ast, ctx, jump_targets, code)
+    return code.text(), ends
+
+
+def emit_statements(
+    ast: list[Statement],
+    ctx: CompileContext,
+    jump_targets: set[int],
+    code: Code,
+    previous_line: int = -1,
+) -> list[int]:
+    """
+    Append the pseudocode of some statements of a program to a Code.
+
+    Args:
+        ast: Statements to translate
+        ctx: Compilation context
+        jump_targets: Jump targets of the whole program; the first statement
+            of their lines is preceded by a label
+        code: Code to append to
+        previous_line: Line of the statement before the first one of ast, when
+            ast starts in the middle of a line
+
+    Returns:
+        For each statement, the offset in the code where its code ends
+    """
+    ends: list[int] = []
+
+    # Checked once: statements are only timed while tracing is enabled
+    trace = tracing.enabled
+    handlers = handler_table
+
     for instr in ast:
-        line = instr["line"]
-        if line in jump_targets:
-            pseudo_code.append(f"LABEL label_{line}")
+        line = instr.line
+        code.line = line
+        if line in jump_targets and line != previous_line:
+            code.emit("LABEL", f"label_{line}")
+        previous_line = line
+
+        if trace:
+            start = time.perf_counter()
+        handler = None
+        mark = len(code)
 
         try:
-            handler: InstructionHandler = get_instruction_handler(instr, ctx)
+            handler: InstructionHandler = handlers[instr.command]
+            if handler is None:  # First use of the command, or no handler
+                handler = get_handler(instr.command)
             if handler is None:
-                logger.error(f"Unknown instruction: {instr}")
-                raise ValueError(f"Unknown instruction: {instr}")
-
-            instr_code = handler.pseudocode()
-            pseudo_code += instr_code
-
-        except InvalidSyntaxError as e:
-            # For syntax errors, add a comment in the pseudocode and continue
-            logger.error(f"Syntax error at line {line}: {str(e)}")
-            pseudo_code.append(f"# Syntax error at line {line}: {str(e)}")
-
-        except EvaluationHandlerError as e:
-            # For expression evaluation errors, add fallback code
-            logger.error(f"Expression evaluation error at line {line}: {str(e)}")
-            pseudo_code.append(
-                f"# Expression evaluation error at line {line}: {str(e)}"
+                raise Exception(f"Unknown command '{instr.name}'")
+
+            handler.emit(instr, ctx, code)
+
+        except Exception as e:
+            # Drop any code of the statement emitted before the error
+            code.truncate(mark)
+            code.extend_text(_error_code(instr, e))
+
+        ends.append(len(code))
+
+        if trace:
+            tracing.emit(
+                "handler",
+                line=line,
+                command=instr.name,
+                handler=type(handler).__name__ if handler is not None else None,
+                duration=time.perf_counter() - start,
             )
 
-            # If this is an assignment (LET), add fallback to set variable to 0
-            if instr["command"].upper() == "LET" and len(instr["args"]) >= 1:
-                var_name = instr["args"][0]
-                pseudo_code.append("PUSH_CONST 0")
-                pseudo_code.append(f"STORE {var_name}")
+    return ends
 
-        except CommandProcessingError as e:
-            # For command processing errors, add a comment
-            logger.error(f"Command processing error at line {line}: {str(e)}")
-            pseudo_code.append(f"# Command processing error at line {line}: {str(e)}")
 
-        except HandlerError as e:
-            # For other handler errors, add a comment
-            logger.error(f"Handler error at line {line}: {str(e)}")
-            pseudo_code.append(f"# Error at line {line}: {str(e)}")
+def _error_code(instr: Statement, e: Exception) -> list[str]:
+    """
+    Log an error raised translating a statement, and return the pseudocode
+    that replaces the code of the statement.
+    """
+    line = instr.line
+    if isinstance(e, InvalidSyntaxError):
+        # For syntax errors, add a comment in the pseudocode and continue
+        logger.error(f"Syntax error at line {line}: {str(e)}")
+        return [f"# Syntax error at line {line}: {str(e)}"]
 
-        except Exception as e:
-            # For unexpected errors, add a comment and continue
-            logger.error(f"Unexpected error at line {line}: {str(e)}")
-            pseudo_code.append(f"# Unexpected error at line {line}: {str(e)}")
+    if isinstance(e, EvaluationHandlerError):
+        # For expression evaluation errors, add fallback code
+        logger.error(f"Expression evaluation error at line {line}: {str(e)}")
+        error_code = [f"# Expression evaluation error at line {line}: {str(e)}"]
+
+        # If this is an assignment (LET), add fallback to set variable to 0
+        if instr.command == Command.LET and len(instr.args) >= 1:
+            var_name = instr.args[0]
+            error_code.append("PUSH_CONST 0")
+            error_code.append(f"STORE {var_name}")
+        return error_code
+
+    if isinstance(e, CommandProcessingError):
+        # For command processing errors, add a comment
+        logger.error(f"Command processing error at line {line}: {str(e)}")
+        return [f"# Command processing error at line {line}: {str(e)}"]
+
+    if isinstance(e, HandlerError):
+        # For other handler errors, add a comment
+        logger.error(f"Handler error at line {line}: {str(e)}")
+        return [f"# Error at line {line}: {str(e)}"]
+
+    # For unexpected errors, add a comment and continue
+    logger.error(f"Unexpected error at line {line}: {str(e)}")
+    return [f"# Unexpected error at line {line}: {str(e)}"]
+
+
+# Chunks per worker: small enough to balance the load, large enough that
+# scheduling and sending the results back stay cheap
+CHUNKS_PER_JOB = 4
+
+# State of a worker process, set up by _init_worker
+_worker_ast: list[Statement] = []
+_worker_context: CompileContext | None = None
+_worker_jump_targets: set[int] = set()
+_worker_events: list[dict[str, Any]] | None = None
 
-    # logger.debug(f"Pseudocode generated: {pseudo_code}")
-    return pseudo_code
+
+def _emit_parallel(
+    ast: list[Statement], jump_targets: set[int], jobs: int
+) -> tuple[Code, list[int]]:
+    # Imported here: process pools are slow to import and only used with jobs
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Workers get the whole AST once, when they start (forked workers inherit
+    # it without pickling), and then only the bounds of each chunk
+    size = -(-len(ast) // (jobs * CHUNKS_PER_JOB))
+    chunks = [(i, min(i + size, len(ast))) for i in range(0, len(ast), size)]
+
+    code = Code()
+    ends: list[int] = []
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(chunks)),
+        initializer=_init_worker,
+        initargs=(ast, jump_targets, tracing.enabled),
+    ) as executor:
+        for chunk_code, chunk_ends, events in executor.map(_emit_chunk, chunks):
+            offset = len(code)
+            code.extend(chunk_code)
+            ends += [offset + end for end in chunk_ends]
+            for event in events:
+                tracing.emit(**event)
+    return code, ends
+
+
+def _init_worker(ast: list[Statement], jump_targets: set[int], trace: bool) -> None:
+    global _worker_ast, _worker_context, _worker_jump_targets, _worker_events
+    _worker_ast = ast
+    _worker_context = CompileContext()
+    _worker_jump_targets = jump_targets
+
+    # Trace sinks inherited from the parent must not be written to from here:
+    # events are collected and sent back with each chunk instead
+    tracing.reset()
+    if trace:
+        _worker_events = []
+        tracing.add_sink(_worker_events.append)
+
+
+def _emit_chunk(
+    bounds: tuple[int, int],
+) -> tuple[Code, list[int], list[dict[str, Any]]]:
+    start, stop = bounds
+    code = Code()
+    ends = emit_statements(
+        _worker_ast[start:stop],
+        _worker_context,
+        _worker_jump_targets,
+        code,
+        _worker_ast[start - 1].line if start else -1,
+    )
+    events: list[dict[str, Any]] = []
+    if _worker_events:
+        events = _worker_events[:]
+        _worker_events.clear()
+    return code, ends, events
@@ -0,0 +1,139 @@
+from bisect import bisect_right
+from collections.abc import Iterator
+from itertools import accumulate
+
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.common.line_cache import LineCache, line_hash
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.statement import Statement
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.pseudocode.codegen import (
+    extract_jump_targets,
+    generate_statements,
+)
+from c64basic_compiler.utils.logging import logger
+
+
+def generate_incremental(
+    source: str, ctx: CompileContext, cache: LineCache, jobs: int = 1
+) -> tuple[list[str], int]:
+    """
+    Generate the pseudocode of a program, reusing the code of unchanged lines.
+
+    Only lines missing from the cache are tokenized and parsed: new or edited
+    lines, and lines that became (or stopped being) a jump target because a
+    GOTO, GOSUB or IF elsewhere changed. Their code is generated and spliced
+    with the cached code in program order, so the result is the same as that
+    of generate_code over the whole program.
+
+    Args:
+        source: The BASIC source code
+        ctx: Compilation context
+        cache: Line cache, updated with the newly generated lines
+        jobs: Number of worker processes for the lines to generate
+
+    Returns:
+        The pseudocode and the number of lines reused from the cache
+    """
+    texts = [text for text in source.split("\n") if text.strip()]
+    digests = [line_hash(text) for text in texts]
+
+    # Line numbers and jump targets of every line, to place the labels
+    cached = [cache.get_line(digest) for digest in digests]
+    unknown = [index for index, entry in enumerate(cached) if entry is None]
+    parsed = dict(zip(unknown, _parse_lines([texts[i] for i in unknown]), strict=True))
+    entries: list[tuple[int, list[int]]] = []
+    for index, entry in enumerate(cached):
+        if entry is None:
+            statements = parsed[index]
+            line = statements[0].line if statements else -1
+            targets = sorted(extract_jump_targets(statements))
+            entry = (line, targets)
+            cache.put_line(digests[index], line, targets)
+        entries.append(entry)
+
+    numbers = [line for line, _ in entries]
+    jump_targets: set[int] = set()
+    for _, targets in entries:
+        jump_targets.update(targets)
+
+    # Reuse the code of the lines whose text and label did not change
+    codes: list[list[str]] = []
+    missing: list[int] = []
+    for index, digest in enumerate(digests):
+        code = cache.get_code(digest, numbers[index] in jump_targets)
+        if code is None:
+            # Generated below
+            missing.append(index)
+            code = []
+        else:
+            _report_errors(code)
+        codes.append(code)
+
+    logger.debug("Reusing {} of {} lines", len(texts) - len(missing), len(texts))
+
+    if missing:
+        unparsed = [index for index in missing if index not in parsed]
+        parsed.update(
+            zip(unparsed, _parse_lines([texts[i] for i in unparsed]), strict=True)
+        )
+
+        ast: list[Statement] = []
+        counts: list[int] = []
+        for index in missing:
+            ast += parsed[index]
+            counts.append(len(parsed[index]))
+
+        code, ends = generate_statements(ast, ctx, jump_targets, jobs)
+        for index, line_code in zip(
+            missing, _split_lines(code, ends, counts), strict=True
+        ):
+            codes[index] = line_code
+            cache.put_code(digests[index], numbers[index] in jump_targets, line_code)
+
+    pseudo_code: list[str] = []
+    for code in codes:
+        pseudo_code += code
+    return pseudo_code, len(texts) - len(missing)
+
+
+def _report_errors(code: list[str]) -> None:
+    """
+    Log again the errors of a reused line, from the comments in its code.
+    """
+    for instruction in code:
+        if instruction.startswith("# "):
+            logger.error("{} (cached)", instruction[2:])
+
+
+def _parse_lines(texts: list[str]) -> list[list[Statement]]:
+    """
+    Parse source lines with a single scan, returning the statements of each.
+    """
+    stream = scan("\n".join(texts))
+    line_starts = list(accumulate((len(text) + 1 for text in texts), initial=0))
+    starts = stream.starts
+    bounds = stream.bounds
+
+    statements: list[list[Statement]] = [[] for _ in texts]
+    for index, statement in enumerate(parse(stream)):
+        # Streams have no empty statements, so parse() keeps one per statement
+        line_index = bisect_right(line_starts, starts[bounds[index]]) - 1
+        statements[line_index].append(statement)
+    return statements
+
+
+def _split_lines(
+    code: list[str], ends: list[int], counts: list[int]
+) -> Iterator[list[str]]:
+    """
+    Split generated code into lines, given the end offset of the code of each
+    statement and the number of statements of each line.
+    """
+    statement = 0
+    start = 0
+    for count in counts:
+        statement += count
+        end = ends[statement - 1] if statement else 0
+        yield code[start:end]
+        start = end
@@ -53,4 +53,58 @@ INSTRUCTION_SET = {
     ),  # Lee entrada del usuario y la guarda en variable
     "END": Instruction("END", 0x27, 0),  # Termina el programa
     "REM": Instruction("REM", 0x28, 1),  # Comentario (ignorado en tiempo de ejecución)
+    # Instrucciones que emiten los handlers y el evaluador de expresiones
+    "LOAD": Instruction("LOAD", 0x29, 1),  # Empuja valor de variable
+    "STORE": Instruction("STORE", 0x2A, 1),  # Guarda valor de pila en variable
+    "NEGATE": Instruction("NEGATE", 0x2B, 0),  # Cambia signo del top de la pila
+    "POW": Instruction("POW", 0x2C, 0),  # Potencia: top 2 de pila
+    "EQUAL": Instruction("EQUAL", 0x2D, 0),  # Push -1 si iguales, 0 si no
+    "NOT_EQUAL": Instruction("NOT_EQUAL", 0x2E, 0),  # Push -1 si distintos
+    "LESS": Instruction("LESS", 0x2F, 0),  # Push -1 si a < b
+    "LESS_EQUAL": Instruction("LESS_EQUAL", 0x30, 0),  # Push -1 si a ≤ b
+    "GREATER": Instruction("GREATER", 0x31, 0),  # Push -1 si a > b
+    "GREATER_EQUAL": Instruction("GREATER_EQUAL", 0x32, 0),  # Push -1 si a ≥ b
+    "INT": Instruction("INT", 0x33, 0),  # Parte entera (redondeo hacia abajo)
+    "SGN": Instruction("SGN", 0x34, 0),  # Signo: -1, 0 o 1
+    "SQR": Instruction("SQR", 0x35, 0),  # Raíz cuadrada
+    "LOG": Instruction("LOG", 0x36, 0),  # Logaritmo natural
+    "EXP": Instruction("EXP", 0x37, 0),  # Exponencial
+    "SIN": Instruction("SIN", 0x38, 0),  # Seno
+    "COS": Instruction("COS", 0x39, 0),  # Coseno
+    "TAN": Instruction("TAN", 0x3A, 0),  # Tangente
+    "ATN": Instruction("ATN", 0x3B, 0),  # Arcotangente
+    "RND": Instruction("RND", 0x3C, 0),  # Número aleatorio
+    "ASC": Instruction("ASC", 0x3D, 0),  # Código del primer carácter de una cadena
+    "PI": Instruction("PI", 0x3E, 0),  # Empuja la constante π
+    "TI": Instruction("TI", 0x3F, 0),  # Empuja el reloj del sistema (jiffies)
+    "TI$": Instruction("TI$", 0x40, 0),  # Empuja la hora como cadena HHMMSS
+    "TIME": Instruction("TIME", 0x41, 0),  # Igual que TI
+    "TIME$": Instruction("TIME$", 0x42, 0),  # Igual que TI$
+    "PRINT_VALUE": Instruction("PRINT_VALUE", 0x43, 0),  # Imprime top de la pila
+    "PRINT_NEWLINE": Instruction("PRINT_NEWLINE", 0x44, 0),  # Imprime salto de línea
+    "PRINT_NO_NEWLINE": Instruction("PRINT_NO_NEWLINE", 0x45, 0),  # Sin salto (;)
+    "PRINT_TAB": Instruction("PRINT_TAB", 0x46, 0),  # Avanza a la siguiente zona (,)
+    "COND_JUMP": Instruction("COND_JUMP", 0x47, 1),  # Salta si top de la pila es cierto
+    "IF_START": Instruction("IF_START", 0x48, 0),  # Abre bloque si top es cierto
+    "IF_END": Instruction("IF_END", 0x49, 0),  # Cierra el bloque de IF_START
+    "FOR_START": Instruction("FOR_START", 0x4A, 1),  # Abre bucle FOR de la variable
+    "STORE_LIMIT": Instruction("STORE_LIMIT", 0x4B, 1),  # Guarda límite del bucle
+    "STORE_STEP": Instruction("STORE_STEP", 0x4C, 1),  # Guarda paso del bucle
+    "NEXT": Instruction("NEXT", 0x4D, 1),  # Cierra bucle (variable opcional)
+    "INPUT_PROMPT": Instruction("INPUT_PROMPT", 0x4E, 0),  # Imprime el mensaje de INPUT
+    "INPUT_STRING": Instruction("INPUT_STRING", 0x4F, 1),  # Lee cadena en variable
+    "INPUT_NUMBER": Instruction("INPUT_NUMBER", 0x50, 1),  # Lee número en variable
+    "GET_CHAR": Instruction("GET_CHAR", 0x51, 1),  # Lee tecla como cadena
+    "GET_CHAR_CODE": Instruction("GET_CHAR_CODE", 0x52, 1),  # Lee código de tecla
+    "VALIDATE_INT_RANGE_ADDRESS": Instruction(
+        "VALIDATE_INT_RANGE_ADDRESS", 0x53, 0
+    ),  # Comprueba dirección en 0-65535
+    "VALIDATE_INT_RANGE_VALUE": Instruction(
+        "VALIDATE_INT_RANGE_VALUE", 0x54, 0
+    ),  # Comprueba valor en 0-255
+    "POKE_MEMORY": Instruction("POKE_MEMORY", 0x55, 0),  # Escribe valor en dirección
+    "#": Instruction("#", 0x56, 1),  # Comentario con un error de compilación
 }
+
+# Instrucciones por código de operación
+OPCODES = {instruction.opcode: instruction for instruction in INSTRUCTION_SET.values()}
@@ -0,0 +1,274 @@
+"""
+Columnar in-memory representation of pseudocode.
+
+A Code holds a program as parallel arrays: the opcode of each instruction
+(see INSTRUCTION_SET), the index of its operand in a pool of interned
+operands, and the BASIC line it was generated for. Operands are typed when
+they are interned, so passes over the code can tell constants from names
+and read their values without parsing any text. Text is only rendered when
+it is needed, for .pseudocode files or for callers that expect strings.
+"""
+
+import re
+from array import array
+from collections.abc import Iterable, Iterator
+
+from c64basic_compiler.pseudocode.instruction_set import INSTRUCTION_SET, OPCODES
+
+# Kinds of operands
+CONST_INT = 0
+CONST_FLOAT = 1
+CONST_STRING = 2  # String literal, kept without its quotes
+CONST_NAME = 3  # Variable, label or any other text
+
+_INT = re.compile(r"-?(?:0|[1-9][0-9]*)")
+
+# Opcode and "takes an operand" flag of each mnemonic
+ENCODING = {
+    mnemonic: (instruction.opcode, instruction.operand_count > 0)
+    for mnemonic, instruction in INSTRUCTION_SET.items()
+}
+
+# Mnemonic of each opcode
+MNEMONICS = [""] * 256
+for _opcode, _instruction in OPCODES.items():
+    MNEMONICS[_opcode] = _instruction.mnemonic
+
+# Opcode and operand of text instructions seen so far: generated code repeats
+# the same few thousand instructions over and over. Cleared when full.
+_PARSED: dict[str, tuple[int, str | None]] = {}
+PARSED_LIMIT = 100_000
+
+
+def classify_operand(text: str) -> tuple[int, int | float | str]:
+    """
+    Return the kind and value of an operand. Numbers are only typed when
+    writing back the value gives the same text. A string literal without its
+    closing quote runs to the end of the text, as it does in PRINT.
+    """
+    if _INT.fullmatch(text) and text != "-0":
+        return CONST_INT, int(text)
+    if text[:1] == '"':
+        if len(text) >= 2 and text[-1] == '"':
+            return CONST_STRING, text[1:-1]
+        if '"' not in text[1:]:
+            return CONST_STRING, text[1:]
+    try:
+        value = float(text)
+    except ValueError:
+        return CONST_NAME, text
+    if repr(value) == text:
+        return CONST_FLOAT, value
+    return CONST_NAME, text
+
+
+def format_operand(kind: int, value: int | float | str) -> str:
+    """
+    Return the text of an operand, the inverse of classify_operand.
+    """
+    if kind == CONST_STRING:
+        return f'"{value}"'
+    if kind == CONST_FLOAT:
+        return repr(value)
+    return str(value)
+
+
+def parse_instruction(text: str) -> tuple[int, str | None]:
+    """
+    Return the opcode and the operand text (None for no operand) of a line of
+    text pseudocode.
+
+    Raises:
+        ValueError: When the mnemonic is unknown, or has an operand it does
+            not take
+    """
+    parsed = _PARSED.get(text)
+    if parsed is None:
+        mnemonic, separator, operand = text.partition(" ")
+        encoding = ENCODING.get(mnemonic)
+        if encoding is None:
+            raise ValueError(f"Unknown instruction '{mnemonic}'")
+        opcode, has_operand = encoding
+        if separator and not has_operand:
+            raise ValueError(f"Instruction '{mnemonic}' takes no operand: {text}")
+        if len(_PARSED) >= PARSED_LIMIT:
+            _PARSED.clear()
+        parsed = _PARSED[text] = (opcode, operand if separator else None)
+    return parsed
+
+
+class Code:
+    """
+    Pseudocode of a program, in columns.
+
+    opcodes, operands and lines have one entry per instruction: the opcode,
+    the index of the operand in constants (-1 for none) and the source line
+    (-1 for none). constants and kinds have the value and kind of each
+    distinct operand.
+
+    Handlers add instructions with emit(); the source line of the
+    instructions is taken from the line attribute, which code generation
+    sets before each statement.
+    """
+
+    __slots__ = ("opcodes", "operands", "lines", "constants", "kinds", "line", "_index")
+
+    def __init__(self) -> None:
+        self.opcodes = array("H")
+        self.operands = array("i")
+        self.lines = array("i")
+        self.constants: list[int | float | str] = []
+        self.kinds = bytearray()
+        self.line = -1  # Source line of the instructions emitted next
+        self._index: dict[str, int] = {}  # Operand index by text
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Yield the instructions as lines of text pseudocode, rendering them one
+        at a time.
+        """
+        mnemonics = MNEMONICS
+        texts = self.operand_texts()
+        for opcode, operand in zip(self.opcodes, self.operands, strict=True):
+            if operand >= 0:
+                yield f"{mnemonics[opcode]} {texts[operand]}"
+            else:
+                yield mnemonics[opcode]
+
+    def emit(self, mnemonic: str, operand: str | None = None) -> None:
+        """
+        Add an instruction.
+
+        Raises:
+            ValueError: When the mnemonic is unknown, or has an operand it
+                does not take
+        """
+        encoding = ENCODING.get(mnemonic)
+        if encoding is None or (operand is not None and not encoding[1]):
+            raise ValueError(f"Invalid instruction: {mnemonic} {operand}")
+        self.opcodes.append(encoding[0])
+        self.operands.append(-1 if operand is None else self.intern(operand))
+        self.lines.append(self.line)
+
+    def emit_all(self, instructions: Iterable[tuple[str, str | None]]) -> None:
+        """
+        Add instructions given as (mnemonic, operand) pairs, as emit() does.
+
+        Raises:
+            ValueError: When a mnemonic is unknown, or has an operand it does
+                not take
+        """
+        # emit, inlined: compiled expressions go through here
+        encodings = ENCODING
+        index = self._index
+        opcodes = self.opcodes
+        operands = self.operands
+        for mnemonic, operand in instructions:
+            encoding = encodings.get(mnemonic)
+            if encoding is None or (operand is not None and not encoding[1]):
+                raise ValueError(f"Invalid instruction: {mnemonic} {operand}")
+            opcodes.append(encoding[0])
+            if operand is None:
+                operands.append(-1)
+            else:
+                operand_index = index.get(operand)
+                operands.append(
+                    self.intern(operand) if operand_index is None else operand_index
+                )
+        self.lines.extend([self.line] * (len(opcodes) - len(self.lines)))
+
+    def emit_text(self, text: str) -> None:
+        """
+        Add an instruction given as a line of text pseudocode.
+        """
+        opcode, operand = parse_instruction(text)
+        self.opcodes.append(opcode)
+        self.operands.append(-1 if operand is None else self.intern(operand))
+        self.lines.append(self.line)
+
+    def extend_text(self, texts: Iterable[str]) -> None:
+        """
+        Add instructions given as lines of text pseudocode.
+        """
+        # emit_text, inlined: handlers that generate text go through here
+        parsed = _PARSED
+        index = self._index
+        opcodes = self.opcodes
+        operands = self.operands
+        line = self.line
+        for text in texts:
+            opcode_operand = parsed.get(text) or parse_instruction(text)
+            opcodes.append(opcode_operand[0])
+            operand = opcode_operand[1]
+            if operand is None:
+                operands.append(-1)
+            else:
+                operand_index = index.get(operand)
+                operands.append(
+                    self.intern(operand) if operand_index is None else operand_index
+                )
+        self.lines.extend([line] * (len(opcodes) - len(self.lines)))
+
+    def extend(self, other: "Code") -> None:
+        """
+        Append the instructions of another Code.
+        """
+        remap = array("i", (self.intern(text) for text in other.operand_texts()))
+        self.opcodes += other.opcodes
+        self.operands.extend(
+            remap[operand] if operand >= 0 else -1 for operand in other.operands
+        )
+        self.lines += other.lines
+
+    def intern(self, text: str) -> int:
+        """
+        Return the index of an operand in constants, adding it if it is new.
+        """
+        index = self._index.get(text)
+        if index is None:
+            index = self._index[text] = len(self.constants)
+            kind, value = classify_operand(text)
+            self.constants.append(value)
+            self.kinds.append(kind)
+        return index
+
+    def truncate(self, length: int) -> None:
+        """
+        Drop the instructions after the first length ones. Interned operands
+        are kept.
+        """
+        del self.opcodes[length:]
+        del self.operands[length:]
+        del self.lines[length:]
+
+    def operand_texts(self) -> list[str]:
+        """
+        Return the text of every operand, by index.
+        """
+        return list(self._index)
+
+    def text(self) -> list[str]:
+        """
+        Render the code as lines of text pseudocode.
+        """
+        mnemonics = MNEMONICS
+        texts = self.operand_texts()
+        return [
+            f"{mnemonics[opcode]} {texts[operand]}"
+            if operand >= 0
+            else mnemonics[opcode]
+            for opcode, operand in zip(self.opcodes, self.operands, strict=True)
+        ]
+
+    @classmethod
+    def from_text(cls, texts: Iterable[str], line: int = -1) -> "Code":
+        """
+        Build the code of lines of text pseudocode.
+        """
+        code = cls()
+        code.line = line
+        code.extend_text(texts)
+        return code
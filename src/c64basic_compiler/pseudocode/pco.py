@@ -0,0 +1,329 @@
+"""
+Binary pseudocode object files (.pco).
+
+A .pco file holds the same program as a text .pseudocode file in a fraction
+of the space, and can be loaded without parsing any text:
+
+    header     b"PCO", format version (1 byte), number of instructions and
+               size of the code section in bytes (uint32 each, little endian)
+    code       per instruction, its opcode (1 byte, see INSTRUCTION_SET) and,
+               for opcodes that take an operand, a varint: 0 for no operand,
+               n for constant n - 1
+    constants  number of constants (varint), then each constant: its kind
+               (1 byte) and its value. Ints are zigzag varints, floats 8-byte
+               doubles, string literals and names varint-prefixed UTF-8
+
+Each distinct operand is stored once. Operands are typed when their text is
+exactly the text of a number or a string literal; anything else (variables,
+labels, comments) is kept as a name. Disassembling gives back the text the
+file was assembled from, line for line.
+
+Usage:
+    python -m c64basic_compiler.pseudocode.pco asm prog.pseudocode prog.pco
+    python -m c64basic_compiler.pseudocode.pco dis prog.pco [output]
+"""
+
+import argparse
+import io
+import struct
+import sys
+from array import array
+from collections.abc import Iterable
+from typing import BinaryIO
+
+from c64basic_compiler.pseudocode.instruction_set import OPCODES
+from c64basic_compiler.pseudocode.ir import (
+    CONST_FLOAT,
+    CONST_INT,
+    CONST_NAME,
+    CONST_STRING,
+    Code,
+    classify_operand,
+    format_operand,
+    parse_instruction,
+)
+
+__all__ = [
+    "CONST_FLOAT",
+    "CONST_INT",
+    "CONST_NAME",
+    "CONST_STRING",
+    "PcoWriter",
+    "assemble",
+    "disassemble",
+    "load",
+    "read_pco",
+    "write_pco",
+]
+
+MAGIC = b"PCO"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<3sBII")
+_DOUBLE = struct.Struct("<d")
+
+# Whether each opcode takes an operand
+_HAS_OPERAND = [False] * 256
+for _opcode, _instruction in OPCODES.items():
+    _HAS_OPERAND[_opcode] = _instruction.operand_count > 0
+
+
+def _append_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class PcoWriter:
+    """
+    Assembles pseudocode into a .pco file, one instruction at a time, so that
+    a streamed build never holds the whole program. The header is completed
+    by close().
+    """
+
+    # Bytes of code buffered before they are written out
+    BUFFER_SIZE = 1 << 16
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self.count = 0
+        self.code_size = 0
+        self._code = bytearray()
+        # Index of each distinct operand text, in order of appearance
+        self._constants: dict[str, int] = {}
+        self._start = file.tell()
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0))
+
+    def write(self, line: str) -> None:
+        """
+        Assemble a line of text pseudocode.
+
+        Raises:
+            ValueError: When the mnemonic is unknown, or has an operand it
+                does not take
+        """
+        opcode, operand = parse_instruction(line)
+        self._write(opcode, -1 if operand is None else self._intern(operand))
+
+    def write_code(self, code: Code) -> None:
+        """
+        Write the instructions of a Code.
+        """
+        remap = [self._intern(text) for text in code.operand_texts()]
+        for opcode, operand in zip(code.opcodes, code.operands, strict=True):
+            self._write(opcode, remap[operand] if operand >= 0 else -1)
+
+    def _intern(self, text: str) -> int:
+        if text[:1] == '"' and (len(text) < 2 or text[-1] != '"'):
+            # Close an open string literal, so that it reads back as the same
+            # constant as the closed one
+            text += '"'
+        index = self._constants.get(text)
+        if index is None:
+            index = self._constants[text] = len(self._constants)
+        return index
+
+    def _write(self, opcode: int, operand: int) -> None:
+        code = self._code
+        code.append(opcode)
+        if _HAS_OPERAND[opcode]:
+            _append_varint(code, operand + 1)
+        self.count += 1
+        if len(code) >= self.BUFFER_SIZE:
+            self._flush()
+
+    def close(self) -> None:
+        """
+        Write the constants and complete the header. The file is not closed.
+        """
+        self._flush()
+        pool = bytearray()
+        _append_varint(pool, len(self._constants))
+        for text in self._constants:
+            kind, value = classify_operand(text)
+            pool.append(kind)
+            # CONST_INT values are ints and CONST_FLOAT values floats
+            if isinstance(value, int):
+                _append_varint(pool, value * 2 if value >= 0 else -value * 2 - 1)
+            elif isinstance(value, float):
+                pool += _DOUBLE.pack(value)
+            else:
+                data = value.encode("utf-8")
+                _append_varint(pool, len(data))
+                pool += data
+        file = self.file
+        file.write(pool)
+        end = file.tell()
+        file.seek(self._start)
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, self.count, self.code_size))
+        file.seek(end)
+
+    def _flush(self) -> None:
+        self.file.write(self._code)
+        self.code_size += len(self._code)
+        self._code.clear()
+
+
+def write_pco(filename: str, code: Code | Iterable[str]) -> int:
+    """
+    Write a Code, or assemble text pseudocode, into a .pco file.
+
+    Returns:
+        The number of instructions written
+    """
+    with open(filename, "wb") as f:
+        return _write_all(PcoWriter(f), code)
+
+
+def assemble(code: Code | Iterable[str]) -> bytes:
+    """
+    Return the bytes of the .pco file of a Code or of text pseudocode.
+    """
+    buffer = io.BytesIO()
+    _write_all(PcoWriter(buffer), code)
+    return buffer.getvalue()
+
+
+def _write_all(writer: PcoWriter, code: Code | Iterable[str]) -> int:
+    if isinstance(code, Code):
+        writer.write_code(code)
+    else:
+        for line in code:
+            writer.write(line)
+    writer.close()
+    return writer.count
+
+
+def load(data: bytes) -> Code:
+    """
+    Load the Code of a program from the bytes of a .pco file. Source lines
+    are not stored in .pco files, so every instruction has line -1.
+
+    Raises:
+        ValueError: When the data is not a .pco file of a known version
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Not a .pco file: too short")
+    magic, version, count, code_size = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a .pco file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported .pco format version {version}")
+
+    try:
+        code = Code()
+        position = _load_code(data, count, code_size, code)
+        _load_constants(data, position, code)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Corrupt .pco file: {e}") from e
+    return code
+
+
+def _load_code(data: bytes, count: int, code_size: int, code: Code) -> int:
+    opcodes = array("H", bytes(count * 2))
+    operands = array("i", [0]) * count
+    has_operand = _HAS_OPERAND
+    position = _HEADER.size
+    end = position + code_size
+    index = 0
+    while position < end:
+        opcode = data[position]
+        position += 1
+        opcodes[index] = opcode
+        if has_operand[opcode]:
+            value = data[position]
+            position += 1
+            if value > 0x7F:
+                value, position = _read_varint(data, position - 1)
+            operands[index] = value - 1
+        else:
+            operands[index] = -1
+        index += 1
+    if index != count:
+        raise IndexError("instruction count mismatch")
+    code.opcodes = opcodes
+    code.operands = operands
+    code.lines = array("i", [-1]) * count
+    return position
+
+
+def _load_constants(data: bytes, position: int, code: Code) -> None:
+    size, position = _read_varint(data, position)
+    for index in range(size):
+        kind = data[position]
+        if kind == CONST_FLOAT:
+            value = _DOUBLE.unpack_from(data, position + 1)[0]
+            position += 1 + _DOUBLE.size
+        elif kind == CONST_INT:
+            value, position = _read_varint(data, position + 1)
+            value = value >> 1 if not value & 1 else -(value >> 1) - 1
+        else:
+            length, position = _read_varint(data, position + 1)
+            value = data[position : position + length].decode("utf-8")
+            position += length
+        if code.intern(format_operand(kind, value)) != index:
+            raise IndexError("duplicate constant")
+
+
+def read_pco(filename: str) -> Code:
+    """
+    Load a program from a .pco file (see load).
+    """
+    with open(filename, "rb") as f:
+        return load(f.read())
+
+
+def disassemble(code: Code) -> list[str]:
+    """
+    Return the text pseudocode of a program, one instruction per line.
+    """
+    return code.text()
+
+
+def _read_varint(data: bytes, position: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Assemble and disassemble binary pseudocode (.pco) files."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    asm = commands.add_parser("asm", help="Assemble a text .pseudocode file")
+    asm.add_argument("input", help="Text pseudocode file")
+    asm.add_argument("output", help=".pco file to write")
+    dis = commands.add_parser("dis", help="Disassemble a .pco file")
+    dis.add_argument("input", help=".pco file")
+    dis.add_argument("output", nargs="?", help="Text file (default: standard output)")
+    args = parser.parse_args()
+
+    if args.command == "asm":
+        with open(args.input) as f:
+            count = write_pco(args.output, (line.rstrip("\n") for line in f))
+        print(f"{count} instructions written to {args.output}")
+        return
+
+    try:
+        code = read_pco(args.input)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    text = "".join(line + "\n" for line in disassemble(code))
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.statement import Statement
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.pseudocode.codegen import (
+    extract_jump_targets,
+    generate_statements,
+)
+
+# Source lines tokenized and parsed at a time: enough to amortize the cost of
+# each scan, few enough to keep memory use flat
+CHUNK_LINES = 256
+
+# Only statements with these words have jump targets (GOTO, GOSUB, GO TO and
+# IF ... THEN line)
+_JUMP_WORDS = ("GO", "THEN")
+
+
+def read_lines(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Yield the non-blank lines of a source, such as an open file, without their
+    line endings.
+    """
+    for text in lines:
+        text = text.rstrip("\r\n")
+        if text.strip():
+            yield text
+
+
+def scan_jump_targets(lines: Iterable[str], chunk_lines: int = CHUNK_LINES) -> set[int]:
+    """
+    Find the jump targets of a program, keeping only the targets in memory.
+
+    Only the lines that may jump are parsed, in chunks, so this is much
+    lighter than a full parse while giving the same targets as
+    extract_jump_targets over the whole program.
+    """
+    candidates = (
+        text for text in lines if any(word in text.upper() for word in _JUMP_WORDS)
+    )
+    targets: set[int] = set()
+    for statements in parse_lines(candidates, chunk_lines):
+        targets |= extract_jump_targets(statements)
+    return targets
+
+
+def parse_lines(
+    lines: Iterable[str], chunk_lines: int = CHUNK_LINES
+) -> Iterator[list[Statement]]:
+    """
+    Parse source lines a chunk at a time, yielding the statements of each
+    chunk.
+    """
+    lines = iter(lines)
+    while chunk := list(islice(lines, chunk_lines)):
+        yield parse(scan("\n".join(chunk)))
+
+
+def generate_stream(
+    chunks: Iterable[list[Statement]],
+    ctx: CompileContext,
+    jump_targets: set[int],
+) -> Iterator[str]:
+    """
+    Generate pseudocode chunk by chunk, yielding each instruction as soon as
+    the chunk it belongs to is translated.
+
+    Args:
+        chunks: Statements of the program, in order (see parse_lines)
+        ctx: Compilation context
+        jump_targets: Jump targets of the whole program (see scan_jump_targets)
+    """
+    for statements in chunks:
+        yield from generate_statements(statements, ctx, jump_targets)[0]
@@ -0,0 +1,377 @@
+"""
+Compile server.
+
+A long-running process that compiles BASIC source sent over HTTP, on a TCP
+port or a Unix socket, so that clients do not pay for interpreter startup
+and keep the expression and line caches warm between requests:
+
+    python -m c64basic_compiler.server --port 6464 [--jobs N]
+    curl --data-binary @prog.bas http://127.0.0.1:6464/compile
+
+Endpoints:
+    POST /compile   Body: BASIC source (or JSON {"source": ...}). Returns JSON
+                    with the pseudocode and the .prg file (base64), the
+                    pseudocode as text with ?format=text, or the .prg file
+                    with ?format=prg
+    GET /stats      Request latency and cache statistics
+"""
+
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import socketserver
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from c64basic_compiler.build import compile_source
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.common.expression_cache import ExpressionCache
+from c64basic_compiler.common.line_cache import LineCache
+from c64basic_compiler.compiler.codegen import BASIC_START, generate_binary
+from c64basic_compiler.exceptions import BackendError
+from c64basic_compiler.utils.logging import configure_logger, logger
+
+DEFAULT_PORT = 6464
+
+# Entries of the in-memory line cache before it is started afresh
+LINE_CACHE_LIMIT = 100_000
+
+# Number of recent requests the latency statistics are computed on
+LATENCY_WINDOW = 1000
+
+
+class Compiler:
+    """
+    Compiles programs with caches that persist from one program to the next.
+
+    Not thread safe: the server serializes calls or gives each worker process
+    a compiler of its own.
+    """
+
+    def __init__(self) -> None:
+        self.expression_cache = ExpressionCache()
+        self.line_cache = LineCache()
+
+    def compile(self, source: str) -> dict[str, Any]:
+        """
+        Compile a program. The result holds the pseudocode, the contents of
+        its .prg file in base64 (None, with the reason in "prg_error", when
+        the backend cannot compile it), line counts and the cache lookups
+        done for this program.
+        """
+        expressions = self.expression_cache
+        lines = self.line_cache
+        before = (expressions.hits, expressions.misses, lines.hits, lines.misses)
+
+        pseudo_code, reused = compile_source(source, CompileContext(expressions), lines)
+
+        prg: str | None = None
+        prg_error: str | None = None
+        try:
+            binary = BASIC_START.to_bytes(2, "little") + generate_binary(pseudo_code)
+        except BackendError as e:
+            prg_error = str(e)
+        else:
+            prg = base64.b64encode(binary).decode("ascii")
+
+        result = {
+            "pseudocode": pseudo_code,
+            "prg": prg,
+            "prg_error": prg_error,
+            "lines": sum(1 for text in source.split("\n") if text.strip()),
+            "reused_lines": reused,
+            "expression_cache": {
+                "hits": expressions.hits - before[0],
+                "misses": expressions.misses - before[1],
+            },
+            "line_cache": {
+                "hits": lines.hits - before[2],
+                "misses": lines.misses - before[3],
+            },
+        }
+        if lines.stats()["code"] > LINE_CACHE_LIMIT:
+            self.line_cache = LineCache()
+        return result
+
+
+# Compiler of a worker process, set up by _init_worker
+_worker_compiler: Compiler | None = None
+
+
+def _init_worker(log_level: str) -> None:
+    global _worker_compiler
+    configure_logger(level=log_level)
+    _worker_compiler = Compiler()
+
+
+def _compile_in_worker(source: str) -> dict[str, Any]:
+    if _worker_compiler is None:
+        raise RuntimeError("Worker process started without _init_worker")
+    return _worker_compiler.compile(source)
+
+
+class CompileServer:
+    """
+    Serves compilations, keeping request statistics.
+
+    With jobs == 1 programs are compiled one at a time in the calling thread;
+    with more, in a pool of worker processes, each with its own warm caches.
+    """
+
+    def __init__(self, jobs: int = 1, log_level: str = "INFO"):
+        self.jobs = jobs
+        self._compiler = Compiler() if jobs == 1 else None
+        self._executor = None
+        if jobs > 1:
+            # Spawned, not forked: workers start while request threads run
+            self._executor = ProcessPoolExecutor(
+                max_workers=jobs,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(log_level,),
+            )
+        self._compile_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._totals = {
+            "requests": 0,
+            "errors": 0,
+            "lines": 0,
+            "reused_lines": 0,
+            "expression_hits": 0,
+            "expression_misses": 0,
+            "line_hits": 0,
+            "line_misses": 0,
+        }
+
+    def compile(self, source: str) -> dict[str, Any]:
+        """
+        Compile a program, see Compiler.compile. The result also holds the
+        time spent on the request, in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            if self._executor is not None:
+                result = self._executor.submit(_compile_in_worker, source).result()
+            elif self._compiler is not None:
+                with self._compile_lock:
+                    result = self._compiler.compile(source)
+            else:
+                raise RuntimeError("No compiler and no worker processes")
+        except Exception:
+            with self._stats_lock:
+                self._totals["requests"] += 1
+                self._totals["errors"] += 1
+            raise
+
+        result["time"] = time.perf_counter() - start
+        with self._stats_lock:
+            totals = self._totals
+            totals["requests"] += 1
+            totals["lines"] += result["lines"]
+            totals["reused_lines"] += result["reused_lines"]
+            totals["expression_hits"] += result["expression_cache"]["hits"]
+            totals["expression_misses"] += result["expression_cache"]["misses"]
+            totals["line_hits"] += result["line_cache"]["hits"]
+            totals["line_misses"] += result["line_cache"]["misses"]
+            self._latencies.append(result["time"])
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Request counts, latency of the recent requests (in milliseconds) and
+        cache lookups since the server started.
+        """
+        with self._stats_lock:
+            totals = dict(self._totals)
+            latencies = sorted(self._latencies)
+
+        latency: dict[str, float] = {"count": len(latencies)}
+        if latencies:
+            latency.update(
+                mean=statistics.fmean(latencies) * 1e3,
+                p50=latencies[len(latencies) // 2] * 1e3,
+                p95=latencies[int(len(latencies) * 0.95)] * 1e3,
+                max=latencies[-1] * 1e3,
+            )
+        return {
+            "jobs": self.jobs,
+            "requests": totals["requests"],
+            "errors": totals["errors"],
+            "latency_ms": latency,
+            "lines": totals["lines"],
+            "reused_lines": totals["reused_lines"],
+            "expression_cache": {
+                "hits": totals["expression_hits"],
+                "misses": totals["expression_misses"],
+            },
+            "line_cache": {
+                "hits": totals["line_hits"],
+                "misses": totals["line_misses"],
+            },
+        }
+
+    def close(self) -> None:
+        """
+        Stop the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+class CompileRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a CompileServer (self.server.compile_server)."""
+
+    server: "CompileHTTPServer | ThreadingUnixHTTPServer"
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path == "/stats":
+            self._send_json(200, self.server.compile_server.stats())
+        else:
+            self._send_json(404, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/compile":
+            self._send_json(404, {"error": f"Not found: {self.path}"})
+            return
+
+        try:
+            source = self._read_source()
+            result = self.server.compile_server.compile(source)
+        except ValueError as e:  # Undecodable body or source without line numbers
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.error(f"Error compiling request: {e}")
+            self._send_json(500, {"error": str(e)})
+            return
+
+        output_format = parse_qs(url.query).get("format")
+        if output_format == ["text"]:
+            text = "".join(line + "\n" for line in result["pseudocode"])
+            self._send(200, "text/plain; charset=utf-8", text.encode())
+        elif output_format == ["prg"]:
+            if result["prg"] is None:
+                self._send_json(422, {"error": result["prg_error"]})
+            else:
+                prg = base64.b64decode(result["prg"])
+                self._send(200, "application/octet-stream", prg)
+        else:
+            self._send_json(200, result)
+
+    def _read_source(self) -> str:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8")
+        if self.headers.get_content_type() == "application/json":
+            source = json.loads(body).get("source")
+            if not isinstance(source, str):
+                raise ValueError('JSON body must have a "source" string')
+            return source
+        return body
+
+    def _send_json(self, status: int, data: dict[str, Any]) -> None:
+        self._send(status, "application/json", json.dumps(data).encode())
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Unix socket clients have no address
+        return str(self.client_address[0]) if self.client_address else "local"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("{} - {}", self.address_string(), format % args)
+
+
+class CompileHTTPServer(ThreadingHTTPServer):
+    """HTTP server on a TCP port, one thread per request."""
+
+    compile_server: CompileServer
+
+
+class ThreadingUnixHTTPServer(
+    socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    """HTTP server on a Unix socket, one thread per request."""
+
+    daemon_threads = True
+    compile_server: CompileServer
+
+
+def make_server(
+    compile_server: CompileServer,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    socket_path: str | None = None,
+) -> CompileHTTPServer | ThreadingUnixHTTPServer:
+    """
+    Create the HTTP server for a CompileServer, on a Unix socket if a path is
+    given and on a TCP port otherwise.
+    """
+    server: CompileHTTPServer | ThreadingUnixHTTPServer
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, CompileRequestHandler)
+    else:
+        server = CompileHTTPServer((host, port), CompileRequestHandler)
+    server.compile_server = compile_server
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="C64 BASIC compile server.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help="TCP port to listen on"
+    )
+    parser.add_argument("--socket", help="Listen on this Unix socket instead")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes (default: 1, compile in the server)",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Log every request"
+    )
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    log_level = "DEBUG" if args.verbose else "INFO"
+    configure_logger(level=log_level)
+
+    compile_server = CompileServer(jobs=args.jobs, log_level=log_level)
+    server = make_server(compile_server, args.host, args.port, args.socket)
+    location = args.socket
+    if isinstance(server, CompileHTTPServer):
+        location = f"http://{args.host}:{server.server_port}"
+    logger.info("Compile server listening on {}", location)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        compile_server.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
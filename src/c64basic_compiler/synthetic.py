@@ -0,0 +1,371 @@
+"""
+Synthetic BASIC programs for scaling tests.
+
+Generates valid C64 BASIC programs of any size from a seed, with a realistic
+mix of the statements the compiler supports (LET, PRINT, IF/THEN, FOR/NEXT,
+GOTO, GOSUB, POKE, INPUT and GET). The same seed and options always give the
+same program.
+
+The program is a main body, an END and a block of subroutines. The main body
+is generated a block of lines at a time, so that programs of millions of
+lines can be written without holding them in memory: FOR loops open and
+close within a block, GOTO and IF ... THEN jump forward to lines outside any
+loop (later in the block, or the first line of the next block) and GOSUB
+calls one of the subroutines, which all end with RETURN. Line numbers go up
+by 10, or by less when that is needed to stay within the C64 limit of 63999;
+programs of more lines than that go past it, which the compiler accepts.
+
+Usage:
+    python -m c64basic_compiler.synthetic -n 10000 --seed 1 -o big.bas
+"""
+
+import argparse
+import random
+import sys
+from collections.abc import Callable, Iterator
+
+# Highest line number of C64 BASIC
+MAX_LINE_NUMBER = 63999
+
+# Lines of the main body generated at a time
+BLOCK_LINES = 64
+
+# Lines of each subroutine, RETURN included, and main body lines per
+# subroutine
+SUBROUTINE_LINES = 4
+LINES_PER_SUBROUTINE = 50
+
+# Shortest program: one line of main body, END and one subroutine
+MIN_LINES = 2 + SUBROUTINE_LINES
+
+LOOP_VARIABLES = ("I", "J", "K", "L", "M", "N")
+VARIABLES = ("A", "B", "C", "D", "X", "Y", "Z", "S", "T", "X1", "Y1", "P2")
+STRING_VARIABLES = ("A$", "B$", "N$", "K$")
+WORDS = ("HELLO", "SCORE", "LEVEL", "READY", "GAME OVER", "PRESS A KEY")
+FUNCTIONS = ("ABS", "INT", "SGN", "SQR", "RND", "PEEK")
+OPERATORS = ("+", "-", "*", "/")
+COMPARISONS = ("=", "<>", "<", ">", "<=", ">=")
+# Screen and color memory, border, background and text color
+POKE_ADDRESSES = ("1024", "55296", "53280", "53281", "646")
+
+# Relative weights of the statements that do not jump, each made by the
+# method of the same name
+STATEMENT_WEIGHTS = {
+    "let": 35,
+    "print": 25,
+    "if": 10,
+    "poke": 10,
+    "string": 8,
+    "rem": 5,
+    "input": 3,
+    "get": 4,
+}
+
+# Chance of opening a FOR loop, and of closing the innermost one, at a line
+FOR_CHANCE = 0.08
+NEXT_CHANCE = 0.15
+
+
+class ProgramGenerator:
+    """
+    Generates a synthetic program line by line.
+
+    Args:
+        lines: Number of lines of the program (at least MIN_LINES)
+        seed: Seed of the random generator
+        expression_depth: Deepest nesting of operators and function calls in
+            an expression
+        loop_nesting: Deepest nesting of FOR loops
+        jump_density: Fraction of the main body lines that are GOTO, GOSUB
+            or IF ... THEN line
+    """
+
+    def __init__(
+        self,
+        lines: int,
+        seed: int = 0,
+        expression_depth: int = 3,
+        loop_nesting: int = 2,
+        jump_density: float = 0.1,
+    ):
+        if lines < MIN_LINES:
+            raise ValueError(f"Programs have at least {MIN_LINES} lines")
+        if not 0 <= loop_nesting <= len(LOOP_VARIABLES):
+            raise ValueError(f"Loop nesting must be 0 to {len(LOOP_VARIABLES)}")
+        if not 0 <= jump_density <= 1:
+            raise ValueError("Jump density must be between 0 and 1")
+        self.lines = lines
+        self.expression_depth = max(0, expression_depth)
+        self.loop_nesting = loop_nesting
+        self.jump_density = jump_density
+        self.random = random.Random(seed)
+
+        self.step = max(1, min(10, MAX_LINE_NUMBER // lines))
+        self.subroutines = max(1, lines // LINES_PER_SUBROUTINE)
+        self.subroutines = min(self.subroutines, (lines - 2) // SUBROUTINE_LINES)
+        self.body_lines = lines - 1 - self.subroutines * SUBROUTINE_LINES
+
+        self._makers: list[Callable[[int], str]] = [
+            getattr(self, f"_{kind}") for kind in STATEMENT_WEIGHTS
+        ]
+        self._weights = list(STATEMENT_WEIGHTS.values())
+
+    def line_number(self, index: int) -> int:
+        """
+        Return the line number of the line at an index (from 0).
+        """
+        return (index + 1) * self.step
+
+    def generate(self) -> Iterator[str]:
+        """
+        Yield the lines of the program, numbered, without line endings.
+        """
+        for start in range(0, self.body_lines, BLOCK_LINES):
+            stop = min(start + BLOCK_LINES, self.body_lines)
+            yield from self._block(start, stop)
+
+        yield f"{self.line_number(self.body_lines)} END"
+
+        index = self.body_lines + 1
+        for _ in range(self.subroutines):
+            for _ in range(SUBROUTINE_LINES - 1):
+                yield f"{self.line_number(index)} {self._statement(0)}"
+                index += 1
+            yield f"{self.line_number(index)} RETURN"
+            index += 1
+
+    def _block(self, start: int, stop: int) -> Iterator[str]:
+        """
+        Yield the lines of the main body from start to stop (excluded).
+        """
+        rand = self.random
+        # Loop depth before each line, and whether it opens (1) or closes
+        # (-1) a loop
+        depths = []
+        changes = []
+        depth = 0
+        for index in range(start, stop):
+            left = stop - index
+            change = 0
+            if depth and (left <= depth or rand.random() < NEXT_CHANCE):
+                change = -1
+            elif (
+                depth < self.loop_nesting
+                and left > depth + 2
+                and rand.random() < FOR_CHANCE
+            ):
+                change = 1
+            depths.append(depth)
+            changes.append(change)
+            depth += change
+
+        # Lines a jump may land on: those outside any loop, and the line after
+        # the block
+        targets = [start + i for i, d in enumerate(depths) if d == 0] + [stop]
+
+        for offset, (depth, change) in enumerate(zip(depths, changes, strict=True)):
+            index = start + offset
+            if change == 1:
+                variable = LOOP_VARIABLES[depth]
+                statement = (
+                    f"FOR {variable} = {rand.randint(0, 9)} TO {rand.randint(10, 99)}"
+                )
+                if rand.random() < 0.3:
+                    statement += f" STEP {rand.randint(1, 5)}"
+            elif change == -1:
+                statement = f"NEXT {LOOP_VARIABLES[depth - 1]}"
+            elif rand.random() < self.jump_density:
+                later = [target for target in targets if target > index]
+                statement = self._jump(self.line_number(rand.choice(later)))
+            else:
+                statement = self._statement(depth)
+            yield f"{self.line_number(index)} {statement}"
+
+    def _jump(self, target: int) -> str:
+        rand = self.random
+        kind = rand.randrange(3)
+        if kind == 0:
+            return f"GOTO {target}"
+        if kind == 1:
+            return f"IF {self._condition()} THEN {target}"
+        subroutine = rand.randrange(self.subroutines)
+        start = self.body_lines + 1 + subroutine * SUBROUTINE_LINES
+        return f"GOSUB {self.line_number(start)}"
+
+    def _statement(self, loops: int) -> str:
+        """
+        Return a statement that does not jump, inside loops FOR loops, whose
+        variables may be read but not assigned.
+        """
+        make = self.random.choices(self._makers, self._weights)[0]
+        return make(loops)
+
+    def _let(self, loops: int) -> str:
+        return f"{self.random.choice(VARIABLES)} = {self._expression(loops)}"
+
+    def _if(self, loops: int) -> str:
+        rand = self.random
+        if rand.random() < 0.5:
+            then = self._print(loops)
+        else:
+            then = f"LET {rand.choice(VARIABLES)} = {self._expression(loops)}"
+        return f"IF {self._condition(loops)} THEN {then}"
+
+    def _poke(self, loops: int) -> str:
+        rand = self.random
+        if loops and rand.random() < 0.5:
+            # Walk screen or color memory with a loop variable
+            address = f"{rand.choice(POKE_ADDRESSES[:2])} + {LOOP_VARIABLES[loops - 1]}"
+        else:
+            address = rand.choice(POKE_ADDRESSES)
+        return f"POKE {address}, {rand.randint(0, 255)}"
+
+    def _string(self, loops: int) -> str:
+        rand = self.random
+        choice = rand.random()
+        if choice < 0.4:
+            value = f'"{rand.choice(WORDS)}"'
+        elif choice < 0.6:
+            value = f"CHR$({rand.randint(65, 90)})"
+        elif choice < 0.8:
+            value = f"STR$({self._expression(loops, 1)})"
+        else:
+            value = f'{rand.choice(STRING_VARIABLES)} + "{rand.choice(WORDS)}"'
+        return f"{rand.choice(STRING_VARIABLES)} = {value}"
+
+    def _rem(self, loops: int) -> str:
+        return f"REM {self.random.choice(WORDS)}"
+
+    def _input(self, loops: int) -> str:
+        rand = self.random
+        if rand.random() < 0.5:
+            return f'INPUT "{rand.choice(WORDS)}"; {rand.choice(VARIABLES)}'
+        return f"INPUT {rand.choice(STRING_VARIABLES)}"
+
+    def _get(self, loops: int) -> str:
+        return f"GET {self.random.choice(STRING_VARIABLES)}"
+
+    def _expression(self, loops: int = 0, depth: int | None = None) -> str:
+        """
+        Return a numeric expression nested at most depth levels deep (at most
+        expression_depth when not given), in which the variables of loops FOR
+        loops may appear.
+        """
+        rand = self.random
+        if depth is None:
+            depth = rand.randint(0, self.expression_depth)
+        if depth == 0:
+            return self._operand(loops)
+
+        choice = rand.random()
+        if choice < 0.2:
+            function = rand.choice(FUNCTIONS)
+            if function == "PEEK":
+                return f"PEEK({rand.choice(POKE_ADDRESSES)})"
+            return f"{function}({self._expression(loops, depth - 1)})"
+        if choice < 0.25:
+            return f"-({self._expression(loops, depth - 1)})"
+        if choice < 0.3:
+            return f"LEN({rand.choice(STRING_VARIABLES)})"
+        left = self._expression(loops, depth - 1)
+        right = self._expression(loops, rand.randint(0, depth - 1))
+        expression = f"{left} {rand.choice(OPERATORS)} {right}"
+        if choice < 0.5:
+            return f"({expression})"
+        return expression
+
+    def _operand(self, loops: int) -> str:
+        rand = self.random
+        choice = rand.random()
+        if choice < 0.4:
+            return str(rand.randint(0, 999))
+        if choice < 0.5:
+            return f"{rand.randint(0, 99)}.{rand.randint(1, 9)}"
+        if loops and choice < 0.7:
+            return rand.choice(LOOP_VARIABLES[:loops])
+        return rand.choice(VARIABLES)
+
+    def _condition(self, loops: int = 0) -> str:
+        rand = self.random
+        condition = (
+            f"{self._expression(loops, 0)} {rand.choice(COMPARISONS)} "
+            f"{self._expression(loops)}"
+        )
+        if rand.random() < 0.2:
+            variable = rand.choice(STRING_VARIABLES)
+            condition += f' {rand.choice(("AND", "OR"))} {variable} = ""'
+        return condition
+
+    def _print(self, loops: int) -> str:
+        rand = self.random
+        items = []
+        for _ in range(rand.randint(1, 3)):
+            choice = rand.random()
+            if choice < 0.4:
+                items.append(f'"{rand.choice(WORDS)}"')
+            elif choice < 0.6:
+                items.append(rand.choice(STRING_VARIABLES))
+            else:
+                items.append(self._expression(loops))
+        text = "PRINT " + rand.choice(("; ", ", ")).join(items)
+        if rand.random() < 0.2:
+            text += ";"
+        return text
+
+
+def generate_program(
+    lines: int,
+    seed: int = 0,
+    expression_depth: int = 3,
+    loop_nesting: int = 2,
+    jump_density: float = 0.1,
+) -> Iterator[str]:
+    """
+    Yield the lines of a synthetic program (see ProgramGenerator).
+    """
+    return ProgramGenerator(
+        lines, seed, expression_depth, loop_nesting, jump_density
+    ).generate()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic C64 BASIC program for scaling tests."
+    )
+    parser.add_argument(
+        "-n", "--lines", type=int, default=1000, help="Number of program lines"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--depth", type=int, default=3, help="Maximum expression depth")
+    parser.add_argument(
+        "--nesting", type=int, default=2, help="Maximum FOR loop nesting"
+    )
+    parser.add_argument(
+        "--jumps",
+        type=float,
+        default=0.1,
+        help="Fraction of lines that are GOTO, GOSUB or IF ... THEN line",
+    )
+    parser.add_argument(
+        "-o", "--output", help="BASIC file to write (default: standard output)"
+    )
+    args = parser.parse_args()
+
+    try:
+        program = generate_program(
+            args.lines, args.seed, args.depth, args.nesting, args.jumps
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.writelines(line + "\n" for line in program)
+        print(f"{args.lines} lines written to {args.output}")
+    else:
+        sys.stdout.writelines(line + "\n" for line in program)
+
+
+if __name__ == "__main__":
+    main()
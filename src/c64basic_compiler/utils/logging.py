@@ -5,6 +5,8 @@ from loguru import logger
 LOGGER_FORMAT = "<green>{name}</green>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
 LOGGER_LEVEL = "INFO"
 
+__all__ = ["LOGGER_FORMAT", "LOGGER_LEVEL", "configure_logger", "logger"]
+
 logger.remove()
 
 
@@ -0,0 +1,103 @@
+"""
+Build profiles.
+
+ProfileSink is a trace sink (see tracing) that adds up the events of a build:
+the time, and memory when tracemalloc is tracing, of each stage (read, scan,
+parse, codegen, write...), the time spent in each handler class and the time
+spent on each source line. report() formats them as text, with the most
+expensive lines first:
+
+    sink = ProfileSink()
+    tracing.add_sink(sink)
+    compile_file("prog.bas", "prog.prg")
+    tracing.remove_sink(sink)
+    print(sink.report(top=10))
+"""
+
+from typing import Any
+
+# Events that are not the span of a stage
+_NOT_STAGES = ("handler", "report")
+
+
+class ProfileSink:
+    """Add up trace events into the profile of a build."""
+
+    def __init__(self) -> None:
+        # Stage -> duration (s), allocated and peak memory (bytes), in order of
+        # first appearance
+        self.stages: dict[str, dict[str, float]] = {}
+        # Handler class -> [statements, duration (s)]
+        self.handlers: dict[str, list[float]] = {}
+        # Source line -> [duration (s), commands]
+        self.lines: dict[int, list[Any]] = {}
+
+    def __call__(self, event: dict[str, Any]) -> None:
+        stage = event["stage"]
+        if stage == "handler":
+            duration = event["duration"]
+            name = event["handler"] or f"(no handler: {event['command']})"
+            handler = self.handlers.setdefault(name, [0, 0.0])
+            handler[0] += 1
+            handler[1] += duration
+            line = self.lines.setdefault(event["line"], [0.0, []])
+            line[0] += duration
+            line[1].append(event["command"])
+        elif stage not in _NOT_STAGES and "duration" in event:
+            totals = self.stages.setdefault(stage, {"duration": 0.0})
+            totals["duration"] += event["duration"]
+            if "allocated" in event:
+                totals["allocated"] = totals.get("allocated", 0) + event["allocated"]
+                totals["peak"] = max(totals.get("peak", 0), event["peak"])
+
+    def top_lines(self, top: int) -> list[tuple[int, float, list[str]]]:
+        """
+        Return the line number, time and commands of the top most expensive
+        source lines.
+        """
+        ranked = sorted(self.lines.items(), key=lambda item: item[1][0], reverse=True)
+        return [
+            (line, duration, commands) for line, (duration, commands) in ranked[:top]
+        ]
+
+    def report(self, top: int = 10, source: dict[int, str] | None = None) -> str:
+        """
+        Format the profile as text.
+
+        Args:
+            top: Number of source lines listed
+            source: Text of each source line, by line number, shown next to
+                the lines listed
+        """
+        total = sum(totals["duration"] for totals in self.stages.values())
+        out = ["Stages:"]
+        for stage, totals in self.stages.items():
+            text = f"  {stage:<12}{totals['duration'] * 1e3:10.1f} ms"
+            text += f"{_percent(totals['duration'], total):>7}"
+            if "allocated" in totals:
+                text += f"{totals['allocated'] / 1024:12.0f} KiB allocated"
+                text += f"{totals['peak'] / 1024:10.0f} KiB peak"
+            out.append(text)
+
+        handler_total = sum(duration for _, duration in self.handlers.values())
+        out.append("Handlers:")
+        by_time = sorted(
+            self.handlers.items(), key=lambda item: item[1][1], reverse=True
+        )
+        for name, (count, duration) in by_time:
+            out.append(
+                f"  {name:<28}{count:8d} statements{duration * 1e3:10.1f} ms"
+                f"{_percent(duration, handler_total):>7}"
+            )
+
+        out.append(f"Top {top} lines:")
+        for line, duration, commands in self.top_lines(top):
+            text = source.get(line, "") if source else " : ".join(commands)
+            if len(text) > 60:
+                text = text[:57] + "..."
+            out.append(f"  {line:>8}{duration * 1e3:10.3f} ms  {text}")
+        return "\n".join(out)
+
+
+def _percent(part: float, total: float) -> str:
+    return f"{part / total:.1%}" if total else "-"
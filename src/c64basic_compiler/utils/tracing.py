@@ -0,0 +1,131 @@
+"""
+Compile-time tracing.
+
+Tracing is off by default. Instrumented code checks the module-level
+``enabled`` flag before building any event, so a build without tracing only
+pays for one attribute lookup per instrumented point:
+
+    from c64basic_compiler.utils import tracing
+
+    if tracing.enabled:
+        tracing.emit("handler", line=10, handler="PrintHandler", duration=0.001)
+
+Events are dictionaries with at least a "stage" key and are handed to every
+registered sink. JsonLinesSink writes them to a file, one JSON object per
+line.
+"""
+
+import json
+import sys
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+Sink = Callable[[dict[str, Any]], None]
+
+enabled = False
+_sinks: list[Sink] = []
+
+
+class JsonLinesSink:
+    """Write trace events to a JSON-lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+
+    def __call__(self, event: dict[str, Any]) -> None:
+        self._file.write(json.dumps(event, default=str))
+        self._file.write("\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def add_sink(sink: Sink) -> None:
+    """
+    Register a sink and turn tracing on.
+    """
+    global enabled
+    _sinks.append(sink)
+    enabled = True
+
+
+def remove_sink(sink: Sink) -> None:
+    """
+    Unregister a sink (closing it if it can be closed). Tracing is turned off
+    when no sinks are left.
+    """
+    global enabled
+    _sinks.remove(sink)
+    close = getattr(sink, "close", None)
+    if close is not None:
+        close()
+    enabled = bool(_sinks)
+
+
+def disable() -> None:
+    """
+    Unregister and close every sink.
+    """
+    for sink in list(_sinks):
+        remove_sink(sink)
+
+
+def reset() -> None:
+    """
+    Unregister every sink without closing it, e.g. in a forked worker process
+    whose inherited sinks belong to the parent process.
+    """
+    global enabled
+    _sinks.clear()
+    enabled = False
+
+
+def emit(stage: str, **fields: Any) -> None:
+    """
+    Send an event to every sink. Does nothing while tracing is disabled.
+
+    Args:
+        stage: Compilation stage or step the event belongs to
+        **fields: Event data, e.g. line, handler or duration (seconds)
+    """
+    if not enabled:
+        return
+    event = {"stage": stage, **fields}
+    for sink in _sinks:
+        sink(event)
+
+
+@contextmanager
+def span(stage: str, **fields: Any) -> Iterator[dict[str, Any]]:
+    """
+    Time a block and emit one event for it, with its duration in seconds.
+    While tracemalloc is tracing, the event also has the memory allocated by
+    the block and not freed ("allocated") and the peak memory use during the
+    block ("peak"), in bytes above the memory in use when it started.
+
+    The yielded dictionary is the event data, so the block can add fields.
+    While tracing is disabled the block runs untimed.
+    """
+    if not enabled:
+        yield fields
+        return
+    # Not imported here, as it is slow to import: whoever started it has
+    tracemalloc = sys.modules.get("tracemalloc")
+    if tracemalloc is not None and not tracemalloc.is_tracing():
+        tracemalloc = None
+    if tracemalloc is not None:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        duration = time.perf_counter() - start
+        if tracemalloc is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            fields["allocated"] = current - before
+            fields["peak"] = peak - before
+        emit(stage, **fields, duration=duration)
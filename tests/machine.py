@@ -0,0 +1,274 @@
+"""
+A C64 to run compiled programs in tests: the 6502 of py65, with the BASIC ROM
+and KERNAL routines used by compiled programs done in Python.
+
+The routines keep FAC and ARG in memory in the layout of the ROM, so code
+that reads FAC (its exponent, or the integer left by AYINT) sees what it
+would see on a C64. Numbers are computed with Python floats, rounded to the
+40 bits of BASIC each time they are stored.
+"""
+
+import math
+
+from py65.devices.mpu6502 import MPU
+
+from c64basic_compiler.common import basic_rom_routines as rom
+from c64basic_compiler.common import kernal_routines as kernal
+from c64basic_compiler.common.c64_float import from_mflpt, to_mflpt
+
+FAC = 0x61
+ARG = 0x69
+FOUT_BUFFER = 0x0100
+# Return address of the program: the machine stops when it gets there
+EXIT = 0xFFF0
+
+
+class BasicError(Exception):
+    """A BASIC error raised by a program"""
+
+    def __init__(self, number: int):
+        super().__init__(f"BASIC error {number}")
+        self.number = number
+
+
+def format_number(value: float) -> str:
+    """
+    Text of a number as PRINT and STR$ write it: a space or a minus sign, then
+    up to 9 significant digits.
+    """
+    sign = "-" if value < 0 else " "
+    value = abs(value)
+    if value == 0:
+        return " 0"
+    if 0.01 <= value < 1e9:
+        text = f"{value:.9g}" if value >= 1 else f"{value:.9f}".rstrip("0")
+        if "e" in text:
+            text = f"{value:.0f}"
+        if "." in text:
+            text = text.rstrip("0").rstrip(".")
+        if text.startswith("0."):
+            text = text[1:]
+        return sign + text
+    mantissa, exponent = f"{value:.8e}".split("e")
+    mantissa = mantissa.rstrip("0").rstrip(".")
+    return f"{sign}{mantissa}E{int(exponent):+03d}"
+
+
+class Machine:
+    """
+    Runs the machine code of a .prg file, collecting what it prints.
+
+    Args:
+        binary: Contents of the .prg file, after the load address
+        keys: Text typed on the keyboard, read by INPUT and GET
+    """
+
+    def __init__(self, binary: bytes, keys: str = ""):
+        self.mpu = MPU()
+        self.memory = self.mpu.memory
+        self.memory[0x0801 : 0x0801 + len(binary)] = binary
+        self.keys = list(keys)
+        self.output: list[str] = []
+        self.column = 0
+        self.traps = {
+            rom.MOVFM: self.movfm,
+            rom.MOVMF: self.movmf,
+            rom.CONUPK: self.conupk,
+            rom.FADD: lambda: self.operate(lambda a, b: a + b),
+            rom.FSUB: lambda: self.operate(lambda a, b: a - b),
+            rom.FMULT: lambda: self.operate(lambda a, b: a * b),
+            rom.FDIV: lambda: self.operate(lambda a, b: a / b),
+            rom.FPWRT: lambda: self.set_fac(self.get(ARG) ** self.get(FAC)),
+            rom.NEGOP: lambda: self.set_fac(-self.get(FAC)),
+            rom.FCOMP: self.fcomp,
+            rom.SIGN: lambda: self.set_a(self.sign(self.get(FAC))),
+            rom.SGN: lambda: self.set_fac(self.sign_value(self.get(FAC))),
+            rom.ABS: lambda: self.set_fac(abs(self.get(FAC))),
+            rom.INT: lambda: self.set_fac(math.floor(self.get(FAC))),
+            rom.SQR: lambda: self.set_fac(math.sqrt(self.get(FAC))),
+            rom.LOG: lambda: self.set_fac(math.log(self.get(FAC))),
+            rom.EXP: lambda: self.set_fac(math.exp(self.get(FAC))),
+            rom.SIN: lambda: self.set_fac(math.sin(self.get(FAC))),
+            rom.COS: lambda: self.set_fac(math.cos(self.get(FAC))),
+            rom.TAN: lambda: self.set_fac(math.tan(self.get(FAC))),
+            rom.ATN: lambda: self.set_fac(math.atan(self.get(FAC))),
+            rom.RND: lambda: self.set_fac(0.5),
+            rom.FOUT: self.fout,
+            rom.FIN: self.fin,
+            rom.GIVAYF: self.givayf,
+            rom.AYINT: self.ayint,
+            rom.GETADR: self.getadr,
+            rom.ERROR: self.error,
+            rom.CHRGOT: self.chrgot,
+            kernal.CHROUT: self.chrout,
+            kernal.CHRIN: self.chrin,
+            kernal.GETIN: self.getin,
+        }
+
+    def run(self, limit: int = 1_000_000) -> str:
+        """
+        Run the program from the address of its SYS line until it returns, and
+        return what it printed.
+
+        Raises:
+            BasicError: When the program stops with a BASIC error
+            TimeoutError: When the program runs too many instructions
+        """
+        mpu = self.mpu
+        self.push_word(EXIT - 1)
+        mpu.pc = int(bytes(self.memory[0x0807:0x080B]))
+        for _ in range(limit):
+            if mpu.pc == EXIT:
+                return "".join(self.output)
+            trap = self.traps.get(mpu.pc)
+            if trap is None:
+                mpu.step()
+                continue
+            trap()
+            mpu.pc = self.pull_word() + 1
+        raise TimeoutError("Program did not end")
+
+    # --- Registers and stack ------------------------------------------------
+
+    def push_word(self, value: int) -> None:
+        mpu = self.mpu
+        mpu.memory[0x100 + mpu.sp] = value >> 8
+        mpu.sp = (mpu.sp - 1) & 0xFF
+        mpu.memory[0x100 + mpu.sp] = value & 0xFF
+        mpu.sp = (mpu.sp - 1) & 0xFF
+
+    def pull_word(self) -> int:
+        mpu = self.mpu
+        mpu.sp = (mpu.sp + 1) & 0xFF
+        low = mpu.memory[0x100 + mpu.sp]
+        mpu.sp = (mpu.sp + 1) & 0xFF
+        return low | mpu.memory[0x100 + mpu.sp] << 8
+
+    def set_a(self, value: int) -> None:
+        mpu = self.mpu
+        mpu.a = value & 0xFF
+        mpu.p &= ~(mpu.ZERO | mpu.NEGATIVE)
+        if mpu.a == 0:
+            mpu.p |= mpu.ZERO
+        mpu.p |= mpu.a & mpu.NEGATIVE
+
+    def pointer(self) -> int:
+        """Address in A (low byte) and Y (high byte)"""
+        return self.mpu.a | self.mpu.y << 8
+
+    # --- Numbers --------------------------------------------------------------
+
+    def get(self, address: int) -> float:
+        """Value of FAC or ARG"""
+        data = bytearray(self.memory[address : address + 5])
+        data[1] = data[1] & 0x7F | (self.memory[address + 5] & 0x80)
+        return from_mflpt(data)
+
+    def set(self, address: int, value: float) -> None:
+        """Set FAC or ARG, rounding the number to 40 bits"""
+        data = to_mflpt(value)
+        self.memory[address] = data[0]
+        self.memory[address + 1] = data[1] | 0x80
+        self.memory[address + 2 : address + 5] = data[2:]
+        self.memory[address + 5] = 0xFF if data[1] & 0x80 else 0
+
+    def set_fac(self, value: float) -> None:
+        self.set(FAC, value)
+
+    def load(self, address: int) -> float:
+        return from_mflpt(bytes(self.memory[address : address + 5]))
+
+    @staticmethod
+    def sign(value: float) -> int:
+        return 0 if value == 0 else (1 if value > 0 else 0xFF)
+
+    @staticmethod
+    def sign_value(value: float) -> int:
+        return 0 if value == 0 else (1 if value > 0 else -1)
+
+    def movfm(self) -> None:
+        self.set_fac(self.load(self.pointer()))
+
+    def movmf(self) -> None:
+        address = self.mpu.x | self.mpu.y << 8
+        self.memory[address : address + 5] = to_mflpt(self.get(FAC))
+
+    def conupk(self) -> None:
+        self.set(ARG, self.load(self.pointer()))
+
+    def operate(self, operation) -> None:
+        self.set_fac(operation(self.load(self.pointer()), self.get(FAC)))
+
+    def fcomp(self) -> None:
+        self.set_a(self.sign(self.get(FAC) - self.load(self.pointer())))
+
+    def fout(self) -> None:
+        text = format_number(self.get(FAC)).encode("ascii") + b"\0"
+        self.memory[FOUT_BUFFER : FOUT_BUFFER + len(text)] = text
+        self.mpu.a = FOUT_BUFFER & 0xFF
+        self.mpu.y = FOUT_BUFFER >> 8
+
+    def fin(self) -> None:
+        address = self.memory[rom.TXTPTR] | self.memory[rom.TXTPTR + 1] << 8
+        text = ""
+        while self.memory[address]:
+            text += chr(self.memory[address])
+            address += 1
+        text = text.replace(" ", "")
+        for end in range(len(text), -1, -1):
+            try:
+                value = float(text[:end])
+                break
+            except ValueError:
+                value = 0.0
+        self.set_fac(value)
+
+    def chrgot(self) -> None:
+        address = self.memory[rom.TXTPTR] | self.memory[rom.TXTPTR + 1] << 8
+        self.set_a(self.memory[address])
+
+    def givayf(self) -> None:
+        value = self.mpu.a << 8 | self.mpu.y
+        self.set_fac(value - 0x10000 if value & 0x8000 else value)
+
+    def ayint(self) -> None:
+        value = math.floor(self.get(FAC))
+        if not -32768 <= value <= 32767:
+            raise BasicError(rom.ERROR_ILLEGAL_QUANTITY)
+        value &= 0xFFFF
+        self.memory[rom.FACMO] = value >> 8
+        self.memory[rom.FACMO + 1] = value & 0xFF
+
+    def getadr(self) -> None:
+        value = math.floor(self.get(FAC))
+        if not 0 <= value <= 0xFFFF:
+            raise BasicError(rom.ERROR_ILLEGAL_QUANTITY)
+        self.memory[rom.LINNUM] = value & 0xFF
+        self.memory[rom.LINNUM + 1] = value >> 8
+
+    def error(self) -> None:
+        raise BasicError(self.mpu.x)
+
+    # --- Screen and keyboard ----------------------------------------------------
+
+    def chrout(self) -> None:
+        code = self.mpu.a
+        if code == 0x0D:
+            self.output.append("\n")
+            self.column = 0
+        else:
+            self.output.append(" " if code == 0x1D else chr(code))
+            self.column += 1
+        self.memory[rom.PNTR] = self.column
+
+    def chrin(self) -> None:
+        if not self.keys:
+            raise TimeoutError("Program waits for input")
+        # Typed keys are echoed by the screen editor
+        key = self.keys.pop(0)
+        self.set_a(0x0D if key == "\n" else ord(key))
+        self.chrout()
+        self.set_a(0x0D if key == "\n" else ord(key))
+
+    def getin(self) -> None:
+        self.set_a(ord(self.keys.pop(0)) if self.keys else 0)
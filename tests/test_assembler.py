@@ -0,0 +1,157 @@
+import pytest
+from c64basic_compiler.common.c64_float import exact, from_mflpt, to_mflpt
+from c64basic_compiler.common.opcodes_6502 import (
+    ABSOLUTE,
+    IMMEDIATE,
+    OPCODE_TABLE,
+)
+from c64basic_compiler.compiler.assembler import Assembler, Ref
+from c64basic_compiler.exceptions import AssemblyError
+
+
+def test_opcode_table():
+    """Test that the table has the 151 official opcodes, each used once"""
+    opcodes = [opcode for modes in OPCODE_TABLE.values() for opcode in modes.values()]
+
+    assert len(opcodes) == 151
+    assert len(set(opcodes)) == 151
+    assert OPCODE_TABLE["LDA"][IMMEDIATE] == 0xA9
+    assert OPCODE_TABLE["JSR"][ABSOLUTE] == 0x20
+
+
+def test_source():
+    """Test addressing modes, labels, equates and directives of the source"""
+    asm = Assembler()
+    asm.equ("ptr", 0xFB)
+    asm.source(
+        """
+start:  LDA #<text      ; Comment
+        STA ptr
+        LDA #>text
+        STA ptr+1
+        LDY #0
+loop:   LDA (ptr),Y
+        STA $0400,Y
+        INY
+        CPY #2
+        BNE loop
+        ASL A
+        JMP (vector)
+        LDA buffer+1
+        RTS
+vector: .word start
+text:   .byte $48, %01001001
+buffer: .res 3
+"""
+    )
+
+    code = asm.assemble(0xC000)
+
+    assert code == bytes.fromhex(
+        "a9 1e 85 fb a9 c0 85 fc a0 00 b1 fb 99 00 04 c8"
+        "c0 02 d0 f6 0a 6c 1c c0 ad 21 c0 60 00 c0 48 49"
+    )
+    assert asm.symbols["buffer"] == asm.end == 0xC020
+    assert asm.top == 0xC023
+
+
+def test_references():
+    """Test that references are resolved when the program is laid out"""
+    asm = Assembler()
+    asm.op("LDA", IMMEDIATE, Ref("data", 1, ">"))
+    asm.op("JSR", ABSOLUTE, Ref("data", 2))
+    asm.label("data")
+
+    assert asm.assemble(0x1234) == bytes.fromhex("a9 12 20 3b 12")
+
+
+def test_branch_relaxation():
+    """Test that branches are short when in range and long otherwise"""
+    asm = Assembler()
+    asm.label("top")
+    asm.branch("BEQ", Ref("near"))
+    asm.branch("BCC", Ref("far"))
+    asm.label("near")
+    asm.data(bytes(200))
+    asm.label("far")
+    asm.branch("BNE", Ref("top"))
+
+    code = asm.assemble(0x1000)
+
+    assert code[:7] == bytes.fromhex("f0 05 b0 03 4c cf 10")
+    assert code[-5:] == bytes.fromhex("f0 03 4c 00 10")
+    assert asm.long_branches == {2, 6}
+
+
+def test_branch_relaxation_cascade():
+    """Test that a long branch can push another one out of range"""
+    asm = Assembler()
+    asm.branch("BMI", Ref("end"))
+    asm.branch("BVS", Ref("far"))
+    asm.data(bytes(124))
+    asm.label("end")
+    asm.data(bytes(200))
+    asm.label("far")
+
+    code = asm.assemble(0)
+
+    # The first branch reaches its target only while the second is short
+    assert code[:2] == bytes.fromhex("10 03")
+    assert len(code) == 334
+    assert asm.long_branches == {0, 1}
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        ("LDA missing", "Undefined symbol missing"),
+        ("a: NOP\na: NOP", "defined twice"),
+        ("STX $1234,X", "no absx addressing mode"),
+        ("FOO", "Unknown instruction"),
+        ("LDA (1,2", "Invalid operand"),
+        ("BNE far\n" + "NOP\n" * 200 + "far: RTS", "out of range"),
+    ],
+)
+def test_errors(source, message):
+    """Test that invalid programs raise AssemblyError"""
+    asm = Assembler()
+    with pytest.raises(AssemblyError, match=message):
+        asm.source(source)
+        asm.assemble(0x1000)
+
+
+@pytest.mark.parametrize(
+    "value, data",
+    [
+        (0, "00 00 00 00 00"),
+        (1, "81 00 00 00 00"),
+        (-1, "81 80 00 00 00"),
+        (0.5, "80 00 00 00 00"),
+        (10, "84 20 00 00 00"),
+        (0.1, "7d 4c cc cc cd"),
+        (3.141592653589793, "82 49 0f da a2"),
+    ],
+)
+def test_c64_float(value, data):
+    """Test the 5-byte numbers of BASIC"""
+    assert to_mflpt(value) == bytes.fromhex(data)
+    assert from_mflpt(bytes.fromhex(data)) == pytest.approx(value, rel=1e-9)
+
+
+def test_c64_float_overflow():
+    """Test that numbers too large for BASIC cannot be encoded"""
+    with pytest.raises(OverflowError):
+        to_mflpt(1e39)
+    assert to_mflpt(1e-40) == bytes(5)
+
+
+def test_c64_float_exact():
+    """Test the numbers BASIC stores without rounding"""
+    assert exact(10, 4) == 2.5
+    assert exact(-6, -4) == 1.5
+    assert exact(8, 2) == 4 and isinstance(exact(8, 2), int)
+    assert exact(2**32 - 1) == 2**32 - 1
+    assert exact(1, 3) is None
+    assert exact(2**32 + 1) is None
+    assert exact(2**126) == 2**126
+    assert exact(2**127) is None
@@ -0,0 +1,289 @@
+import pytest
+from c64basic_compiler.build import compile_file
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.assembler import Ref
+from c64basic_compiler.compiler.backend import lower
+from c64basic_compiler.compiler.codegen import basic_header, generate_binary
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.exceptions import (
+    BackendError,
+    ProgramTooLargeError,
+    UnsupportedInstructionError,
+)
+from c64basic_compiler.pseudocode.codegen import generate_ir
+
+
+def build(source: str) -> bytearray:
+    return generate_binary(generate_ir(parse(scan(source)), CompileContext()))
+
+
+def run(source: str, keys: str = "") -> str:
+    """Compile a program and run it, returning what it prints"""
+    pytest.importorskip("py65")
+    from tests.machine import Machine
+
+    return Machine(build(source), keys).run()
+
+
+def test_basic_header():
+    """Test the BASIC line that starts the machine code: 10 SYS 2062"""
+    assert basic_header() == bytes.fromhex("0c 08 0a 00 9e 20 32 30 36 32 00 00 00")
+
+
+def test_binary_starts_after_header():
+    """Test that the machine code follows the header and the PRG is written"""
+    binary = build('10 PRINT "HI"\n')
+
+    assert binary.startswith(basic_header())
+    # JSR clear_memory
+    assert binary[len(basic_header())] == 0x20
+
+
+def test_compile_file_writes_prg(tmp_path):
+    """Test that builds write the .prg file with its load address"""
+    source = tmp_path / "prog.bas"
+    source.write_text('10 PRINT "HI"\n20 END\n')
+    output = tmp_path / "prog.prg"
+
+    report = compile_file(str(source), str(output))
+
+    assert report["prg_file"] == str(output)
+    assert output.read_bytes() == b"\x01\x08" + build(source.read_text())
+
+
+def test_streamed_build_without_prg(tmp_path):
+    """Test that streamed builds, kept in constant memory, write no .prg file"""
+    source = tmp_path / "prog.bas"
+    source.write_text('10 PRINT "HI"\n20 END\n')
+    output = tmp_path / "prog.prg"
+
+    report = compile_file(str(source), str(output), stream=True)
+
+    assert report["prg_file"] is None
+    assert report["instructions"] > 0
+    assert not output.exists()
+
+
+def test_compile_file_without_prg(tmp_path):
+    """Test that programs the backend cannot compile get no .prg file"""
+    source = tmp_path / "prog.bas"
+    source.write_text("10 WAIT 1\n")
+    output = tmp_path / "prog.prg"
+
+    report = compile_file(str(source), str(output))
+
+    assert report["prg_file"] is None
+    assert not output.exists()
+
+
+@pytest.mark.parametrize(
+    "source, error",
+    [
+        ("10 WAIT 1\n", BackendError),
+        ("10 PRINT TI\n", UnsupportedInstructionError),
+        ('10 A$ = "' + "X" * 300 + '"\n', BackendError),
+        ("10 DIM A(10)\n", BackendError),
+        ("10 FOR I% = 1 TO 2\n", BackendError),
+    ],
+)
+def test_errors(source, error):
+    """Test that programs that cannot be compiled raise BackendError"""
+    with pytest.raises(error):
+        build(source)
+
+
+def test_program_too_large():
+    """Test that programs must fit below the BASIC ROM"""
+    source = "".join(f'{n} A$ = "{n}" + B$\n' for n in range(10, 50000, 10))
+
+    with pytest.raises(ProgramTooLargeError):
+        build(source)
+
+
+def test_branches_relaxed():
+    """Test that IF and NEXT branch with Bxx, over a JMP only when far"""
+    body = "PRINT " + "; ".join(["A"] * 20)
+    source = f"10 FOR I = 1 TO 2\n20 IF I = 1 THEN {body}\n30 NEXT I\n"
+    asm = lower(generate_ir(parse(scan(source)), CompileContext()))
+    asm.layout(0x080E)
+    long_branches = sorted(asm.items[index][1] for index in asm.long_branches)
+
+    # IF skips the printing of 20 numbers, of 10 bytes each, and NEXT goes
+    # back over it; the branches within the 16-bit compares stay short
+    assert long_branches == ["BEQ", "BPL"]
+
+    asm = lower(
+        generate_ir(parse(scan(source.replace(body, "PRINT A"))), CompileContext())
+    )
+    asm.layout(0x080E)
+    assert not asm.long_branches
+
+
+def test_run_print():
+    """Test PRINT of strings and numbers, with ; and ,"""
+    output = run('10 PRINT "A IS"; 2; "!"\n20 PRINT 1, -2; 3\n30 PRINT "X";\n')
+
+    assert output == "A IS 2 !\n 1        -2  3 \nX"
+
+
+def test_run_arithmetic():
+    """Test operators, precedence and functions"""
+    output = run(
+        "10 A = 5\n"
+        "20 PRINT (1 + 2) * (3 + 4) - 10 / (A - 3)\n"
+        "30 PRINT 2 ^ 10; -A; INT(-2.5); SGN(-3); ABS(-7); SQR(16)\n"
+        "40 PRINT 12 AND 10; 12 OR 3; NOT 0\n"
+        "50 PRINT 3 = 3; 3 <> 3; A >= 4; A < 4\n"
+        "60 PRINT -2^2; -A^2; 2*-3\n"
+    )
+
+    assert output.split("\n") == [
+        " 16 ",
+        " 1024 -5 -3 -1  7  4 ",
+        " 8  15 -1 ",
+        "-1  0 -1  0 ",
+        "-4 -25 -6 ",
+        "",
+    ]
+
+
+def test_run_strings():
+    """Test string variables, concatenation and string functions"""
+    output = run(
+        '10 A$ = "AB": B$ = A$ + "C" + CHR$(68)\n'
+        "20 PRINT B$; LEN(B$); ASC(B$)\n"
+        '30 C$ = "  2.5E1Y": D$ = STR$(12) + "X": PRINT D$; VAL(C$) + 1\n'
+        '40 IF A$ < B$ THEN PRINT "LESS"\n'
+        '50 IF A$ = "AB" THEN PRINT "EQUAL"\n'
+    )
+
+    assert output == "ABCD 4  65 \n 12X 26 \nLESS\nEQUAL\n"
+
+
+def test_run_open_string_literal():
+    """Test that a string literal without its closing quote runs to the end"""
+    assert run('10 A$ = "AB\n20 PRINT A$; LEN(A$)\n') == "AB 2 \n"
+
+
+def test_targets_with_several_statements(tmp_path):
+    """Test jump targets on lines that hold several statements"""
+    source = tmp_path / "prog.bas"
+    source.write_text(
+        "10 I = 0\n"
+        "20 I = I + 1: IF I < 5 THEN 20\n"
+        "30 GOSUB 100: PRINT I\n"
+        "40 END\n"
+        '100 PRINT "SUB";: RETURN\n'
+    )
+    output = tmp_path / "prog.prg"
+
+    report = compile_file(str(source), str(output))
+
+    assert report["prg_file"] == str(output)
+    assert run(source.read_text()) == "SUB 5 \n"
+
+
+def test_run_control_flow():
+    """Test IF, GOTO, GOSUB, FOR loops with steps, and END within GOSUB"""
+    output = run(
+        "10 FOR I = 1 TO 3\n"
+        "20 FOR J = 10 TO 1 STEP -4.5\n"
+        "30 PRINT I * J;\n"
+        "40 NEXT J\n"
+        "50 NEXT I\n"
+        "60 GOSUB 100\n"
+        '70 PRINT "NOT REACHED"\n'
+        "100 PRINT\n"
+        "110 IF I > 3 AND I < 5 THEN 130\n"
+        "120 RETURN\n"
+        '130 PRINT "OK"\n'
+        "140 END\n"
+    )
+
+    assert output == " 10  5.5  1  20  11  2  30  16.5  3 \nOK\n"
+
+
+def test_run_memory_and_input():
+    """Test POKE, PEEK, INPUT and GET"""
+    output = run(
+        "10 POKE 1024 + 5, 7 * 3: A = 1029: POKE A, PEEK(A) + 1\n"
+        "20 PRINT PEEK(1029)\n"
+        '30 INPUT "NAME"; N$\n'
+        "40 INPUT X\n"
+        "50 GET K$: GET K\n"
+        "60 PRINT N$; X * 2; K$; K\n",
+        keys="ADA\n21\nYZ",
+    )
+
+    assert output == " 22 \nNAME? ADA\n? 21\nADA 42 Y 90 \n"
+
+
+def test_integer_code():
+    """Test that integer variables and counters get no floating point code"""
+    source = (
+        "10 FOR I = 0 TO 199 STEP 2\n"
+        "20 A = I * 4 + INT(I / 8) - (I AND 7)\n"
+        "30 IF A >= 40 AND I <> 100 THEN POKE 1024 + I, A AND 255\n"
+        "40 NEXT I\n"
+    )
+    asm = lower(generate_ir(parse(scan(source)), CompileContext()))
+    calls = {
+        item[3] for item in asm.items if item[0] == "op" and item[1] in ("JSR", "JMP")
+    }
+
+    assert calls == {Ref("clear_memory"), Ref("end")}
+
+
+def test_run_integers():
+    """Test 16-bit arithmetic, compares and conversions of integers"""
+    output = run(
+        "10 FOR I = -3 TO 3 STEP 3\n"
+        "20 PRINT I; I + 1; -I; I * 2; INT(I / 2); I < 1; I >= 0; NOT I\n"
+        "30 NEXT I\n"
+        "40 FOR J = 65534 TO 65535: PRINT J; J = 65535; J - 0.5: NEXT J\n"
+        "50 K = 200: K = K - 400: A = 100 AND K: PRINT K; A; K / 8\n"
+        '60 POKE 1024, K + 255: A$ = "ABC": PRINT PEEK(1024); LEN(A$) * 2 + 0.5\n'
+        "70 FOR L = 5 TO 5 STEP 0: PRINT L;: NEXT\n"
+    )
+
+    assert output.split("\n") == [
+        "-3 -2  3 -6 -2 -1  0  2 ",
+        " 0  1  0  0  0 -1 -1 -1 ",
+        " 3  4 -3  6  1  0 -1 -4 ",
+        " 65534  0  65533.5 ",
+        " 65535 -1  65534.5 ",
+        "-200  32 -25 ",
+        " 55  6.5 ",
+        " 5 ",
+    ]
+
+
+def test_run_integer_variables():
+    """Test integer (%) variables: rounded down, 16-bit, mixed with numbers"""
+    output = run(
+        "10 A% = 7.9: B% = -7.5: C% = A% / 2: PRINT A%; B%; C%; A% / 2\n"
+        "20 INPUT D%: GET E%: F% = D% - E%: PRINT D%; E%; F%; F% < D%\n",
+        keys="-30000\nZ",
+    )
+
+    assert output == " 7 -8  3  3.5 \n? -30000\n-30000  90 -30090 -1 \n"
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "10 A% = 32768\n",
+        "10 A% = -1E6\n",
+        "10 INPUT A%: B% = A% - 10\n",
+        "10 INPUT A%: PRINT A% - 10 AND 1\n",
+    ],
+)
+def test_run_integer_variables_out_of_range(source):
+    """Test that numbers out of -32768..32767 cannot be stored in A%"""
+    pytest.importorskip("py65")
+    from tests.machine import BasicError, Machine
+
+    with pytest.raises(BasicError) as error:
+        Machine(build(source), "-32760\n").run()
+    assert error.value.number == 14
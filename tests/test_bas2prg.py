@@ -58,6 +58,37 @@ class TestBas2Prg:
         assert ord("Q") in result
         assert ord("S") in result
 
+    def test_tokenize_line_first_match(self):
+        """Test that keywords are found inside words, first in table order"""
+        result = tokenize_line("10 fort=1TO9:ifstop ThenINPUT#1,A")
+
+        assert result[2:] == bytes(
+            [
+                basic_tokens["FOR"],
+                ord("t"),
+                basic_tokens["="],
+                ord("1"),
+                basic_tokens["TO"],
+                ord("9"),
+                ord(":"),
+                basic_tokens["IF"],
+                basic_tokens["STOP"],
+                ord(" "),
+                basic_tokens["THEN"],
+                basic_tokens["INPUT#"],
+                ord("1"),
+                ord(","),
+                ord("A"),
+                0,
+            ]
+        )
+
+    def test_tokenize_line_unclosed_quote(self):
+        """Test that an unclosed quote runs to the end of the line"""
+        result = tokenize_line('40 PRINT"A";"TO END')
+
+        assert result[2:] == bytes([basic_tokens["PRINT"], *b'"A";"TO END', 0])
+
     @patch(
         "builtins.open", new_callable=mock_open, read_data='10 PRINT "HELLO"\n20 END\n'
     )
@@ -0,0 +1,70 @@
+import os
+
+from c64basic_compiler.batch import build_batch, expand_inputs, is_batch
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+
+class TestInputs:
+    def test_is_batch(self, tmp_path):
+        """Test that directories, globs and several inputs select batch mode"""
+        assert not is_batch(["prog.bas"])
+        assert is_batch([str(tmp_path)])
+        assert is_batch(["*.bas"])
+        assert is_batch(["a.bas", "b.bas"])
+
+    def test_expand_inputs(self, tmp_path):
+        """Test expanding directories and globs, without duplicates"""
+        a = _write(tmp_path / "a.bas", "10 END")
+        b = _write(tmp_path / "b.bas", "10 END")
+        _write(tmp_path / "notes.txt", "")
+        c = _write(tmp_path / "sub" / "c.bas", "10 END")
+
+        assert expand_inputs([str(tmp_path)]) == [a, b]
+        assert expand_inputs([b, str(tmp_path / "**" / "*.bas")]) == [b, a, c]
+
+
+class TestBuildBatch:
+    def test_reports(self, tmp_path):
+        """Test the report of compiled, missing and skipped files"""
+        good = _write(tmp_path / "good.bas", '10 PRINT "HI"\n20 END')
+        done = _write(tmp_path / "done.bas", "10 END")
+        _write(tmp_path / "out" / "done.prg", "")
+        missing = str(tmp_path / "missing.bas")
+
+        reports = build_batch(
+            [good, done, missing], output_dir=str(tmp_path / "out"), use_cache=False
+        )
+
+        assert [r["status"] for r in reports] == ["ok", "skipped", "error"]
+        assert reports[0]["size"] == os.path.getsize(
+            tmp_path / "out" / "good.pseudocode"
+        )
+        assert reports[0]["lines"] == 2
+        assert all(r["time"] >= 0 for r in reports)
+
+    def test_force_overwrites(self, tmp_path):
+        """Test that existing outputs are compiled again when forced"""
+        source = _write(tmp_path / "done.bas", "10 END")
+        _write(tmp_path / "done.prg", "")
+
+        assert build_batch([source], force=True)[0]["status"] == "ok"
+
+    def test_parallel_matches_serial(self, tmp_path):
+        """Test that worker processes produce the same outputs"""
+        for index in range(4):
+            _write(tmp_path / f"p{index}.bas", f"10 A = {index} * 2\n20 GOTO 10")
+
+        serial = build_batch([str(tmp_path)], output_dir=str(tmp_path / "s"))
+        parallel = build_batch([str(tmp_path)], output_dir=str(tmp_path / "p"), jobs=2)
+
+        assert [r["status"] for r in parallel] == ["ok"] * 4
+        for index in range(4):
+            name = f"p{index}.pseudocode"
+            assert (tmp_path / "s" / name).read_text() == (
+                tmp_path / "p" / name
+            ).read_text()
@@ -0,0 +1,122 @@
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.common.line_cache import LineCache
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.pseudocode.codegen import extract_jump_targets, generate_code
+from c64basic_compiler.pseudocode.incremental import generate_incremental
+from c64basic_compiler.pseudocode.stream import (
+    generate_stream,
+    parse_lines,
+    read_lines,
+    scan_jump_targets,
+)
+from c64basic_compiler.utils import tracing
+
+PROGRAM = """10 FOR I = 1 TO 10 STEP 2
+20 IF I > 5 THEN 60
+30 PRINT "I="; I * 2
+40 GOSUB 100
+50 NEXT I
+60 A = (I + 1) / 3
+70 WAIT 1
+80 POKE 53280, A AND 15
+90 END
+100 LET B$ = "SUB"
+110 RETURN
+"""
+
+
+class TestParallelGeneration:
+    def test_matches_serial_build(self):
+        """Test that parallel generation gives the serial output, labels included"""
+        ast = parse(scan(PROGRAM))
+        serial = generate_code(ast, CompileContext())
+
+        for jobs in (2, 3, 8):
+            assert generate_code(ast, CompileContext(), jobs=jobs) == serial
+        assert "LABEL label_100" in serial
+
+    def test_one_label_per_line(self):
+        """Test that a target line split between chunks gets a single label"""
+        ast = parse(scan("10 A = 1: A = 2: A = 3: A = 4: A = 5\n20 GOTO 10\n"))
+
+        for jobs in (1, 2, 8):
+            code = generate_code(ast, CompileContext(), jobs=jobs)
+            assert code.count("LABEL label_10") == 1
+            assert code[0] == "LABEL label_10"
+
+    def test_trace_events_in_program_order(self):
+        """Test that handler events of the workers reach the parent's sinks"""
+        events = []
+        tracing.add_sink(events.append)
+        try:
+            generate_code(parse(scan(PROGRAM)), CompileContext(), jobs=2)
+        finally:
+            tracing.disable()
+
+        lines = [e["line"] for e in events if e["stage"] == "handler"]
+        assert lines == [10, 20, 30, 40, 50, 60, 70, 80, 90, 100, 110]
+
+
+class TestIncremental:
+    def test_matches_full_build(self):
+        """Test that cold and warm incremental builds match a full build"""
+        full = generate_code(parse(scan(PROGRAM)), CompileContext())
+        cache = LineCache()
+
+        cold, reused = generate_incremental(PROGRAM, CompileContext(), cache)
+        assert (cold, reused) == (full, 0)
+
+        warm, reused = generate_incremental(PROGRAM, CompileContext(), cache)
+        assert (warm, reused) == (full, 11)
+
+    def test_edit_recompiles_line_and_dependents(self):
+        """Test that an edit recompiles the line and the lines it relabels"""
+        cache = LineCache()
+        generate_incremental(PROGRAM, CompileContext(), cache)
+
+        # Line 20 now jumps to 70, which needs a label, instead of 60
+        edited = PROGRAM.replace("20 IF I > 5 THEN 60", "20 IF I > 5 THEN 70")
+        code, reused = generate_incremental(edited, CompileContext(), cache)
+
+        assert reused == 8
+        assert code == generate_code(parse(scan(edited)), CompileContext())
+
+    def test_multiple_statements_per_line(self):
+        """Test splitting the code of lines with several statements"""
+        program = "10 A = 1: B = 2: PRINT A\n20 GOTO 10\n30 END"
+        cache = LineCache()
+        cold, _ = generate_incremental(program, CompileContext(), cache, jobs=2)
+        warm, reused = generate_incremental(program, CompileContext(), cache)
+
+        assert cold == warm == generate_code(parse(scan(program)), CompileContext())
+        assert reused == 3
+
+
+class TestStreaming:
+    def test_matches_full_build(self):
+        """Test that streaming in small chunks gives the output of a full build"""
+        lines = PROGRAM.splitlines(keepends=True)
+        targets = scan_jump_targets(read_lines(lines), chunk_lines=2)
+        code = generate_stream(
+            parse_lines(read_lines(lines), chunk_lines=3), CompileContext(), targets
+        )
+
+        assert targets == extract_jump_targets(parse(scan(PROGRAM)))
+        assert list(code) == generate_code(parse(scan(PROGRAM)), CompileContext())
+
+    def test_output_before_input_is_read(self):
+        """Test that code is yielded before the whole source is read"""
+        read = []
+
+        def source():
+            for text in PROGRAM.splitlines():
+                read.append(text)
+                yield text
+
+        code = generate_stream(
+            parse_lines(source(), chunk_lines=4), CompileContext(), {60, 100}
+        )
+
+        assert next(code) == "PUSH_CONST 1"
+        assert len(read) == 4
@@ -1,10 +1,14 @@
 import pytest
 import re
+from c64basic_compiler.basic import FUNCTION_TABLE
+from c64basic_compiler.compiler.lexer import lex_expression
 from c64basic_compiler.evaluate import (
     evaluate_expression,
     tokenize,
     shunting_yard,
     generate_pseudocode,
+    rpn_to_pseudocode,
+    tokens_to_rpn,
     Type,
     TypeMismatchError,
     EvaluationError,
@@ -227,10 +231,10 @@ def test_shunting_yard_mismatched_parentheses():
 
 # --- Tests para generate_pseudocode ---
 def test_generate_pseudocode_numerics():
-    rpn = [5, 3, "+"]  # 5 + 3
+    rpn = [5, "A", "+"]  # 5 + A
     code = generate_pseudocode(rpn)
     assert "PUSH_CONST 5" in code
-    assert "PUSH_CONST 3" in code
+    assert "LOAD A" in code
     assert "ADD" in code
 
 
@@ -243,21 +247,27 @@ def test_generate_pseudocode_variables():
 
 
 def test_generate_pseudocode_unary_minus():
-    rpn = [5, "UNARY-"]  # -5
+    rpn = ["A", "UNARY-"]  # -A
     code = generate_pseudocode(rpn)
-    assert "PUSH_CONST 5" in code
+    assert "LOAD A" in code
     assert "NEGATE" in code
 
 
 def test_generate_pseudocode_string_operations():
-    rpn = ['"Hello"', '"World"', "+"]  # "Hello" + "World"
+    rpn = ['"Hello"', "A$", "+"]  # "Hello" + A$
     code = generate_pseudocode(rpn)
     assert 'PUSH_CONST "Hello"' in code
-    assert 'PUSH_CONST "World"' in code
+    assert "LOAD A$" in code
     # La concatenación puede implementarse como ADD para strings
     assert "ADD" in code or "CONCAT" in code
 
 
+def test_generate_pseudocode_integer_variables():
+    assert evaluate_expression("A% AND 7") == ["LOAD A%", "PUSH_CONST 7", "AND"]
+    with pytest.raises(TypeMismatchError):
+        generate_pseudocode(['"Hello"', "A%", "+"])
+
+
 def test_generate_pseudocode_type_mismatch():
     rpn = ['"Hello"', 5, "+"]  # Intento de "Hello" + 5, que debería fallar
     with pytest.raises(TypeMismatchError):
@@ -286,10 +296,10 @@ def test_generate_pseudocode_not_enough_operands():
 # --- Tests para evaluar expresiones completas ---
 def test_evaluate_numeric_expressions():
     # Comprobar que las instrucciones generadas para expresiones numéricas son correctas
-    code = evaluate_expression("1 + 2 * 3")
+    code = evaluate_expression("1 + 2 * X")
     assert "PUSH_CONST 1" in code
     assert "PUSH_CONST 2" in code
-    assert "PUSH_CONST 3" in code
+    assert "LOAD X" in code
     assert "MUL" in code  # Primero multiplicación (2 * 3)
     assert "ADD" in code  # Luego suma (1 + resultado)
 
@@ -312,6 +322,16 @@ def test_evaluate_negative_numbers():
     )
 
 
+def test_evaluate_negative_power():
+    # El signo se aplica después de la potencia: -2^2 es -(2^2)
+    assert evaluate_expression("-2^2") == [
+        "PUSH_CONST 2",
+        "PUSH_CONST 2",
+        "POW",
+        "NEGATE",
+    ]
+
+
 def test_evaluate_function_calls():
     # Verificar llamadas a funciones
     code = evaluate_expression("SIN(PI/2)")
@@ -334,3 +354,79 @@ def test_evaluate_complex_expression():
     assert "PUSH_CONST 10" in " ".join(code)
     assert "LOG" in code
     assert "ADD" in code
+
+
+# --- Precedencia y tokens tipados ---
+@pytest.mark.parametrize(
+    "expr,expected",
+    [
+        (
+            "X * Y + Z / 2",
+            ["LOAD X", "LOAD Y", "MUL", "LOAD Z", "PUSH_CONST 2", "DIV", "ADD"],
+        ),
+        ("A - B - C", ["LOAD A", "LOAD B", "SUB", "LOAD C", "SUB"]),
+        ("-(A + B)", ["LOAD A", "LOAD B", "ADD", "NEGATE"]),
+        ("-A ^ 2", ["LOAD A", "PUSH_CONST 2", "POW", "NEGATE"]),
+        ("NOT A = B", ["LOAD A", "LOAD B", "EQUAL", "NOT"]),
+        (
+            "A > 1 OR B AND C",
+            ["LOAD A", "PUSH_CONST 1", "GREATER", "LOAD B", "LOAD C", "AND", "OR"],
+        ),
+    ],
+)
+def test_operator_precedence(expr, expected):
+    assert evaluate_expression(expr) == expected
+
+
+def test_tokens_to_rpn_uses_resolved_functions():
+    rpn = tokens_to_rpn(lex_expression("-SIN(X)"))
+
+    assert [token.text for token in rpn] == ["X", "SIN", "-"]
+    assert rpn[-1].func is FUNCTION_TABLE["UNARY-"]
+    assert rpn_to_pseudocode(rpn) == ["LOAD X", "SIN", "NEGATE"]
+
+
+def test_tokens_to_rpn_unexpected_keyword():
+    with pytest.raises(UnhandledTokenError):
+        tokens_to_rpn(lex_expression("A THEN B"))
+
+
+# --- Plegado de constantes ---
+@pytest.mark.parametrize(
+    "expr,expected",
+    [
+        ("1 + 2 * 3", ["PUSH_CONST 7"]),
+        ("10 / 4 - 0.5", ["PUSH_CONST 2"]),
+        ("-(3) * 1.5", ["PUSH_CONST -4.5"]),
+        ("ABS(-7) + SGN(-3) + INT(-2.5)", ["PUSH_CONST 3"]),
+        ("12 AND 10 OR NOT 0", ["PUSH_CONST -1"]),
+        ('3 = 3 AND "A" < "AB"', ["PUSH_CONST -1"]),
+        ('CHR$(65) + STR$(12) + "X"', ['PUSH_CONST "A 12X"']),
+        ('LEN("ABC") + ASC("B")', ["PUSH_CONST 69"]),
+        ('"X" + "ABC', ['PUSH_CONST "XABC"']),  # Open literal at the end
+        ('"X" + "', ['PUSH_CONST "X"']),
+        ("X + 2 * 3", ["LOAD X", "PUSH_CONST 6", "ADD"]),
+    ],
+)
+def test_constant_folding(expr, expected):
+    assert evaluate_expression(expr) == expected
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        "1 / 3",  # Rounded by BASIC
+        "0.1 + 1",  # 0.1 has no exact C64 value
+        "2 ^ 3",  # Computed with EXP and LOG by the ROM
+        "SQR(16)",
+        "1 / 0",  # Errors are raised at run time
+        "40000 AND 1",
+        'ASC("")',
+        "CHR$(13)",  # Cannot be written in a string literal
+        "STR$(0.5)",
+        "1E38 * 10",
+        "PI * 2",
+    ],
+)
+def test_constant_folding_keeps_runtime_results(expr):
+    assert len(evaluate_expression(expr)) > 1
@@ -0,0 +1,133 @@
+import pytest
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.common.expression_cache import ExpressionCache
+from c64basic_compiler.evaluate import (
+    compile_expression,
+    emit_tokens,
+    evaluate_expression,
+    render,
+)
+from c64basic_compiler.compiler.lexer import lex_expression
+from c64basic_compiler.exceptions import EvaluationError
+from c64basic_compiler.pseudocode.ir import Code
+
+
+class TestExpressionCache:
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted as hits or misses"""
+        cache = ExpressionCache()
+
+        assert cache.get(("A",)) is None
+        cache.put(("A",), ("LOAD A",))
+
+        assert cache.get(("A",)) == ("LOAD A",)
+        assert cache.stats() == {
+            "size": 1,
+            "maxsize": 1024,
+            "hits": 1,
+            "misses": 1,
+            "evictions": 0,
+        }
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the least recently used entry is dropped first"""
+        cache = ExpressionCache(maxsize=2)
+        cache.put("A", ("LOAD A",))
+        cache.put("B", ("LOAD B",))
+        cache.get("A")
+        cache.put("C", ("LOAD C",))
+
+        assert "A" in cache
+        assert "B" not in cache
+        assert cache.evictions == 1
+
+    def test_resize_and_clear(self):
+        """Test shrinking the cache and resetting it"""
+        cache = ExpressionCache(maxsize=3)
+        for key in "ABC":
+            cache.put(key, (f"LOAD {key}",))
+
+        cache.resize(1)
+        assert len(cache) == 1
+        assert cache.evictions == 2
+
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.evictions == 0
+
+    def test_zero_size_disables_caching(self):
+        """Test that a cache of size 0 stores nothing"""
+        cache = ExpressionCache(maxsize=0)
+        cache.put("A", ("LOAD A",))
+
+        assert len(cache) == 0
+
+    def test_negative_size(self):
+        """Test that negative sizes are rejected"""
+        with pytest.raises(ValueError):
+            ExpressionCache(maxsize=-1)
+
+
+class TestCompileExpression:
+    def test_key_is_token_sequence(self):
+        """Test that spacing and word operator case do not affect the key"""
+        cache = ExpressionCache()
+        first = compile_expression("X AND 7", cache)
+        second = compile_expression("X and   7", cache)
+
+        assert first is second
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_result_is_immutable(self):
+        """Test that cached pseudocode cannot be modified by callers"""
+        cache = ExpressionCache()
+        code = compile_expression("INT(Y/8)", cache)
+
+        assert isinstance(code, tuple)
+        evaluate_expression("INT(Y/8)", cache=cache).append("NOT_EQUAL")
+        assert compile_expression("INT(Y/8)", cache) == code
+
+    def test_matches_uncached_result(self):
+        """Test that caching does not change the generated code"""
+        cache = ExpressionCache()
+        expr = "PEEK(V+17)"
+
+        code = compile_expression(expr, cache)
+
+        assert code == compile_expression(expr)
+        assert render(code) == evaluate_expression(expr)
+
+    def test_emit_without_text(self, monkeypatch):
+        """Test that compiled expressions are emitted without parsing text"""
+
+        def fail(self, text):
+            raise AssertionError(f"text parsed: {text}")
+
+        monkeypatch.setattr(Code, "emit_text", fail)
+        monkeypatch.setattr(Code, "extend_text", fail)
+        cache = ExpressionCache()
+        code = Code()
+        for _ in range(2):
+            emit_tokens(lex_expression('A$ + "!" + STR$(X * 2)'), code, cache)
+
+        assert code.text()[:3] == ["LOAD A$", 'PUSH_CONST "!"', "ADD"]
+        assert len(code) == 16
+        assert cache.hits == 1
+
+    def test_errors_are_not_cached(self):
+        """Test that expressions that fail to compile are not stored"""
+        cache = ExpressionCache()
+        with pytest.raises(EvaluationError):
+            compile_expression("(A + B", cache)
+
+        assert len(cache) == 0
+
+    def test_context_shares_cache(self):
+        """Test that a cache can outlive a compilation context"""
+        cache = ExpressionCache()
+        compile_expression("SA+RA+BA", CompileContext(cache).expression_cache)
+        compile_expression("SA+RA+BA", CompileContext(cache).expression_cache)
+
+        assert cache.hits == 1
+        assert CompileContext().expression_cache is not cache
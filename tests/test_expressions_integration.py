@@ -9,7 +9,7 @@ from c64basic_compiler.exceptions import (
 # Test de integración que verifica funciones específicas del lenguaje BASIC
 class TestBasicFunctions:
     def test_abs_function(self):
-        code = evaluate_expression("ABS(-42)")
+        code = evaluate_expression("ABS(X - 42)")
         assert any(
             "PUSH_CONST -42" in line or "PUSH_CONST 42" in " ".join(code)
             for line in code
@@ -22,8 +22,8 @@ class TestBasicFunctions:
         assert "INT" in " ".join(code)
 
     def test_sgn_function(self):
-        code = evaluate_expression("SGN(-99)")
-        assert "PUSH_CONST -99" in " ".join(code) or "-99" in " ".join(code)
+        code = evaluate_expression("SGN(X - 99)")
+        assert "PUSH_CONST 99" in " ".join(code) or "99" in " ".join(code)
         assert "SGN" in " ".join(code)
 
     def test_sqr_function(self):
@@ -80,22 +80,22 @@ class TestBasicFunctions:
         )
 
     def test_str_function(self):
-        code = evaluate_expression("STR$(42)")
+        code = evaluate_expression("STR$(X + 42)")
         assert "PUSH_CONST 42" in " ".join(code) or "42" in " ".join(code)
         assert "STR$" in " ".join(code)
 
     def test_len_function(self):
-        code = evaluate_expression('LEN("ABC")')
+        code = evaluate_expression('LEN("ABC" + A$)')
         assert 'PUSH_CONST "ABC"' in " ".join(code) or '"ABC"' in " ".join(code)
         assert "LEN" in " ".join(code)
 
     def test_chr_function(self):
-        code = evaluate_expression("CHR$(65)")
+        code = evaluate_expression("CHR$(X + 65)")
         assert "PUSH_CONST 65" in " ".join(code) or "65" in " ".join(code)
         assert "CHR$" in " ".join(code)
 
     def test_asc_function(self):
-        code = evaluate_expression('ASC("A")')
+        code = evaluate_expression('ASC("A" + A$)')
         assert 'PUSH_CONST "A"' in " ".join(code) or '"A"' in " ".join(code)
         assert "ASC" in " ".join(code)
 
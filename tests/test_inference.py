@@ -0,0 +1,102 @@
+import pytest
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.inference import (
+    SIGNED,
+    Range,
+    add,
+    divide,
+    infer_integers,
+    logic_and,
+    logic_or,
+    multiply,
+)
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.pseudocode.codegen import generate_ir
+
+
+def infer(source: str):
+    return infer_integers(generate_ir(parse(scan(source)), CompileContext()))
+
+
+def test_ranges():
+    """Test the ranges of the results of operations"""
+    assert add(Range(0, 10), Range(-5, 5)) == Range(-5, 15)
+    assert multiply(Range(-2, 3), Range(-4, 1)) == Range(-12, 8)
+    assert divide(Range(1, 2), Range(-1, 1)) is None
+    assert not divide(Range(1, 8), Range(4, 4)).integral
+    assert add(Range(2**31, 2**31), Range(2**31, 2**31)).integral is False
+    assert logic_and(Range(0, 300), SIGNED) == Range(0, 300)
+    assert logic_or(Range(1, 5), Range(0, 8)) == Range(1, 15)
+    assert logic_or(Range(-1, 0), Range(0, 8)) == SIGNED
+
+
+def test_for_counters():
+    """Test that counters with whole limits and steps are integers"""
+    integers = infer(
+        "10 FOR I = 1 TO 10\n"
+        "20 FOR J = 100 TO 0 STEP -2\n"
+        "30 FOR K = 0 TO 1 STEP 0.5\n"
+        "40 NEXT K: NEXT J: NEXT I\n"
+    )
+
+    assert integers.ranges == {"I": Range(0, 11), "J": Range(-2, 100)}
+    assert integers.steps == {"I": 1, "J": -2}
+
+
+def test_assignments():
+    """Test the variables that hold whole numbers only"""
+    integers = infer(
+        "10 A = 5: B = A * 3 - 1\n"
+        "20 C = B / 2: D = INT(C)\n"
+        "30 E = PEEK(53280) AND 15: F = A = B\n"
+        "40 G = 40000: H = 70000\n"
+        "50 INPUT X: Y = X - X\n"
+    )
+
+    assert integers.ranges == {
+        "A": Range(0, 5),
+        "B": Range(-1, 14),
+        "D": Range(-1, 7),
+        "E": Range(0, 15),
+        "F": Range(-1, 0),
+        "G": Range(0, 40000),
+    }
+
+
+def test_integer_variables():
+    """Test that integer (%) variables are rounded down and in 16 bits"""
+    integers = infer("10 A% = 2.5: B% = A% * 1000: INPUT C%\n20 D% = D% + 1\n")
+
+    assert integers.ranges == {
+        "A%": Range(0, 2),
+        "B%": Range(0, 2000),
+        "C%": SIGNED,
+        "D%": SIGNED,
+    }
+
+
+def test_growing_ranges():
+    """Test that variables changed by loops of GOTO are not integers"""
+    integers = infer("10 N = N + 1: M = 2\n20 IF N < 10 THEN 10\n")
+
+    assert integers.ranges == {"M": Range(0, 2)}
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "10 FOR I = 1 TO 10: NEXT I\n20 FOR I = 1 TO 10 STEP 2: NEXT I\n",
+        "10 FOR I = 1 TO 10: NEXT I\n20 I = 0.5\n",
+        "10 FOR I = 1 TO 40000 STEP 30000: NEXT I\n",
+        "10 FOR I = 1 TO N: NEXT I\n20 INPUT N\n",
+    ],
+)
+def test_not_counters(source):
+    """Test loops whose counters may not be whole numbers in 16 bits"""
+    assert "I" not in infer(source).ranges
+
+
+def test_unknown_pseudocode():
+    """Test that programs the inference cannot follow have no integers"""
+    assert infer("10 I = 1: DEF FNA(X) = X\n").ranges == {}
@@ -1,9 +1,13 @@
 import pytest
 from unittest.mock import MagicMock, patch
+from c64basic_compiler.common.compile_context import CompileContext
 from c64basic_compiler.compiler.instructions_registry import (
     instruction_handlers,
+    get_handler,
     get_instruction_handler,
+    handler_table,
 )
+from c64basic_compiler.compiler.statement import Command, Statement
 from c64basic_compiler.handlers.print_handler import PrintHandler
 from c64basic_compiler.handlers.let_handler import LetHandler
 from c64basic_compiler.handlers.if_handler import IfHandler
@@ -71,3 +75,36 @@ class TestInstructionsRegistry:
 
         # Check error message
         assert "Unknown command 'UNKNOWN'" in str(excinfo.value)
+
+    def test_handler_table_indexed_by_command(self):
+        """Test that the dispatch table holds one shared handler per command"""
+        handler = get_handler(Command.PRINT)
+        assert isinstance(handler, PrintHandler)
+        assert handler_table[Command.PRINT] is handler
+        assert get_handler(Command.PRINT) is handler
+        assert isinstance(get_handler(Command.IF), IfHandler)
+        assert get_handler(Command.UNKNOWN) is None
+        assert get_handler(Command.WAIT) is None
+        assert len(handler_table) == max(Command) + 1
+
+    def test_handlers_are_stateless(self):
+        """Test that a shared handler keeps no data of the statements it handles"""
+        handler = get_handler(Command.PRINT)
+        first = Statement.from_dict({"command": "PRINT", "args": ["A"], "line": 10})
+        second = Statement.from_dict({"command": "PRINT", "args": ["B"], "line": 20})
+
+        context = CompileContext()
+
+        assert handler.generate(first, context)[0] == "LOAD A"
+        assert handler.generate(second, context)[0] == "LOAD B"
+        assert handler.instr is None
+
+    def test_bound_handler_matches_table(self):
+        """Test that pseudocode() of a bound handler matches generate()"""
+        instruction = {"command": "IF", "args": ["A", "THEN", "END"], "line": 10}
+        statement = Statement.from_dict(instruction)
+        context = CompileContext()
+
+        assert get_instruction_handler(
+            instruction, context
+        ).pseudocode() == get_handler(Command.IF).generate(statement, context)
@@ -0,0 +1,117 @@
+import pytest
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.instructions_registry import get_handler
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.statement import Command
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.pseudocode.codegen import generate_code, generate_ir
+from c64basic_compiler.pseudocode.instruction_set import INSTRUCTION_SET
+from c64basic_compiler.pseudocode.ir import CONST_INT, CONST_NAME, Code
+
+PROGRAM = """10 FOR I = 1 TO 10
+20 IF I > 5 THEN 60
+30 PRINT "I="; I * 2
+40 GOSUB 100
+50 NEXT I
+60 A = B +
+70 END
+100 RETURN
+"""
+
+
+def test_generate_ir_matches_text():
+    """Test that the IR renders to the same pseudocode as generate_code"""
+    ast = parse(scan(PROGRAM))
+
+    code = generate_ir(ast, CompileContext())
+
+    assert code.text() == generate_code(ast, CompileContext())
+    assert list(code) == code.text()
+
+
+def test_source_lines():
+    """Test that every instruction records the line it was generated for"""
+    code = generate_ir(parse(scan(PROGRAM)), CompileContext())
+    lines = dict(zip(code.text(), code.lines, strict=True))
+
+    assert lines["LABEL label_60"] == 60
+    assert lines["CALL label_100"] == 40
+    assert lines["RET"] == 100
+    assert set(code.lines) == {10, 20, 30, 40, 50, 60, 70, 100}
+
+
+def test_columns():
+    """Test that instructions are stored as opcodes and interned operands"""
+    code = Code()
+    code.line = 10
+    code.emit("PUSH_CONST", "5")
+    code.emit_text("STORE A")
+    code.emit("PUSH_CONST", "5")
+    code.emit("ADD")
+
+    assert code.opcodes.itemsize == 2
+    assert list(code.opcodes) == [
+        INSTRUCTION_SET[mnemonic].opcode
+        for mnemonic in ("PUSH_CONST", "STORE", "PUSH_CONST", "ADD")
+    ]
+    assert list(code.operands) == [0, 1, 0, -1]
+    assert code.constants == [5, "A"]
+    assert list(code.kinds) == [CONST_INT, CONST_NAME]
+    assert list(code.lines) == [10] * 4
+
+
+def test_extend_and_truncate():
+    """Test that appending a Code remaps its operands into the pool"""
+    code = Code.from_text(["STORE A", "LOAD B"])
+    code.extend(Code.from_text(["LOAD B", "LOAD C", "END"], line=20))
+
+    assert code.text() == ["STORE A", "LOAD B", "LOAD B", "LOAD C", "END"]
+    assert list(code.lines) == [-1, -1, 20, 20, 20]
+
+    code.truncate(2)
+    assert code.text() == ["STORE A", "LOAD B"]
+
+
+@pytest.mark.parametrize("text", ["FOO 1", "ADD 1"])
+def test_invalid_instructions(text):
+    """Test that unknown instructions and stray operands are rejected"""
+    with pytest.raises(ValueError):
+        Code.from_text([text])
+    with pytest.raises(ValueError):
+        Code().emit(*text.split())
+
+
+def test_handler_emit_and_generate():
+    """Test that emit-based handlers still generate text"""
+    statement = parse(scan("10 GOTO 20"))[0]
+    handler = get_handler(Command.GOTO)
+
+    code = Code()
+    handler.emit(statement, CompileContext(), code)
+
+    assert handler.generate(statement, CompileContext()) == ["JMP label_20"]
+    assert code.text() == ["JMP label_20"]
+
+
+def test_handlers_emit_without_text(monkeypatch):
+    """Test that handlers append instructions without rendering text"""
+
+    def fail(self, text):
+        raise AssertionError(f"text parsed: {text}")
+
+    monkeypatch.setattr(Code, "emit_text", fail)
+    monkeypatch.setattr(Code, "extend_text", fail)
+    source = (
+        '10 INPUT "N"; N: GET K$: GET K\n'
+        "20 FOR I = 1 TO N STEP 2: POKE 1024 + I, I AND 7\n"
+        '30 IF I THEN PRINT "I="; I, -2^2;\n'
+        "40 LET A = A + 1: IF A < 3 THEN 20\n"
+        "50 NEXT I: GOSUB 70: REM DONE\n"
+        "60 END\n"
+        "70 RETURN\n"
+    )
+
+    code = generate_ir(parse(scan(source)), CompileContext())
+
+    assert "POKE_MEMORY" in code.text()
+    assert "IF_END" in code.text()
@@ -0,0 +1,102 @@
+import pytest
+from c64basic_compiler.basic import FUNCTION_TABLE
+from c64basic_compiler.compiler.lexer import ExprToken, TokenKind, lex_expression
+from c64basic_compiler.evaluate import evaluate_expression
+from c64basic_compiler.exceptions import UnhandledTokenError
+
+
+class TestLexExpression:
+    def test_kinds_and_offsets(self):
+        """Test that every token carries its kind, offsets and function"""
+        tokens = lex_expression('SIN(X1) + "HI"')
+
+        assert tokens == [
+            ExprToken(TokenKind.KEYWORD, "SIN", 0, 3, FUNCTION_TABLE["SIN"]),
+            ExprToken(TokenKind.LPAREN, "(", 3, 4),
+            ExprToken(TokenKind.IDENTIFIER, "X1", 4, 6),
+            ExprToken(TokenKind.RPAREN, ")", 6, 7),
+            ExprToken(TokenKind.OPERATOR, "+", 8, 9, FUNCTION_TABLE["+"]),
+            ExprToken(TokenKind.STRING, '"HI"', 10, 14),
+        ]
+
+    def test_word_operators_resolve_functions(self):
+        """Test that word operators and keywords resolve case-insensitively"""
+        tokens = lex_expression("not sin(a)")
+
+        assert tokens[0].func is FUNCTION_TABLE["NOT"]
+        assert tokens[1].func is FUNCTION_TABLE["SIN"]
+
+    def test_multi_character_operators(self):
+        """Test that relational operators are kept as a single token"""
+        tokens = lex_expression("A<=B OR C<>D")
+
+        assert [t.text for t in tokens] == ["A", "<=", "B", "OR", "C", "<>", "D"]
+        assert tokens[3].kind == TokenKind.OPERATOR
+
+    def test_word_operators_are_uppercased(self):
+        """Test that AND/OR/NOT are normalized to uppercase"""
+        tokens = lex_expression("a and not b")
+
+        assert [t.text for t in tokens] == ["a", "AND", "NOT", "b"]
+
+    def test_negative_literal_after_operator(self):
+        """Test that a sign is merged into the literal where an operand is expected"""
+        tokens = lex_expression("A * - 1.5")
+
+        assert tokens[-1] == ExprToken(TokenKind.NUMBER, "-1.5", 4, 9)
+
+    @pytest.mark.parametrize("expr", ["-2^2", "A * -2 ^ 2"])
+    def test_sign_not_merged_into_power_base(self, expr):
+        """Test that a literal raised to a power keeps its sign apart"""
+        tokens = lex_expression(expr)
+
+        assert [t.text for t in tokens][-4:] == ["-", "2", "^", "2"]
+
+    @pytest.mark.parametrize("expr", ["X-1", "X - 1", "X1 -1", "(A) -1", "PI -1"])
+    def test_binary_minus_after_operand(self, expr):
+        """Test that a minus following an operand stays a subtraction"""
+        tokens = lex_expression(expr)
+
+        assert [t.text for t in tokens][-2:] == ["-", "1"]
+
+    def test_number_forms(self):
+        """Test decimal, leading-dot and exponent literals"""
+        tokens = lex_expression("3.14 .5 1E3 7.")
+
+        assert all(t.kind == TokenKind.NUMBER for t in tokens)
+        assert [t.text for t in tokens] == ["3.14", ".5", "1E3", "7."]
+
+    def test_string_preserves_spaces(self):
+        """Test that string literals keep their content untouched"""
+        tokens = lex_expression('"A  B:C" + A$')
+
+        assert tokens[0].text == '"A  B:C"'
+        assert tokens[2] == ExprToken(TokenKind.IDENTIFIER, "A$", 11, 13)
+
+    def test_variable_suffixes(self):
+        """Test that string ($) and integer (%) suffixes are part of names"""
+        tokens = lex_expression("A% + B1$")
+
+        assert tokens[0] == ExprToken(TokenKind.IDENTIFIER, "A%", 0, 2)
+        assert tokens[2] == ExprToken(TokenKind.IDENTIFIER, "B1$", 5, 8)
+
+    def test_unexpected_character(self):
+        """Test that characters which cannot start a token are reported"""
+        with pytest.raises(UnhandledTokenError):
+            lex_expression("A # B")
+
+
+class TestLexerIntegration:
+    def test_subtraction_of_literal(self):
+        """Test that subtracting a literal no longer swallows the operator"""
+        assert evaluate_expression("5 - 6") == ["PUSH_CONST -1"]
+        assert evaluate_expression("A - 6") == ["LOAD A", "PUSH_CONST 6", "SUB"]
+
+    def test_relational_operators(self):
+        """Test that two-character relational operators evaluate"""
+        assert evaluate_expression("A <> B")[-1] == "NOT_EQUAL"
+        assert evaluate_expression("A <= B")[-1] == "LESS_EQUAL"
+
+    def test_digits_in_string_literal(self):
+        """Test that digits inside strings are left untouched"""
+        assert evaluate_expression('VAL("123")')[0] == 'PUSH_CONST "123"'
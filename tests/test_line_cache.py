@@ -0,0 +1,87 @@
+import json
+
+from c64basic_compiler.common import line_cache
+from c64basic_compiler.common.line_cache import LineCache, line_hash
+
+
+class TestLineCache:
+    def test_round_trip(self, tmp_path):
+        """Test that saved entries are found by the next build"""
+        path = str(tmp_path / "prog.cache.json")
+        digest = line_hash("10 GOTO 20")
+        cache = LineCache(path)
+        cache.put_line(digest, 10, [20])
+        cache.put_code(digest, False, ["JMP label_20"])
+        cache.save()
+
+        cache = LineCache(path)
+        assert cache.get_line(digest) == (10, [20])
+        assert cache.get_code(digest, False) == ["JMP label_20"]
+        assert cache.get_code(digest, True) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_unused_entries_are_dropped(self, tmp_path):
+        """Test that only the entries used by the last build are saved"""
+        path = str(tmp_path / "prog.cache.json")
+        cache = LineCache(path)
+        cache.put_code(line_hash("10 END"), False, ["END"])
+        cache.put_code(line_hash("10 STOP"), False, ["STOP"])
+        cache.save()
+
+        cache = LineCache(path)
+        cache.get_code(line_hash("10 END"), False)
+        cache.save()
+
+        assert LineCache(path).stats()["code"] == 1
+
+    def test_other_version_is_ignored(self, tmp_path, monkeypatch):
+        """Test that a cache written by another compiler version is not used"""
+        path = str(tmp_path / "prog.cache.json")
+        cache = LineCache(path)
+        cache.put_code(line_hash("10 END"), False, ["END"])
+        cache.save()
+
+        monkeypatch.setattr(line_cache, "compiler_version", lambda: "0.0.0")
+        assert LineCache(path).get_code(line_hash("10 END"), False) is None
+
+    def test_source_change_invalidates_cache(self, tmp_path, monkeypatch):
+        """Test that editing a compiler source changes the cache key"""
+        root = tmp_path / "compiler"
+        (root / "handlers").mkdir(parents=True)
+        source = root / "handlers" / "print_handler.py"
+        source.write_text("CODE = 'PRINT'\n")
+        (root / "notes.txt").write_text("not a source")
+        fingerprint = line_cache.source_fingerprint(str(root))
+
+        (root / "notes.txt").write_text("still not a source")
+        assert line_cache.source_fingerprint(str(root)) == fingerprint
+
+        source.write_text("CODE = 'PRINT_NUM'\n")
+        changed = line_cache.source_fingerprint(str(root))
+        assert changed != fingerprint
+
+        path = str(tmp_path / "prog.cache.json")
+        monkeypatch.setattr(line_cache, "compiler_version", lambda: fingerprint)
+        cache = LineCache(path)
+        cache.put_code(line_hash("10 END"), False, ["END"])
+        cache.save()
+        monkeypatch.setattr(line_cache, "compiler_version", lambda: changed)
+        assert LineCache(path).get_code(line_hash("10 END"), False) is None
+
+    def test_corrupt_file_is_a_cold_cache(self, tmp_path):
+        """Test that an unreadable cache file is ignored"""
+        path = tmp_path / "prog.cache.json"
+        path.write_text("{not json")
+
+        assert LineCache(str(path)).stats()["code"] == 0
+
+    def test_save_is_compact_json(self, tmp_path):
+        """Test the layout of the cache file"""
+        path = tmp_path / "prog.cache.json"
+        cache = LineCache(str(path))
+        cache.put_line("ab", 10, [])
+        cache.save()
+
+        data = json.loads(path.read_text())
+        assert data["format"] == line_cache.CACHE_FORMAT
+        assert data["lines"] == {"ab": [10, []]}
@@ -1,5 +1,10 @@
 import pytest
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.lexer import TokenKind
 from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.statement import Command
+from c64basic_compiler.compiler.tokenizer import scan, tokenize
+from c64basic_compiler.pseudocode.codegen import generate_code
 from c64basic_compiler.common.basic_tokens import SUPPORTED_COMMANDS
 
 
@@ -12,9 +17,9 @@ class TestParser:
 
         # Check AST structure
         assert len(ast) == 1
-        assert ast[0]["line"] == 10
-        assert ast[0]["command"] == "PRINT"
-        assert ast[0]["args"] == ["HELLO"]
+        assert ast[0].line == 10
+        assert ast[0].command == Command.PRINT
+        assert ast[0].args == ("HELLO",)
 
     def test_parse_multiple_statements(self):
         """Test parsing multiple BASIC statements"""
@@ -24,11 +29,11 @@ class TestParser:
 
         # Check AST structure
         assert len(ast) == 2
-        assert ast[0]["line"] == 10
-        assert ast[0]["command"] == "PRINT"
-        assert ast[1]["line"] == 20
-        assert ast[1]["command"] == "GOTO"
-        assert ast[1]["args"] == ["10"]
+        assert ast[0].line == 10
+        assert ast[0].command == Command.PRINT
+        assert ast[1].line == 20
+        assert ast[1].command == Command.GOTO
+        assert ast[1].args == ("10",)
 
     def test_parse_negative_numbers(self):
         """Test parsing statements with negative numbers"""
@@ -37,7 +42,16 @@ class TestParser:
         ast = parse(tokens)
 
         # Check numbers are properly combined
-        assert ast[0]["args"] == ["A", "=", "-5"]
+        assert ast[0].args == ("A", "=", "-5")
+
+    def test_parse_binary_minus(self):
+        """Test that a minus after an operand stays a subtraction"""
+        ast = parse(tokenize("10 X=Y-1\n20 PRINT (A)-2,-3"))
+
+        assert ast[0].args == ("X", "=", "Y", "-", "1")
+        assert ast[1].args == ("(", "A", ")", "-", "2", ",", "-3")
+        code = generate_code(ast, CompileContext())
+        assert "SUB" in code
 
     def test_parse_implicit_let(self):
         """Test parsing implicit LET statements"""
@@ -46,8 +60,8 @@ class TestParser:
         ast = parse(tokens)
 
         # Check command is converted to LET
-        assert ast[0]["command"] == "LET"
-        assert ast[0]["args"] == ["X", "=", "10"]
+        assert ast[0].command == Command.LET
+        assert ast[0].args == ("X", "=", "10")
 
     def test_parse_if_then(self):
         """Test parsing IF statements"""
@@ -56,9 +70,9 @@ class TestParser:
         ast = parse(tokens)
 
         # IF statements should preserve their structure
-        assert ast[0]["command"] == "IF"
-        assert "THEN" in ast[0]["args"]
-        assert "PRINT" in ast[0]["args"]
+        assert ast[0].command == Command.IF
+        assert "THEN" in ast[0].args
+        assert "PRINT" in ast[0].args
 
     def test_parse_empty_line(self):
         """Test parsing empty line"""
@@ -68,3 +82,42 @@ class TestParser:
 
         # Empty lines should be skipped
         assert len(ast) == 0
+
+    def test_parse_token_stream_keeps_tokens(self):
+        """Test that statements from scan() carry their tokens, parallel to args"""
+        ast = parse(scan("10 POKE V + 17, X AND 7\n20 A = -1"))
+
+        assert ast[0].args == ("V", "+", "17", ",", "X", "AND", "7")
+        assert tuple(t.text for t in ast[0].tokens) == ast[0].args
+        assert ast[0].tokens[5].kind == TokenKind.OPERATOR
+        assert ast[1].command == Command.LET
+        assert ast[1].tokens[2].kind == TokenKind.NUMBER
+
+    def test_parse_string_tokens_are_classified(self):
+        """Test that plain string tokens get classified tokens too"""
+        ast = parse([(30, ["LET", "A", "=", "-", "5"])])
+
+        assert [t.kind for t in ast[0].tokens] == [
+            TokenKind.IDENTIFIER,
+            TokenKind.OPERATOR,
+            TokenKind.NUMBER,
+        ]
+
+    def test_handlers_do_not_lex_again(self, monkeypatch):
+        """Test that expressions from a scanned listing are not lexed again"""
+        import c64basic_compiler.evaluate as evaluate
+
+        def fail(expr):
+            raise AssertionError(f"expression lexed again: {expr}")
+
+        monkeypatch.setattr(evaluate, "lex_expression", fail)
+        source = (
+            '10 FOR I = 1 TO N STEP 2: POKE 1024 + I, I AND 7\n'
+            '20 IF I<=3 THEN PRINT "I=";I*2\n'
+            "30 NEXT I"
+        )
+
+        code = generate_code(parse(scan(source)), CompileContext())
+
+        assert "POKE_MEMORY" in code
+        assert "LESS_EQUAL" in code
@@ -0,0 +1,122 @@
+import pytest
+from c64basic_compiler.basic import FUNCTION_TABLE
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.pseudocode.codegen import generate_code
+from c64basic_compiler.pseudocode.instruction_set import INSTRUCTION_SET, OPCODES
+from c64basic_compiler.pseudocode.pco import (
+    CONST_FLOAT,
+    CONST_INT,
+    CONST_NAME,
+    CONST_STRING,
+    assemble,
+    disassemble,
+    load,
+    read_pco,
+    write_pco,
+)
+
+PROGRAM = """10 FOR I = 1 TO 10 STEP 0.5
+20 IF I > 5 THEN 60
+30 PRINT "I="; I * 2, -I
+40 GOSUB 100
+50 NEXT I
+60 INPUT "NAME"; N$
+70 GET K$
+80 POKE 53280, PEEK(53281) AND 15
+90 END
+100 REM
+110 RETURN
+"""
+
+
+def test_registry_covers_emitted_mnemonics():
+    """Test that functions, operators and handlers all have an opcode"""
+    code = generate_code(parse(scan(PROGRAM)), CompileContext())
+
+    for function in FUNCTION_TABLE.values():
+        assert function.mnemonic in INSTRUCTION_SET
+    for line in code:
+        assert line.partition(" ")[0] in INSTRUCTION_SET
+    assert len(OPCODES) == len(INSTRUCTION_SET)
+
+
+def test_round_trip():
+    """Test that disassembling gives back the assembled pseudocode"""
+    code = generate_code(parse(scan(PROGRAM)), CompileContext())
+
+    assert list(disassemble(load(assemble(code)))) == code
+
+
+def test_typed_constants():
+    """Test that operands are typed only when their text round-trips"""
+    code = [
+        "PUSH_CONST 5",
+        "PUSH_CONST -0.5",
+        'PUSH_CONST "HI THERE"',
+        "LOAD A$",
+        "PUSH_CONST 5",
+        "PUSH_CONST 007",
+        "PUSH_CONST -0.0",
+        "NEXT",
+        "REM ",
+    ]
+    program = load(assemble(code))
+
+    assert list(program.opcodes[:2]) == [INSTRUCTION_SET["PUSH_CONST"].opcode] * 2
+    assert list(program.operands) == [0, 1, 2, 3, 0, 4, 5, -1, 6]
+    assert program.constants == [5, -0.5, "HI THERE", "A$", "007", -0.0, ""]
+    assert list(program.kinds) == [
+        CONST_INT,
+        CONST_FLOAT,
+        CONST_STRING,
+        CONST_NAME,
+        CONST_NAME,
+        CONST_FLOAT,
+        CONST_NAME,
+    ]
+    assert list(disassemble(program)) == code
+
+
+def test_open_string_literal():
+    """Test that an unterminated string literal is read back closed"""
+    program = load(assemble(['PUSH_CONST "AB', 'PUSH_CONST "AB"', 'PUSH_CONST "']))
+
+    assert list(program.operands) == [0, 0, 1]
+    assert program.constants == ["AB", ""]
+    assert list(program.kinds) == [CONST_STRING, CONST_STRING]
+    assert list(disassemble(program)) == ['PUSH_CONST "AB"'] * 2 + ['PUSH_CONST ""']
+
+
+def test_write_and_read(tmp_path):
+    """Test that .pco files are several times smaller than text"""
+    code = generate_code(parse(scan(PROGRAM)), CompileContext()) * 50
+    path = str(tmp_path / "prog.pco")
+
+    assert write_pco(path, code) == len(code)
+    assert list(disassemble(read_pco(path))) == code
+    assert len("\n".join(code)) / (tmp_path / "prog.pco").stat().st_size > 5
+
+
+@pytest.mark.parametrize(
+    "code, message",
+    [
+        (["FOO 1"], "Unknown instruction 'FOO'"),
+        (["ADD 1"], "takes no operand"),
+    ],
+)
+def test_assemble_errors(code, message):
+    """Test that unknown instructions and stray operands are rejected"""
+    with pytest.raises(ValueError, match=message):
+        assemble(code)
+
+
+def test_load_errors():
+    """Test that other files and truncated files are rejected"""
+    data = assemble(["PUSH_CONST 1", "PRINT_VALUE"])
+
+    with pytest.raises(ValueError, match="Not a .pco file"):
+        load(b"10 PRINT 1\n" + data)
+    with pytest.raises(ValueError, match="Corrupt"):
+        load(data[:-2])
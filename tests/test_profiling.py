@@ -0,0 +1,85 @@
+from c64basic_compiler.build import compile_file
+from c64basic_compiler.utils import tracing
+from c64basic_compiler.utils.profiling import ProfileSink
+
+PROGRAM = """10 A = 1
+20 PRINT "A IS "; A * 2 + SQR(ABS(A)), "DONE"
+30 WAIT 1
+40 END
+"""
+
+
+def test_sink_adds_up_events():
+    """Test that stages, handlers and lines are added up"""
+    sink = ProfileSink()
+    sink({"stage": "scan", "duration": 0.5, "allocated": 100, "peak": 300})
+    sink({"stage": "scan", "duration": 0.25, "allocated": 50, "peak": 200})
+    sink(
+        {
+            "stage": "handler",
+            "line": 10,
+            "command": "PRINT",
+            "handler": "P",
+            "duration": 0.1,
+        }
+    )
+    sink(
+        {
+            "stage": "handler",
+            "line": 10,
+            "command": "LET",
+            "handler": "L",
+            "duration": 0.3,
+        }
+    )
+    sink(
+        {
+            "stage": "handler",
+            "line": 20,
+            "command": "WAIT",
+            "handler": None,
+            "duration": 0.2,
+        }
+    )
+    sink({"stage": "report", "lines": 2})
+
+    assert sink.stages == {"scan": {"duration": 0.75, "allocated": 150, "peak": 300}}
+    assert sink.handlers == {
+        "P": [1, 0.1],
+        "L": [1, 0.3],
+        "(no handler: WAIT)": [1, 0.2],
+    }
+    assert sink.top_lines(1) == [(10, 0.4, ["PRINT", "LET"])]
+
+
+def test_profile_build(tmp_path):
+    """Test that a profiled build reports every stage and statement"""
+    source = tmp_path / "prog.bas"
+    source.write_text(PROGRAM)
+    sink = ProfileSink()
+    tracing.add_sink(sink)
+    try:
+        compile_file(str(source), str(tmp_path / "prog.prg"))
+    finally:
+        tracing.disable()
+
+    assert list(sink.stages) == [
+        "read",
+        "scan",
+        "parse",
+        "codegen",
+        "write",
+        "native",
+    ]
+    assert set(sink.handlers) == {
+        "LetHandler",
+        "PrintHandler",
+        "EndHandler",
+        "(no handler: WAIT)",
+    }
+    assert sorted(sink.lines) == [10, 20, 30, 40]
+
+    report = sink.report(top=2, source={20: "PRINT ..."})
+    assert "codegen" in report
+    assert "Top 2 lines:" in report
+    assert len(report.split("Top 2 lines:")[1].strip().splitlines()) == 2
@@ -0,0 +1,132 @@
+import base64
+import http.client
+import json
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.codegen import generate_binary
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.pseudocode.codegen import generate_code, generate_ir
+from c64basic_compiler.server import CompileServer, make_server
+
+PROGRAM = '10 PRINT "HELLO"\n20 A = A + 1\n30 IF A < 10 THEN 10\n40 END\n'
+
+
+def _serve(**kwargs):
+    compile_server = CompileServer()
+    server = make_server(compile_server, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def url():
+    server = _serve(port=0)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _post(url, body, content_type="text/plain"):
+    request = urllib.request.Request(
+        url, data=body.encode(), headers={"Content-Type": content_type}
+    )
+    with urllib.request.urlopen(request) as response:
+        return response.read().decode()
+
+
+class TestCompileServer:
+    def test_compile(self, url):
+        """Test that the server returns the pseudocode of a build"""
+        result = json.loads(_post(f"{url}/compile", PROGRAM))
+
+        assert result["pseudocode"] == generate_code(
+            parse(scan(PROGRAM)), CompileContext()
+        )
+        assert result["lines"] == 4
+
+    def test_compile_json_and_text(self, url):
+        """Test JSON requests and plain text responses"""
+        body = json.dumps({"source": PROGRAM})
+        text = _post(f"{url}/compile?format=text", body, "application/json")
+
+        assert text.splitlines()[0] == "LABEL label_10"
+
+    def test_compile_prg(self, url):
+        """Test that the server returns the .prg file of a build"""
+        prg = b"\x01\x08" + generate_binary(
+            generate_ir(parse(scan(PROGRAM)), CompileContext())
+        )
+        result = json.loads(_post(f"{url}/compile", PROGRAM))
+        request = urllib.request.Request(f"{url}/compile?format=prg", PROGRAM.encode())
+        with urllib.request.urlopen(request) as response:
+            body = response.read()
+
+        assert base64.b64decode(result["prg"]) == prg
+        assert result["prg_error"] is None
+        assert body == prg
+
+    def test_compile_without_prg(self, url):
+        """Test programs the backend cannot compile"""
+        result = json.loads(_post(f"{url}/compile", "10 WAIT 1\n"))
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            _post(f"{url}/compile?format=prg", "10 WAIT 1\n")
+
+        assert result["pseudocode"]
+        assert result["prg"] is None
+        assert result["prg_error"]
+        assert excinfo.value.code == 422
+
+    def test_caches_stay_warm(self, url):
+        """Test that a second request reuses lines and updates the statistics"""
+        _post(f"{url}/compile", PROGRAM)
+        result = json.loads(_post(f"{url}/compile", PROGRAM))
+        with urllib.request.urlopen(f"{url}/stats") as response:
+            stats = json.loads(response.read())
+
+        assert result["reused_lines"] == 4
+        assert stats["requests"] == 2
+        assert stats["reused_lines"] == 4
+        assert stats["line_cache"]["hits"] == 4
+        assert stats["latency_ms"]["count"] == 2
+
+    def test_bad_request(self, url):
+        """Test that source without line numbers is rejected"""
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            _post(f"{url}/compile", 'PRINT "NO LINE NUMBER"')
+
+        assert excinfo.value.code == 400
+
+    def test_unix_socket(self, tmp_path):
+        """Test serving on a Unix socket"""
+        path = str(tmp_path / "compile.sock")
+        server = _serve(socket_path=path)
+        try:
+            connection = http.client.HTTPConnection("localhost")
+            connection.sock = socket.socket(socket.AF_UNIX)
+            connection.sock.connect(path)
+            connection.request("POST", "/compile", PROGRAM)
+            result = json.loads(connection.getresponse().read())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert result["lines"] == 4
+
+
+def test_worker_processes():
+    """Test compiling in worker processes"""
+    compile_server = CompileServer(jobs=2)
+    try:
+        first = compile_server.compile(PROGRAM)
+        compile_server.compile(PROGRAM)
+    finally:
+        compile_server.close()
+
+    assert first["pseudocode"] == generate_code(parse(scan(PROGRAM)), CompileContext())
+    assert compile_server.stats()["requests"] == 2
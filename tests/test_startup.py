@@ -0,0 +1,56 @@
+import subprocess
+import sys
+
+from c64basic_compiler.basic import FUNCTION_CLASSES, FUNCTION_TABLE, BasicFunction
+
+
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+def _modules_after(code):
+    """Modules loaded by a fresh interpreter after running code"""
+    result = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint(*sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def test_function_registry_is_complete():
+    """Test that every BasicFunction subclass is in the static registry"""
+    assert set(_subclasses(BasicFunction)) == set(FUNCTION_CLASSES)
+    assert len(FUNCTION_TABLE) == len(FUNCTION_CLASSES)
+
+
+def test_build_imports_no_handlers():
+    """Test that the build CLI starts without handlers or process pools"""
+    modules = _modules_after("import c64basic_compiler.build")
+
+    handlers = {m for m in modules if m.startswith("c64basic_compiler.handlers.")}
+
+    assert handlers == {"c64basic_compiler.handlers.instruction_handler"}
+    assert "concurrent.futures.process" not in modules
+    assert "importlib.metadata" not in modules
+    assert "tracemalloc" not in modules
+    assert "cProfile" not in modules
+
+
+def test_handlers_loaded_by_command():
+    """Test that compiling a program only loads the handlers it uses"""
+    modules = _modules_after(
+        "from c64basic_compiler.common.compile_context import CompileContext\n"
+        "from c64basic_compiler.compiler.parser import parse\n"
+        "from c64basic_compiler.compiler.tokenizer import scan\n"
+        "from c64basic_compiler.pseudocode.codegen import generate_code\n"
+        "generate_code(parse(scan('10 GOTO 20\\n20 END')), CompileContext())"
+    )
+
+    assert "c64basic_compiler.handlers.goto_handler" in modules
+    assert "c64basic_compiler.handlers.end_handler" in modules
+    assert "c64basic_compiler.handlers.print_handler" not in modules
+    assert "c64basic_compiler.evaluate" not in modules
@@ -0,0 +1,55 @@
+import pytest
+from c64basic_compiler.common import basic_tokens
+from c64basic_compiler.compiler.lexer import TokenKind
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.statement import Command, Statement
+from c64basic_compiler.compiler.tokenizer import scan
+
+
+class TestCommand:
+    def test_values_are_token_bytes(self):
+        """Test that commands are valued by their C64 token"""
+        assert Command.PRINT == basic_tokens.PRINT
+        assert Command.INPUT_HASH == basic_tokens.INPUT_HASH
+
+    @pytest.mark.parametrize(
+        "word,expected",
+        [("print", Command.PRINT), ("PRINT#", Command.PRINT_HASH), ("X", None)],
+    )
+    def test_lookup(self, word, expected):
+        """Test keyword lookup, unknown words map to UNKNOWN"""
+        assert Command.lookup(word) == (expected or Command.UNKNOWN)
+
+
+class TestStatement:
+    def test_slots(self):
+        """Test that statements have no per-instance dictionary"""
+        statement = Statement(10, Command.END, "END", ())
+
+        assert not hasattr(statement, "__dict__")
+
+    def test_tokens_from_stream(self):
+        """Test that tokens are read from the stream, parallel to args"""
+        statement = parse(scan("10 PRINT A;B$"))[0]
+
+        assert statement.args == ("A", ";", "B$")
+        assert [t.kind for t in statement.tokens] == [
+            TokenKind.IDENTIFIER,
+            TokenKind.SEMICOLON,
+            TokenKind.IDENTIFIER,
+        ]
+        assert statement.tokens[2].start == 11
+
+    def test_args_are_interned(self):
+        """Test that equal args share a single string"""
+        first, second = parse(scan("10 COUNTER = 1\n20 COUNTER = 2"))
+
+        assert first.args[0] is second.args[0]
+
+    def test_from_dict(self):
+        """Test building a statement from a plain dictionary"""
+        statement = Statement.from_dict({"line": 5, "command": "goto", "args": ["10"]})
+
+        assert statement.command == Command.GOTO
+        assert statement.name == "GOTO"
+        assert statement.tokens[0].kind == TokenKind.NUMBER
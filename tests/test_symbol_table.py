@@ -20,6 +20,15 @@ class TestSymbolTable:
             # Debería fallar para una variable inexistente
             self.symbol_table.get_address("NONEXISTENT")
 
+    def test_register_sizes(self):
+        """Test that variables get the storage of the type of their name"""
+        assert self.symbol_table.register("A") == 0xC000
+        assert self.symbol_table.register("B%") == 0xC005
+        assert self.symbol_table.register("C$") == 0xC007
+        assert self.symbol_table.register("D", 2, "integer") == 0xC107
+        assert self.symbol_table.get_type("B%") == "integer"
+        assert self.symbol_table.offset == 0x109
+
     def test_str_representation(self):
         """Test string representation"""
         # Solo verificamos que la representación de cadena funciona
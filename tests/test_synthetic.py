@@ -0,0 +1,62 @@
+import pytest
+from c64basic_compiler.build import compile_source
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.statement import Command
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.pseudocode.codegen import extract_jump_targets
+from c64basic_compiler.synthetic import MAX_LINE_NUMBER, generate_program
+
+
+def test_seeded():
+    """Test that a seed always gives the same program"""
+    first = list(generate_program(200, seed=7))
+
+    assert list(generate_program(200, seed=7)) == first
+    assert list(generate_program(200, seed=8)) != first
+    assert len(first) == 200
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_programs_compile(seed):
+    """Test that generated programs compile without errors"""
+    source = "\n".join(
+        generate_program(
+            300, seed=seed, expression_depth=5, loop_nesting=3, jump_density=0.3
+        )
+    )
+
+    code, _ = compile_source(source, CompileContext())
+
+    assert not [line for line in code if line.startswith("#")]
+
+
+def test_structure():
+    """Test line numbers, jump targets and loop nesting"""
+    ast = parse(scan("\n".join(generate_program(2000, seed=1, loop_nesting=2))))
+    lines = [instr.line for instr in ast]
+
+    assert lines == sorted(set(lines))
+    assert lines[-1] <= MAX_LINE_NUMBER
+    assert extract_jump_targets(ast) <= set(lines)
+
+    depth = deepest = 0
+    for instr in ast:
+        if instr.command == Command.FOR:
+            depth += 1
+        elif instr.command == Command.NEXT:
+            depth -= 1
+        deepest = max(deepest, depth)
+        assert depth >= 0
+    assert depth == 0
+    assert deepest == 2
+
+    commands = {instr.command for instr in ast}
+    for command in ("LET", "PRINT", "IF", "GOTO", "GOSUB", "POKE", "INPUT", "GET"):
+        assert Command[command] in commands
+
+
+def test_too_short():
+    """Test that programs too short for their structure are rejected"""
+    with pytest.raises(ValueError):
+        generate_program(3)
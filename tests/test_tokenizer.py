@@ -1,5 +1,6 @@
 import pytest
-from c64basic_compiler.compiler.tokenizer import tokenize, tokenize_line
+from c64basic_compiler.compiler.lexer import ExprToken, TokenKind
+from c64basic_compiler.compiler.tokenizer import scan, tokenize, tokenize_line
 
 
 class TestTokenizer:
@@ -79,3 +80,61 @@ class TestTokenizer:
 
         # Should handle negative numbers according to the implementation
         assert result == ["LET", "X", "=", "-10"]
+
+
+class TestScan:
+    def test_columnar_storage(self):
+        """Test that scan stores kinds and offsets in compact arrays"""
+        source = '10 PRINT "HI";A\n20 GOTO 10\n'
+
+        stream = scan(source)
+
+        assert stream.kinds.typecode == "B"
+        assert stream.starts.typecode == "I"
+        assert list(stream.lines) == [10, 20]
+        assert len(stream) == 2
+        assert [stream.text(i) for i in stream.token_range(0)] == [
+            "PRINT",
+            '"HI"',
+            ";",
+            "A",
+        ]
+        assert stream.kinds[1] == TokenKind.STRING
+        assert stream.token(1) == ExprToken(TokenKind.STRING, '"HI"', 9, 13)
+
+    def test_statements_per_line(self):
+        """Test that ':' splits statements sharing the same line number"""
+        stream = scan("10 A=1:B=2: PRINT A\n")
+
+        assert list(stream.lines) == [10, 10, 10]
+        assert stream.statement(2) == (10, ["PRINT", "A"])
+
+    def test_relational_operators(self):
+        """Test that two-character operators are single tokens"""
+        stream = scan("10 IF A<=B THEN 20\n")
+
+        assert stream.statement(0)[1] == ["IF", "A", "<=", "B", "THEN", "20"]
+
+    def test_sign_only_where_operand_expected(self):
+        """Test that subtraction and negative literals are told apart"""
+        stream = scan("10 X=Y-1\n20 FOR I=10 TO 1 STEP -1\n")
+
+        assert stream.statement(0)[1] == ["X", "=", "Y", "-", "1"]
+        assert stream.statement(1)[1][-1] == "-1"
+
+    def test_sign_not_merged_into_power_base(self):
+        """Test that -2^2 is read as -(2^2), as on the C64"""
+        stream = scan("10 PRINT -2^2, -22 ^ 2, 2^-2\n")
+
+        assert " ".join(stream.statement(0)[1]) == "PRINT - 2 ^ 2 , - 22 ^ 2 , 2 ^ -2"
+
+    def test_blank_lines_and_unterminated_string(self):
+        """Test blank lines are skipped and open strings stop at the line end"""
+        stream = scan('\n10 PRINT "OPEN\n\n20 END')
+
+        assert list(stream) == [(10, ["PRINT", '"OPEN']), (20, ["END"])]
+
+    def test_missing_line_number(self):
+        """Test that lines without a line number are rejected"""
+        with pytest.raises(ValueError):
+            scan('PRINT "HELLO"\n')
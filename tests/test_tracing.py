@@ -0,0 +1,97 @@
+import json
+import tracemalloc
+
+import pytest
+from c64basic_compiler.common.compile_context import CompileContext
+from c64basic_compiler.compiler.parser import parse
+from c64basic_compiler.compiler.tokenizer import scan
+from c64basic_compiler.pseudocode.codegen import generate_code
+from c64basic_compiler.utils import tracing
+
+
+@pytest.fixture
+def events():
+    """Collect trace events in a list while the test runs"""
+    collected = []
+    tracing.add_sink(collected.append)
+    yield collected
+    tracing.disable()
+
+
+def test_disabled_by_default():
+    """Test that nothing is recorded without a sink"""
+    assert tracing.enabled is False
+    tracing.emit("scan", tokens=1)
+
+    with tracing.span("parse") as event:
+        event["statements"] = 0
+    assert "duration" not in event
+
+
+def test_emit(events):
+    """Test that events carry their stage and fields"""
+    tracing.emit("handler", line=10, handler="PrintHandler")
+
+    assert events == [{"stage": "handler", "line": 10, "handler": "PrintHandler"}]
+
+
+def test_span_duration(events):
+    """Test that spans record their duration and the fields added by the block"""
+    with tracing.span("scan") as event:
+        event["tokens"] = 3
+
+    assert events[0]["stage"] == "scan"
+    assert events[0]["tokens"] == 3
+    assert events[0]["duration"] >= 0
+
+
+def test_span_memory(events):
+    """Test that spans record memory while tracemalloc is tracing"""
+    tracemalloc.start()
+    try:
+        with tracing.span("parse"):
+            kept = [str(i) for i in range(1000)]
+            temporary = [str(i) for i in range(1000)]
+            del temporary
+    finally:
+        tracemalloc.stop()
+
+    assert events[0]["allocated"] > 0
+    assert events[0]["peak"] > events[0]["allocated"]
+    assert len(kept) == 1000
+
+
+def test_remove_last_sink_disables(events):
+    """Test that tracing turns off when the last sink is removed"""
+    tracing.remove_sink(events.append)
+
+    assert tracing.enabled is False
+
+
+def test_json_lines_sink(tmp_path):
+    """Test that the file sink writes one JSON object per event"""
+    path = tmp_path / "build.trace.jsonl"
+    tracing.add_sink(tracing.JsonLinesSink(str(path)))
+    tracing.emit("read", file="a.bas")
+    tracing.emit("handler", line=10, handler=None)
+    tracing.disable()
+
+    lines = path.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"stage": "read", "file": "a.bas"},
+        {"stage": "handler", "line": 10, "handler": None},
+    ]
+
+
+def test_generate_code_handler_events(events):
+    """Test that code generation emits one event per statement"""
+    ast = parse(scan('10 PRINT "HI"\n20 WAIT 1\n30 END'))
+    generate_code(ast, CompileContext())
+
+    handlers = [e for e in events if e["stage"] == "handler"]
+    assert [(e["line"], e["command"], e["handler"]) for e in handlers] == [
+        (10, "PRINT", "PrintHandler"),
+        (20, "WAIT", None),
+        (30, "END", "EndHandler"),
+    ]
+    assert all(e["duration"] >= 0 for e in handlers)